@@ -0,0 +1,306 @@
+# Kegg/actualizacion_incremental_kegg.py
+
+'''
+Actualización incremental de los datos de KEGG de un organismo.
+
+En lugar de volver a descargar todas las entradas y todos los KGML en cada
+actualización, este script decide qué ha cambiado a partir de:
+1. La versión publicada por KEGG (`info/<organismo>`, línea "Release ..."). Si coincide
+   con la de la última actualización, no hay nada que hacer (una sola petición).
+2. Una "huella" por elemento calculada sobre los listados masivos de KEGG (3 peticiones):
+   - Entradas: la línea de cada gen en `list/<organismo>` (tipo, posición, descripción)
+     y las rutas a las que pertenece según `link/pathway/<organismo>` (la entrada en texto
+     plano incluye sus rutas, así que cambia si el gen entra o sale de alguna).
+   - Rutas: el nombre de la ruta (`list/pathway/<organismo>`) y su conjunto de genes
+     (`link/pathway/<organismo>`, `Kegg.mapeos_kegg`).
+   Solo se descargan los elementos nuevos o cuya huella ha cambiado.
+3. El hash del contenido descargado: las entradas y rutas cuyo contenido no ha cambiado
+   respecto al guardado no se vuelven a procesar ni a subir.
+
+Las entradas cambiadas se vuelven a parsear con `parser_kegg.parsear_entrada_kegg`
+y, junto con las rutas cambiadas (cuyos archivos se actualizan en la carpeta de
+`descargas_definiciones_rutas_kegg_kgml`), se suben a MongoDB con upsert por su clave
+(`entry` en `kegg_rutas`, `_id` en `kegg_rutas_graficas`). Los elementos que ya no
+aparecen en KEGG se eliminan.
+
+Las rutas para las que KEGG no tiene KGML (404) se anotan en el estado como "sin KGML"
+con su huella: no cuentan como fallo y no se vuelven a pedir mientras la huella no cambie.
+
+El estado (versión de KEGG, huellas y hashes) se guarda de forma atómica en
+`<carpeta>/estado.manifiesto`. Si algún elemento falla, la versión no se actualiza y la
+siguiente ejecución vuelve a revisar los listados y reintenta solo lo pendiente.
+
+Uso (desde la carpeta `Descarga_datos`):
+    python -m Kegg.actualizacion_incremental_kegg [--subir] [--forzar]
+
+Con `--subir` se usan las variables de entorno MONGO_URI y DB_NAME (archivo `.env`).
+'''
+
+import os
+import re
+import json
+import asyncio
+import hashlib
+import argparse
+from dotenv import load_dotenv
+from pymongo import MongoClient
+from comun.manifiesto import escribir_json_atomico
+from comun.registros import escribir_registros
+from comun.carga_mongo import cargar_registros
+from comun.versiones_dataset import registrar_version
+from Kegg.descargas_datos_kegg import crear_cliente_kegg, descargar_lote_kegg
+from Kegg.descargas_definiciones_rutas_kegg_kgml import (
+    get_organism_pathway_metadata, descargar_datos_ruta, CAMPO_SIN_KGML
+)
+from Kegg.mapeos_kegg import obtener_genes_por_ruta
+from Kegg import descargas_definiciones_rutas_kegg_kgml
+from Kegg.parser_kegg import parsear_entrada_kegg
+from Kegg.kgml_comprimido import comprimir_documento_ruta
+
+CARPETA_INCREMENTAL = "descargas_kegg_incremental"
+NOMBRE_ESTADO = "estado.manifiesto"
+COLECCION_ENTRADAS = "kegg_rutas"
+COLECCION_RUTAS = "kegg_rutas_graficas"
+
+
+def huella(valor):
+    """SHA-256 de un valor serializado de forma estable."""
+    if not isinstance(valor, str):
+        valor = json.dumps(valor, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(valor.encode("utf-8")).hexdigest()
+
+
+def cargar_estado(carpeta, organismo):
+    ruta = os.path.join(carpeta, NOMBRE_ESTADO)
+    try:
+        with open(ruta, "r", encoding="utf-8") as f:
+            estado = json.load(f)
+        if estado.get("organismo") == organismo:
+            return estado
+        print(f"El estado de {ruta} es de otro organismo; se parte de cero.")
+    except FileNotFoundError:
+        pass
+    except (OSError, ValueError) as e:
+        print(f"Estado ilegible en {ruta} ({e}); se parte de cero.")
+    return {"organismo": organismo, "release": None, "entradas": {}, "rutas": {}}
+
+
+def guardar_estado(carpeta, estado):
+    escribir_json_atomico(os.path.join(carpeta, NOMBRE_ESTADO), estado, indent=2, ensure_ascii=False)
+
+
+async def obtener_release_kegg(cliente, organismo):
+    """Devuelve la versión de KEGG (p. ej. "112.0+/10-24, Oct 24") para el organismo, o None."""
+    response = await cliente.get(f"info/{organismo}")
+    if response.status_code != 200:
+        print(f"No se pudo obtener info/{organismo}: HTTP {response.status_code}")
+        return None
+    match = re.search(r"Release\s+(.+)", response.text)
+    return match.group(1).strip() if match else None
+
+
+async def obtener_huellas_entradas(cliente, organismo, rutas_por_gen=None):
+    """
+    Huella de cada gen a partir de su línea en `list/<organismo>` y de sus rutas
+    (`rutas_por_gen`, {gen: [rutas]}).
+    """
+    rutas_por_gen = rutas_por_gen or {}
+    response = await cliente.get(f"list/{organismo}")
+    response.raise_for_status()
+    huellas = {}
+    for linea in response.text.strip().split("\n"):
+        if linea.strip():
+            gen = linea.split("\t")[0]
+            huellas[gen] = huella({"linea": linea, "rutas": sorted(rutas_por_gen.get(gen, []))})
+    return huellas
+
+
+async def obtener_huellas_rutas(cliente, organismo):
+    """Metadatos, huella (nombre + genes) y genes de cada ruta del organismo."""
+    metadatos, genes_por_ruta = await asyncio.gather(
+        get_organism_pathway_metadata(cliente, organismo),
+        obtener_genes_por_ruta(cliente, organismo),
+    )
+
+    rutas = {}
+    for p_meta in metadatos:
+        genes = genes_por_ruta.get(p_meta["pathway_id"], [])
+        rutas[p_meta["pathway_id"]] = (p_meta, huella({"name": p_meta["name"], "genes": genes}), genes)
+    return rutas
+
+
+def rutas_por_gen(rutas):
+    """{gen: [rutas]} a partir del resultado de `obtener_huellas_rutas`."""
+    relacion = {}
+    for pid, (_, _, genes) in rutas.items():
+        for gen in genes:
+            relacion.setdefault(gen, []).append(pid)
+    return relacion
+
+
+def elementos_cambiados(huellas_actuales, guardados):
+    """Devuelve (IDs nuevos o con huella distinta, IDs que ya no existen)."""
+    cambiados = [i for i, h in huellas_actuales.items() if guardados.get(i, {}).get("huella") != h]
+    eliminados = [i for i in guardados if i not in huellas_actuales]
+    return cambiados, eliminados
+
+
+def id_kegg_de_entrada(raw_text, organismo):
+    """Obtiene "org:ID" a partir de la línea ENTRY de una entrada en texto plano."""
+    for linea in raw_text.split("\n"):
+        if linea.startswith("ENTRY"):
+            return f"{organismo}:{linea[12:].split()[0]}"
+    return None
+
+
+async def descargar_entradas(cliente, ids, organismo, carpeta, batch_size=10):
+    """Descarga las entradas indicadas y devuelve {id KEGG: raw_text}."""
+    log_path = os.path.join(carpeta, "descarga.log")
+    lotes = [ids[i:i + batch_size] for i in range(0, len(ids), batch_size)]
+    resultados = await asyncio.gather(*(
+        descargar_lote_kegg(cliente, lote, numero + 1, log_path) for numero, lote in enumerate(lotes)
+    ))
+    entradas = {}
+    for resultado in resultados:
+        for entrada in resultado or []:
+            id_kegg = id_kegg_de_entrada(entrada["raw_text"], organismo)
+            if id_kegg:
+                entradas[id_kegg] = entrada["raw_text"]
+    return entradas
+
+
+def subir_cambios(db, docs_entradas, docs_rutas, entradas_eliminadas, rutas_eliminadas):
+    """Upsert de los documentos cambiados y borrado de los eliminados."""
+    coleccion_entradas = db[COLECCION_ENTRADAS]
+    coleccion_rutas = db[COLECCION_RUTAS]
+    docs_rutas_comprimidos = [comprimir_documento_ruta(doc) for doc in docs_rutas]
+    for coleccion, docs in ((coleccion_entradas, docs_entradas), (coleccion_rutas, docs_rutas_comprimidos)):
+        if docs:
+            print(cargar_registros(coleccion, docs).informe())
+    if entradas_eliminadas:
+        coleccion_entradas.delete_many({"entry": {"$in": [i.split(":")[-1] for i in entradas_eliminadas]}})
+    if rutas_eliminadas:
+        coleccion_rutas.delete_many({"_id": {"$in": rutas_eliminadas}})
+    # Se escribe en las colecciones activas: nueva versión para invalidar la caché de la API
+    if docs_entradas or entradas_eliminadas:
+        registrar_version(db, COLECCION_ENTRADAS, origen="incremental")
+    if docs_rutas or rutas_eliminadas:
+        registrar_version(db, COLECCION_RUTAS, origen="incremental")
+    print(f"MongoDB: {len(docs_entradas)} entradas y {len(docs_rutas)} rutas actualizadas, "
+          f"{len(entradas_eliminadas)} entradas y {len(rutas_eliminadas)} rutas eliminadas.")
+
+
+async def actualizar_incremental(cliente, organismo="bce", carpeta=CARPETA_INCREMENTAL, db=None, forzar=False):
+    """
+    Ejecuta una actualización incremental y devuelve un resumen con la versión de KEGG y
+    el número de elementos revisados, descargados, actualizados y eliminados.
+    """
+    os.makedirs(carpeta, exist_ok=True)
+    estado = cargar_estado(carpeta, organismo)
+
+    release = await obtener_release_kegg(cliente, organismo)
+    print(f"Versión de KEGG: {release} (última actualización: {estado['release']})")
+    resumen = {"release": release, "entradas_descargadas": 0, "entradas_actualizadas": 0,
+               "rutas_descargadas": 0, "rutas_actualizadas": 0, "rutas_sin_kgml": 0,
+               "entradas_eliminadas": 0, "rutas_eliminadas": 0}
+    if release is not None and release == estado["release"] and not forzar:
+        print("KEGG no ha publicado cambios desde la última actualización.")
+        return resumen
+
+    # Las huellas de las entradas incluyen sus rutas, así que se calculan después
+    rutas = await obtener_huellas_rutas(cliente, organismo)
+    huellas_entradas = await obtener_huellas_entradas(cliente, organismo, rutas_por_gen(rutas))
+    entradas_cambiadas, entradas_eliminadas = elementos_cambiados(huellas_entradas, estado["entradas"])
+    rutas_cambiadas, rutas_eliminadas = elementos_cambiados(
+        {pid: h for pid, (_, h, _) in rutas.items()}, estado["rutas"])
+    print(f"Entradas a revisar: {len(entradas_cambiadas)} de {len(huellas_entradas)}; "
+          f"rutas a revisar: {len(rutas_cambiadas)} de {len(rutas)}.")
+
+    entradas_descargadas, rutas_descargadas = await asyncio.gather(
+        descargar_entradas(cliente, entradas_cambiadas, organismo, carpeta),
+        asyncio.gather(*(descargar_datos_ruta(cliente, rutas[pid][0], rutas[pid][2]) for pid in rutas_cambiadas)),
+    )
+    resumen["entradas_descargadas"] = len(entradas_descargadas)
+
+    for id_kegg in entradas_eliminadas:
+        del estado["entradas"][id_kegg]
+    for pid in rutas_eliminadas:
+        del estado["rutas"][pid]
+
+    # Entradas: solo se re-parsean y suben las que han cambiado de contenido
+    docs_entradas = []
+    for id_kegg, raw_text in entradas_descargadas.items():
+        hash_contenido = huella(raw_text)
+        if estado["entradas"].get(id_kegg, {}).get("sha256") != hash_contenido:
+            doc = parsear_entrada_kegg(raw_text)
+            if doc["pathways"]:
+                docs_entradas.append(doc)
+            elif id_kegg in estado["entradas"]:
+                # Ya no pertenece a ninguna ruta: se elimina de la colección
+                entradas_eliminadas.append(id_kegg)
+        estado["entradas"][id_kegg] = {"huella": huellas_entradas[id_kegg], "sha256": hash_contenido}
+
+    # Rutas: las que fallaron se descartan (se reintentarán en la próxima ejecución); las
+    # que no tienen KGML en KEGG se anotan y, si antes lo tenían, se eliminan de MongoDB
+    docs_rutas = []
+    for datos_ruta in rutas_descargadas:
+        if datos_ruta.pop(CAMPO_SIN_KGML, False):
+            pid = datos_ruta["_id"]
+            resumen["rutas_sin_kgml"] += 1
+            if estado["rutas"].get(pid, {}).get("sha256"):
+                rutas_eliminadas.append(pid)
+            estado["rutas"][pid] = {"huella": rutas[pid][1], "sha256": None, "sin_kgml": True}
+            continue
+        if not datos_ruta["kgml_data"]:
+            continue
+        resumen["rutas_descargadas"] += 1
+        pid = datos_ruta["_id"]
+        hash_contenido = huella(datos_ruta)
+        if estado["rutas"].get(pid, {}).get("sha256") != hash_contenido:
+            escribir_registros(descargas_definiciones_rutas_kegg_kgml.archivo_de_ruta(pid), [datos_ruta])
+            docs_rutas.append(datos_ruta)
+        estado["rutas"][pid] = {"huella": rutas[pid][1], "sha256": hash_contenido}
+
+    resumen.update(entradas_actualizadas=len(docs_entradas), rutas_actualizadas=len(docs_rutas),
+                   entradas_eliminadas=len(entradas_eliminadas), rutas_eliminadas=len(rutas_eliminadas))
+
+    if db is not None:
+        subir_cambios(db, docs_entradas, docs_rutas, entradas_eliminadas, rutas_eliminadas)
+
+    # La versión solo se da por procesada si no quedó nada pendiente
+    pendientes = (len(entradas_cambiadas) - len(entradas_descargadas)) + \
+        (len(rutas_cambiadas) - resumen["rutas_descargadas"] - resumen["rutas_sin_kgml"])
+    if pendientes:
+        print(f"Quedan {pendientes} elementos sin descargar; se reintentarán en la próxima ejecución.")
+    else:
+        estado["release"] = release
+    guardar_estado(carpeta, estado)
+
+    print(f"Actualización completada: {resumen}")
+    return resumen
+
+
+def main(organismo="bce", subir=False, forzar=False):
+    db = None
+    if subir:
+        load_dotenv()
+        mongo_uri = os.getenv("MONGO_URI")
+        db_name = os.getenv("DB_NAME")
+        if not mongo_uri or not db_name:
+            print("Faltan variables en el archivo .env")
+            return
+        db = MongoClient(mongo_uri)[db_name]
+
+    async def _ejecutar():
+        async with crear_cliente_kegg() as cliente:
+            await actualizar_incremental(cliente, organismo, CARPETA_INCREMENTAL, db, forzar)
+    asyncio.run(_ejecutar())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Actualiza solo las entradas y rutas de KEGG que han cambiado.")
+    parser.add_argument("--organismo", default="bce", help="Código de organismo KEGG (por defecto, bce).")
+    parser.add_argument("--subir", action="store_true", help="Sube los cambios a MongoDB (MONGO_URI y DB_NAME).")
+    parser.add_argument("--forzar", action="store_true", help="Revisa los listados aunque la versión de KEGG no haya cambiado.")
+    args = parser.parse_args()
+    main(args.organismo, args.subir, args.forzar)
@@ -2,95 +2,194 @@
 Script para descargar entradas de la base de datos KEGG.
 
 Este script obtiene todos los identificadores KEGG de un organismo específico ('Bacillus cereus' con el código "bce"),
-y descarga las entradas correspondientes en bloques. Los datos se guardan en archivos `.json` de tamaño configurable (por defecto, 500 entradas por archivo).
+y descarga las entradas correspondientes en bloques. Los datos se guardan en archivos NDJSON comprimidos (`.ndjson.gz`, `comun.registros`) de tamaño configurable (por defecto, 500 entradas por archivo).
 
 Características:
 - Obtiene todos los IDs válidos del organismo desde la API de KEGG.
-- Descarga las entradas en lotes pequeños (por defecto, 10 por petición) para evitar errores de red.
-- Agrupa las entradas descargadas en bloques de tamaño configurable (por defecto, 500) y las guarda como JSON.
-- Añade un breve retardo entre peticiones para evitar saturar el servidor de KEGG.
-- Registra los errores HTTP en un archivo `descarga.log` dentro de la carpeta de salida.
-
+- Descarga las entradas en lotes pequeños (por defecto, 10 por petición, el máximo que admite `get/`).
+- Los lotes se descargan de forma concurrente con el cliente compartido `comun.cliente_http`,
+  que respeta el límite de KEGG (3 peticiones por segundo) y reintenta con espera
+  exponencial ante errores temporales.
+- Agrupa las entradas descargadas en bloques de tamaño configurable (por defecto, 500) y las guarda como NDJSON+gzip.
+  Cada bloque se escribe en cuanto termina, de forma atómica, y se registra en el manifiesto
+  `descarga.manifiesto` de la carpeta de salida (`comun.manifiesto`) con el hash de su archivo y de sus IDs.
+- Si la descarga se interrumpe, la siguiente ejecución salta los bloques ya registrados.
+  Con `--verify` se comprueban antes los archivos registrados y se vuelven a descargar los que fallen.
+- Registra los errores HTTP y de red (tras agotar los reintentos) en un archivo `descarga.log`
+  dentro de la carpeta de salida; el lote fallido deja su bloque incompleto sin detener la descarga.
+- `KEGG_API_BASE_URL` cambia la URL base de la API, p. ej. para usar el servidor simulado de
+  `comun.servidor_simulado` (`banco_pruebas_descargas.py` mide así el rendimiento sin red).
+
+Uso (desde la carpeta `Descarga_datos`):
+    python -m Kegg.descargas_datos_kegg [--verify]
 '''
 
 import os
-import time
-import requests
-import json
+import re
+import argparse
+import asyncio
+import hashlib
 from pathlib import Path
+import httpx
+from comun.cliente_http import ClienteHTTPAsync
+from comun.cache_http import cache_desde_entorno
+from comun.manifiesto import Manifiesto
+from comun.registros import EXTENSION, escribir_registros
 
-def obtener_ids_kegg(organismo="bce"):
+KEGG_API_BASE_URL = os.getenv("KEGG_API_BASE_URL", "http://rest.kegg.jp")
+KEGG_PETICIONES_POR_SEGUNDO = float(os.getenv("KEGG_PETICIONES_POR_SEGUNDO", 3))
+KEGG_CONCURRENCIA = int(os.getenv("KEGG_CONCURRENCIA", 3))
+
+
+def crear_cliente_kegg(tasa=None, concurrencia=None):
+    """Crea el cliente HTTP asíncrono configurado para la API de KEGG."""
+    return ClienteHTTPAsync(
+        base_url=KEGG_API_BASE_URL,
+        tasa=tasa or KEGG_PETICIONES_POR_SEGUNDO,
+        concurrencia=concurrencia or KEGG_CONCURRENCIA,
+        cache=cache_desde_entorno(),
+    )
+
+
+async def obtener_ids_kegg_async(cliente, organismo="bce"):
     """Obtiene todos los IDs KEGG para un organismo dado."""
-    url = f"http://rest.kegg.jp/list/{organismo}"
-    response = requests.get(url)
+    response = await cliente.get(f"list/{organismo}")
     response.raise_for_status()
     lines = response.text.strip().split("\n")
     ids = [line.split()[0] for line in lines]
     return ids
 
-def descargar_entradas_kegg(ids, output_dir, batch_size=10, bloque_size=500, delay=2.0):
+
+def obtener_ids_kegg(organismo="bce"):
+    """Versión síncrona de `obtener_ids_kegg_async`."""
+    async def _ejecutar():
+        async with crear_cliente_kegg() as cliente:
+            return await obtener_ids_kegg_async(cliente, organismo)
+    return asyncio.run(_ejecutar())
+
+
+async def descargar_lote_kegg(cliente, batch, numero_lote, log_path):
+    """Descarga un lote de IDs con `get/` y devuelve sus entradas en texto plano (o None si falla)."""
+    url = f"get/{'+'.join(batch)}"
+    try:
+        response = await cliente.get(url)
+    except httpx.TransportError as e:  # Incluye los timeouts; el cliente ya agotó los reintentos
+        error_msg = f"Error de red en el bloque ({numero_lote}): {type(e).__name__}: {e}\n"
+        print(error_msg.strip())
+        with open(log_path, "a") as log_file:
+            log_file.write(error_msg)
+        return None
+
+    if response.status_code != 200:
+        error_msg = f"Error en el bloque HTTP ({numero_lote}): {response.status_code}\n"
+        print(error_msg.strip())
+        with open(log_path, "a") as log_file:
+            log_file.write(error_msg)
+        return None
+
+    # Cada entrada termina en una línea "///" (incluida la última del bloque)
+    entradas = re.split(r"^///[ \t]*$", response.text, flags=re.MULTILINE)
+    return [{"raw_text": entrada.strip() + "\n///"} for entrada in entradas if entrada.strip()]
+
+
+def guardar_bloque(output_dir, numero_bloque, entradas):
+    filename = os.path.join(output_dir, f"bloque_{numero_bloque:04d}{EXTENSION}")
+    escribir_registros(filename, entradas)
+    print(f"Guardado: {filename} con {len(entradas)} entradas.")
+    return filename
+
+
+def hash_ids(ids):
+    return hashlib.sha256("\n".join(ids).encode("utf-8")).hexdigest()
+
+
+async def descargar_bloque_kegg(cliente, manifiesto, ids_bloque, numero_bloque, primer_lote, batch_size, output_dir, log_path):
+    """
+    Descarga los lotes de un bloque, lo guarda y, si no falló ningún lote, lo registra
+    en el manifiesto. Devuelve el número de entradas guardadas.
+    """
+    lotes = [ids_bloque[i:i + batch_size] for i in range(0, len(ids_bloque), batch_size)]
+    resultados = await asyncio.gather(*(
+        descargar_lote_kegg(cliente, lote, primer_lote + i, log_path) for i, lote in enumerate(lotes)
+    ))
+
+    entradas = [entrada for resultado in resultados if resultado for entrada in resultado]
+    if not entradas:
+        return 0
+
+    filename = guardar_bloque(output_dir, numero_bloque, entradas)
+    if all(resultado is not None for resultado in resultados):
+        manifiesto.registrar(f"bloque_{numero_bloque:04d}", filename,
+                             entradas=len(entradas), ids_sha256=hash_ids(ids_bloque))
+    else:
+        print(f"Bloque {numero_bloque} incompleto: se volverá a descargar en la próxima ejecución.")
+    return len(entradas)
+
+
+async def descargar_entradas_kegg_async(cliente, ids, output_dir, batch_size=10, bloque_size=500, verificar=False):
+    """Descarga las entradas de `ids` por bloques y devuelve cuántas se guardaron en esta ejecución."""
     if not os.path.exists(output_dir):
         os.makedirs(output_dir)
 
     log_path = os.path.join(output_dir, "descarga.log")
-    total = 0
-    bloques_guardados = 0
-    acumulador = []
-
-    for i in range(0, len(ids), batch_size):
-        batch = ids[i:i + batch_size]
-        ids_str = "+".join(batch)
-        url = f"http://rest.kegg.jp/get/{ids_str}"
-        response = requests.get(url)
-        
-        if response.status_code != 200:
-            error_msg = f"Error en el bloque HTTP ({i//batch_size + 1}): {response.status_code}\n"
-            print(error_msg.strip())
-            with open(log_path, "a") as log_file:
-                log_file.write(error_msg)
+    manifiesto = Manifiesto.cargar(output_dir, {"batch_size": batch_size, "bloque_size": bloque_size})
+    if verificar:
+        manifiesto.verificar()
+
+    # Cada bloque corresponde siempre al mismo tramo de IDs, así se puede reanudar por bloques
+    tareas = []
+    bloques_saltados = 0
+    for inicio in range(0, len(ids), bloque_size):
+        numero_bloque = inicio // bloque_size + 1
+        ids_bloque = ids[inicio:inicio + bloque_size]
+        clave = f"bloque_{numero_bloque:04d}"
+        if manifiesto.completado(clave) and manifiesto.completados[clave]["ids_sha256"] == hash_ids(ids_bloque):
+            bloques_saltados += 1
             continue
+        tareas.append(descargar_bloque_kegg(cliente, manifiesto, ids_bloque, numero_bloque,
+                                            inicio // batch_size + 1, batch_size, output_dir, log_path))
 
-        bloque_texto = response.text.strip()
-        entradas = bloque_texto.split("///\n")
-        nuevas_entradas = []
-
-        for entrada in entradas:
-            if entrada.strip():
-                nuevas_entradas.append({"raw_text": entrada.strip() + "\n///"})
+    if bloques_saltados:
+        print(f"Reanudando: {bloques_saltados} bloques ya descargados según el manifiesto.")
 
-        acumulador.extend(nuevas_entradas)
-        total += len(nuevas_entradas)
-        print(f"Añadidas {len(nuevas_entradas)} entradas (Total acumuladas: {len(acumulador)})")
-
-        if len(acumulador) >= bloque_size:
+    # Los bloques se guardan a medida que terminan; el cliente limita la tasa y la concurrencia
+    total = 0
+    bloques_guardados = 0
+    for tarea in asyncio.as_completed(tareas):
+        guardadas = await tarea
+        if guardadas:
             bloques_guardados += 1
-            filename = os.path.join(output_dir, f"bloque_{bloques_guardados:04d}.json")
-            with open(filename, "w") as f:
-                json.dump(acumulador[:bloque_size], f, indent=2)
-            print(f"Guardado: {filename} con {bloque_size} entradas.")
-            acumulador = acumulador[bloque_size:]
-
-        time.sleep(delay)
-
-    # Guardar lo que quede acumulado al final
-    if acumulador:
-        bloques_guardados += 1
-        filename = os.path.join(output_dir, f"bloque_{bloques_guardados:04d}.json")
-        with open(filename, "w") as f:
-            json.dump(acumulador, f, indent=2)
-        print(f"Guardado final: {filename} con {len(acumulador)} entradas.")
+            total += guardadas
 
     print("Descarga completada.")
     print(f"Archivos guardados: {bloques_guardados}")
     print(f"Total de entradas KEGG descargadas: {total}")
+    return total
 
-if __name__ == "__main__":
+
+def descargar_entradas_kegg(ids, output_dir, batch_size=10, bloque_size=500, tasa=None, concurrencia=None, verificar=False):
+    """Versión síncrona de `descargar_entradas_kegg_async` con su propio cliente."""
+    async def _ejecutar():
+        async with crear_cliente_kegg(tasa, concurrencia) as cliente:
+            return await descargar_entradas_kegg_async(cliente, ids, output_dir, batch_size, bloque_size, verificar)
+    return asyncio.run(_ejecutar())
+
+
+async def main(verificar=False):
     organism_code = "bce"  # Bacillus cereus
     carpeta_descargas = "descargas_kegg_json"
-    
-    print("Obteniendo lista de IDs de KEGG...")
-    ids = obtener_ids_kegg(organism_code)
-    print(f"Total de IDs obtenidos: {len(ids)}")
 
-    print(f"Comenzando la descarga en bloques de 10 entradas...")
-    descargar_entradas_kegg(ids, carpeta_descargas, batch_size=10)
+    async with crear_cliente_kegg() as cliente:
+        print("Obteniendo lista de IDs de KEGG...")
+        ids = await obtener_ids_kegg_async(cliente, organism_code)
+        print(f"Total de IDs obtenidos: {len(ids)}")
+
+        print(f"Comenzando la descarga en bloques de 10 entradas...")
+        await descargar_entradas_kegg_async(cliente, ids, carpeta_descargas, batch_size=10, verificar=verificar)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Descarga las entradas KEGG de un organismo.")
+    parser.add_argument("--verify", action="store_true",
+                        help="Comprueba los bloques ya descargados y vuelve a descargar los que no coincidan.")
+    args = parser.parse_args()
+    asyncio.run(main(verificar=args.verify))
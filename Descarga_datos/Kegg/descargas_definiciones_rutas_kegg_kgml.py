@@ -7,83 +7,126 @@ Este script se conecta a la API REST de KEGG para obtener información sobre las
 rutas metabólicas de un organismo específico. Para cada ruta, descarga:
 1. Metadatos de la ruta (ID, nombre, URL de la imagen).
 2. El contenido del archivo KGML (KEGG Markup Language) que describe la ruta.
-3. Una lista de genes asociados a la ruta, obtenidos directamente de la API de KEGG.
+3. Una lista de genes asociados a la ruta. Los genes de todas las rutas se obtienen con
+   una sola petición a `link/pathway/<organismo>` (`Kegg.mapeos_kegg`); solo si esa
+   petición falla se pide `get/<ruta>/genes` ruta a ruta.
 
-Los datos recopilados para cada ruta se guardan en archivos individuales en formato JSON
-dentro de un directorio de salida especificado. El script maneja reintentos para
-las peticiones a la API y errores comunes.
+Los datos recopilados para cada ruta se guardan en archivos individuales en formato NDJSON+gzip (`comun.registros`)
+dentro de un directorio de salida especificado. Las rutas se procesan de forma concurrente
+con el cliente compartido `comun.cliente_http`, que limita la tasa de peticiones al
+límite publicado por KEGG y gestiona los reintentos ante errores temporales.
 
 Funciones principales:
-- fetch_kegg_data_with_retry: Realiza peticiones a la API de KEGG con una lógica
-  de reintentos robusta para manejar errores temporales de red o de la API.
+- fetch_kegg_data_with_retry: Realiza peticiones a la API de KEGG a través del cliente
+  compartido y traduce los errores habituales (404, 400 en listas de genes) a `None`.
 - get_organism_pathway_metadata: Obtiene y parsea la lista de todas las rutas
   metabólicas para un organismo dado.
 - get_genes_for_pathway_from_kegg: Obtiene la lista de genes de KEGG asociados
-  a una ruta específica.
+  a una ruta específica (alternativa, una petición por ruta).
+- descargar_datos_ruta: Descarga el KGML (y, si no se le pasan, los genes) de una ruta
+  y devuelve el documento a guardar. Si KEGG responde 404 (la ruta no tiene KGML, algo
+  habitual en rutas globales como bce01100), el documento lleva `CAMPO_SIN_KGML` a True
+  para distinguirlo de un fallo que se deba reintentar; los que guardan el documento
+  retiran el campo antes.
+- procesar_ruta: Descarga KGML y genes de una ruta, guarda su archivo de forma
+  atómica y la registra en el manifiesto de la carpeta de salida (`comun.manifiesto`).
+  Devuelve el estado de la ruta: `RUTA_GUARDADA`, `RUTA_SIN_KGML` o `RUTA_FALLIDA`.
 - main: Orquesta el proceso completo de obtención de metadatos de rutas, descarga
-  de datos KGML y genes, y guardado de la información en archivos JSON.
+  de datos KGML y genes, y guardado de la información en archivos `.ndjson.gz`.
+
+Las rutas ya registradas en el manifiesto se saltan, de modo que una ejecución
+interrumpida se reanuda donde se quedó. Las rutas sin KGML en KEGG (404) se guardan con
+`kgml_data` a None y se registran con `sin_kgml: True`, así que tampoco se vuelven a
+pedir. Las rutas cuyo KGML no se pudo descargar no se guardan ni se registran: se
+cuentan como fallidas en el resumen y se vuelven a intentar en la siguiente ejecución. Con `--verify` se comprueban antes los archivos
+registrados (existencia y hash) y se vuelven a descargar los que no coincidan.
+
+Uso (desde la carpeta `Descarga_datos`):
+    python -m Kegg.descargas_definiciones_rutas_kegg_kgml [--verify]
 '''
 
 
 import os
-import time
-import requests
-import json 
+import argparse
+import asyncio
+import httpx
 from pathlib import Path # Para manejo de rutas y creacion de carpetas
 from dotenv import load_dotenv
+from comun.cliente_http import ClienteHTTPAsync
+from comun.cache_http import cache_desde_entorno
+from comun.manifiesto import Manifiesto
+from comun.registros import EXTENSION, escribir_registros
+from Kegg.mapeos_kegg import obtener_genes_por_ruta
 
 
 load_dotenv() # Carga variables desde el archivo .env
 
-KEGG_API_BASE_URL = "http://rest.kegg.jp"
+KEGG_API_BASE_URL = os.getenv("KEGG_API_BASE_URL", "http://rest.kegg.jp")
 ORGANISM_CODE = os.getenv("KEGG_ORGANISM_CODE", "bce")
-REQUEST_DELAY_SECONDS = float(os.getenv("KEGG_REQUEST_DELAY", 0.34))
+KEGG_PETICIONES_POR_SEGUNDO = float(os.getenv("KEGG_PETICIONES_POR_SEGUNDO", 3))
+KEGG_CONCURRENCIA = int(os.getenv("KEGG_CONCURRENCIA", 3))
 
 # Carpeta donde se guardaran los archivos JSON de las rutas
 OUTPUT_JSON_DIR = "descargas_kegg_rutas_graficas_json" 
 
+# Marca de `descargar_datos_ruta` para las rutas sin KGML en KEGG (404)
+CAMPO_SIN_KGML = "sin_kgml"
+
+# Estados de `procesar_ruta`
+RUTA_GUARDADA = "guardada"
+RUTA_SIN_KGML = "sin_kgml"
+RUTA_FALLIDA = "fallida"
+NO_ENCONTRADO = object()
+
+
+def archivo_de_ruta(path_id):
+    """Archivo de salida (un único registro) de una ruta."""
+    return Path(OUTPUT_JSON_DIR) / f"{path_id}{EXTENSION}"
+
+
+def crear_cliente_kegg():
+    """Crea el cliente HTTP asíncrono configurado para la API de KEGG."""
+    return ClienteHTTPAsync(
+        base_url=KEGG_API_BASE_URL,
+        tasa=KEGG_PETICIONES_POR_SEGUNDO,
+        concurrencia=KEGG_CONCURRENCIA,
+        cache=cache_desde_entorno(),
+    )
+
 
-def fetch_kegg_data_with_retry(endpoint, retries=3, delay_multiplier=2, ignore_400_for_genes=False):
+async def fetch_kegg_data_with_retry(cliente, endpoint, ignore_400_for_genes=False, no_encontrado=None):
+    """Texto de la respuesta, `no_encontrado` si es un 404 o None si falla."""
+
+    url = f"{cliente.base_url}/{endpoint}"
+    try:
+        response = await cliente.get(endpoint)
+    except httpx.TransportError as e:
+        print(f"Fallo la obtencion de datos desde {url}: {e}")
+        return None
+
+    if response.status_code == 404:
+        print(f"Recurso no encontrado (404) en {url}")
+        return no_encontrado
     
-    url = f"{KEGG_API_BASE_URL}/{endpoint}"
-    current_delay = REQUEST_DELAY_SECONDS
-    for attempt in range(retries):
-        try:
-            time.sleep(current_delay)
-            response = requests.get(url, timeout=30)
-            response.raise_for_status()
-            if not response.text.strip():
-                print(f"Advertencia: Respuesta vacia desde {url} en intento {attempt + 1}")
-                if attempt < retries - 1:
-                    current_delay *= delay_multiplier
-                    continue
-                return None
-            return response.text
-        except requests.exceptions.HTTPError as e:
-            if e.response.status_code == 404:
-                print(f"Recurso no encontrado (404) en {url}")
-                return None
-            
-            if e.response.status_code == 400 and ignore_400_for_genes:
-                print(f"Error HTTP 400 (Bad Request) en {url}. Se asume que no hay lista de genes disponible via este endpoint para esta ruta.")
-                return None 
-            
-            print(f"Error HTTP {e.response.status_code} en {url}, intento {attempt + 1}/{retries}.")
-        except requests.exceptions.RequestException as e:
-            print(f"Error de red/peticion en {url}: {e}, intento {attempt + 1}/{retries}.")
-        if attempt < retries - 1:
-            current_delay *= delay_multiplier
-        else:
-            print(f"Fallo la obtencion de datos desde {url} despues de {retries} intentos.")
-            return None
-    return None
-
-
-def get_organism_pathway_metadata(org_code):
+    if response.status_code == 400 and ignore_400_for_genes:
+        print(f"Error HTTP 400 (Bad Request) en {url}. Se asume que no hay lista de genes disponible via este endpoint para esta ruta.")
+        return None 
+
+    if response.status_code != 200:
+        print(f"Fallo la obtencion de datos desde {url}: HTTP {response.status_code}.")
+        return None
+
+    if not response.text.strip():
+        print(f"Advertencia: Respuesta vacia desde {url}")
+        return None
+    return response.text
+
+
+async def get_organism_pathway_metadata(cliente, org_code):
     
     print(f"Obteniendo metadatos de rutas para el organismo: {org_code}")
     endpoint = f"list/pathway/{org_code}"
-    data = fetch_kegg_data_with_retry(endpoint)
+    data = await fetch_kegg_data_with_retry(cliente, endpoint)
     pathways_metadata = []
     if data:
         for line in data.strip().split('\n'):
@@ -102,11 +145,11 @@ def get_organism_pathway_metadata(org_code):
                 print(f"Advertencia: No se pudo parsear la linea de metadatos de ruta: {line}")
     return pathways_metadata
 
-def get_genes_for_pathway_from_kegg(pathway_id_with_org_prefix):
+async def get_genes_for_pathway_from_kegg(cliente, pathway_id_with_org_prefix):
     
     print(f"Obteniendo genes de KEGG para la ruta: {pathway_id_with_org_prefix}")
     endpoint = f"get/{pathway_id_with_org_prefix}/genes"
-    data = fetch_kegg_data_with_retry(endpoint, ignore_400_for_genes=True)
+    data = await fetch_kegg_data_with_retry(cliente, endpoint, ignore_400_for_genes=True)
     gene_kegg_ids = []
     if data:
         for line in data.strip().split('\n'):
@@ -120,7 +163,79 @@ def get_genes_for_pathway_from_kegg(pathway_id_with_org_prefix):
     return gene_kegg_ids
 
 
-def main():
+async def descargar_datos_ruta(cliente, p_meta, genes=None):
+    """
+    Descarga el KGML de una ruta y devuelve el documento (con `kgml_data` None si falló).
+    `genes` son los genes de la ruta según `link/pathway`; si es None se piden a `get/<ruta>/genes`.
+    """
+    path_id = p_meta["pathway_id"] # ej: bce00010
+
+    pathway_data_to_save = {
+        "_id": path_id, 
+        "name": p_meta["name"],
+        "organism_code": p_meta["organism_code"],
+        "image_url": p_meta["image_url"],
+        "kgml_data": None,
+        "kegg_genes_in_pathway": []
+    }
+    
+    if genes is None:
+        # KGML y genes se piden a la vez; el cliente se encarga de respetar la tasa
+        kgml_content, genes_from_kegg_api = await asyncio.gather(
+            fetch_kegg_data_with_retry(cliente, f"get/{path_id}/kgml", no_encontrado=NO_ENCONTRADO),
+            get_genes_for_pathway_from_kegg(cliente, path_id),
+        )
+    else:
+        kgml_content, genes_from_kegg_api = await fetch_kegg_data_with_retry(
+            cliente, f"get/{path_id}/kgml", no_encontrado=NO_ENCONTRADO), genes
+    
+    if kgml_content is NO_ENCONTRADO:
+        pathway_data_to_save[CAMPO_SIN_KGML] = True
+        print(f"KEGG no tiene KGML para {path_id}.")
+    elif kgml_content:
+        pathway_data_to_save["kgml_data"] = kgml_content
+        print(f"KGML para {path_id} descargado.")
+    else:
+        print(f"Fallo la descarga de KGML para {path_id}.")
+
+    if genes_from_kegg_api:
+        pathway_data_to_save["kegg_genes_in_pathway"] = genes_from_kegg_api
+        print(f"Se encontraron {len(genes_from_kegg_api)} genes de KEGG para la ruta {path_id}.")
+    else:
+        print(f"No se obtuvieron genes de KEGG API para la ruta {path_id} (o el endpoint no es aplicable). Los genes especificos se buscaran en el KGML si es necesario.")
+
+    return pathway_data_to_save
+
+
+async def procesar_ruta(cliente, p_meta, manifiesto=None, genes=None):
+    """
+    Descarga KGML y genes de una ruta, guarda su archivo y la registra en el manifiesto.
+    Devuelve `RUTA_GUARDADA`, `RUTA_SIN_KGML` (KEGG no tiene KGML; también se guarda y
+    se registra) o `RUTA_FALLIDA` (falló la descarga del KGML o el guardado).
+    """
+    path_id = p_meta["pathway_id"]
+    file_path = archivo_de_ruta(path_id)
+    pathway_data_to_save = await descargar_datos_ruta(cliente, p_meta, genes)
+    sin_kgml = pathway_data_to_save.pop(CAMPO_SIN_KGML, False)
+    if not sin_kgml and not pathway_data_to_save["kgml_data"]:
+        return RUTA_FALLIDA  # No se guarda ni se registra: se reintenta en la siguiente ejecución
+
+    # Guardar el diccionario como un registro NDJSON+gzip
+    try:
+        escribir_registros(file_path, [pathway_data_to_save])
+        print(f"Datos de la ruta {path_id} guardados en {file_path}")
+        if manifiesto is not None:
+            extra = {"sin_kgml": True} if sin_kgml else {}
+            manifiesto.registrar(path_id, file_path, genes=len(pathway_data_to_save["kegg_genes_in_pathway"]), **extra)
+        return RUTA_SIN_KGML if sin_kgml else RUTA_GUARDADA
+    except IOError as e:
+        print(f"Error al guardar el archivo {file_path}: {e}")
+    except Exception as e:
+        print(f"Un error inesperado ocurrio al guardar {file_path}: {e}")
+    return RUTA_FALLIDA
+
+
+async def main_async(cliente, verificar=False):
     
     print(f"--- Iniciando descarga de datos graficos de rutas KEGG a archivos JSON ---")
     print(f"Organismo KEGG: {ORGANISM_CODE}")
@@ -129,69 +244,53 @@ def main():
     # Crear la carpeta de salida si no existe
     Path(OUTPUT_JSON_DIR).mkdir(parents=True, exist_ok=True)
 
-    all_pathways_meta = get_organism_pathway_metadata(ORGANISM_CODE)
+    all_pathways_meta = await get_organism_pathway_metadata(cliente, ORGANISM_CODE)
 
     if not all_pathways_meta:
         print(f"No se encontraron rutas para {ORGANISM_CODE} o hubo un error en la obtencion.")
-        return
+        return {}
 
     print(f"Se encontraron {len(all_pathways_meta)} rutas para {ORGANISM_CODE}.")
-    successful_downloads = 0
-    failed_downloads = 0
-
-    for i, p_meta in enumerate(all_pathways_meta):
-        path_id = p_meta["pathway_id"] # ej: bce00010
-        
-        file_path = Path(OUTPUT_JSON_DIR) / f"{path_id}.json"
-        print(f"\nProcesando ruta ({i+1}/{len(all_pathways_meta)}): {path_id} - {p_meta['name']}")
-
-
-        pathway_data_to_save = {
-            "_id": path_id, 
-            "name": p_meta["name"],
-            "organism_code": p_meta["organism_code"],
-            "image_url": p_meta["image_url"],
-            "kgml_data": None,
-            "kegg_genes_in_pathway": []
-        }
-        
-        print(f"Descargando KGML para {path_id}...")
-        kgml_endpoint = f"get/{path_id}/kgml"
-        kgml_content = fetch_kegg_data_with_retry(kgml_endpoint)
-        
-        if kgml_content:
-            pathway_data_to_save["kgml_data"] = kgml_content
-            print(f"KGML para {path_id} descargado.")
-        else:
-            print(f"Fallo la descarga de KGML para {path_id}.")
-
-        
-        genes_from_kegg_api = get_genes_for_pathway_from_kegg(path_id)
-        if genes_from_kegg_api:
-            pathway_data_to_save["kegg_genes_in_pathway"] = genes_from_kegg_api
-            print(f"Se encontraron {len(genes_from_kegg_api)} genes de KEGG para la ruta {path_id}.")
-        else:
-           
-            print(f"No se obtuvieron genes de KEGG API para la ruta {path_id} (o el endpoint no es aplicable). Los genes especificos se buscaran en el KGML si es necesario.")
-
-        # Guardar el diccionario como un archivo JSON
+
+    manifiesto = Manifiesto.cargar(OUTPUT_JSON_DIR, {"organismo": ORGANISM_CODE})
+    if verificar:
+        manifiesto.verificar()
+
+    pendientes = [p_meta for p_meta in all_pathways_meta if not manifiesto.completado(p_meta["pathway_id"])]
+    if len(pendientes) < len(all_pathways_meta):
+        print(f"Reanudando: {len(all_pathways_meta) - len(pendientes)} rutas ya descargadas según el manifiesto.")
+
+    genes_por_ruta = None
+    if pendientes:
         try:
-            with open(file_path, 'w', encoding='utf-8') as f:
-                json.dump(pathway_data_to_save, f, indent=2, ensure_ascii=False)
-            print(f"Datos de la ruta {path_id} guardados en {file_path}")
-            successful_downloads += 1
-        except IOError as e:
-            print(f"Error al guardar el archivo {file_path}: {e}")
-            failed_downloads += 1
-        except Exception as e:
-            print(f"Un error inesperado ocurrio al guardar {file_path}: {e}")
-            failed_downloads += 1
+            genes_por_ruta = await obtener_genes_por_ruta(cliente, ORGANISM_CODE)
+        except httpx.HTTPError as e:
+            print(f"No se pudo obtener link/pathway/{ORGANISM_CODE} ({e}); se piden los genes ruta a ruta.")
 
+    resultados = await asyncio.gather(*(
+        procesar_ruta(cliente, p_meta, manifiesto,
+                      None if genes_por_ruta is None else genes_por_ruta.get(p_meta["pathway_id"], []))
+        for p_meta in pendientes
+    ))
+    resumen = {estado: resultados.count(estado) for estado in (RUTA_GUARDADA, RUTA_SIN_KGML, RUTA_FALLIDA)}
 
     print("\n--- Proceso de descarga de datos graficos de rutas KEGG a JSON completado ---")
-    print(f"Total de rutas procesadas: {len(all_pathways_meta)}")
-    print(f"Archivos JSON guardados/actualizados exitosamente: {successful_downloads}")
-    print(f"Archivos JSON con fallos al guardar: {failed_downloads}")
+    print(f"Total de rutas procesadas: {len(pendientes)}")
+    print(f"Rutas guardadas con KGML: {resumen[RUTA_GUARDADA]}")
+    print(f"Rutas sin KGML en KEGG (guardadas sin KGML): {resumen[RUTA_SIN_KGML]}")
+    print(f"Rutas fallidas (KGML no descargado o error al guardar; se reintentarán): {resumen[RUTA_FALLIDA]}")
+    return resumen
+
+
+def main(verificar=False):
+    async def _ejecutar():
+        async with crear_cliente_kegg() as cliente:
+            await main_async(cliente, verificar)
+    asyncio.run(_ejecutar())
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Descarga las rutas KEGG (KGML y genes) de un organismo.")
+    parser.add_argument("--verify", action="store_true",
+                        help="Comprueba las rutas ya descargadas y vuelve a descargar las que no coincidan.")
+    args = parser.parse_args()
+    main(verificar=args.verify)
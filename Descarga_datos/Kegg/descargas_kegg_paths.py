@@ -1,8 +1,8 @@
 '''
 Resumen:
-Este script procesa archivos JSON descargados con datos de KEGG, extrae información sobre
+Este script procesa los archivos descargados con datos de KEGG, extrae información sobre
 rutas metabólicas de las entradas de *Bacillus cereus*, y guarda los resultados 
-en archivos JSON estructurados por bloques.
+en archivos NDJSON comprimidos (`comun.registros`) estructurados por bloques.
 
 Pasos del script:
 1. **Configuración de carpetas**:
@@ -10,19 +10,18 @@ Pasos del script:
    descargados y una carpeta de salida (`descargas_rutas_kegg_json`) donde se guardarán 
    los resultados.
 
-2. **Función `extraer_info_pathways`**:
-   - Extrae información relevante sobre rutas metabólicas a partir del campo `raw_text` 
-   de cada entrada.
-   - Para cada ruta encontrada, se guarda el ID de la ruta y su nombre.
+2. **Parseo de las entradas** (`Kegg.parser_kegg.parsear_entrada_kegg`):
+   - Convierte el campo `raw_text` de cada entrada en un documento estructurado del gen
+   (rutas, ortología, posición, motivos, enlaces a otras bases de datos, secuencias...),
+   en una sola pasada y sin mensajes por línea.
 
 3. **Función `procesar_archivos_kegg`**:
-   - Recorre los archivos JSON en la carpeta de entrada, cargando y procesando cada uno.
-   - Si el archivo contiene datos válidos en formato lista, extrae las rutas metabólicas
-   y las almacena en un acumulador.
-   - Una vez que el acumulador alcanza el tamaño de `bloque_size` (500 entradas), 
-   se guarda en un archivo JSON en la carpeta de salida.
-   - Finalmente, guarda cualquier entrada restante que no haya alcanzado el tamaño
-   de bloque.
+   - Reparte los archivos de la carpeta de entrada (`.ndjson.gz`, o `.json` antiguos)
+   entre `procesos` procesos (por defecto, uno por núcleo): cada proceso lee y parsea un
+   archivo completo. Como mucho hay `2 * procesos` archivos en curso a la vez.
+   - Los resultados se recogen en el orden de los archivos y cada entrada con rutas
+   metabólicas se escribe en la salida (`rutas_bloque_XXXX.ndjson.gz`), que cambia de
+   archivo al alcanzar `tamano_maximo_archivo` bytes.
 
 4. **Ejecución del script**:
    - Al ejecutarse el script, comienza el procesamiento de los archivos en la carpeta 
@@ -31,117 +30,85 @@ Pasos del script:
 
 
 import os
-import json
-import re
+import time
+import argparse
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
+from comun.registros import EscritorRegistros, leer_registros, listar_archivos_registros, TAMANO_MAXIMO_ARCHIVO
+from Kegg.parser_kegg import parsear_entrada_kegg
 
 # Configuración
 carpeta_entrada = "descargas_kegg_json"  # Carpeta donde estarán los archivos descargados
 carpeta_salida = "descargas_rutas_kegg_json"  # Carpeta donde se guardarán los archivos de rutas
-batch_size = 10  # Número de entradas por descarga
-bloque_size = 500  # Número de entradas por archivo JSON
-
-# Crear carpeta de salida si no existe
-Path(carpeta_salida).mkdir(parents=True, exist_ok=True)
-
-def extraer_info_pathways(raw_text):
-    entry = None
-    name = None
-    pathways = []
-
-    lines = raw_text.split("\n")
-    current_key = None
-
-    for line in lines:
-        if not line.strip():
-            continue
-
-        if re.match(r"^[A-Z]", line[:12]):
-            current_key = line[:12].strip()
-            content = line[12:].strip()
-        else:
-            content = line.strip()
-
-        # Depuración: mostrar líneas que estamos procesando
-        print(f"Procesando línea: {line}")
-
-        if current_key == "ENTRY":
-            entry = content.split()[0]
-        elif current_key == "NAME":
-            name = content
-        elif current_key == "PATHWAY":
-            # Ajuste para capturar las rutas en el formato correcto
-            match = re.match(r"^(bce\d{5})\s+(.*)$", content)
-            if match:
-                pathways.append({
-                    "pathway_id": match.group(1),  # ID de la ruta (por ejemplo, bce03010)
-                    "pathway_name": match.group(2)  # Nombre de la ruta (por ejemplo, Ribosome)
-                })
-
-    # Depuración: Mostrar las rutas extraídas
-    print(f"Rutas encontradas: {pathways}")
-
-    return {
-        "entry": entry,
-        "name": name,
-        "pathways": pathways
-    }
-
-def procesar_archivos_kegg(carpeta):
-    total_guardados = 0
-    acumulador = []
-    bloques_guardados = 0
-
-    # Verificamos que la carpeta de entrada tenga archivos
-    archivos = sorted(os.listdir(carpeta))
+tamano_maximo_archivo = TAMANO_MAXIMO_ARCHIVO  # Bytes (sin comprimir) por archivo de salida antes de rotar
+
+def procesar_archivo(ruta_entrada):
+    """
+    Parsea las entradas de un archivo y devuelve (documentos con rutas, entradas leídas, error).
+    Se ejecuta en los procesos del pool; si el archivo está dañado se devuelve lo leído hasta el error.
+    """
+    documentos = []
+    entradas = 0
+    try:
+        for item in leer_registros(ruta_entrada):
+            raw_text = item.get("raw_text", "")
+            if raw_text:  # Si hay raw_text, procesar
+                entradas += 1
+                doc = parsear_entrada_kegg(raw_text)
+                if doc["pathways"]:  # Solo guardar si tiene rutas
+                    documentos.append(doc)
+    except (ValueError, EOFError, OSError) as e:
+        return documentos, entradas, str(e)
+    return documentos, entradas, None
+
+def parsear_archivos(archivos, procesos):
+    """Generador de los resultados de `procesar_archivo`, en el orden de `archivos`."""
+    if procesos <= 1 or len(archivos) <= 1:
+        yield from map(procesar_archivo, archivos)
+        return
+    with ProcessPoolExecutor(max_workers=procesos) as pool:
+        pendientes = deque()
+        for ruta_entrada in archivos:
+            pendientes.append(pool.submit(procesar_archivo, ruta_entrada))
+            # Se limita el número de archivos en curso para no acumular resultados en memoria
+            if len(pendientes) >= 2 * procesos:
+                yield pendientes.popleft().result()
+        while pendientes:
+            yield pendientes.popleft().result()
+
+def procesar_archivos_kegg(carpeta, procesos=None):
+    # Crear carpeta de salida si no existe
+    Path(carpeta_salida).mkdir(parents=True, exist_ok=True)
+
+    # Verificamos que la carpeta de entrada tenga archivos de registros
+    archivos = listar_archivos_registros(carpeta)
     if not archivos:
         print("No se encontraron archivos en la carpeta de entrada.")
         return
 
-    for archivo in archivos:
-        if archivo.endswith(".json"):
-            print(f"Procesando archivo: {archivo}")
-            ruta_entrada = os.path.join(carpeta, archivo)
-            with open(ruta_entrada, "r") as f:
-                try:
-                    datos = json.load(f)
-                    if not isinstance(datos, list):  # Verificar si el contenido es una lista
-                        print(f"El archivo {archivo} no tiene el formato esperado (debe ser una lista de entradas).")
-                        continue
-
-                    for item in datos:
-                        raw_text = item.get("raw_text", "")
-                        if raw_text:  # Si hay raw_text, procesar
-                            doc = extraer_info_pathways(raw_text)
-                            if doc["pathways"]:  # Solo guardar si tiene rutas
-                                acumulador.append(doc)
-
-                    # Si se ha alcanzado el número de entradas en bloque, guardar archivo
-                    if len(acumulador) >= bloque_size:
-                        bloques_guardados += 1
-                        nombre_salida = f"rutas_bloque_{bloques_guardados:04d}.json"
-                        ruta_salida = os.path.join(carpeta_salida, nombre_salida)
-                        with open(ruta_salida, "w") as out_file:
-                            json.dump(acumulador[:bloque_size], out_file, indent=2)
-                        print(f" Guardado archivo {nombre_salida} con {bloque_size} entradas.")
-                        acumulador = acumulador[bloque_size:]  # Reiniciar acumulador
-
-                except json.JSONDecodeError:
-                    print(f"Error al procesar el archivo {archivo}. No es un archivo JSON válido.")
-
-    # Guardar lo que quede en el acumulador
-    if acumulador:
-        bloques_guardados += 1
-        nombre_salida = f"rutas_bloque_{bloques_guardados:04d}.json"
-        ruta_salida = os.path.join(carpeta_salida, nombre_salida)
-        with open(ruta_salida, "w") as out_file:
-            json.dump(acumulador, out_file, indent=2)
-        print(f"Guardado final archivo {nombre_salida} con {len(acumulador)} entradas.")
-
-    if bloques_guardados == 0:
+    procesos = procesos or os.cpu_count() or 1
+    inicio = time.perf_counter()
+    entradas_leidas = 0
+
+    # El escritor rota de archivo por tamaño
+    with EscritorRegistros(carpeta_salida, "rutas_bloque", tamano_maximo_archivo) as escritor:
+        for ruta_entrada, (documentos, entradas, error) in zip(archivos, parsear_archivos(archivos, procesos)):
+            entradas_leidas += entradas
+            for doc in documentos:
+                escritor.escribir(doc)
+            if error:
+                print(f"Error al procesar el archivo {os.path.basename(ruta_entrada)}. No es un archivo de registros válido: {error}")
+
+    segundos = time.perf_counter() - inicio
+    print(f"{entradas_leidas} entradas de {len(archivos)} archivos parseadas en {segundos:.2f} s con {procesos} procesos.")
+    if escritor.total == 0:
         print("No se encontraron rutas metabólicas válidas en los archivos.")
     else:
-        print(f"Total de archivos guardados: {bloques_guardados}")
+        print(f"Total de archivos guardados: {len(escritor.archivos)} ({escritor.total} entradas)")
 
 if __name__ == "__main__":
-    procesar_archivos_kegg(carpeta_entrada)
+    parser = argparse.ArgumentParser(description="Parsea las entradas de KEGG descargadas y extrae sus rutas.")
+    parser.add_argument("--procesos", type=int, default=None, help="Procesos en paralelo (def: uno por núcleo).")
+    args = parser.parse_args()
+    procesar_archivos_kegg(carpeta_entrada, args.procesos)
@@ -0,0 +1,42 @@
+# Kegg/kgml_comprimido.py
+
+'''
+Compresión del KGML de los documentos de rutas antes de cargarlos en MongoDB
+(`kegg_rutas_graficas`).
+
+`kgml_data` se guarda como binario zlib (nivel 9) junto al marcador `kgml_codec`
+("zlib"). El backend lo descomprime de forma transparente
+(`app/services/kegg_kgml_comprimido_service.py`, que debe usar los mismos códecs) y
+los documentos ya cargados en texto se convierten con `python -m app.jobs.comprimir_kgml`.
+
+Solo se comprime al escribir en MongoDB: los archivos NDJSON+gzip de las descargas
+siguen guardando el KGML como texto (ya van comprimidos y tienen que ser JSON).
+'''
+
+import zlib
+from bson.binary import Binary
+
+CODEC_ZLIB = "zlib"
+NIVEL_COMPRESION = 9
+
+
+def comprimir_documento_ruta(documento):
+    """
+    Copia del documento con `kgml_data` comprimido. Los documentos sin KGML en texto
+    (otras colecciones, o ya comprimidos) se devuelven sin cambios.
+    """
+    kgml = documento.get("kgml_data")
+    if not isinstance(kgml, str):
+        return documento
+    return dict(documento, kgml_data=Binary(zlib.compress(kgml.encode("utf-8"), NIVEL_COMPRESION)),
+                kgml_codec=CODEC_ZLIB)
+
+
+def kgml_de_documento(documento):
+    """KGML en texto de un documento de ruta, esté o no comprimido."""
+    kgml = documento.get("kgml_data")
+    if isinstance(kgml, (bytes, bytearray)):
+        if documento.get("kgml_codec", CODEC_ZLIB) != CODEC_ZLIB:
+            raise ValueError(f"Códec de KGML desconocido: {documento.get('kgml_codec')!r}")
+        return zlib.decompress(bytes(kgml)).decode("utf-8")
+    return kgml
@@ -0,0 +1,141 @@
+# Kegg/mapeos_kegg.py
+
+'''
+Descarga de las relaciones gen <-> ruta y KEGG <-> UniProt de un organismo con los
+endpoints masivos de KEGG, una petición por relación:
+- `link/pathway/<organismo>`: todas las parejas (gen, ruta), p. ej.
+  `bce:BC_0001<TAB>path:bce00010`.
+- `conv/uniprot/<organismo>`: todas las parejas (gen, accesión de UniProt), p. ej.
+  `bce:BC_0001<TAB>up:Q81JF6`.
+
+Sustituyen a las miles de peticiones `get/<ruta>/genes` (una por ruta, que además suelen
+responder 400) y a tener que descargar la ficha de cada gen para saber en qué rutas está.
+`descargas_definiciones_rutas_kegg_kgml` y `actualizacion_incremental_kegg` usan
+`obtener_genes_por_ruta` para rellenar `kegg_genes_in_pathway`.
+
+Se generan dos colecciones, con un documento por gen:
+- `kegg_genes_rutas`: {"_id": "bce:BC_0001", "entry": "BC_0001", "pathways": ["bce00010", ...]}
+- `kegg_uniprot`: {"_id": "bce:BC_0001", "entry": "BC_0001", "uniprot": ["Q81JF6"]}
+
+Ambas tienen índices sobre `entry` (clave de `kegg_rutas`) y sobre el campo de la
+relación (`pathways` / `uniprot`, multiclave), de modo que se puede pasar de una ruta a
+sus genes, de un gen de KEGG a su entrada de UniProt (`primaryAccession`) y al revés con
+una búsqueda por índice.
+
+Los documentos se guardan en `descargas_kegg_mapeos/` (NDJSON+gzip, `comun.registros`) y,
+con `--subir`, se cargan en MongoDB con recarga azul/verde (`comun.versiones_dataset`).
+
+Uso (desde la carpeta `Descarga_datos`):
+    python -m Kegg.mapeos_kegg [--subir] [--organismo bce]
+'''
+
+import os
+import asyncio
+import argparse
+from comun.registros import escribir_registros
+from comun.carga_mongo import cargar_registros
+from comun.versiones_dataset import preparar_staging, validar_staging, promover, conectar
+from Kegg.descargas_datos_kegg import crear_cliente_kegg
+
+CARPETA_MAPEOS = "descargas_kegg_mapeos"
+COLECCION_GENES_RUTAS = "kegg_genes_rutas"
+COLECCION_KEGG_UNIPROT = "kegg_uniprot"
+INDICES = {
+    COLECCION_GENES_RUTAS: ("entry", "pathways"),
+    COLECCION_KEGG_UNIPROT: ("entry", "uniprot"),
+}
+
+
+async def obtener_enlaces(cliente, endpoint):
+    """Parejas (origen, destino) de un endpoint `link/` o `conv/` de KEGG."""
+    response = await cliente.get(endpoint)
+    response.raise_for_status()
+    enlaces = []
+    for linea in response.text.splitlines():
+        partes = linea.split("\t")
+        if len(partes) == 2:
+            enlaces.append((partes[0].strip(), partes[1].strip()))
+    return enlaces
+
+
+def _agrupar(enlaces, prefijo):
+    agrupados = {}
+    for origen, destino in enlaces:
+        agrupados.setdefault(origen, set()).add(destino.removeprefix(prefijo))
+    return {clave: sorted(valores) for clave, valores in agrupados.items()}
+
+
+def _sin_prefijo_ruta(enlaces):
+    return ((gen, ruta.removeprefix("path:")) for gen, ruta in enlaces)
+
+
+async def obtener_genes_por_ruta(cliente, organismo):
+    """{ruta: [genes]} a partir de `link/pathway/<organismo>`."""
+    enlaces = await obtener_enlaces(cliente, f"link/pathway/{organismo}")
+    return _agrupar(((ruta, gen) for gen, ruta in _sin_prefijo_ruta(enlaces)), "")
+
+
+async def obtener_mapeos(cliente, organismo):
+    """Descarga las dos relaciones y devuelve ({gen: [rutas]}, {gen: [accesiones UniProt]})."""
+    enlaces_rutas, enlaces_uniprot = await asyncio.gather(
+        obtener_enlaces(cliente, f"link/pathway/{organismo}"),
+        obtener_enlaces(cliente, f"conv/uniprot/{organismo}"),
+    )
+    return _agrupar(_sin_prefijo_ruta(enlaces_rutas), ""), _agrupar(enlaces_uniprot, "up:")
+
+
+def documentos_mapeo(relacion, campo):
+    """Un documento por gen: {"_id": "org:ID", "entry": "ID", campo: [...]}."""
+    for gen, valores in sorted(relacion.items()):
+        yield {"_id": gen, "entry": gen.split(":", 1)[-1], campo: valores}
+
+
+def subir_mapeo(db, coleccion, documentos):
+    """
+    Carga los documentos en el staging de `coleccion`, lo valida y lo promueve. Devuelve
+    False (sin promover) si hubo errores de escritura o la validación falla.
+    """
+    staging = preparar_staging(db, coleccion)
+    for campo in INDICES[coleccion]:
+        staging.create_index(campo)
+    resumen = cargar_registros(staging, documentos)
+    print(resumen.informe())
+    problemas = resumen.problemas() or validar_staging(db, coleccion)
+    if problemas:
+        for problema in problemas:
+            print(f"Carga incompleta: {problema}")
+        print(f"No se promueve '{staging.name}'; '{coleccion}' no se ha modificado.")
+        return False
+    promover(db, coleccion)
+    return True
+
+
+async def descargar_mapeos(cliente, organismo="bce", carpeta=CARPETA_MAPEOS, db=None):
+    """Descarga y guarda (y, si se pasa `db`, sube) los mapeos. Devuelve {colección: documentos}."""
+    rutas_por_gen, uniprot_por_gen = await obtener_mapeos(cliente, organismo)
+    resumen = {}
+    for coleccion, relacion, campo in ((COLECCION_GENES_RUTAS, rutas_por_gen, "pathways"),
+                                       (COLECCION_KEGG_UNIPROT, uniprot_por_gen, "uniprot")):
+        ruta = os.path.join(carpeta, f"{coleccion}.ndjson.gz")
+        resumen[coleccion] = escribir_registros(ruta, documentos_mapeo(relacion, campo))
+        print(f"{coleccion}: {resumen[coleccion]} genes guardados en {ruta}")
+        if db is not None:
+            subir_mapeo(db, coleccion, documentos_mapeo(relacion, campo))
+    return resumen
+
+
+def main(organismo="bce", subir=False):
+    db = conectar() if subir else None
+
+    async def _ejecutar():
+        async with crear_cliente_kegg() as cliente:
+            return await descargar_mapeos(cliente, organismo, db=db)
+    return asyncio.run(_ejecutar())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Descarga las relaciones gen-ruta y KEGG-UniProt de KEGG.")
+    parser.add_argument("--organismo", default="bce", help="Código KEGG del organismo.")
+    parser.add_argument("--subir", action="store_true", help="Carga las colecciones de mapeos en MongoDB.")
+    args = parser.parse_args()
+    main(args.organismo, args.subir)
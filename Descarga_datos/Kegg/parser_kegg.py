@@ -0,0 +1,144 @@
+# Kegg/parser_kegg.py
+
+'''
+Parser de las entradas de genes de KEGG en formato texto ("flat file", `get/<id>`).
+
+Cada línea de una entrada tiene la clave de la sección en las 12 primeras columnas y el
+contenido a partir de la columna 13. Las líneas de continuación dejan la clave en blanco
+y pertenecen a la última sección abierta; la entrada termina en `///`:
+
+    ENTRY       BC_0001           CDS       T00117
+    NAME        (RefSeq) chromosomal replication initiator protein DnaA
+    ORTHOLOGY   K02313  chromosomal replication initiator protein
+    PATHWAY     bce02020  Two-component system
+                bce04112  Cell cycle - Caulobacter
+    POSITION    1..1344
+    DBLINKS     NCBI-ProteinID: NP_830000
+                UniProt: Q81JF6
+    AASEQ       447
+                MLNIDQ...
+
+`parsear_entrada_kegg(raw_text)` recorre las líneas una sola vez, sin expresiones
+regulares por línea, y devuelve un documento estructurado del gen:
+- `entry`, `type`, `genome`: de la línea ENTRY.
+- `symbol` (lista), `name`, `organism` ({code, name}).
+- `orthology`: [{ko_id, name, ec}], `pathways`: [{pathway_id, pathway_name}],
+  `modules`: [{module_id, module_name}].
+- `position`: {raw, chromosome, start, end, strand}.
+- `motif`, `dblinks`, `structure`: {base de datos: [identificadores]}.
+- `aaseq`, `ntseq`: {length, sequence}.
+- `otras_secciones`: el resto de secciones (BRITE, NETWORK...), como lista de líneas.
+
+Los campos `entry`, `name` y `pathways` mantienen el formato de los documentos que ya
+había en la colección `kegg_rutas`.
+'''
+
+import re
+
+ANCHO_CLAVE = 12
+_NUMEROS = re.compile(r"\d+")
+_EC = re.compile(r"\s*\[EC:([^\]]*)\]\s*$")
+
+
+def secciones_kegg(raw_text):
+    """Agrupa las líneas de la entrada en (clave, [contenidos]) uniendo las continuaciones."""
+    secciones = []
+    for linea in raw_text.splitlines():
+        if not linea.strip() or linea.startswith("///"):
+            continue
+        clave = linea[:ANCHO_CLAVE]
+        if clave[0] != " ":
+            secciones.append((clave.rstrip(), [linea[ANCHO_CLAVE:].strip()]))
+        elif secciones:
+            # Continuación (o subclave sangrada, que se conserva en el contenido)
+            secciones[-1][1].append(linea.strip())
+    return secciones
+
+
+def _id_y_nombre(lineas, campo_id, campo_nombre):
+    elementos = []
+    for linea in lineas:
+        partes = linea.split(None, 1)
+        if partes:
+            elementos.append({campo_id: partes[0], campo_nombre: partes[1].strip() if len(partes) > 1 else ""})
+    return elementos
+
+
+def _ortologia(lineas):
+    ortologos = []
+    for ortologo in _id_y_nombre(lineas, "ko_id", "name"):
+        ec = _EC.search(ortologo["name"])
+        ortologo["ec"] = ec.group(1).split() if ec else []
+        if ec:
+            ortologo["name"] = ortologo["name"][:ec.start()]
+        ortologos.append(ortologo)
+    return ortologos
+
+
+def _enlaces(lineas):
+    """Líneas "BASE: id1 id2" (DBLINKS, MOTIF, STRUCTURE) -> {BASE: [id1, id2]}."""
+    enlaces = {}
+    for linea in lineas:
+        base, separador, ids = linea.partition(":")
+        if separador:
+            enlaces.setdefault(base.strip(), []).extend(ids.split())
+    return enlaces
+
+
+def _secuencia(lineas):
+    longitud = lineas[0].split()[0] if lineas and lineas[0] else ""
+    return {
+        "length": int(longitud) if longitud.isdigit() else None,
+        "sequence": "".join(lineas[1:]).replace(" ", ""),
+    }
+
+
+def parsear_posicion(texto):
+    """`1..1344`, `complement(2290..3435)`, `2:join(10..20,30..40)` -> posición estructurada."""
+    cromosoma, _, ubicacion = texto.rpartition(":")
+    numeros = [int(n) for n in _NUMEROS.findall(ubicacion)]
+    return {
+        "raw": texto,
+        "chromosome": cromosoma or None,
+        "start": min(numeros) if numeros else None,
+        "end": max(numeros) if numeros else None,
+        "strand": "-" if "complement" in ubicacion else "+",
+    }
+
+
+def parsear_entrada_kegg(raw_text):
+    """Convierte el texto de una entrada de gen de KEGG en un documento estructurado."""
+    documento = {"entry": None, "name": None, "pathways": []}
+    otras = {}
+
+    for clave, lineas in secciones_kegg(raw_text):
+        if clave == "ENTRY":
+            partes = lineas[0].split()
+            documento["entry"] = partes[0] if partes else None
+            documento["type"] = partes[1] if len(partes) > 1 else None
+            documento["genome"] = partes[2] if len(partes) > 2 else None
+        elif clave == "SYMBOL":
+            documento["symbol"] = [s.strip() for s in " ".join(lineas).split(",") if s.strip()]
+        elif clave == "NAME":
+            documento["name"] = " ".join(lineas)
+        elif clave == "ORTHOLOGY":
+            documento["orthology"] = _ortologia(lineas)
+        elif clave == "ORGANISM":
+            codigo, _, nombre = lineas[0].partition(" ")
+            documento["organism"] = {"code": codigo, "name": nombre.strip()}
+        elif clave == "PATHWAY":
+            documento["pathways"] = _id_y_nombre(lineas, "pathway_id", "pathway_name")
+        elif clave == "MODULE":
+            documento["modules"] = _id_y_nombre(lineas, "module_id", "module_name")
+        elif clave == "POSITION":
+            documento["position"] = parsear_posicion(lineas[0])
+        elif clave in ("MOTIF", "DBLINKS", "STRUCTURE"):
+            documento[clave.lower()] = _enlaces(lineas)
+        elif clave in ("AASEQ", "NTSEQ"):
+            documento[clave.lower()] = _secuencia(lineas)
+        else:
+            otras.setdefault(clave, []).extend(lineas)
+
+    if otras:
+        documento["otras_secciones"] = otras
+    return documento
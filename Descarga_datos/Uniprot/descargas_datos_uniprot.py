@@ -4,22 +4,43 @@ Script para descargar datos de proteínas desde UniProt en formato JSON.
 
 Funcionalidades:
 - Realiza búsquedas en UniProt por una consulta (query) y descarga los resultados en bloques.
-- Guarda los datos descargados en archivos `.json` dentro de una carpeta local.
+  La paginación usa el cursor de la cabecera `Link` (`proceso_descarga`) o, con `--stream`,
+  una única transferencia por `uniprotkb/stream` (`descargar_stream_uniprot`). En ambos casos
+  la respuesta llega comprimida con gzip, se decodifica de forma incremental y cada bloque se
+  escribe a disco en cuanto se completa, de modo que la memoria no depende del total.
+- Guarda los datos descargados en archivos NDJSON comprimidos (`.ndjson.gz`, `comun.registros`)
+  dentro de una carpeta local.
 - Muestra el número total de entradas disponibles en UniProt para la consulta.
 - Cuenta las entradas descargadas por bloque y el total acumulado.
 - Al finalizar, compara las entradas descargadas con el total disponible en UniProt.
 
 
 - La variable `query` especificar el organismo o taxón.
-- Definir el tamaño de los bloques (`limit`) y el número máximo de entradas a descargar (`total`).
-- Se puede usar el total real de UniProt como límite para descargar todas las entradas disponibles.
+- Definir el tamaño de los bloques (`limit`). Se descargan todas las entradas de la consulta;
+  el total que informa UniProt (`obtener_numero_entradas`) se usa para comprobar el resultado.
+- Cada bloque se guarda de forma atómica y se registra en `descarga.manifiesto` (`comun.manifiesto`);
+  al relanzar la descarga, los bloques ya registrados se leen de disco en lugar de pedirse otra vez.
+  Con `--verify` se comprueban antes sus archivos y se vuelven a descargar los que no coincidan.
+- Las peticiones del cliente httpx pasan por la caché en disco de `comun.cache_http` si se
+  activa con la variable de entorno `HTTP_CACHE` (`normal`, `offline` o `refrescar`).
+- `UNIPROT_API_URL` cambia la URL base de la API, p. ej. para usar el servidor simulado de
+  `comun.servidor_simulado`.
 '''
 import requests
+import httpx
+import argparse
 import time
 import json
 import os
+import re
+from comun.manifiesto import Manifiesto
+from comun.registros import EXTENSION, escribir_registros, leer_registros
+from comun.cache_http import TransporteCache, cache_desde_entorno
 
 
+UNIPROT_API_URL = os.getenv("UNIPROT_API_URL", "https://rest.uniprot.org/uniprotkb")
+UNIPROT_TIMEOUT = httpx.Timeout(60.0, connect=10.0)
+
 # Crear una carpeta para almacenar los archivos .json si no existe
 carpeta_descargas = "descargas_Uniprote_json"
 if not os.path.exists(carpeta_descargas):
@@ -43,35 +64,38 @@ def descargar_datos_uniprot(query, limit=100, offset=0, format='json'):
         return None
 
 
-# Función para buscar proteínas revisadas (validadas) por taxón específico
-def buscar_proteinas_revisadas_por_taxon(taxon_id):
+# Función para buscar proteínas revisadas (validadas) por taxón específico.
+# Recorre todas las páginas siguiendo el cursor de la cabecera Link (rel="next").
+# Para descargar después las entradas completas de esas accesiones, ver
+# `Uniprot.descargas_por_accesion_uniprot` (pocas peticiones para cientos de proteínas).
+def buscar_proteinas_revisadas_por_taxon(taxon_id, limit=500):
     # URL para buscar solo proteínas validadas (reviewed) asociadas a un taxón específico
-    url = f"https://rest.uniprot.org/uniprotkb/search?query=organism_id:{taxon_id}+AND+reviewed:true&format=json"
+    url = f"{UNIPROT_API_URL}/search?query=organism_id:{taxon_id}+AND+reviewed:true&format=json&size={limit}"
 
-    # Realizar la solicitud GET a la API
-    response = requests.get(url)
+    ids_proteinas = []
+    while url:
+        # Realizar la solicitud GET a la API
+        response = requests.get(url)
 
-    # Verificar si la solicitud fue exitosa
-    if response.status_code == 200:
-        datos = response.json()
+        # Verificar si la solicitud fue exitosa
+        if response.status_code != 200:
+            print(f"Error en la búsqueda del taxón {taxon_id}. Estado: {response.status_code}")
+            return ids_proteinas
 
-        # Verificar si hay resultados
-        if 'results' in datos and datos['results']:
+        datos = response.json()
+        if not ids_proteinas and datos.get('results'):
             print(f"Proteínas validadas asociadas al taxón {taxon_id}:")
-            # Recopilar los IDs de proteínas revisadas
-            ids_proteinas = []
-            for resultado in datos['results']:
-                id_uniprot = resultado.get('primaryAccession', 'No disponible')
-                nombre = resultado.get('proteinDescription', {}).get('recommendedName', {}).get('fullName', 'No disponible')
-                ids_proteinas.append(id_uniprot)
-                print(f"ID UniProt: {id_uniprot} - Nombre: {nombre}")
-            return ids_proteinas
-        else:
-            print(f"No se encontraron proteínas validadas para el taxón {taxon_id}.")
-            return []
-    else:
-        print(f"Error en la búsqueda del taxón {taxon_id}. Estado: {response.status_code}")
-        return []
+        # Recopilar los IDs de proteínas revisadas
+        for resultado in datos.get('results', []):
+            id_uniprot = resultado.get('primaryAccession', 'No disponible')
+            nombre = resultado.get('proteinDescription', {}).get('recommendedName', {}).get('fullName', 'No disponible')
+            ids_proteinas.append(id_uniprot)
+            print(f"ID UniProt: {id_uniprot} - Nombre: {nombre}")
+        url = response.links.get("next", {}).get("url")
+
+    if not ids_proteinas:
+        print(f"No se encontraron proteínas validadas para el taxón {taxon_id}.")
+    return ids_proteinas
 
 
 # Función para descargar toda la información de una proteína específica por su ID
@@ -133,34 +157,188 @@ def obtener_numero_entradas(query):
         return 0
 
 
-# Función para gestionar la descarga por bloques desde una búsqueda general
-def proceso_descarga(query, limit=100, total=1000, delay=2):
-    offset = 0
-    while offset < total:
-        print(f"Descargando bloque desde {offset} hasta {offset + limit}...")
-        datos = descargar_datos_uniprot(query, limit=limit, offset=offset)
-              
-        if datos and 'results' in datos:
-
-            # Guardar los datos en un archivo JSON dentro de la carpeta "descargas_Uniprot_json"
-            archivo_json = os.path.join(carpeta_descargas, f"datos_uniprot_{offset}_{offset + limit}.json")
-            with open(archivo_json, 'w') as archivo:
-                json.dump(datos['results'], archivo, indent=4)
-
-            # Para visualizar los descargando
-            print(f"Resultados descargados: {len(datos['results'])} proteínas.")
-            for resultado in datos['results']:
-                print(f"ID UniProt: {resultado.get('primaryAccession', 'No disponible')} - Nombre: {resultado.get('proteinDescription', {}).get('recommendedName', {}).get('fullName', 'No disponible')}")
-            yield datos['results']  #
-            print("No se encontraron más datos o ocurrió un error.")
+# Crea el cliente HTTP para UniProt. httpx pide y descomprime gzip de forma
+# incremental (cabecera Accept-Encoding) y reintenta los errores de conexión.
+# Con HTTP_CACHE las respuestas se guardan (y se sirven) desde la caché en disco.
+def crear_cliente_uniprot(transport=None, cache=None):
+    transport = transport or httpx.HTTPTransport(retries=3)
+    cache = cache or cache_desde_entorno()
+    if cache is not None:
+        transport = TransporteCache(cache, transport)
+    return httpx.Client(
+        timeout=UNIPROT_TIMEOUT,
+        headers={"Accept-Encoding": "gzip"},
+        transport=transport,
+    )
+
+
+# Caracteres que cambian el estado del escáner de `iterar_resultados_json`
+_CARACTERES_JSON = re.compile(r'[{}\[\]"\\]')
+
+
+# Decodifica de forma incremental una respuesta {"results": [ {...}, {...}, ... ]}
+# a partir de trozos de texto, devolviendo cada entrada en cuanto está completa.
+# Cada trozo se recorre una sola vez (saltando de un carácter estructural al
+# siguiente) para encontrar dónde termina cada entrada, y solo entonces se
+# decodifica; solo se mantiene en memoria la entrada que se está recibiendo.
+# Lanza ValueError si la respuesta termina sin cerrar la lista de resultados.
+def iterar_resultados_json(trozos):
+    cabecera = ""  # Texto anterior a la lista "results"
+    dentro_de_resultados = terminado = False
+    profundidad = 0
+    en_cadena = escapado = False
+    piezas = []  # Trozos de la entrada que se está recibiendo
+    for trozo in trozos:
+        if terminado:
             break
-
-        offset += limit
-        time.sleep(delay)  # Pausa para evitar sobrecargar la API
-
-
-
-def main():
+        if not dentro_de_resultados:
+            cabecera += trozo
+            clave = cabecera.find('"results"')
+            inicio = cabecera.find("[", clave) if clave != -1 else -1
+            if inicio == -1:
+                continue
+            trozo, cabecera = cabecera[inicio + 1:], ""
+            dentro_de_resultados = True
+
+        inicio_entrada = 0 if profundidad else None
+        saltar_hasta = 1 if escapado else 0  # Carácter escapado al final del trozo anterior
+        escapado = False
+        for coincidencia in _CARACTERES_JSON.finditer(trozo, saltar_hasta):
+            posicion = coincidencia.start()
+            if posicion < saltar_hasta:
+                continue
+            caracter = trozo[posicion]
+            if en_cadena:
+                if caracter == "\\":
+                    saltar_hasta = posicion + 2
+                    escapado = saltar_hasta > len(trozo)
+                elif caracter == '"':
+                    en_cadena = False
+            elif caracter == '"':
+                en_cadena = True
+            elif caracter in "{[":
+                if profundidad == 0:
+                    inicio_entrada = posicion
+                profundidad += 1
+            elif profundidad == 0:  # "]" que cierra la lista de resultados
+                terminado = True
+                break
+            else:
+                profundidad -= 1
+                if profundidad == 0:
+                    piezas.append(trozo[inicio_entrada:posicion + 1])
+                    yield json.loads("".join(piezas))
+                    piezas, inicio_entrada = [], None
+        if profundidad:
+            piezas.append(trozo[inicio_entrada:])
+
+    if not terminado:
+        if not dentro_de_resultados:
+            raise ValueError("La respuesta de UniProt no contiene la lista 'results'.")
+        raise ValueError("Respuesta de UniProt truncada: la lista 'results' no se cerró.")
+
+
+def archivo_bloque(offset, limit):
+    return os.path.join(carpeta_descargas, f"datos_uniprot_{offset}_{offset + limit}{EXTENSION}")
+
+
+# Función para gestionar la descarga por bloques desde una búsqueda general.
+# Pagina con cursor: cada respuesta indica la página siguiente en la cabecera
+# Link (rel="next"), que UniProt sí admite para paginar en profundidad. Cada
+# página se guarda en cuanto llega y se registra en el manifiesto junto con el
+# enlace a la siguiente, de modo que una ejecución interrumpida se reanuda en
+# la página pendiente.
+def proceso_descarga(query, limit=500, delay=0, verificar=False, cliente=None):
+    manifiesto = Manifiesto.cargar(carpeta_descargas, {"query": query, "limit": limit, "modo": "cursor"})
+    if verificar:
+        manifiesto.verificar()
+
+    cliente_propio = cliente is None
+    cliente = cliente or crear_cliente_uniprot()
+    url = f"{UNIPROT_API_URL}/search"
+    params = {'query': query, 'format': 'json', 'size': limit}
+    pagina = 0
+    try:
+        while url:
+            clave = f"pagina_{pagina:05d}"
+            archivo_json = archivo_bloque(pagina * limit, limit)
+            pagina += 1
+
+            # Página ya descargada en una ejecución anterior: se lee de disco
+            if manifiesto.completado(clave):
+                print(f"Página {pagina} ya descargada según el manifiesto.")
+                yield list(leer_registros(archivo_json))
+                url, params = manifiesto.completados[clave]["siguiente"], None
+                continue
+
+            print(f"Descargando página {pagina} ({limit} entradas por página)...")
+            response = cliente.get(url, params=params)
+            if response.status_code != 200:
+                print(f"Error al descargar datos de UniProt: {response.status_code}")
+                return
+
+            resultados = response.json().get('results', [])
+            siguiente = response.links.get("next", {}).get("url")
+
+            # Guardar los datos dentro de la carpeta "descargas_Uniprot_json"
+            escribir_registros(archivo_json, resultados)
+            manifiesto.registrar(clave, archivo_json, entradas=len(resultados), siguiente=siguiente)
+            print(f"Resultados descargados: {len(resultados)} proteínas.")
+            yield resultados
+
+            url, params = siguiente, None
+            if url and delay:
+                time.sleep(delay)  # Pausa opcional entre páginas
+    finally:
+        if cliente_propio:
+            cliente.close()
+
+
+# Descarga todas las entradas de la consulta en una única transferencia con el
+# endpoint `uniprotkb/stream`. La respuesta (comprimida con gzip) se descomprime y
+# decodifica según llega, y las entradas se escriben en bloques de `limit`, así la
+# memoria no crece con el tamaño del taxón. No se puede reanudar a mitad del
+# stream: si se interrumpe, se vuelve a pedir entero (los bloques se siguen
+# registrando en el manifiesto para poder comprobarlos con --verify).
+def descargar_stream_uniprot(query, limit=500, verificar=False, cliente=None):
+    manifiesto = Manifiesto.cargar(carpeta_descargas, {"query": query, "limit": limit, "modo": "stream"})
+    if verificar:
+        manifiesto.verificar()
+
+    def guardar(numero, bloque):
+        archivo_json = archivo_bloque(numero * limit, limit)
+        escribir_registros(archivo_json, bloque)
+        manifiesto.registrar(f"bloque_{numero:05d}", archivo_json, entradas=len(bloque))
+        print(f"Guardado bloque {numero + 1} con {len(bloque)} proteínas.")
+
+    cliente_propio = cliente is None
+    cliente = cliente or crear_cliente_uniprot()
+    try:
+        params = {'query': query, 'format': 'json'}
+        with cliente.stream("GET", f"{UNIPROT_API_URL}/stream", params=params) as response:
+            if response.status_code != 200:
+                print(f"Error al descargar datos de UniProt: {response.status_code}")
+                return
+
+            numero = 0
+            bloque = []
+            for entrada in iterar_resultados_json(response.iter_text()):
+                bloque.append(entrada)
+                if len(bloque) == limit:
+                    guardar(numero, bloque)
+                    yield bloque
+                    numero += 1
+                    bloque = []
+            if bloque:
+                guardar(numero, bloque)
+                yield bloque
+    finally:
+        if cliente_propio:
+            cliente.close()
+
+
+
+def main(verificar=False, stream=False):
       # EN UNIPROT HAY  20,421 RESULTS
     #query = "organism_id:9606 AND reviewed:true"
     
@@ -184,7 +362,6 @@ def main():
 
     limit = 500
     total = obtener_numero_entradas(query)  # Obtener el número total de entradas
-    delay = 2  # Para evitar demasiadas peticiones rápidas
    
     # Verificar si se pudo obtener el número total
     if total == 0:
@@ -196,8 +373,12 @@ def main():
 
     entradas_descargadas = 0  # Contador total real
 
-    # Descargar en bloques
-    for datos in proceso_descarga(query=query, limit=limit, total=total, delay=delay):
+    # Descargar en bloques (una sola transferencia con --stream, o por páginas con cursor)
+    if stream:
+        bloques = descargar_stream_uniprot(query=query, limit=limit, verificar=verificar)
+    else:
+        bloques = proceso_descarga(query=query, limit=limit, verificar=verificar)
+    for datos in bloques:
         cantidad_bloque = len(datos)
         entradas_descargadas += cantidad_bloque
         print(f"Entradas descargadas en este bloque: {cantidad_bloque}")
@@ -216,4 +397,10 @@ def main():
     
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Descarga las entradas de UniProt de una consulta.")
+    parser.add_argument("--verify", action="store_true",
+                        help="Comprueba los bloques ya descargados y vuelve a descargar los que no coincidan.")
+    parser.add_argument("--stream", action="store_true",
+                        help="Descarga todas las entradas en una única transferencia con uniprotkb/stream.")
+    args = parser.parse_args()
+    main(verificar=args.verify, stream=args.stream)
@@ -0,0 +1,166 @@
+# Uniprot/descargas_por_accesion_uniprot.py
+
+'''
+Descarga por lotes de entradas de UniProt a partir de una lista de accesiones.
+
+En lugar de una petición `uniprotkb/<accesión>.json` por proteína, las accesiones se
+agrupan en consultas `accession:(A OR B OR ...)` al endpoint `uniprotkb/stream`, que
+devuelve todas las entradas de la consulta en una sola respuesta:
+- `agrupar_accesiones` llena cada grupo mientras la URL resultante no supere
+  `LONGITUD_MAXIMA_URL` (y como mucho `MAXIMO_ACCESIONES` por consulta), así que
+  actualizar unos cientos de proteínas cuesta unas pocas peticiones.
+- Los grupos se piden de forma concurrente con el cliente compartido
+  `comun.cliente_http` (límite de tasa `UNIPROT_PETICIONES_POR_SEGUNDO`, concurrencia
+  `UNIPROT_CONCURRENCIA` y reintentos ante 429/5xx). Con `HTTP_CACHE` pasan por la caché
+  en disco de `comun.cache_http`.
+- Cada respuesta se decodifica entrada a entrada con el mismo escáner que las descargas
+  completas (`iterar_resultados_json`), que detecta las respuestas truncadas.
+- Las entradas se escriben en archivos NDJSON+gzip (`comun.registros`) según llega cada
+  grupo, sin esperar a los demás.
+Al terminar se informa por separado de las accesiones que UniProt no devolvió (obsoletas
+o erróneas) y de las de los grupos que fallaron tras los reintentos; estas se guardan en
+`<salida>/accesiones_fallidas.txt` para volver a pedirlas con `--archivo`.
+
+Uso (desde la carpeta `Descarga_datos`):
+    python -m Uniprot.descargas_por_accesion_uniprot P12345 Q81JF6 ... [--archivo lista.txt]
+        [--salida carpeta]
+'''
+
+import os
+import asyncio
+import argparse
+from urllib.parse import quote_plus
+from comun.cliente_http import ClienteHTTPAsync
+from comun.cache_http import cache_desde_entorno
+from comun.registros import EscritorRegistros
+from Uniprot.descargas_datos_uniprot import UNIPROT_API_URL, iterar_resultados_json
+
+LONGITUD_MAXIMA_URL = 4000  # Margen respecto a los ~8 KB que suelen admitir servidores y proxies
+MAXIMO_ACCESIONES = 500
+UNIPROT_PETICIONES_POR_SEGUNDO = float(os.getenv("UNIPROT_PETICIONES_POR_SEGUNDO", 3))
+UNIPROT_CONCURRENCIA = int(os.getenv("UNIPROT_CONCURRENCIA", 3))
+CARPETA_SALIDA = "descargas_uniprot_accesiones"
+ARCHIVO_FALLIDAS = "accesiones_fallidas.txt"
+_SEPARADOR = quote_plus(" OR ")
+
+
+def crear_cliente_uniprot_async(tasa=None, concurrencia=None):
+    """Crea el cliente HTTP asíncrono configurado para la API de UniProt."""
+    return ClienteHTTPAsync(
+        base_url=UNIPROT_API_URL,
+        tasa=tasa or UNIPROT_PETICIONES_POR_SEGUNDO,
+        concurrencia=concurrencia or UNIPROT_CONCURRENCIA,
+        timeout=120.0,
+        cache=cache_desde_entorno(),
+    )
+
+
+def consulta_accesiones(grupo):
+    return f"accession:({' OR '.join(grupo)})"
+
+
+def agrupar_accesiones(accesiones, longitud_maxima=LONGITUD_MAXIMA_URL, maximo=MAXIMO_ACCESIONES,
+                       url_base=UNIPROT_API_URL):
+    """
+    Reparte las accesiones (sin repetidas, en su orden) en grupos cuya URL de
+    `stream` no supera `longitud_maxima` caracteres.
+    """
+    # Longitud fija: URL, parámetros y `accession:()` ya codificados
+    fija = len(f"{url_base}/stream?format=json&query=") + len(quote_plus(consulta_accesiones([])))
+    grupo, longitud = [], fija
+    for accesion in dict.fromkeys(accesiones):
+        extra = len(quote_plus(accesion)) + (len(_SEPARADOR) if grupo else 0)
+        if grupo and (longitud + extra > longitud_maxima or len(grupo) == maximo):
+            yield grupo
+            grupo, longitud = [], fija
+            extra = len(quote_plus(accesion))
+        grupo.append(accesion)
+        longitud += extra
+    if grupo:
+        yield grupo
+
+
+async def descargar_grupo(cliente, grupo):
+    """Entradas de UniProt de un grupo de accesiones (una sola petición)."""
+    response = await cliente.get("stream", params={"format": "json", "query": consulta_accesiones(grupo)})
+    response.raise_for_status()
+    # Se decodifica entero antes de escribir nada: un grupo truncado cuenta como fallido
+    return list(iterar_resultados_json(response.iter_text()))
+
+
+async def _descargar_grupo_o_error(cliente, grupo):
+    try:
+        return grupo, await descargar_grupo(cliente, grupo), None
+    except Exception as e:
+        return grupo, None, e
+
+
+async def descargar_por_accesiones(cliente, accesiones, escritor, longitud_maxima=LONGITUD_MAXIMA_URL):
+    """
+    Descarga las entradas de `accesiones` por grupos y las escribe con `escritor`
+    (`EscritorRegistros`) según llegan. Devuelve un resumen con las peticiones hechas,
+    las entradas escritas, las accesiones que UniProt no devolvió (`faltan`) y las de
+    los grupos que fallaron (`fallidas`, que conviene volver a pedir).
+    """
+    grupos = list(agrupar_accesiones(accesiones, longitud_maxima, url_base=str(cliente.base_url).rstrip("/")))
+    pedidas = {accesion for grupo in grupos for accesion in grupo}
+    encontradas, fallidas = set(), set()
+    errores = 0
+    for tarea in asyncio.as_completed([_descargar_grupo_o_error(cliente, grupo) for grupo in grupos]):
+        grupo, entradas, error = await tarea
+        if error is not None:
+            errores += 1
+            fallidas.update(grupo)
+            print(f"Error al descargar un grupo de {len(grupo)} accesiones de UniProt: {error!r}")
+            continue
+        for entrada in entradas:
+            escritor.escribir(entrada)
+            encontradas.add(entrada.get("primaryAccession"))
+            encontradas.update(entrada.get("secondaryAccessions", []))
+        print(f"Grupo descargado: {len(entradas)} entradas.")
+
+    faltan = sorted(pedidas - encontradas - fallidas)
+    return {"pedidas": len(pedidas), "peticiones": len(grupos), "errores": errores,
+            "entradas": escritor.total, "faltan": faltan, "fallidas": sorted(fallidas)}
+
+
+def leer_accesiones(ruta):
+    """Accesiones de un archivo de texto (separadas por espacios, comas o saltos de línea)."""
+    with open(ruta, "r", encoding="utf-8") as f:
+        return f.read().replace(",", " ").split()
+
+
+def main(accesiones, carpeta=CARPETA_SALIDA):
+    async def _ejecutar():
+        async with crear_cliente_uniprot_async() as cliente:
+            with EscritorRegistros(carpeta, "uniprot") as escritor:
+                return await descargar_por_accesiones(cliente, accesiones, escritor)
+
+    resumen = asyncio.run(_ejecutar())
+    print(f"Accesiones pedidas: {resumen['pedidas']} en {resumen['peticiones']} peticiones "
+          f"({resumen['errores']} con error).")
+    print(f"Entradas guardadas en {carpeta}: {resumen['entradas']}")
+    if resumen["faltan"]:
+        print(f"UniProt no devolvió {len(resumen['faltan'])} accesiones: {', '.join(resumen['faltan'][:20])}"
+              f"{' ...' if len(resumen['faltan']) > 20 else ''}")
+    ruta_fallidas = os.path.join(carpeta, ARCHIVO_FALLIDAS)
+    if os.path.exists(ruta_fallidas):
+        os.remove(ruta_fallidas)  # De una ejecución anterior
+    if resumen["fallidas"]:
+        with open(ruta_fallidas, "w", encoding="utf-8") as f:
+            f.write("\n".join(resumen["fallidas"]) + "\n")
+        print(f"No se pudieron descargar {len(resumen['fallidas'])} accesiones (grupos con error); "
+              f"para reintentarlas: --archivo {ruta_fallidas}")
+    return resumen
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Descarga entradas de UniProt por lotes de accesiones.")
+    parser.add_argument("accesiones", nargs="*", help="Accesiones de UniProt.")
+    parser.add_argument("--archivo", help="Archivo con accesiones (una por línea o separadas por espacios/comas).")
+    parser.add_argument("--salida", default=CARPETA_SALIDA, help="Carpeta de los archivos NDJSON+gzip.")
+    args = parser.parse_args()
+    lista = args.accesiones + (leer_accesiones(args.archivo) if args.archivo else [])
+    if not lista:
+        parser.error("Indica accesiones o un archivo con --archivo.")
+    main(lista, args.salida)
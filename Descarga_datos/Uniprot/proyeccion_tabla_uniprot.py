@@ -0,0 +1,114 @@
+# Uniprot/proyeccion_tabla_uniprot.py
+
+'''
+Proyección "de servicio" de las entradas de UniProt para la tabla de resultados de la API
+(`backend/app/consultas/consulta_uniprot_tabla.py`).
+
+Al cargar una entrada se le añade el subdocumento `tabla`, con los campos que muestra la
+tabla ya resueltos y planos, de modo que la API solo tiene que proyectarlos:
+    "tabla": {
+        "primaryAccession": "Q81JF6",
+        "proteinDescription": "...",          # submissionNames o, si no hay, recommendedName
+        "genes": [{"geneName": "dnaA", "orderedLocusNames": "BC_0001"}],
+        "locusNames": ["BC_0001"],            # Todos los locus, para buscar
+        "geneNames": ["dnaA"],
+        "sequence": {"length": 447, "molWeight": 50817, "crc64": "...", "md5": "..."}
+    }
+La secuencia completa no se duplica: la API la toma de `sequence.value`.
+
+La carga (`unificar_ficheros_json_subir_mongoAtlas.py`) añade el subdocumento a las
+entradas de UniProt. Para las colecciones ya cargadas:
+    python -m Uniprot.proyeccion_tabla_uniprot [--coleccion UniProt] [--todas]
+rellena `tabla` en los documentos que no lo tienen (con `--todas`, en todos).
+'''
+
+import argparse
+from pymongo import UpdateOne
+from comun.versiones_dataset import conectar, registrar_version
+
+CAMPO_TABLA = "tabla"
+COLECCION_UNIPROT = "UniProt"
+TAMANO_LOTE = 1000
+
+
+def _valor(objeto):
+    """`{"value": x}` -> x (UniProt envuelve casi todos los textos así)."""
+    return objeto.get("value") if isinstance(objeto, dict) else objeto
+
+
+def _descripcion(descripcion):
+    if not isinstance(descripcion, dict):
+        return None
+    for nombre in descripcion.get("submissionNames") or []:
+        if isinstance(nombre, dict) and _valor(nombre.get("fullName")):
+            return _valor(nombre.get("fullName"))
+    recomendado = descripcion.get("recommendedName")
+    return _valor(recomendado.get("fullName")) if isinstance(recomendado, dict) else None
+
+
+def documento_tabla(entrada):
+    """Subdocumento `tabla` de una entrada de UniProt."""
+    genes, locus, nombres = [], [], []
+    for gen in entrada.get("genes") or []:
+        if not isinstance(gen, dict):
+            continue
+        nombre = _valor(gen.get("geneName"))
+        locus_gen = [_valor(l) for l in gen.get("orderedLocusNames") or [] if _valor(l)]
+        genes.append({"geneName": nombre, "orderedLocusNames": locus_gen[0] if locus_gen else ""})
+        locus.extend(locus_gen)
+        if nombre:
+            nombres.append(nombre)
+
+    secuencia = entrada.get("sequence") or {}
+    return {
+        "primaryAccession": entrada.get("primaryAccession"),
+        "proteinDescription": _descripcion(entrada.get("proteinDescription")),
+        "genes": genes,
+        "locusNames": locus,
+        "geneNames": nombres,
+        "sequence": {
+            "length": secuencia.get("length", 0),
+            "molWeight": secuencia.get("molWeight"),
+            "crc64": secuencia.get("crc64"),
+            "md5": secuencia.get("md5"),
+        },
+    }
+
+
+def con_tabla(documento):
+    """Copia de una entrada de UniProt con `tabla`; otros documentos se devuelven sin cambios."""
+    if "primaryAccession" not in documento:
+        return documento
+    return dict(documento, **{CAMPO_TABLA: documento_tabla(documento)})
+
+
+def rellenar_tabla(collection, todas=False, tamano_lote=TAMANO_LOTE):
+    """Añade (o, con `todas`, recalcula) `tabla` en los documentos de la colección. Devuelve cuántos."""
+    filtro = {"primaryAccession": {"$exists": True}}
+    if not todas:
+        filtro[CAMPO_TABLA] = {"$exists": False}
+    proyeccion = {"primaryAccession": 1, "proteinDescription": 1, "genes": 1,
+                  "sequence.length": 1, "sequence.molWeight": 1, "sequence.crc64": 1, "sequence.md5": 1}
+    operaciones, total = [], 0
+    for documento in collection.find(filtro, proyeccion):
+        operaciones.append(UpdateOne({"_id": documento["_id"]}, {"$set": {CAMPO_TABLA: documento_tabla(documento)}}))
+        if len(operaciones) == tamano_lote:
+            collection.bulk_write(operaciones, ordered=False)
+            total += len(operaciones)
+            operaciones = []
+    if operaciones:
+        collection.bulk_write(operaciones, ordered=False)
+        total += len(operaciones)
+    return total
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rellena la proyección `tabla` de las entradas de UniProt ya cargadas.")
+    parser.add_argument("--coleccion", default=COLECCION_UNIPROT, help="Colección de UniProt.")
+    parser.add_argument("--todas", action="store_true", help="Recalcula también los documentos que ya la tienen.")
+    args = parser.parse_args()
+    db = conectar()
+    actualizados = rellenar_tabla(db[args.coleccion], args.todas)
+    print(f"Proyección '{CAMPO_TABLA}' escrita en {actualizados} documentos de '{args.coleccion}'.")
+    if actualizados:
+        registrar_version(db, args.coleccion, origen="proyeccion tabla")
@@ -0,0 +1,186 @@
+# banco_pruebas_descargas.py
+
+'''
+Banco de pruebas de rendimiento de los scripts de descarga contra el servidor simulado
+de KEGG y UniProt (`comun.servidor_simulado`), sin red.
+
+Cada escenario ejecuta las funciones reales de descarga (cliente HTTP, límite de tasa,
+reintentos, manifiestos y escritura NDJSON+gzip) sobre una carpeta temporal:
+- `kegg_entradas`: `list/<org>` y todas las entradas con `get/` en lotes de 10
+  (`Kegg.descargas_datos_kegg`); cuenta las entradas guardadas, no las pedidas.
+- `kegg_rutas`: metadatos, `link/pathway` y el KGML de cada ruta
+  (`Kegg.descargas_definiciones_rutas_kegg_kgml`).
+- `uniprot_cursor`: búsqueda paginada con cursor (`Uniprot.descargas_datos_uniprot`).
+- `uniprot_stream`: la misma consulta en una sola transferencia con `stream`.
+
+Por escenario se muestran los elementos descargados, el tiempo, los elementos por
+segundo y las peticiones que recibió el servidor, incluidas las que respondió con
+errores (503) o limitó (429) y que el cliente tuvo que reintentar. El cliente de UniProt
+no reintenta: con errores inyectados, sus escenarios terminan antes y descargan menos
+elementos. Si `HTTP_CACHE` está activa, los clientes usan la caché como en una descarga
+normal. Con `--fallo FRAGMENTO=VECES` se programan errores deterministas (ver
+`comun.servidor_simulado`), p. ej. `--fallo get/bce:BC_0011+=3` para que un lote agote
+los reintentos.
+
+Uso (desde la carpeta `Descarga_datos`):
+    python -m banco_pruebas_descargas [--genes N] [--rutas N] [--latencia S]
+        [--tasa-error P] [--fallo FRAGMENTO=VECES ...] [--limite-tasa N] [--tasa N] [--concurrencia N]
+        [--escenarios kegg_entradas,uniprot_stream] [--detalle]
+'''
+
+import argparse
+import asyncio
+import contextlib
+import io
+import tempfile
+import time
+from comun.cliente_http import ClienteHTTPAsync
+from comun.cache_http import cache_desde_entorno
+from comun.servidor_simulado import ServidorSimulado, generar_datos
+from Kegg.descargas_datos_kegg import obtener_ids_kegg_async, descargar_entradas_kegg_async
+from Kegg.descargas_definiciones_rutas_kegg_kgml import get_organism_pathway_metadata, descargar_datos_ruta
+from Kegg.mapeos_kegg import obtener_genes_por_ruta
+import Uniprot.descargas_datos_uniprot as uniprot
+
+ESCENARIOS = ("kegg_entradas", "kegg_rutas", "uniprot_cursor", "uniprot_stream")
+CONSULTA_UNIPROT = "organism_id:226900"
+
+
+class ResultadoEscenario:
+    """Resultado de un escenario: elementos, tiempo y peticiones al servidor."""
+
+    def __init__(self, nombre, elementos, segundos, peticiones):
+        self.nombre = nombre
+        self.elementos = elementos
+        self.segundos = segundos
+        self.peticiones = peticiones  # Diferencia de `ServidorSimulado.estadisticas`
+
+    @property
+    def elementos_por_segundo(self):
+        return self.elementos / self.segundos if self.segundos else 0.0
+
+    def informe(self):
+        return (f"{self.nombre:<15} {self.elementos:>7} elementos {self.segundos:>8.2f} s "
+                f"{self.elementos_por_segundo:>9.1f}/s  {self.peticiones['peticiones']:>6} peticiones "
+                f"({self.peticiones['errores']} 503, {self.peticiones['limitadas']} 429), "
+                f"{self.peticiones['bytes'] / 1024:.0f} KiB")
+
+
+def _cliente_kegg(servidor, opciones):
+    return ClienteHTTPAsync(base_url=servidor.url_kegg, tasa=opciones.tasa, concurrencia=opciones.concurrencia,
+                            espera_base=opciones.espera_base, cache=cache_desde_entorno())
+
+
+async def _kegg_entradas(servidor, carpeta, opciones):
+    async with _cliente_kegg(servidor, opciones) as cliente:
+        ids = await obtener_ids_kegg_async(cliente, servidor.datos["organismo"])
+        return await descargar_entradas_kegg_async(cliente, ids, f"{carpeta}/kegg_entradas")
+
+
+async def _kegg_rutas(servidor, carpeta, opciones):
+    organismo = servidor.datos["organismo"]
+    async with _cliente_kegg(servidor, opciones) as cliente:
+        metadatos = await get_organism_pathway_metadata(cliente, organismo)
+        genes_por_ruta = await obtener_genes_por_ruta(cliente, organismo)
+        documentos = await asyncio.gather(*(
+            descargar_datos_ruta(cliente, p_meta, genes_por_ruta.get(p_meta["pathway_id"], []))
+            for p_meta in metadatos
+        ))
+    return sum(1 for documento in documentos if documento["kgml_data"])
+
+
+@contextlib.contextmanager
+def _uniprot_en(servidor, carpeta):
+    """Apunta el script de UniProt (URL y carpeta de descarga) al servidor simulado."""
+    anteriores = uniprot.UNIPROT_API_URL, uniprot.carpeta_descargas
+    uniprot.UNIPROT_API_URL, uniprot.carpeta_descargas = servidor.url_uniprot, carpeta
+    try:
+        yield
+    finally:
+        uniprot.UNIPROT_API_URL, uniprot.carpeta_descargas = anteriores
+
+
+def _uniprot(servidor, carpeta, opciones, stream):
+    with _uniprot_en(servidor, f"{carpeta}/uniprot_{'stream' if stream else 'cursor'}"), \
+            uniprot.crear_cliente_uniprot() as cliente:
+        if stream:
+            bloques = uniprot.descargar_stream_uniprot(CONSULTA_UNIPROT, opciones.tamano_pagina, cliente=cliente)
+        else:
+            bloques = uniprot.proceso_descarga(CONSULTA_UNIPROT, opciones.tamano_pagina, cliente=cliente)
+        return sum(len(bloque) for bloque in bloques)
+
+
+def ejecutar_escenario(nombre, servidor, carpeta, opciones):
+    """Ejecuta un escenario y mide su tiempo y sus peticiones al servidor."""
+    antes = dict(servidor.estadisticas)
+    salida = contextlib.nullcontext() if opciones.detalle else contextlib.redirect_stdout(io.StringIO())
+    inicio = time.perf_counter()
+    with salida:
+        if nombre == "kegg_entradas":
+            elementos = asyncio.run(_kegg_entradas(servidor, carpeta, opciones))
+        elif nombre == "kegg_rutas":
+            elementos = asyncio.run(_kegg_rutas(servidor, carpeta, opciones))
+        else:
+            elementos = _uniprot(servidor, carpeta, opciones, stream=nombre == "uniprot_stream")
+    segundos = time.perf_counter() - inicio
+    peticiones = {clave: valor - antes[clave] for clave, valor in servidor.estadisticas.items()}
+    return ResultadoEscenario(nombre, elementos, segundos, peticiones)
+
+
+def ejecutar_banco(opciones):
+    """Levanta el servidor simulado, ejecuta los escenarios pedidos y devuelve sus resultados."""
+    datos = generar_datos(genes=opciones.genes, rutas=opciones.rutas)
+    resultados = []
+    with ServidorSimulado(datos, opciones.latencia, opciones.tasa_error, opciones.limite_tasa,
+                          fallos=dict(opciones.fallo)) as servidor, \
+            tempfile.TemporaryDirectory() as carpeta:
+        for nombre in opciones.escenarios:
+            resultado = ejecutar_escenario(nombre, servidor, carpeta, opciones)
+            print(resultado.informe())
+            resultados.append(resultado)
+    return resultados
+
+
+def _escenarios(texto):
+    nombres = [nombre.strip() for nombre in texto.split(",") if nombre.strip()]
+    desconocidos = set(nombres) - set(ESCENARIOS)
+    if desconocidos:
+        raise argparse.ArgumentTypeError(f"Escenarios desconocidos: {', '.join(sorted(desconocidos))}")
+    return nombres
+
+
+def _fallo(texto):
+    fragmento, separador, veces = texto.rpartition("=")
+    if not separador or not fragmento or not veces.isdigit():
+        raise argparse.ArgumentTypeError(f"Fallo programado no válido (FRAGMENTO=VECES): {texto}")
+    return fragmento, int(veces)
+
+
+def crear_parser():
+    parser = argparse.ArgumentParser(description="Mide los scripts de descarga contra un servidor KEGG/UniProt simulado.")
+    parser.add_argument("--genes", type=int, default=1000, help="Genes (y proteínas) del organismo sintético.")
+    parser.add_argument("--rutas", type=int, default=50, help="Rutas del organismo sintético.")
+    parser.add_argument("--latencia", type=float, default=0.05, help="Segundos de latencia por petición del servidor.")
+    parser.add_argument("--tasa-error", type=float, default=0.0, help="Probabilidad de que el servidor responda 503.")
+    parser.add_argument("--fallo", action="append", default=[], type=_fallo,
+                        help="503 programados: las primeras VECES peticiones cuya ruta contiene FRAGMENTO (repetible).")
+    parser.add_argument("--limite-tasa", type=float, default=None, help="Peticiones por segundo antes de responder 429.")
+    parser.add_argument("--tasa", type=float, default=50.0, help="Peticiones por segundo del cliente de KEGG.")
+    parser.add_argument("--concurrencia", type=int, default=3, help="Peticiones a KEGG en vuelo.")
+    parser.add_argument("--espera-base", type=float, default=1.0, help="Espera base de los reintentos del cliente.")
+    parser.add_argument("--tamano-pagina", type=int, default=500, help="Entradas por página/bloque de UniProt.")
+    parser.add_argument("--escenarios", type=_escenarios, default=list(ESCENARIOS),
+                        help=f"Escenarios separados por comas ({', '.join(ESCENARIOS)}).")
+    parser.add_argument("--detalle", action="store_true", help="Muestra la salida de los scripts de descarga.")
+    return parser
+
+
+def main(argv=None):
+    opciones = crear_parser().parse_args(argv)
+    print(f"Servidor simulado: {opciones.genes} genes, {opciones.rutas} rutas, latencia {opciones.latencia} s, "
+          f"errores {opciones.tasa_error:.0%}, límite {opciones.limite_tasa or 'sin límite'} pet/s")
+    return ejecutar_banco(opciones)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+# comun/cache_http.py
+
+'''
+Caché en disco de las respuestas HTTP de los scripts de descarga (KEGG y UniProt).
+
+Se intercala como transporte de httpx (`TransporteCache`), así que la usan tanto el
+cliente asíncrono compartido (`comun.cliente_http`) como el cliente síncrono de UniProt
+sin cambiar el código que hace las peticiones. Solo se guardan las respuestas 200 de
+peticiones GET.
+
+Almacenamiento (direccionado por contenido):
+- La clave de una petición es el sha256 de su método y su URL con los parámetros
+  ordenados. Su entrada (`claves/ab/<clave>.json`) guarda el estado, las cabeceras, la
+  fecha y el hash del cuerpo.
+- El cuerpo se guarda una sola vez por contenido en `objetos/cd/<sha256>`, comprimido con
+  gzip (si el servidor ya lo envió comprimido se guarda tal cual). Las respuestas
+  idénticas de URLs distintas comparten objeto.
+- El cuerpo se escribe mientras se lee la respuesta (sin cargarlo entero en memoria, lo
+  que importa para el `stream` de UniProt) y solo se publica, de forma atómica, si la
+  respuesta se leyó completa.
+
+Modos (variable de entorno `HTTP_CACHE`, vacía = sin caché):
+- `normal`: responde desde la caché si la entrada no ha caducado (`HTTP_CACHE_TTL`
+  segundos; sin TTL, no caduca) y, si no, va a la red y la guarda.
+- `offline`: responde solo desde la caché, aunque haya caducado. Una petición que no
+  está en la caché lanza `NoEnCacheError`, sin tocar la red.
+- `refrescar`: va siempre a la red y actualiza la caché.
+
+La carpeta es `HTTP_CACHE_DIR` (por defecto, `.cache_http`). Ejemplo para repetir una
+descarga sin red:
+    HTTP_CACHE=offline python -m Kegg.descargas_datos_kegg
+'''
+
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+import time
+import httpx
+from comun.manifiesto import escribir_json_atomico
+
+MODOS = ("normal", "offline", "refrescar")
+CARPETA_CACHE = ".cache_http"
+CABECERAS_EXCLUIDAS = {"content-length", "transfer-encoding", "connection", "keep-alive", "set-cookie"}
+
+
+class NoEnCacheError(httpx.RequestError):
+    """La petición no está en la caché y el modo `offline` no permite ir a la red."""
+
+
+def clave_peticion(metodo, url):
+    """sha256 del método y la URL con los parámetros en orden."""
+    url = httpx.URL(str(url))
+    parametros = httpx.QueryParams(sorted(url.params.multi_items()))
+    normalizada = url.copy_with(query=str(parametros).encode("ascii") or None)
+    return hashlib.sha256(f"{metodo.upper()} {normalizada}".encode("utf-8")).hexdigest()
+
+
+class _ObjetoPendiente:
+    """Cuerpo de una respuesta que se está escribiendo en un temporal de la caché."""
+
+    def __init__(self, cache, comprimir):
+        descriptor, self.temporal = tempfile.mkstemp(dir=cache.carpeta, prefix=".objeto.", suffix=".tmp")
+        self._archivo = os.fdopen(descriptor, "wb")
+        self._salida = gzip.GzipFile(fileobj=self._archivo, mode="wb", mtime=0) if comprimir else self._archivo
+        self.hash = hashlib.sha256()
+        self.comprimido = comprimir
+
+    def escribir(self, trozo):
+        self.hash.update(trozo)
+        self._salida.write(trozo)
+
+    def cerrar(self):
+        if self._salida is not self._archivo:
+            self._salida.close()
+        self._archivo.close()
+
+    def descartar(self):
+        self.cerrar()
+        if os.path.exists(self.temporal):
+            os.remove(self.temporal)
+
+
+class _FlujoQueGuarda(httpx.SyncByteStream, httpx.AsyncByteStream):
+    """Envuelve el cuerpo de una respuesta de la red y lo copia a la caché al leerlo."""
+
+    def __init__(self, flujo, cache, clave, request, response):
+        self._flujo = flujo
+        self._cache = cache
+        self._clave = clave
+        self._request = request
+        self._response = response
+        self._objeto = _ObjetoPendiente(cache, comprimir="content-encoding" not in response.headers)
+        self._completo = False
+
+    def __iter__(self):
+        for trozo in self._flujo:
+            self._objeto.escribir(trozo)
+            yield trozo
+        self._completo = True
+
+    async def __aiter__(self):
+        async for trozo in self._flujo:
+            self._objeto.escribir(trozo)
+            yield trozo
+        self._completo = True
+
+    def _terminar(self):
+        if self._completo:
+            self._cache.publicar(self._clave, self._request, self._response, self._objeto)
+        else:
+            self._objeto.descartar()
+
+    def close(self):
+        try:
+            self._flujo.close()
+        finally:
+            self._terminar()
+
+    async def aclose(self):
+        try:
+            await self._flujo.aclose()
+        finally:
+            self._terminar()
+
+
+class CacheHTTP:
+    """Caché de respuestas en `carpeta` con caducidad `ttl` (segundos, None = sin caducidad)."""
+
+    def __init__(self, carpeta=CARPETA_CACHE, ttl=None, modo="normal"):
+        if modo not in MODOS:
+            raise ValueError(f"Modo de caché desconocido: {modo!r} (válidos: {', '.join(MODOS)})")
+        self.carpeta = carpeta
+        self.ttl = ttl
+        self.modo = modo
+        self.aciertos = 0
+        self.fallos = 0
+        os.makedirs(carpeta, exist_ok=True)
+
+    def _ruta_entrada(self, clave):
+        return os.path.join(self.carpeta, "claves", clave[:2], f"{clave}.json")
+
+    def _ruta_objeto(self, hash_cuerpo):
+        return os.path.join(self.carpeta, "objetos", hash_cuerpo[:2], hash_cuerpo)
+
+    def buscar(self, request):
+        """Entrada de la caché utilizable para `request` según el modo, o None."""
+        if request.method != "GET" or self.modo == "refrescar":
+            return None
+        try:
+            with open(self._ruta_entrada(clave_peticion(request.method, request.url)), "r", encoding="utf-8") as f:
+                entrada = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if not os.path.exists(self._ruta_objeto(entrada["cuerpo"])):
+            return None
+        caducada = self.ttl is not None and time.time() - entrada["fecha"] > self.ttl
+        return None if caducada and self.modo != "offline" else entrada
+
+    def respuesta(self, request, entrada):
+        """Construye la respuesta guardada en `entrada`."""
+        with open(self._ruta_objeto(entrada["cuerpo"]), "rb") as f:
+            contenido = f.read()
+        if entrada["comprimido"]:
+            contenido = gzip.decompress(contenido)
+        self.aciertos += 1
+        return httpx.Response(entrada["estado"], headers=entrada["cabeceras"], content=contenido, request=request)
+
+    def publicar(self, clave, request, response, objeto):
+        """Mueve el cuerpo ya escrito a su objeto y registra la entrada de la petición."""
+        objeto.cerrar()
+        hash_cuerpo = objeto.hash.hexdigest()
+        ruta_objeto = self._ruta_objeto(hash_cuerpo)
+        os.makedirs(os.path.dirname(ruta_objeto), exist_ok=True)
+        os.replace(objeto.temporal, ruta_objeto)
+        escribir_json_atomico(self._ruta_entrada(clave), {
+            "metodo": request.method,
+            "url": str(request.url),
+            "estado": response.status_code,
+            "cabeceras": [(k, v) for k, v in response.headers.multi_items() if k.lower() not in CABECERAS_EXCLUIDAS],
+            "fecha": time.time(),
+            "cuerpo": hash_cuerpo,
+            "comprimido": objeto.comprimido,
+        })
+
+    def interceptar(self, request):
+        """Respuesta desde la caché si procede; None si hay que ir a la red."""
+        entrada = self.buscar(request)
+        if entrada is not None:
+            return self.respuesta(request, entrada)
+        if self.modo == "offline":
+            raise NoEnCacheError(f"No está en la caché (modo offline): {request.method} {request.url}", request=request)
+        self.fallos += 1
+        return None
+
+    def guardar_al_leer(self, request, response):
+        """Devuelve `response` con su cuerpo copiándose a la caché si es un GET 200."""
+        if request.method != "GET" or response.status_code != 200:
+            return response
+        flujo = _FlujoQueGuarda(response.stream, self, clave_peticion(request.method, request.url), request, response)
+        return httpx.Response(response.status_code, headers=response.headers, stream=flujo,
+                              extensions=response.extensions, request=request)
+
+
+class TransporteCache(httpx.BaseTransport, httpx.AsyncBaseTransport):
+    """Transporte httpx (síncrono o asíncrono según `transporte`) que pasa por la caché."""
+
+    def __init__(self, cache, transporte):
+        self.cache = cache
+        self.transporte = transporte
+
+    def handle_request(self, request):
+        respuesta = self.cache.interceptar(request)
+        if respuesta is not None:
+            return respuesta
+        return self.cache.guardar_al_leer(request, self.transporte.handle_request(request))
+
+    async def handle_async_request(self, request):
+        respuesta = self.cache.interceptar(request)
+        if respuesta is not None:
+            return respuesta
+        return self.cache.guardar_al_leer(request, await self.transporte.handle_async_request(request))
+
+    def close(self):
+        self.transporte.close()
+
+    async def aclose(self):
+        await self.transporte.aclose()
+
+
+def cache_desde_entorno():
+    """`CacheHTTP` configurada con HTTP_CACHE, HTTP_CACHE_DIR y HTTP_CACHE_TTL, o None."""
+    modo = os.getenv("HTTP_CACHE", "").strip().lower()
+    if not modo:
+        return None
+    ttl = os.getenv("HTTP_CACHE_TTL")
+    return CacheHTTP(os.getenv("HTTP_CACHE_DIR", CARPETA_CACHE), float(ttl) if ttl else None, modo)
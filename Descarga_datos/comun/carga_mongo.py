@@ -0,0 +1,193 @@
+# comun/carga_mongo.py
+
+'''
+Carga idempotente de registros en MongoDB mediante upserts masivos.
+
+Cada documento se envía como `ReplaceOne(filtro, documento, upsert=True)` filtrando
+por su clave natural, de modo que volver a cargar los mismos datos reemplaza los
+documentos existentes en lugar de duplicarlos:
+- `_id` si el documento ya lo trae (p. ej. rutas KGML, `bce00010`).
+- `primaryAccession` para las entradas de UniProt.
+- `entry` para las entradas de KEGG procesadas (`kegg_rutas`).
+- Si no tiene ninguna, se le asigna un `_id` derivado del hash de su contenido.
+
+Los registros se consumen en streaming y se agrupan en lotes de `tamano_lote` que se
+envían con `bulk_write(ordered=False)` desde un pool de `hilos` hilos (pymongo es
+seguro entre hilos). Con `ordered=False` un documento erróneo no detiene el resto del
+lote: los errores se cuentan y se informan al final. Como mucho hay `2 * hilos` lotes
+en memoria a la vez.
+
+Antes de cargar se crea un índice único sobre la clave natural (si no es `_id`) para
+que cada upsert sea una búsqueda por índice y no un recorrido de la colección. El índice
+es disperso (`sparse`), así que no afecta a los documentos sin ese campo. Si la
+colección tiene duplicados de cargas antiguas (sin upsert), se conserva un documento por
+clave (el de mayor `_id`, que la carga reemplaza después) y se borran los demás antes de
+crear el índice (y sustituye el índice normal que creaban las versiones anteriores en
+ese caso); si aun así no se puede crear, la carga se detiene con el error.
+
+`ResumenCarga.problemas()` reúne los fallos que impiden dar por completa una carga
+(elementos perdidos, errores de escritura y etapas con errores): quien carga en un
+staging (`comun.versiones_dataset`) no lo promueve si hay alguno.
+
+Uso:
+    resumen = cargar_registros(db["UniProt"], leer_registros_carpeta(carpeta))
+    print(resumen.informe())
+'''
+
+import hashlib
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from itertools import islice
+from pymongo import ReplaceOne, DESCENDING
+from pymongo.errors import BulkWriteError, DuplicateKeyError, OperationFailure
+
+CLAVES_NATURALES = ("_id", "primaryAccession", "entry")
+TAMANO_LOTE = 1000
+HILOS = 4
+CODIGOS_CONFLICTO_INDICE = (85, 86)  # IndexOptionsConflict, IndexKeySpecsConflict
+
+
+def clave_natural(documento):
+    """Devuelve (campo, valor) de la clave natural del documento."""
+    for campo in CLAVES_NATURALES:
+        if documento.get(campo) is not None:
+            return campo, documento[campo]
+    contenido = json.dumps(documento, sort_keys=True, ensure_ascii=False, default=str)
+    documento["_id"] = hashlib.sha256(contenido.encode("utf-8")).hexdigest()
+    return "_id", documento["_id"]
+
+
+def eliminar_duplicados(collection, campo):
+    """Deja un solo documento (el de mayor `_id`) por valor de `campo`. Devuelve cuántos se borraron."""
+    grupos = collection.aggregate([
+        {"$match": {campo: {"$exists": True}}},
+        {"$sort": {"_id": DESCENDING}},
+        {"$group": {"_id": f"${campo}", "ids": {"$push": "$_id"}, "total": {"$sum": 1}}},
+        {"$match": {"total": {"$gt": 1}}},
+    ], allowDiskUse=True)
+    sobrantes = [id_documento for grupo in grupos for id_documento in grupo["ids"][1:]]
+    for inicio in range(0, len(sobrantes), TAMANO_LOTE):
+        collection.delete_many({"_id": {"$in": sobrantes[inicio:inicio + TAMANO_LOTE]}})
+    return len(sobrantes)
+
+
+def _crear_indice_unico(collection, campo):
+    try:
+        collection.create_index(campo, unique=True, sparse=True)
+    except DuplicateKeyError:
+        raise
+    except OperationFailure as e:
+        if e.code not in CODIGOS_CONFLICTO_INDICE:
+            raise
+        # Índice normal con el mismo nombre creado por una versión anterior
+        collection.drop_index(f"{campo}_1")
+        collection.create_index(campo, unique=True, sparse=True)
+
+
+def asegurar_indice(collection, campo):
+    """Crea un índice único sobre `campo`, eliminando antes los duplicados de cargas antiguas."""
+    if campo == "_id":
+        return
+    try:
+        _crear_indice_unico(collection, campo)
+    except DuplicateKeyError:
+        borrados = eliminar_duplicados(collection, campo)
+        print(f"'{collection.name}' tenía documentos duplicados por '{campo}': se borraron {borrados}.")
+        _crear_indice_unico(collection, campo)
+
+
+class ResumenCarga:
+    """Contadores de una carga en una colección y su rendimiento."""
+
+    def __init__(self, coleccion):
+        self.coleccion = coleccion
+        self.documentos = 0
+        self.insertados = 0
+        self.reemplazados = 0
+        self.sin_cambios = 0
+        self.errores = 0
+        self.lotes = 0
+        self.segundos = 0.0
+        self.fallos = []  # Elementos que no llegaron a cargarse (archivos, lotes, rutas...)
+        self.publicada = False  # La carga quedó completa y visible en la colección activa
+
+    def acumular(self, documentos, resultado):
+        self.lotes += 1
+        self.documentos += documentos
+        self.insertados += resultado.get("nUpserted", 0)
+        self.reemplazados += resultado.get("nModified", 0)
+        self.sin_cambios += resultado.get("nMatched", 0) - resultado.get("nModified", 0)
+        self.errores += len(resultado.get("writeErrors", []))
+
+    @property
+    def documentos_por_segundo(self):
+        return self.documentos / self.segundos if self.segundos else 0.0
+
+    def problemas(self, estadisticas=()):
+        """
+        Fallos que impiden dar por completa la carga y, por tanto, promover su staging:
+        elementos perdidos (`fallos`), errores de escritura y, si se pasan las
+        `estadisticas` de la tubería que la alimentó (`comun.tuberia`), sus etapas con errores.
+        """
+        problemas = [f"{e.errores} errores en la etapa '{e.nombre}'." for e in estadisticas if e.errores]
+        if self.fallos:
+            problemas.append(f"{len(self.fallos)} elementos no cargados: {', '.join(self.fallos)}.")
+        if self.errores:
+            problemas.append(f"{self.errores} errores de escritura en '{self.coleccion}'.")
+        return problemas
+
+    def informe(self):
+        return (f"Colección '{self.coleccion}': {self.documentos} documentos en {self.lotes} lotes, "
+                f"{self.insertados} nuevos, {self.reemplazados} reemplazados, {self.sin_cambios} sin cambios, "
+                f"{self.errores} errores; {self.segundos:.2f} s ({self.documentos_por_segundo:.0f} docs/s).")
+
+
+def escribir_lote(collection, lote):
+    """Envía un lote de upserts sin orden y devuelve el resultado (también si hubo errores)."""
+    operaciones = []
+    for documento in lote:
+        campo, valor = clave_natural(documento)
+        operaciones.append(ReplaceOne({campo: valor}, documento, upsert=True))
+    try:
+        return collection.bulk_write(operaciones, ordered=False).bulk_api_result
+    except BulkWriteError as e:
+        for error in e.details.get("writeErrors", [])[:3]:
+            print(f"Error en '{collection.name}': {error.get('errmsg')}")
+        return e.details
+
+
+def cargar_registros(collection, registros, tamano_lote=TAMANO_LOTE, hilos=HILOS, resumen=None):
+    """
+    Carga los registros (iterable, se consume en streaming) en `collection` con upserts
+    por clave natural. Devuelve un `ResumenCarga` (o acumula en el recibido).
+    """
+    resumen = resumen or ResumenCarga(collection.name)
+    inicio = time.perf_counter()
+    registros = iter(registros)
+    indices = set()
+    pendientes = {}
+
+    with ThreadPoolExecutor(max_workers=hilos) as pool:
+        while True:
+            lote = list(islice(registros, tamano_lote))
+            if not lote:
+                break
+            for documento in lote:
+                campo = clave_natural(documento)[0]
+                if campo not in indices:
+                    asegurar_indice(collection, campo)
+                    indices.add(campo)
+            pendientes[pool.submit(escribir_lote, collection, lote)] = len(lote)
+
+            # Se limita el número de lotes en vuelo para no acumular registros en memoria
+            if len(pendientes) >= 2 * hilos:
+                terminados, _ = wait(pendientes, return_when=FIRST_COMPLETED)
+                for futuro in terminados:
+                    resumen.acumular(pendientes.pop(futuro), futuro.result())
+
+        for futuro in list(pendientes):
+            resumen.acumular(pendientes.pop(futuro), futuro.result())
+
+    resumen.segundos += time.perf_counter() - inicio
+    return resumen
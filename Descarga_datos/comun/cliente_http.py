@@ -0,0 +1,122 @@
+# comun/cliente_http.py
+
+'''
+Cliente HTTP asíncrono compartido por los scripts de descarga (KEGG y UniProt).
+
+Está construido sobre `httpx.AsyncClient` y añade:
+- Limitador de tasa tipo "token bucket" (`LimitadorTasa`): como máximo `tasa`
+  peticiones por segundo, con ráfagas de hasta `capacidad` peticiones. Para KEGG
+  se usa su límite publicado de 3 peticiones por segundo.
+- Concurrencia acotada con un semáforo (`concurrencia` peticiones en vuelo).
+- Reutilización de conexiones (keep-alive) durante toda la descarga.
+- Reintentos con espera exponencial y "jitter" completo ante errores de red y
+  respuestas 429/5xx, respetando la cabecera `Retry-After` si existe.
+- Caché opcional de respuestas en disco (`comun.cache_http`). Las peticiones que se
+  responden desde la caché no consumen fichas del limitador de tasa.
+
+Con esto el tiempo total de una descarga queda limitado por la tasa permitida
+y no por la suma de pausas fijas entre peticiones.
+
+Uso:
+    async with ClienteHTTPAsync(base_url=KEGG_API_BASE_URL, tasa=3) as cliente:
+        respuesta = await cliente.get("list/bce")
+'''
+
+import asyncio
+import random
+import time
+import httpx
+from comun.cache_http import TransporteCache
+
+ESTADOS_REINTENTABLES = {429, 500, 502, 503, 504}
+
+
+class LimitadorTasa:
+    """Token bucket: repone `tasa` fichas por segundo hasta un máximo de `capacidad`."""
+
+    def __init__(self, tasa, capacidad=1):
+        self.tasa = tasa
+        self.capacidad = capacidad
+        self._fichas = capacidad
+        self._ultimo = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def adquirir(self):
+        async with self._lock:
+            while True:
+                ahora = time.monotonic()
+                self._fichas = min(self.capacidad, self._fichas + (ahora - self._ultimo) * self.tasa)
+                self._ultimo = ahora
+                if self._fichas >= 1:
+                    self._fichas -= 1
+                    return
+                await asyncio.sleep((1 - self._fichas) / self.tasa)
+
+
+class ClienteHTTPAsync:
+    """Cliente HTTP con límite de tasa, concurrencia acotada y reintentos con jitter."""
+
+    def __init__(self, base_url="", tasa=3.0, capacidad=None, concurrencia=3, reintentos=3,
+                 espera_base=1.0, espera_maxima=30.0, timeout=30.0, transport=None, cache=None):
+        self.base_url = base_url
+        self.limitador = LimitadorTasa(tasa, capacidad or max(1, int(tasa)))
+        self.concurrencia = concurrencia
+        self.reintentos = reintentos
+        self.espera_base = espera_base
+        self.espera_maxima = espera_maxima
+        self.timeout = timeout
+        self.transport = transport
+        self.cache = cache
+        self._semaforo = None
+        self._cliente = None
+
+    async def __aenter__(self):
+        self._semaforo = asyncio.Semaphore(self.concurrencia)
+        limites = httpx.Limits(max_connections=self.concurrencia, max_keepalive_connections=self.concurrencia)
+        transport = self.transport
+        if self.cache is not None:
+            transport = TransporteCache(self.cache, transport or httpx.AsyncHTTPTransport(limits=limites))
+        self._cliente = httpx.AsyncClient(
+            base_url=self.base_url,
+            timeout=self.timeout,
+            limits=limites,
+            transport=transport,
+        )
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self._cliente.aclose()
+        self._cliente = None
+
+    def _espera(self, intento, respuesta=None):
+        if respuesta is not None:
+            retry_after = respuesta.headers.get("Retry-After", "")
+            if retry_after.isdigit():
+                return min(float(retry_after), self.espera_maxima)
+        return random.uniform(0, min(self.espera_maxima, self.espera_base * 2 ** intento))
+
+    async def get(self, url, params=None, headers=None):
+        """
+        Realiza un GET con límite de tasa y reintentos. Devuelve la última respuesta
+        (que puede ser un 4xx/5xx) o relanza el último error de red.
+        """
+        en_cache = self.cache is not None and self.cache.buscar(
+            self._cliente.build_request("GET", url, params=params, headers=headers)) is not None
+        for intento in range(self.reintentos):
+            ultimo_intento = intento == self.reintentos - 1
+            async with self._semaforo:
+                if not en_cache:
+                    await self.limitador.adquirir()
+                try:
+                    respuesta = await self._cliente.get(url, params=params, headers=headers)
+                except httpx.TransportError as e:
+                    print(f"Error de red/peticion en {url}: {e}, intento {intento + 1}/{self.reintentos}.")
+                    if ultimo_intento:
+                        raise
+                    respuesta = None
+
+            if respuesta is not None:
+                if respuesta.status_code not in ESTADOS_REINTENTABLES or ultimo_intento:
+                    return respuesta
+                print(f"Error HTTP {respuesta.status_code} en {url}, intento {intento + 1}/{self.reintentos}.")
+            await asyncio.sleep(self._espera(intento, respuesta))
@@ -0,0 +1,141 @@
+# comun/manifiesto.py
+
+'''
+Manifiesto de progreso para reanudar descargas interrumpidas.
+
+Cada descarga guarda en su carpeta de salida un archivo `descarga.manifiesto` (JSON) con:
+- `parametros`: los parámetros de la ejecución (organismo, tamaños de lote...).
+  Si cambian, el manifiesto anterior se descarta y la descarga empieza de cero.
+- `completados`: por cada unidad de trabajo terminada (bloque de IDs, ruta, página),
+  el archivo generado, su hash SHA-256 y datos adicionales (p. ej. número de entradas).
+
+El manifiesto y los archivos de salida se escriben de forma atómica (archivo temporal
+en la misma carpeta + `os.replace`), de modo que una interrupción nunca deja un JSON
+a medio escribir ni un manifiesto que apunte a datos incompletos. Ni el manifiesto ni
+los temporales terminan en `.json`, para que los scripts que recorren la carpeta buscando
+datos (`unificar_ficheros_json_subir_mongoAtlas`, `descargas_kegg_paths`) los ignoren. Al reanudar, las
+unidades registradas se saltan; con `verificar()` se vuelven a comprobar los archivos
+y las que no coinciden se eliminan del manifiesto para descargarse de nuevo.
+
+Uso:
+    manifiesto = Manifiesto.cargar(output_dir, {"organismo": "bce"})
+    if not manifiesto.completado("bloque_0001"):
+        ruta = escribir_json_atomico(destino, datos)
+        manifiesto.registrar("bloque_0001", ruta, entradas=len(datos))
+'''
+
+import hashlib
+import json
+import os
+import tempfile
+
+NOMBRE_MANIFIESTO = "descarga.manifiesto"
+VERSION_MANIFIESTO = 1
+
+
+def escribir_atomico(ruta, contenido):
+    """Escribe `contenido` (bytes) en `ruta` sin dejar nunca un archivo a medias."""
+    carpeta = os.path.dirname(os.path.abspath(ruta))
+    os.makedirs(carpeta, exist_ok=True)
+    descriptor, temporal = tempfile.mkstemp(dir=carpeta, prefix=f".{os.path.basename(ruta)}.", suffix=".tmp")
+    try:
+        with os.fdopen(descriptor, "wb") as f:
+            f.write(contenido)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporal, ruta)
+    except BaseException:
+        if os.path.exists(temporal):
+            os.remove(temporal)
+        raise
+
+
+def escribir_json_atomico(ruta, datos, **opciones_json):
+    """Serializa `datos` a JSON y los escribe de forma atómica. Devuelve la ruta."""
+    contenido = json.dumps(datos, **opciones_json).encode("utf-8")
+    escribir_atomico(ruta, contenido)
+    return ruta
+
+
+def hash_archivo(ruta):
+    """SHA-256 del contenido de un archivo, leído por bloques."""
+    sha = hashlib.sha256()
+    with open(ruta, "rb") as f:
+        for trozo in iter(lambda: f.read(1 << 20), b""):
+            sha.update(trozo)
+    return sha.hexdigest()
+
+
+class Manifiesto:
+    """Registro persistente de las unidades de trabajo ya completadas en una descarga."""
+
+    def __init__(self, ruta, parametros=None, completados=None):
+        self.ruta = ruta
+        self.parametros = parametros or {}
+        self.completados = completados or {}
+
+    @classmethod
+    def cargar(cls, carpeta, parametros=None):
+        """
+        Carga el manifiesto de `carpeta` si existe y corresponde a los mismos parámetros;
+        en otro caso devuelve uno vacío (todavía no escrito en disco).
+        """
+        ruta = os.path.join(carpeta, NOMBRE_MANIFIESTO)
+        parametros = parametros or {}
+        try:
+            with open(ruta, "r", encoding="utf-8") as f:
+                datos = json.load(f)
+        except FileNotFoundError:
+            return cls(ruta, parametros)
+        except (OSError, ValueError) as e:
+            print(f"Manifiesto ilegible en {ruta} ({e}); se empieza de cero.")
+            return cls(ruta, parametros)
+
+        if datos.get("version") != VERSION_MANIFIESTO or datos.get("parametros") != parametros:
+            print(f"El manifiesto de {ruta} corresponde a otros parámetros; se empieza de cero.")
+            return cls(ruta, parametros)
+        return cls(ruta, parametros, datos.get("completados", {}))
+
+    def guardar(self):
+        escribir_json_atomico(self.ruta, {
+            "version": VERSION_MANIFIESTO,
+            "parametros": self.parametros,
+            "completados": self.completados,
+        }, indent=2, ensure_ascii=False)
+
+    def _ruta_archivo(self, registro):
+        # Las rutas se guardan relativas a la carpeta del manifiesto
+        return os.path.join(os.path.dirname(self.ruta), registro["archivo"])
+
+    def completado(self, clave):
+        """True si la unidad está registrada y su archivo de salida sigue existiendo."""
+        registro = self.completados.get(clave)
+        return registro is not None and os.path.exists(self._ruta_archivo(registro))
+
+    def registrar(self, clave, archivo, **extra):
+        """Marca `clave` como completada con el hash de `archivo` y persiste el manifiesto."""
+        relativa = os.path.relpath(archivo, os.path.dirname(self.ruta))
+        self.completados[clave] = {"archivo": relativa, "sha256": hash_archivo(archivo), **extra}
+        self.guardar()
+
+    def verificar(self):
+        """
+        Comprueba que cada archivo registrado existe y conserva su hash. Las unidades
+        que fallan se eliminan del manifiesto (para volver a descargarlas) y se devuelven.
+        """
+        invalidas = []
+        for clave, registro in list(self.completados.items()):
+            archivo = self._ruta_archivo(registro)
+            if not os.path.exists(archivo):
+                print(f"Verificación: falta el archivo {archivo} ({clave}).")
+            elif hash_archivo(archivo) != registro["sha256"]:
+                print(f"Verificación: el archivo {archivo} ({clave}) no coincide con su hash.")
+            else:
+                continue
+            invalidas.append(clave)
+            del self.completados[clave]
+
+        if invalidas:
+            self.guardar()
+        print(f"Verificación completada: {len(self.completados)} correctos, {len(invalidas)} a descargar de nuevo.")
+        return invalidas
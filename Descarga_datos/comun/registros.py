@@ -0,0 +1,198 @@
+# comun/registros.py
+
+'''
+Lectura y escritura en streaming de registros en formato NDJSON comprimido con gzip.
+
+Es el formato intermedio de todas las etapas de `Descarga_datos`: cada línea del
+archivo (`*.ndjson.gz`) es un documento JSON compacto. Frente a los arrays JSON con
+sangría de antes:
+- Se escribe y se lee registro a registro (generadores), sin cargar nunca el archivo
+  entero ni acumular bloques en memoria.
+- Los archivos ocupan mucho menos en disco (sin sangría y comprimidos).
+
+Contenido:
+- `escribir_registros(ruta, registros)`: escribe un archivo completo de forma atómica.
+- `EscritorRegistros`: escritor con rotación por tamaño (`prefijo_0001.ndjson.gz`,
+  `prefijo_0002.ndjson.gz`...). Cada archivo se publica de forma atómica al rotar o
+  cerrar; si se produce un error, el archivo a medias se descarta.
+- `leer_registros(ruta)`: generador de registros de un archivo. Acepta también `.ndjson`
+  sin comprimir y los `.json` antiguos (lista o documento único).
+- `listar_archivos_registros(carpeta)` / `leer_registros_carpeta(carpeta)`: recorren
+  todos los archivos de registros de una carpeta en orden. Si un mismo archivo existe en
+  varios formatos (p. ej. el `.json` antiguo y el `.ndjson.gz` que lo sustituye), solo se
+  usa el preferido según `EXTENSIONES_LEGIBLES`, para no leer sus registros dos veces.
+
+Uso:
+    with EscritorRegistros("salida", "bloque") as escritor:
+        for registro in registros:
+            escritor.escribir(registro)
+    for registro in leer_registros_carpeta("salida"):
+        ...
+'''
+
+import gzip
+import io
+import json
+import os
+import tempfile
+
+EXTENSION = ".ndjson.gz"
+EXTENSIONES_LEGIBLES = (EXTENSION, ".ndjson", ".json")  # En orden de preferencia
+TAMANO_MAXIMO_ARCHIVO = 64 * 1024 * 1024  # Bytes sin comprimir por archivo antes de rotar
+NIVEL_COMPRESION = 6
+
+
+def serializar(registro):
+    return json.dumps(registro, ensure_ascii=False, separators=(",", ":")) + "\n"
+
+
+def _abrir_temporal(ruta):
+    """Abre un temporal gzip junto a `ruta` y devuelve (nombre temporal, texto, binario)."""
+    carpeta = os.path.dirname(os.path.abspath(ruta))
+    os.makedirs(carpeta, exist_ok=True)
+    descriptor, temporal = tempfile.mkstemp(dir=carpeta, prefix=f".{os.path.basename(ruta)}.", suffix=".tmp")
+    binario = os.fdopen(descriptor, "wb")
+    # mtime=0 para que el mismo contenido produzca siempre el mismo archivo (y el mismo hash)
+    comprimido = gzip.GzipFile(fileobj=binario, mode="wb", compresslevel=NIVEL_COMPRESION, mtime=0)
+    return temporal, io.TextIOWrapper(comprimido, encoding="utf-8", newline="\n"), binario
+
+
+def _publicar(temporal, texto, binario, ruta):
+    texto.close()
+    binario.flush()
+    os.fsync(binario.fileno())
+    binario.close()
+    os.replace(temporal, ruta)
+
+
+def _descartar(temporal, texto, binario):
+    try:
+        texto.close()
+    except Exception:
+        pass
+    binario.close()
+    if os.path.exists(temporal):
+        os.remove(temporal)
+
+
+def escribir_registros(ruta, registros):
+    """Escribe los registros en `ruta` (NDJSON gzip) de forma atómica. Devuelve cuántos escribió."""
+    temporal, texto, binario = _abrir_temporal(ruta)
+    total = 0
+    try:
+        for registro in registros:
+            texto.write(serializar(registro))
+            total += 1
+        _publicar(temporal, texto, binario, ruta)
+    except BaseException:
+        _descartar(temporal, texto, binario)
+        raise
+    return total
+
+
+class EscritorRegistros:
+    """Escritor de registros con rotación de archivo al superar `tamano_maximo` bytes."""
+
+    def __init__(self, carpeta, prefijo, tamano_maximo=TAMANO_MAXIMO_ARCHIVO, numero_inicial=1):
+        self.carpeta = carpeta
+        self.prefijo = prefijo
+        self.tamano_maximo = tamano_maximo
+        self.numero = numero_inicial - 1
+        self.archivos = []  # Archivos ya publicados
+        self.total = 0
+        self._actual = None
+        self._bytes = 0
+        self._registros_archivo = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, tipo, valor, traza):
+        if tipo is None:
+            self.cerrar()
+        elif self._actual is not None:
+            _descartar(*self._actual[:3])
+            self._actual = None
+
+    def _abrir(self):
+        self.numero += 1
+        ruta = os.path.join(self.carpeta, f"{self.prefijo}_{self.numero:04d}{EXTENSION}")
+        self._actual = (*_abrir_temporal(ruta), ruta)
+        self._bytes = 0
+        self._registros_archivo = 0
+
+    def escribir(self, registro):
+        if self._actual is None:
+            self._abrir()
+        linea = serializar(registro)
+        self._actual[1].write(linea)
+        self._bytes += len(linea)
+        self._registros_archivo += 1
+        self.total += 1
+        if self._bytes >= self.tamano_maximo:
+            self.rotar()
+
+    def rotar(self):
+        """Publica el archivo actual; el siguiente registro abrirá uno nuevo."""
+        if self._actual is None:
+            return
+        temporal, texto, binario, ruta = self._actual
+        _publicar(temporal, texto, binario, ruta)
+        self.archivos.append(ruta)
+        print(f"Guardado: {ruta} con {self._registros_archivo} registros.")
+        self._actual = None
+
+    def cerrar(self):
+        self.rotar()
+
+
+def leer_registros(ruta):
+    """Generador de los registros de un archivo `.ndjson.gz`, `.ndjson` o `.json` antiguo."""
+    if ruta.endswith(".json"):
+        with open(ruta, "r", encoding="utf-8") as f:
+            datos = json.load(f)
+        yield from (datos if isinstance(datos, list) else [datos])
+        return
+
+    abrir = gzip.open if ruta.endswith(".gz") else open
+    with abrir(ruta, "rt", encoding="utf-8") as f:
+        for linea in f:
+            if linea.strip():
+                yield json.loads(linea)
+
+
+def es_archivo_registros(nombre):
+    return nombre.endswith(EXTENSIONES_LEGIBLES) and not nombre.startswith(".")
+
+
+def _base_y_preferencia(nombre):
+    """(nombre sin extensión, posición de su extensión en `EXTENSIONES_LEGIBLES`)."""
+    for preferencia, extension in enumerate(EXTENSIONES_LEGIBLES):
+        if nombre.endswith(extension):
+            return nombre[:-len(extension)], preferencia
+    raise ValueError(f"{nombre} no es un archivo de registros")
+
+
+def listar_archivos_registros(carpeta, prefijo=""):
+    """
+    Rutas de los archivos de registros de `carpeta` (opcionalmente con `prefijo`), ordenadas.
+    De cada archivo presente en varios formatos solo se devuelve el preferido.
+    """
+    elegidos = {}
+    for nombre in sorted(os.listdir(carpeta)):
+        if not es_archivo_registros(nombre) or not nombre.startswith(prefijo):
+            continue
+        base, preferencia = _base_y_preferencia(nombre)
+        anterior = elegidos.get(base)
+        if anterior is not None:
+            if anterior[0] < preferencia:
+                anterior, (preferencia, nombre) = (preferencia, nombre), anterior
+            print(f"{os.path.join(carpeta, anterior[1])} se ignora: existe {nombre} en un formato preferido.")
+        elegidos[base] = (preferencia, nombre)
+    return [os.path.join(carpeta, nombre) for nombre in sorted(nombre for _, nombre in elegidos.values())]
+
+
+def leer_registros_carpeta(carpeta, prefijo=""):
+    """Generador de todos los registros de los archivos de `carpeta`, en orden de nombre."""
+    for ruta in listar_archivos_registros(carpeta, prefijo):
+        yield from leer_registros(ruta)
@@ -0,0 +1,320 @@
+# comun/servidor_simulado.py
+
+'''
+Servidor HTTP local que imita las APIs de KEGG y UniProt para medir los scripts de
+descarga sin red (`banco_pruebas_descargas.py`) y para probarlos de extremo a extremo.
+
+Se usa `http.server` de la biblioteca estándar (un hilo por conexión, HTTP/1.1 con
+keep-alive), así que no añade dependencias. Los datos son sintéticos y deterministas
+(`generar_datos`): un organismo con `genes` genes repartidos en `rutas` rutas, cada gen
+con una accesión de UniProt.
+
+Endpoints (los de KEGG bajo `/kegg`, los de UniProt bajo `/uniprotkb`):
+- KEGG: `list/<org>`, `list/pathway/<org>`, `get/<id>+<id>...` (texto plano, varias
+  entradas), `get/<ruta>/kgml`, `get/<ruta>/genes` (responde 400, como la API real),
+  `link/pathway/<org>` y `conv/uniprot/<org>`.
+- UniProt: `search` (paginación con cursor en la cabecera `Link` y total en
+  `x-total-results`) y `stream`. Ambos entienden `size` y, en `query`, una lista de
+  accesiones `accession:(A OR B ...)`; cualquier otra consulta devuelve todas las
+  proteínas. Responden con gzip si se pide en `Accept-Encoding`.
+
+Condiciones configurables:
+- `latencia`: segundos de espera por petición (con una variación aleatoria de ±50 %).
+- `tasa_error`: probabilidad de responder 503 en lugar de la respuesta real.
+- `fallos`: errores programados, deterministas aunque las peticiones lleguen en
+  paralelo: `{fragmento: veces}` hace que las primeras `veces` peticiones cuya ruta
+  contiene `fragmento` reciban 503.
+- `limite_tasa`: peticiones por segundo admitidas; las que lo superan reciben 429 con
+  `Retry-After: 1`.
+En `estadisticas` se cuentan las peticiones, los errores inyectados, las respuestas
+limitadas y los bytes enviados.
+
+Uso:
+    with ServidorSimulado(generar_datos(genes=2000), latencia=0.05, limite_tasa=3) as servidor:
+        ClienteHTTPAsync(base_url=servidor.url_kegg, ...)
+        servidor.url_uniprot  # en lugar de https://rest.uniprot.org/uniprotkb
+
+O como proceso aparte (desde la carpeta `Descarga_datos`), con los scripts apuntando a él
+con `KEGG_API_BASE_URL` y `UNIPROT_API_URL`:
+    python -m comun.servidor_simulado [--puerto 8765] [--genes N] [--rutas N]
+        [--latencia S] [--tasa-error P] [--limite-tasa N]
+'''
+
+import argparse
+import gzip
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlencode, urlsplit
+
+_ACCESIONES = re.compile(r"accession:\(?([^)]*)\)?")
+
+
+def accesion_de(indice):
+    """Accesión de UniProt sintética (formato válido, p. ej. P00001) del gen `indice`."""
+    return f"P{indice:05d}"
+
+
+def generar_datos(organismo="bce", genes=1000, rutas=50, semilla=0):
+    """Datos sintéticos del organismo: genes, rutas y proteínas de UniProt."""
+    azar = random.Random(semilla)
+    rutas_ids = [f"{organismo}{10 + i * 10:05d}" for i in range(rutas)]
+    datos = {"organismo": organismo, "genes": {}, "rutas": {r: f"Ruta sintética {r}" for r in rutas_ids},
+             "proteinas": {}}
+    for i in range(1, genes + 1):
+        gen = f"BC_{i:04d}"
+        secuencia = "".join(azar.choice("ACDEFGHIKLMNPQRSTVWY") for _ in range(azar.randint(80, 400)))
+        datos["genes"][gen] = {
+            "rutas": sorted(azar.sample(rutas_ids, azar.randint(0, min(3, rutas)))),
+            "uniprot": accesion_de(i),
+            "secuencia": secuencia,
+            "inicio": i * 1000,
+        }
+        datos["proteinas"][accesion_de(i)] = {
+            "entryType": "UniProtKB unreviewed (TrEMBL)",
+            "primaryAccession": accesion_de(i),
+            "uniProtkbId": f"{accesion_de(i)}_BACCR",
+            "organism": {"scientificName": "Bacillus cereus (strain ATCC 14579)", "taxonId": 226900},
+            "proteinDescription": {"submissionNames": [{"fullName": {"value": f"proteína {gen}"}}]},
+            "genes": [{"orderedLocusNames": [{"value": gen}]}],
+            "sequence": {"value": secuencia, "length": len(secuencia)},
+        }
+    return datos
+
+
+def entrada_kegg(datos, gen):
+    """Texto de la entrada `get/` de un gen, con el formato de columnas de KEGG."""
+    info = datos["genes"][gen]
+    lineas = [f"ENTRY       {gen:<17} CDS       T00117",
+              f"NAME        (RefSeq) proteína {gen}",
+              f"ORGANISM    {datos['organismo']}  Bacillus cereus ATCC 14579"]
+    for i, ruta in enumerate(info["rutas"]):
+        lineas.append(f"{'PATHWAY' if i == 0 else '':<12}{ruta}  {datos['rutas'][ruta]}")
+    lineas.append(f"POSITION    {info['inicio']}..{info['inicio'] + len(info['secuencia']) * 3 + 2}")
+    lineas.append(f"DBLINKS     UniProt: {info['uniprot']}")
+    lineas.append(f"AASEQ       {len(info['secuencia'])}")
+    lineas.extend(f"            {info['secuencia'][i:i + 60]}" for i in range(0, len(info["secuencia"]), 60))
+    return "\n".join(lineas) + "\n///\n"
+
+
+def kgml_ruta(datos, ruta):
+    """KGML mínimo de una ruta: una entrada gráfica por gen y relaciones entre vecinos."""
+    organismo = datos["organismo"]
+    genes = [g for g, info in sorted(datos["genes"].items()) if ruta in info["rutas"]]
+    lineas = [f'<?xml version="1.0"?>',
+              f'<pathway name="path:{ruta}" org="{organismo}" number="{ruta[len(organismo):]}" '
+              f'title="{datos["rutas"][ruta]}">']
+    for i, gen in enumerate(genes, start=1):
+        lineas.append(f'  <entry id="{i}" name="{organismo}:{gen}" type="gene">')
+        lineas.append(f'    <graphics name="{gen}" type="rectangle" x="{100 + (i % 20) * 50}" '
+                      f'y="{100 + (i // 20) * 30}" width="46" height="17"/>')
+        lineas.append("  </entry>")
+    for i in range(1, len(genes)):
+        lineas.append(f'  <relation entry1="{i}" entry2="{i + 1}" type="PPrel"/>')
+    lineas.append("</pathway>")
+    return "\n".join(lineas) + "\n"
+
+
+class _Limitador:
+    """Token bucket del lado del servidor (compartido por todos los hilos)."""
+
+    def __init__(self, tasa):
+        self.tasa = tasa
+        self._fichas = max(1.0, tasa)
+        self._ultimo = time.monotonic()
+        self._lock = threading.Lock()
+
+    def admitir(self):
+        with self._lock:
+            ahora = time.monotonic()
+            self._fichas = min(max(1.0, self.tasa), self._fichas + (ahora - self._ultimo) * self.tasa)
+            self._ultimo = ahora
+            if self._fichas >= 1:
+                self._fichas -= 1
+                return True
+            return False
+
+
+class _Manejador(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, como las APIs reales
+
+    def log_message(self, formato, *args):
+        pass  # Sin una línea por petición: ensuciaría la salida del banco de pruebas
+
+    def do_GET(self):
+        servidor = self.server.simulado
+        partes = urlsplit(self.path)
+        parametros = {clave: valores[-1] for clave, valores in parse_qs(partes.query).items()}
+        servidor.contar("peticiones")
+        time.sleep(servidor.latencia_peticion())
+
+        if servidor.limitador is not None and not servidor.limitador.admitir():
+            servidor.contar("limitadas")
+            return self._responder(429, b"Too Many Requests", cabeceras={"Retry-After": "1"})
+        if servidor.fallo_programado(partes.path) or (servidor.tasa_error and servidor.azar() < servidor.tasa_error):
+            servidor.contar("errores")
+            return self._responder(503, b"Service Unavailable")
+
+        if partes.path.startswith("/kegg/"):
+            estado, cuerpo = servidor.kegg(partes.path[len("/kegg/"):])
+            return self._responder(estado, cuerpo.encode("utf-8"))
+        if partes.path in ("/uniprotkb/search", "/uniprotkb/stream"):
+            return self._uniprot(servidor, partes.path, parametros)
+        return self._responder(404, b"Not Found")
+
+    def _uniprot(self, servidor, ruta, parametros):
+        accesiones = servidor.consulta_uniprot(parametros.get("query", ""))
+        cabeceras = {"Content-Type": "application/json", "x-total-results": str(len(accesiones))}
+        if ruta.endswith("/stream"):
+            pagina = accesiones
+        else:
+            tamano = int(parametros.get("size", 25))
+            inicio = int(parametros.get("cursor", 0))
+            pagina = accesiones[inicio:inicio + tamano]
+            if inicio + tamano < len(accesiones):
+                siguiente = dict(parametros, cursor=str(inicio + tamano))
+                url = f"http://{self.headers.get('Host')}{ruta}?{urlencode(siguiente)}"
+                cabeceras["Link"] = f'<{url}>; rel="next"'
+        resultados = [servidor.datos["proteinas"][accesion] for accesion in pagina]
+        cuerpo = json.dumps({"results": resultados}, separators=(",", ":")).encode("utf-8")
+        return self._responder(200, cuerpo, cabeceras)
+
+    def _responder(self, estado, cuerpo, cabeceras=None):
+        cabeceras = dict(cabeceras or {})
+        cabeceras.setdefault("Content-Type", "text/plain; charset=utf-8")
+        if "gzip" in self.headers.get("Accept-Encoding", "") and len(cuerpo) > 512:
+            cuerpo = gzip.compress(cuerpo, compresslevel=1)
+            cabeceras["Content-Encoding"] = "gzip"
+        self.send_response(estado)
+        for clave, valor in cabeceras.items():
+            self.send_header(clave, valor)
+        self.send_header("Content-Length", str(len(cuerpo)))
+        self.end_headers()
+        self.wfile.write(cuerpo)
+        self.server.simulado.contar("bytes", len(cuerpo))
+
+
+class ServidorSimulado:
+    """Servidor simulado de KEGG y UniProt en un hilo, en `127.0.0.1:puerto` (0 = libre)."""
+
+    def __init__(self, datos=None, latencia=0.0, tasa_error=0.0, limite_tasa=None, puerto=0, semilla=0, fallos=None):
+        self.datos = datos or generar_datos()
+        self.latencia = latencia
+        self.tasa_error = tasa_error
+        self.fallos = dict(fallos or {})  # Errores programados pendientes por fragmento de ruta
+        self.limitador = _Limitador(limite_tasa) if limite_tasa else None
+        self.estadisticas = {"peticiones": 0, "errores": 0, "limitadas": 0, "bytes": 0}
+        self._azar = random.Random(semilla)
+        self._lock = threading.Lock()
+        self._genes_por_ruta = {}
+        for gen, info in self.datos["genes"].items():
+            for ruta in info["rutas"]:
+                self._genes_por_ruta.setdefault(ruta, []).append(gen)
+        self._http = ThreadingHTTPServer(("127.0.0.1", puerto), _Manejador)
+        self._http.daemon_threads = True
+        self._http.simulado = self
+        self._hilo = None
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self._http.server_address[1]}"
+
+    @property
+    def url_kegg(self):
+        return f"{self.url}/kegg"
+
+    @property
+    def url_uniprot(self):
+        return f"{self.url}/uniprotkb"
+
+    def contar(self, contador, cantidad=1):
+        with self._lock:
+            self.estadisticas[contador] += cantidad
+
+    def azar(self):
+        with self._lock:
+            return self._azar.random()
+
+    def fallo_programado(self, ruta):
+        """True si a `ruta` le queda algún 503 programado en `fallos` (y lo consume)."""
+        with self._lock:
+            for fragmento, veces in self.fallos.items():
+                if veces > 0 and fragmento in ruta:
+                    self.fallos[fragmento] = veces - 1
+                    return True
+            return False
+
+    def latencia_peticion(self):
+        return self.latencia * (0.5 + self.azar()) if self.latencia else 0.0
+
+    def kegg(self, ruta):
+        """(estado, texto) de un endpoint de KEGG."""
+        organismo = self.datos["organismo"]
+        partes = ruta.split("/")
+        if partes == ["list", organismo]:
+            return 200, "".join(f"{organismo}:{gen}\tCDS\t{info['inicio']}\tproteína {gen}\n"
+                                for gen, info in self.datos["genes"].items())
+        if partes == ["list", "pathway", organismo]:
+            return 200, "".join(f"path:{r}\t{nombre}\n" for r, nombre in self.datos["rutas"].items())
+        if partes == ["link", "pathway", organismo]:
+            return 200, "".join(f"{organismo}:{gen}\tpath:{r}\n"
+                                for gen, info in self.datos["genes"].items() for r in info["rutas"])
+        if partes == ["conv", "uniprot", organismo]:
+            return 200, "".join(f"{organismo}:{gen}\tup:{info['uniprot']}\n"
+                                for gen, info in self.datos["genes"].items())
+        if len(partes) == 3 and partes[0] == "get" and partes[1] in self.datos["rutas"]:
+            if partes[2] == "kgml":
+                return 200, kgml_ruta(self.datos, partes[1])
+            return 400, ""  # `get/<ruta>/genes` no es una operación válida en la API real
+        if len(partes) == 2 and partes[0] == "get":
+            genes = [i.split(":", 1)[-1] for i in partes[1].split("+")]
+            texto = "".join(entrada_kegg(self.datos, g) for g in genes if g in self.datos["genes"])
+            return (200, texto) if texto else (404, "")
+        return 400, ""
+
+    def consulta_uniprot(self, query):
+        """Accesiones que cumplen la consulta (solo se filtra por `accession:`)."""
+        filtro = _ACCESIONES.search(query)
+        if not filtro:
+            return list(self.datos["proteinas"])
+        pedidas = [a.strip() for a in filtro.group(1).split(" OR ") if a.strip()]
+        return [a for a in pedidas if a in self.datos["proteinas"]]
+
+    def iniciar(self):
+        self._hilo = threading.Thread(target=self._http.serve_forever, daemon=True)
+        self._hilo.start()
+        return self
+
+    def detener(self):
+        self._http.shutdown()
+        self._http.server_close()
+
+    def __enter__(self):
+        return self.iniciar()
+
+    def __exit__(self, *exc_info):
+        self.detener()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Servidor local que simula las APIs de KEGG y UniProt.")
+    parser.add_argument("--puerto", type=int, default=8765)
+    parser.add_argument("--genes", type=int, default=1000, help="Genes del organismo sintético.")
+    parser.add_argument("--rutas", type=int, default=50, help="Rutas del organismo sintético.")
+    parser.add_argument("--latencia", type=float, default=0.0, help="Segundos de espera por petición.")
+    parser.add_argument("--tasa-error", type=float, default=0.0, help="Probabilidad de responder 503.")
+    parser.add_argument("--limite-tasa", type=float, default=None, help="Peticiones por segundo antes del 429.")
+    args = parser.parse_args()
+    servidor = ServidorSimulado(generar_datos(genes=args.genes, rutas=args.rutas), args.latencia,
+                                args.tasa_error, args.limite_tasa, args.puerto)
+    print(f"KEGG_API_BASE_URL={servidor.url_kegg}")
+    print(f"UNIPROT_API_URL={servidor.url_uniprot}")
+    servidor.iniciar()
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        servidor.detener()
@@ -0,0 +1,176 @@
+# comun/tuberia.py
+
+'''
+Tubería de etapas en streaming conectadas por colas asyncio acotadas.
+
+Cada `Etapa` tiene su propia cola de entrada (`tamano_cola` elementos como máximo) y
+`concurrencia` trabajadores que sacan elementos de ella, los procesan con `funcion` y
+ponen los resultados en la cola de la etapa siguiente. Como las colas están acotadas,
+una etapa lenta frena a las anteriores (contrapresión): `put` espera hasta que hay
+hueco, así que nunca se acumulan en memoria más de `tamano_cola` elementos por etapa.
+
+`funcion` recibe un elemento (o una lista de `lote` elementos si la etapa agrupa) y
+devuelve un iterable con los elementos que pasan a la etapa siguiente (o None, para no
+pasar nada: filtros y etapas finales). Puede ser:
+- Una corrutina: se ejecuta en el bucle de eventos (E/S de red).
+- Una función normal: se ejecuta en `ejecutor` (un `ThreadPoolExecutor` para E/S
+  bloqueante como pymongo, o un `ProcessPoolExecutor` para trabajo de CPU; por
+  defecto, el pool de hilos del bucle).
+
+Un error al procesar un elemento se cuenta y se informa, pero no detiene la tubería.
+
+Al terminar se devuelven las estadísticas de cada etapa (`EstadisticasEtapa`):
+elementos procesados, rendimiento, latencia media y máxima por llamada a `funcion`
+(por elemento, o por lote en las etapas que agrupan), y tiempo que
+la etapa pasó esperando porque la cola siguiente estaba llena.
+
+Uso:
+    etapas = [
+        Etapa("descarga", descargar, concurrencia=3),
+        Etapa("parseo", parsear, concurrencia=4, ejecutor=pool_procesos),
+        Etapa("carga", cargar, concurrencia=2, lote=1000, ejecutor=pool_hilos),
+    ]
+    for estadisticas in await ejecutar_tuberia(fuente, etapas):
+        print(estadisticas.informe())
+'''
+
+import asyncio
+import time
+
+TAMANO_COLA = 100
+_FIN = object()
+
+
+class EstadisticasEtapa:
+    """Contadores de una etapa y su rendimiento."""
+
+    def __init__(self, nombre, concurrencia):
+        self.nombre = nombre
+        self.concurrencia = concurrencia
+        self.entradas = 0
+        self.salidas = 0
+        self.errores = 0
+        self.llamadas = 0
+        self.latencia_total = 0.0
+        self.latencia_maxima = 0.0
+        self.espera_salida = 0.0  # Tiempo bloqueado en `put` por la contrapresión
+        self.inicio = None
+        self.fin = None
+
+    def registrar(self, entradas, latencia):
+        self.entradas += entradas
+        self.llamadas += 1
+        self.latencia_total += latencia
+        self.latencia_maxima = max(self.latencia_maxima, latencia)
+
+    @property
+    def segundos(self):
+        return (self.fin or time.perf_counter()) - self.inicio if self.inicio else 0.0
+
+    @property
+    def elementos_por_segundo(self):
+        return self.entradas / self.segundos if self.segundos else 0.0
+
+    @property
+    def latencia_media(self):
+        return self.latencia_total / self.llamadas if self.llamadas else 0.0
+
+    def informe(self):
+        return (f"{self.nombre:<14} x{self.concurrencia:<3} {self.entradas:>8} entradas {self.salidas:>8} salidas "
+                f"{self.errores:>4} errores {self.segundos:>8.2f} s {self.elementos_por_segundo:>9.1f}/s "
+                f"latencia media {self.latencia_media * 1000:>8.1f} ms, máx {self.latencia_maxima * 1000:>8.1f} ms, "
+                f"esperando a la siguiente {self.espera_salida:>7.2f} s")
+
+
+class Etapa:
+    """Etapa de la tubería: `funcion` aplicada por `concurrencia` trabajadores."""
+
+    def __init__(self, nombre, funcion, concurrencia=1, tamano_cola=TAMANO_COLA, lote=None, ejecutor=None):
+        self.nombre = nombre
+        self.funcion = funcion
+        self.concurrencia = concurrencia
+        self.tamano_cola = tamano_cola
+        self.lote = lote
+        self.ejecutor = ejecutor
+        self.estadisticas = EstadisticasEtapa(nombre, concurrencia)
+
+    async def _aplicar(self, elemento):
+        if asyncio.iscoroutinefunction(self.funcion):
+            return await self.funcion(elemento)
+        return await asyncio.get_running_loop().run_in_executor(self.ejecutor, self.funcion, elemento)
+
+    async def _siguiente(self, entrada):
+        """Siguiente elemento (o lote) de la cola de entrada; None al terminar."""
+        if not self.lote:
+            elemento = await entrada.get()
+            if elemento is _FIN:
+                entrada.put_nowait(_FIN)  # Para que terminen también los demás trabajadores
+                return None
+            return elemento, 1
+        lote = []
+        while len(lote) < self.lote:
+            elemento = await entrada.get()
+            if elemento is _FIN:
+                entrada.put_nowait(_FIN)
+                break
+            lote.append(elemento)
+        return (lote, len(lote)) if lote else None
+
+    async def _trabajador(self, entrada, salida):
+        estadisticas = self.estadisticas
+        while True:
+            siguiente = await self._siguiente(entrada)
+            if siguiente is None:
+                return
+            elemento, cantidad = siguiente
+            inicio = time.perf_counter()
+            try:
+                resultados = await self._aplicar(elemento)
+            except Exception as e:
+                estadisticas.errores += cantidad
+                estadisticas.registrar(cantidad, time.perf_counter() - inicio)
+                print(f"Error en la etapa '{self.nombre}': {e!r}")
+                continue
+            estadisticas.registrar(cantidad, time.perf_counter() - inicio)
+            for resultado in resultados or ():
+                estadisticas.salidas += 1
+                if salida is not None:
+                    espera = time.perf_counter()
+                    await salida.put(resultado)
+                    estadisticas.espera_salida += time.perf_counter() - espera
+
+    async def ejecutar(self, entrada, salida):
+        self.estadisticas.inicio = time.perf_counter()
+        await asyncio.gather(*(self._trabajador(entrada, salida) for _ in range(self.concurrencia)))
+        self.estadisticas.fin = time.perf_counter()
+        if salida is not None:
+            await salida.put(_FIN)
+
+
+async def _producir(fuente, cola):
+    if hasattr(fuente, "__aiter__"):
+        async for elemento in fuente:
+            await cola.put(elemento)
+    else:
+        for elemento in fuente:
+            await cola.put(elemento)
+    await cola.put(_FIN)
+
+
+async def ejecutar_tuberia(fuente, etapas):
+    """
+    Pasa los elementos de `fuente` (iterable o iterable asíncrono) por las `etapas` en
+    orden y devuelve sus estadísticas. Los resultados de la última etapa se descartan.
+    """
+    colas = [asyncio.Queue(maxsize=etapa.tamano_cola) for etapa in etapas]
+    tareas = [asyncio.create_task(_producir(fuente, colas[0]))]
+    for i, etapa in enumerate(etapas):
+        salida = colas[i + 1] if i + 1 < len(colas) else None
+        tareas.append(asyncio.create_task(etapa.ejecutar(colas[i], salida)))
+    try:
+        await asyncio.gather(*tareas)
+    except BaseException:
+        for tarea in tareas:
+            tarea.cancel()
+        raise
+    return [etapa.estadisticas for etapa in etapas]
@@ -0,0 +1,187 @@
+# comun/versiones_dataset.py
+
+'''
+Recarga de colecciones en "azul/verde" y registro de la versión del dataset.
+
+Para no servir datos a medio cargar, una recarga completa no escribe en la colección
+que lee la API (`UniProt`, `kegg_rutas`...), sino en una colección de staging
+(`<coleccion>__staging`):
+1. `preparar_staging`: vacía el staging y le copia los índices de la colección activa.
+2. Se cargan los registros en el staging (`comun.carga_mongo`).
+3. `validar_staging`: comprueba que el staging no está vacío, que no ha perdido más
+   de un `1 - proporcion_minima` de documentos respecto a la colección activa y que
+   una muestra de documentos conserva los campos que tienen los de la activa.
+4. `promover`: copia la colección activa (en el servidor, con `$out`, y con sus índices)
+   a `<coleccion>__anterior` y después sustituye la activa por el staging con un único
+   `renameCollection(dropTarget=True)`, que es atómico: los lectores pasan de la
+   generación anterior a la nueva sin ningún momento en que la colección no exista.
+   Después incrementa la versión del dataset. La copia duplica la escritura de la
+   colección, a cambio de conservar la generación anterior para poder revertir.
+
+La versión se guarda en el documento `{"_id": "actual"}` de la colección
+`dataset_versiones`, con el número de versión global y, por colección, la versión en
+que se promovió y su número de documentos. La API usa ese número en sus claves de
+caché, así que una promoción invalida de golpe los resultados cacheados.
+
+Las actualizaciones parciales que escriben directamente en la colección activa (p. ej.
+la actualización incremental de KEGG) llaman a `registrar_version` para invalidar
+igualmente la caché de la API.
+
+`revertir` intercambia la colección activa con `<coleccion>__anterior` de la misma forma
+(copia de la activa y un único renombrado de la anterior sobre ella) y vuelve a
+incrementar la versión. Desde la carpeta `Descarga_datos`:
+    python -m comun.versiones_dataset revertir <coleccion>
+    python -m comun.versiones_dataset estado
+'''
+
+import os
+import sys
+import argparse
+from datetime import datetime, timezone
+from dotenv import load_dotenv
+from pymongo import MongoClient, ReturnDocument
+
+COLECCION_VERSIONES = "dataset_versiones"
+ID_VERSION_ACTUAL = "actual"
+SUFIJO_STAGING = "__staging"
+SUFIJO_ANTERIOR = "__anterior"
+PROPORCION_MINIMA = 0.9
+MUESTRAS_VALIDACION = 20
+
+
+def nombre_staging(coleccion):
+    return f"{coleccion}{SUFIJO_STAGING}"
+
+
+def nombre_anterior(coleccion):
+    return f"{coleccion}{SUFIJO_ANTERIOR}"
+
+
+def _copiar_indices(db, origen, destino):
+    for nombre, info in db[origen].index_information().items():
+        if nombre == "_id_":
+            continue
+        opciones = {k: info[k] for k in ("unique", "sparse") if k in info}
+        db[destino].create_index(info["key"], name=nombre, **opciones)
+
+
+def _copiar_coleccion(db, origen, destino):
+    """Sustituye `destino` por una copia de `origen` (en el servidor, con `$out`) con sus índices."""
+    db[destino].drop()
+    db[origen].aggregate([{"$match": {}}, {"$out": destino}], allowDiskUse=True)
+    _copiar_indices(db, origen, destino)
+
+
+def preparar_staging(db, coleccion):
+    """Crea un staging vacío con los mismos índices que la colección activa y lo devuelve."""
+    staging = db[nombre_staging(coleccion)]
+    staging.drop()
+    if coleccion in db.list_collection_names():
+        _copiar_indices(db, coleccion, staging.name)
+    return staging
+
+
+def _campos_comunes(documentos):
+    campos = None
+    for documento in documentos:
+        campos = set(documento) if campos is None else campos & set(documento)
+    return campos or set()
+
+
+def validar_staging(db, coleccion, proporcion_minima=PROPORCION_MINIMA, muestras=MUESTRAS_VALIDACION):
+    """Devuelve la lista de problemas encontrados en el staging (vacía si se puede promover)."""
+    staging = db[nombre_staging(coleccion)]
+    problemas = []
+
+    total_staging = staging.count_documents({})
+    total_activa = db[coleccion].count_documents({}) if coleccion in db.list_collection_names() else 0
+    if total_staging == 0:
+        return [f"El staging de '{coleccion}' está vacío."]
+    if total_staging < proporcion_minima * total_activa:
+        problemas.append(f"El staging de '{coleccion}' tiene {total_staging} documentos frente a "
+                         f"{total_activa} en la colección activa (mínimo {proporcion_minima:.0%}).")
+
+    muestra_staging = list(staging.aggregate([{"$sample": {"size": muestras}}]))
+    if total_activa:
+        muestra_activa = list(db[coleccion].aggregate([{"$sample": {"size": muestras}}]))
+        faltan = _campos_comunes(muestra_activa) - _campos_comunes(muestra_staging)
+        if faltan:
+            problemas.append(f"A los documentos del staging de '{coleccion}' les faltan campos: {sorted(faltan)}.")
+    elif all(set(documento) == {"_id"} for documento in muestra_staging):
+        problemas.append(f"Los documentos del staging de '{coleccion}' están vacíos.")
+    return problemas
+
+
+def registrar_version(db, coleccion, **datos):
+    """Incrementa la versión del dataset tras cambiar `coleccion` y devuelve la nueva versión."""
+    ahora = datetime.now(timezone.utc)
+    documento = db[COLECCION_VERSIONES].find_one_and_update(
+        {"_id": ID_VERSION_ACTUAL},
+        {"$inc": {"version": 1}, "$set": {"actualizado": ahora}},
+        upsert=True, return_document=ReturnDocument.AFTER,
+    )
+    version = documento["version"]
+    db[COLECCION_VERSIONES].update_one(
+        {"_id": ID_VERSION_ACTUAL},
+        {"$set": {f"colecciones.{coleccion}": {"version": version, "fecha": ahora, **datos}}},
+    )
+    return version
+
+
+def promover(db, coleccion):
+    """Publica el staging como colección activa y devuelve la nueva versión del dataset."""
+    staging = nombre_staging(coleccion)
+    documentos = db[staging].count_documents({})
+    if coleccion in db.list_collection_names():
+        _copiar_coleccion(db, coleccion, nombre_anterior(coleccion))
+    # Un único renombrado atómico: la colección activa existe en todo momento
+    db[staging].rename(coleccion, dropTarget=True)
+    version = registrar_version(db, coleccion, documentos=documentos, origen="carga")
+    print(f"Colección '{coleccion}' promovida ({documentos} documentos). Versión del dataset: {version}.")
+    return version
+
+
+def revertir(db, coleccion):
+    """Vuelve a activar `<coleccion>__anterior` (la activa pasa a ser la anterior)."""
+    anterior = nombre_anterior(coleccion)
+    if anterior not in db.list_collection_names():
+        raise ValueError(f"No hay una generación anterior de '{coleccion}' a la que volver.")
+    temporal = f"{coleccion}__revirtiendo"
+    _copiar_coleccion(db, coleccion, temporal)
+    db[anterior].rename(coleccion, dropTarget=True)
+    db[temporal].rename(anterior, dropTarget=True)
+    documentos = db[coleccion].count_documents({})
+    version = registrar_version(db, coleccion, documentos=documentos, origen="revertir")
+    print(f"Colección '{coleccion}' revertida a la generación anterior ({documentos} documentos). "
+          f"Versión del dataset: {version}.")
+    return version
+
+
+def version_actual(db):
+    documento = db[COLECCION_VERSIONES].find_one({"_id": ID_VERSION_ACTUAL})
+    return documento or {"_id": ID_VERSION_ACTUAL, "version": 0, "colecciones": {}}
+
+
+def conectar():
+    load_dotenv()
+    mongo_uri = os.getenv("MONGO_URI")
+    db_name = os.getenv("DB_NAME")
+    if not mongo_uri or not db_name:
+        print("Faltan variables en el archivo .env")
+        sys.exit(1)
+    return MongoClient(mongo_uri)[db_name]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Gestión de versiones de las colecciones cargadas.")
+    subparsers = parser.add_subparsers(dest="orden", required=True)
+    subparsers.add_parser("estado", help="Muestra la versión activa del dataset.")
+    parser_revertir = subparsers.add_parser("revertir", help="Vuelve a la generación anterior de una colección.")
+    parser_revertir.add_argument("coleccion")
+    args = parser.parse_args()
+
+    db = conectar()
+    if args.orden == "revertir":
+        revertir(db, args.coleccion)
+    else:
+        print(version_actual(db))
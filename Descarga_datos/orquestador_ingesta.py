@@ -0,0 +1,261 @@
+# orquestador_ingesta.py
+
+'''
+Orquestador de la ingesta completa de KEGG de un organismo en una sola ejecución.
+
+Sustituye a ejecutar a mano, en orden, `Kegg.descargas_datos_kegg`,
+`Kegg.descargas_kegg_paths`, `Kegg.descargas_definiciones_rutas_kegg_kgml` y
+`unificar_ficheros_json_subir_mongoAtlas` pasando por carpetas intermedias: las etapas
+se conectan con colas asyncio acotadas (`comun.tuberia`), de modo que la red, la CPU y
+MongoDB trabajan a la vez y una etapa lenta frena a las anteriores en lugar de acumular
+datos en memoria o en disco.
+
+1. Mapeos (`Kegg.mapeos_kegg`): `link/pathway` y `conv/uniprot`, dos peticiones.
+2. Tubería de genes:
+   descarga (`get/` en lotes de 10 IDs, async) -> parseo (`Kegg.parser_kegg`, pool de
+   procesos) -> transformación (solo genes con rutas; se añaden sus accesiones de
+   UniProt) -> carga (`bulk_write` por lotes, pool de hilos) en `kegg_rutas`.
+3. Tubería de rutas:
+   descarga (KGML, async; los genes salen de `link/pathway`) -> carga en
+   `kegg_rutas_graficas` (con el KGML comprimido, `Kegg.kgml_comprimido`).
+Las dos tuberías comparten el cliente HTTP y, con él, el límite de tasa de KEGG.
+
+La carga es azul/verde (`comun.versiones_dataset`): se escribe en los staging y al final
+se validan y promueven. Con `--salida <carpeta>` no se usa MongoDB y los documentos se
+escriben en archivos NDJSON+gzip (`comun.registros`), p. ej. para revisarlos antes.
+
+Los staging solo se promueven si la ingesta está completa: si falta algún lote de genes
+o el KGML de alguna ruta (descargas fallidas tras los reintentos del cliente) o alguna
+etapa tuvo errores, se informa de los fallos, no se promueve la colección afectada y el
+proceso termina con código 1. Un mapeo que no se promueve (`subir_mapeo`) cuenta igual. Las rutas para las que KEGG no tiene KGML (404) no son un
+fallo: se omiten y se cuentan en el resumen.
+
+Al terminar se muestran, por etapa, los elementos procesados, el rendimiento, la
+latencia media y máxima y el tiempo esperando por la contrapresión.
+
+Uso (desde la carpeta `Descarga_datos`):
+    python -m orquestador_ingesta [--organismo bce] [--salida carpeta]
+        [--descargas N] [--procesos N] [--hilos N] [--lote N] [--cola N]
+'''
+
+import os
+import sys
+import time
+import asyncio
+import threading
+import argparse
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from comun.tuberia import Etapa, ejecutar_tuberia, TAMANO_COLA
+from comun.registros import EscritorRegistros
+from comun.carga_mongo import escribir_lote, asegurar_indice, ResumenCarga, TAMANO_LOTE, HILOS
+from comun.versiones_dataset import preparar_staging, validar_staging, promover, conectar
+from Kegg.descargas_datos_kegg import crear_cliente_kegg, obtener_ids_kegg_async, descargar_lote_kegg
+from Kegg.descargas_definiciones_rutas_kegg_kgml import get_organism_pathway_metadata, descargar_datos_ruta, CAMPO_SIN_KGML
+from Kegg.mapeos_kegg import obtener_mapeos, subir_mapeo, documentos_mapeo, COLECCION_GENES_RUTAS, COLECCION_KEGG_UNIPROT
+from Kegg.parser_kegg import parsear_entrada_kegg
+from Kegg.kgml_comprimido import comprimir_documento_ruta
+
+COLECCION_ENTRADAS = "kegg_rutas"
+COLECCION_RUTAS = "kegg_rutas_graficas"
+TAMANO_LOTE_KEGG = 10  # IDs por petición `get/` (máximo de KEGG)
+TAMANO_LOTE_RUTAS = 20  # Los documentos de rutas incluyen el KGML completo
+
+
+def parsear_lote(entradas):
+    """Parsea un lote de entradas descargadas (se ejecuta en el pool de procesos)."""
+    return [parsear_entrada_kegg(entrada["raw_text"]) for entrada in entradas]
+
+
+class Destino:
+    """Destino de una colección: staging de MongoDB o archivos NDJSON+gzip."""
+
+    def __init__(self, coleccion, db=None, carpeta=None):
+        self.coleccion = coleccion
+        self.db = db
+        self.resumen = ResumenCarga(coleccion)
+        self.fallos = self.resumen.fallos  # Elementos perdidos antes de llegar al destino (lotes, rutas...)
+        self._lock = threading.Lock()  # `escribir` se llama desde varios hilos
+        if db is not None:
+            self.staging = preparar_staging(db, coleccion)
+            self.escritor = None
+        else:
+            self.staging = None
+            self.escritor = EscritorRegistros(carpeta, coleccion)
+
+    def escribir(self, lote):
+        """Etapa final (síncrona): escribe un lote de documentos."""
+        inicio = time.perf_counter()
+        if self.staging is not None:
+            resultado = escribir_lote(self.staging, lote)
+        else:
+            for documento in lote:
+                self.escritor.escribir(documento)
+            resultado = {"nUpserted": len(lote)}
+        with self._lock:
+            self.resumen.acumular(len(lote), resultado)
+            self.resumen.segundos += time.perf_counter() - inicio
+
+    def concurrencia(self, hilos):
+        # El escritor de archivos no admite escrituras simultáneas
+        return hilos if self.staging is not None else 1
+
+    def terminar(self, estadisticas):
+        """
+        Publica el resultado: promueve el staging si la carga está completa y es válida, o
+        cierra los archivos. Devuelve la lista de problemas (vacía si se publicó).
+        """
+        print(self.resumen.informe())
+        problemas = self.resumen.problemas(estadisticas)
+        if self.staging is None:
+            self.escritor.cerrar()
+        elif not problemas:
+            problemas = validar_staging(self.db, self.coleccion)
+        for problema in problemas:
+            print(f"'{self.coleccion}' incompleta: {problema}")
+        if self.staging is not None:
+            if problemas:
+                print(f"No se promueve '{self.staging.name}'; '{self.coleccion}' no se ha modificado.")
+            else:
+                promover(self.db, self.coleccion)
+        return problemas
+
+
+async def lotes_ids(cliente, organismo):
+    """Fuente de la tubería de genes: lotes de IDs de KEGG."""
+    ids = await obtener_ids_kegg_async(cliente, organismo)
+    print(f"Genes de {organismo}: {len(ids)}")
+    for inicio in range(0, len(ids), TAMANO_LOTE_KEGG):
+        yield inicio // TAMANO_LOTE_KEGG + 1, ids[inicio:inicio + TAMANO_LOTE_KEGG]
+
+
+async def tuberia_genes(cliente, organismo, destino, uniprot_por_gen, log_path, opciones, pool_procesos, pool_hilos):
+    async def descargar(elemento):
+        numero, lote = elemento
+        entradas = await descargar_lote_kegg(cliente, lote, numero, log_path)
+        if entradas is None:
+            destino.fallos.append(f"lote {numero}")
+            return None
+        return [entradas] if entradas else None
+
+    async def transformar(documento):
+        if not documento["pathways"]:
+            return None
+        documento["uniprot"] = uniprot_por_gen.get(f"{organismo}:{documento['entry']}", [])
+        return [documento]
+
+    if destino.staging is not None:
+        asegurar_indice(destino.staging, "entry")
+    etapas = [
+        Etapa("descarga", descargar, opciones.descargas, opciones.cola),
+        # El parseo recibe lotes de entradas y pasa los documentos de uno en uno
+        Etapa("parseo", parsear_lote, opciones.procesos, opciones.cola, ejecutor=pool_procesos),
+        Etapa("transformacion", transformar, 1, opciones.cola),
+        Etapa("carga", destino.escribir, destino.concurrencia(opciones.hilos), opciones.cola,
+              lote=opciones.lote, ejecutor=pool_hilos),
+    ]
+    return await ejecutar_tuberia(lotes_ids(cliente, organismo), etapas)
+
+
+async def tuberia_rutas(cliente, organismo, destino, rutas_por_gen, opciones, pool_hilos):
+    genes_por_ruta, sin_kgml = {}, []
+    for gen, rutas in rutas_por_gen.items():
+        for ruta in rutas:
+            genes_por_ruta.setdefault(ruta, []).append(gen)
+
+    async def descargar(p_meta):
+        documento = await descargar_datos_ruta(cliente, p_meta, sorted(genes_por_ruta.get(p_meta["pathway_id"], [])))
+        if documento.pop(CAMPO_SIN_KGML, False):
+            sin_kgml.append(documento["_id"])
+            return None
+        if not documento["kgml_data"]:
+            destino.fallos.append(f"ruta {documento['_id']}")
+            return None
+        # En MongoDB el KGML se guarda comprimido; en los archivos NDJSON, como texto
+        return [comprimir_documento_ruta(documento) if destino.staging is not None else documento]
+
+    metadatos = await get_organism_pathway_metadata(cliente, organismo)
+    etapas = [
+        Etapa("descarga_kgml", descargar, opciones.descargas, opciones.cola),
+        Etapa("carga_kgml", destino.escribir, destino.concurrencia(opciones.hilos), opciones.cola,
+              lote=TAMANO_LOTE_RUTAS, ejecutor=pool_hilos),
+    ]
+    estadisticas = await ejecutar_tuberia(metadatos, etapas)
+    if sin_kgml:
+        print(f"Rutas sin KGML en KEGG (omitidas): {len(sin_kgml)} ({', '.join(sorted(sin_kgml))})")
+    return estadisticas
+
+
+async def ingesta(cliente, organismo="bce", db=None, carpeta=None, opciones=None):
+    """
+    Ejecuta la ingesta completa y devuelve las estadísticas de todas las etapas y los
+    problemas por colección no publicada ({} si se publicó todo).
+    """
+    opciones = opciones or crear_parser().parse_args([])
+    inicio = time.perf_counter()
+    if carpeta:
+        os.makedirs(carpeta, exist_ok=True)
+    log_path = os.path.join(carpeta or ".", "descarga.log")
+
+    problemas = {}
+    rutas_por_gen, uniprot_por_gen = await obtener_mapeos(cliente, organismo)
+    for coleccion, relacion, campo in ((COLECCION_GENES_RUTAS, rutas_por_gen, "pathways"),
+                                       (COLECCION_KEGG_UNIPROT, uniprot_por_gen, "uniprot")):
+        if db is not None:
+            if not subir_mapeo(db, coleccion, documentos_mapeo(relacion, campo)):
+                problemas[coleccion] = ["El mapeo no se ha promovido (errores de escritura o validación fallida)."]
+        else:
+            with EscritorRegistros(carpeta, coleccion) as escritor:
+                for documento in documentos_mapeo(relacion, campo):
+                    escritor.escribir(documento)
+
+    destino_genes = Destino(COLECCION_ENTRADAS, db, carpeta)
+    destino_rutas = Destino(COLECCION_RUTAS, db, carpeta)
+    with ProcessPoolExecutor(max_workers=opciones.procesos) as pool_procesos, \
+            ThreadPoolExecutor(max_workers=opciones.hilos) as pool_hilos:
+        estadisticas_genes, estadisticas_rutas = await asyncio.gather(
+            tuberia_genes(cliente, organismo, destino_genes, uniprot_por_gen, log_path, opciones,
+                          pool_procesos, pool_hilos),
+            tuberia_rutas(cliente, organismo, destino_rutas, rutas_por_gen, opciones, pool_hilos),
+        )
+    for destino, estadisticas_tuberia in ((destino_genes, estadisticas_genes), (destino_rutas, estadisticas_rutas)):
+        problemas_destino = destino.terminar(estadisticas_tuberia)
+        if problemas_destino:
+            problemas[destino.coleccion] = problemas_destino
+
+    estadisticas = estadisticas_genes + estadisticas_rutas
+    estado = "incompleta" if problemas else "completada"
+    print(f"\n--- Ingesta de {organismo} {estado} en {time.perf_counter() - inicio:.2f} s ---")
+    for estadisticas_etapa in estadisticas:
+        print(estadisticas_etapa.informe())
+    for coleccion, problemas_coleccion in problemas.items():
+        print(f"No publicada '{coleccion}': {' '.join(problemas_coleccion)}")
+    return estadisticas, problemas
+
+
+def crear_parser():
+    parser = argparse.ArgumentParser(description="Descarga, parsea y carga los datos de KEGG de un organismo.")
+    parser.add_argument("--organismo", default="bce", help="Código KEGG del organismo.")
+    parser.add_argument("--salida", default=None,
+                        help="Carpeta donde escribir los documentos en lugar de cargarlos en MongoDB.")
+    parser.add_argument("--descargas", type=int, default=3, help="Peticiones a KEGG en vuelo.")
+    parser.add_argument("--procesos", type=int, default=os.cpu_count() or 1, help="Procesos de parseo.")
+    parser.add_argument("--hilos", type=int, default=HILOS, help="Lotes escritos en paralelo en MongoDB.")
+    parser.add_argument("--lote", type=int, default=TAMANO_LOTE, help="Documentos por bulk_write.")
+    parser.add_argument("--cola", type=int, default=TAMANO_COLA, help="Elementos como máximo en cada cola.")
+    return parser
+
+
+def main(argv=None):
+    """Ejecuta la ingesta y devuelve el código de salida (1 si alguna colección no se publicó)."""
+    opciones = crear_parser().parse_args(argv)
+    db = None if opciones.salida else conectar()
+
+    async def _ejecutar():
+        async with crear_cliente_kegg(concurrencia=opciones.descargas) as cliente:
+            return await ingesta(cliente, opciones.organismo, db, opciones.salida, opciones)
+    _, problemas = asyncio.run(_ejecutar())
+    return 1 if problemas else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
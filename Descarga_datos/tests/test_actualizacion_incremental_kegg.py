@@ -0,0 +1,156 @@
+# tests/test_actualizacion_incremental_kegg.py
+
+'''
+Tests para la actualización incremental de KEGG (`Kegg/actualizacion_incremental_kegg.py`).
+
+Se simula la API de KEGG con `httpx.MockTransport` a partir de un pequeño "catálogo"
+modificable y se usa `mongomock` como base de datos.
+
+- test_primera_ejecucion_descarga_todo: Sin estado previo se descargan y suben todas
+  las entradas y rutas.
+- test_misma_version_no_descarga: Si la versión de KEGG no cambia solo se pide `info/`.
+- test_nueva_version_descarga_solo_cambios: Con una nueva versión solo se descargan
+  la entrada y el KGML de la ruta cuyas huellas cambiaron (los genes de las rutas salen
+  de `link/pathway`), y se eliminan las que ya no existen.
+- test_cambio_de_rutas_de_un_gen: Un gen que cambia de ruta sin que cambie su línea en
+  `list/` se vuelve a descargar.
+- test_ruta_sin_kgml: Una ruta cuyo KGML da 404 se anota como "sin KGML": la versión se
+  registra y la siguiente ejecución no vuelve a pedir nada.
+'''
+
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+import httpx
+import mongomock
+from comun.cliente_http import ClienteHTTPAsync
+from Kegg import actualizacion_incremental_kegg, descargas_definiciones_rutas_kegg_kgml
+from Kegg.actualizacion_incremental_kegg import actualizar_incremental
+
+
+def entrada(gen, ruta):
+    return (f"ENTRY       {gen}           CDS       T00117\n"
+            f"PATHWAY     {ruta}  Ruta {ruta}\n///\n")
+
+
+class TestActualizacionIncrementalKegg(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.carpeta = os.path.join(self.temp_dir, "incremental")
+        self.patcher_output = patch.object(descargas_definiciones_rutas_kegg_kgml, "OUTPUT_JSON_DIR",
+                                           os.path.join(self.temp_dir, "rutas"))
+        self.patcher_output.start()
+        self.db = mongomock.MongoClient()["test"]
+        self.peticiones = []
+        self.release = "112.0+/10-01, Oct 24"
+        self.genes = {
+            "bce:BC_0001": ("CDS\t1..100\tproteina A", "bce00010"),
+            "bce:BC_0002": ("CDS\t200..300\tproteina B", "bce00020"),
+        }
+        self.rutas = {"bce00010": "Glycolysis", "bce00020": "Citrate cycle"}
+        self.sin_kgml = set()
+
+    def tearDown(self):
+        self.patcher_output.stop()
+        shutil.rmtree(self.temp_dir)
+
+    def handler(self, request):
+        ruta = request.url.path.lstrip("/")
+        self.peticiones.append(ruta)
+        if ruta == "info/bce":
+            return httpx.Response(200, text=f"T00117  Bacillus cereus\nbce     Release {self.release}\n")
+        if ruta == "list/bce":
+            return httpx.Response(200, text="\n".join(f"{g}\t{d}" for g, (d, _) in self.genes.items()))
+        if ruta == "list/pathway/bce":
+            return httpx.Response(200, text="\n".join(f"path:{p}\t{n}" for p, n in self.rutas.items()))
+        if ruta == "link/pathway/bce":
+            return httpx.Response(200, text="\n".join(f"{g}\tpath:{p}" for g, (_, p) in self.genes.items()))
+        if ruta.endswith("/kgml"):
+            pid = ruta.split("/")[1]
+            if pid in self.sin_kgml:
+                return httpx.Response(404)
+            return httpx.Response(200, text=f"<pathway name='{pid}' title='{self.rutas[pid]}'/>")
+        if ruta.endswith("/genes"):
+            pid = ruta.split("/")[1]
+            return httpx.Response(200, text="\n".join(f"{g}\tgen" for g, (_, p) in self.genes.items() if p == pid))
+        if ruta.startswith("get/"):
+            ids = ruta[4:].split("+")
+            return httpx.Response(200, text="".join(entrada(i.split(":")[1], self.genes[i][1]) for i in ids))
+        return httpx.Response(404)
+
+    async def ejecutar(self):
+        self.peticiones.clear()
+        cliente = ClienteHTTPAsync(base_url="http://rest.kegg.jp", transport=httpx.MockTransport(self.handler),
+                                   tasa=1000, reintentos=2, espera_base=0)
+        async with cliente:
+            return await actualizar_incremental(cliente, "bce", self.carpeta, db=self.db)
+
+    async def test_primera_ejecucion_descarga_todo(self):
+        resumen = await self.ejecutar()
+
+        self.assertEqual(resumen["entradas_actualizadas"], 2)
+        self.assertEqual(resumen["rutas_actualizadas"], 2)
+        self.assertEqual(self.db.kegg_rutas.count_documents({}), 2)
+        self.assertEqual(self.db.kegg_rutas_graficas.find_one({"_id": "bce00010"})["kegg_genes_in_pathway"], ["bce:BC_0001"])
+        self.assertTrue(os.path.exists(os.path.join(self.temp_dir, "rutas", "bce00020.ndjson.gz")))
+        self.assertEqual(self.db.dataset_versiones.find_one({"_id": "actual"})["version"], 2)
+
+    async def test_misma_version_no_descarga(self):
+        await self.ejecutar()
+        resumen = await self.ejecutar()
+
+        self.assertEqual(self.peticiones, ["info/bce"])
+        self.assertEqual(resumen["entradas_descargadas"], 0)
+
+    async def test_nueva_version_descarga_solo_cambios(self):
+        await self.ejecutar()
+
+        self.release = "112.0+/10-08, Oct 24"
+        self.genes["bce:BC_0002"] = ("CDS\t200..300\tproteina B renombrada", "bce00020")
+        self.genes["bce:BC_0003"] = ("CDS\t400..500\tproteina C", "bce00010")
+        del self.genes["bce:BC_0001"]
+        del self.rutas["bce00020"]
+        resumen = await self.ejecutar()
+
+        descargas = [p for p in self.peticiones if p.startswith("get/")]
+        self.assertEqual(sorted(descargas), [
+            "get/bce00010/kgml", "get/bce:BC_0002+bce:BC_0003"
+        ])
+        self.assertEqual(self.db.kegg_rutas_graficas.find_one({"_id": "bce00010"})["kegg_genes_in_pathway"],
+                         ["bce:BC_0003"])
+        self.assertEqual(resumen["entradas_eliminadas"], 1)
+        self.assertEqual(resumen["rutas_eliminadas"], 1)
+        # BC_0002 se descargó por su huella, pero su contenido no cambió: no se vuelve a subir
+        self.assertEqual(resumen["entradas_actualizadas"], 1)
+        self.assertEqual(sorted(d["entry"] for d in self.db.kegg_rutas.find()), ["BC_0002", "BC_0003"])
+        self.assertEqual([d["_id"] for d in self.db.kegg_rutas_graficas.find()], ["bce00010"])
+
+    async def test_cambio_de_rutas_de_un_gen(self):
+        await self.ejecutar()
+
+        self.release = "112.0+/10-08, Oct 24"
+        self.genes["bce:BC_0001"] = ("CDS\t1..100\tproteina A", "bce00020")
+        resumen = await self.ejecutar()
+
+        self.assertIn("get/bce:BC_0001", self.peticiones)
+        self.assertEqual(resumen["entradas_actualizadas"], 1)
+        self.assertEqual(self.db.kegg_rutas.find_one({"entry": "BC_0001"})["pathways"][0]["pathway_id"], "bce00020")
+
+    async def test_ruta_sin_kgml(self):
+        self.rutas["bce01100"] = "Metabolic pathways"
+        self.sin_kgml.add("bce01100")
+        resumen = await self.ejecutar()
+
+        self.assertEqual(resumen["rutas_sin_kgml"], 1)
+        self.assertEqual(resumen["rutas_actualizadas"], 2)
+        self.assertIsNone(self.db.kegg_rutas_graficas.find_one({"_id": "bce01100"}))
+
+        await self.ejecutar()
+        self.assertEqual(self.peticiones, ["info/bce"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+# tests/test_cache_http.py
+
+'''
+Tests para la caché en disco de respuestas HTTP (`comun/cache_http.py`).
+
+- test_cliente_async_repite_desde_cache: La segunda descarga no va a la red, aunque
+  los parámetros lleguen en otro orden, y las respuestas de error no se guardan.
+- test_modo_offline_y_ttl: En modo `offline` una petición que no está en la caché falla
+  sin ir a la red; con TTL vencido el modo normal vuelve a pedirla.
+- test_cliente_uniprot_stream_y_contenido_compartido: Las respuestas comprimidas por el
+  servidor se guardan tal cual, se leen en streaming y dos URLs con el mismo cuerpo
+  comparten objeto.
+'''
+
+import gzip
+import os
+import shutil
+import tempfile
+import unittest
+import httpx
+from comun.cache_http import CacheHTTP, NoEnCacheError
+from comun.cliente_http import ClienteHTTPAsync
+from Uniprot.descargas_datos_uniprot import crear_cliente_uniprot
+
+
+class TestCacheHTTP(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.carpeta = tempfile.mkdtemp()
+        self.peticiones = []
+
+    def tearDown(self):
+        shutil.rmtree(self.carpeta)
+
+    def handler(self, request):
+        self.peticiones.append(str(request.url))
+        if request.url.path == "/error":
+            return httpx.Response(404)
+        if request.url.path.startswith("/stream"):
+            return httpx.Response(200, headers={"Content-Encoding": "gzip"}, content=gzip.compress(b'{"results":[]}'))
+        return httpx.Response(200, text=f"respuesta {request.url.path}")
+
+    async def descargar(self, cache, url, params=None):
+        cliente = ClienteHTTPAsync(base_url="http://rest.kegg.jp", transport=httpx.MockTransport(self.handler),
+                                   tasa=1000, espera_base=0, cache=cache)
+        async with cliente:
+            return await cliente.get(url, params=params)
+
+    async def test_cliente_async_repite_desde_cache(self):
+        cache = CacheHTTP(self.carpeta)
+        primera = await self.descargar(cache, "list/bce", {"a": "1", "b": "2"})
+        segunda = await self.descargar(CacheHTTP(self.carpeta), "list/bce", {"b": "2", "a": "1"})
+
+        self.assertEqual(len(self.peticiones), 1)
+        self.assertEqual((segunda.status_code, segunda.text), (200, primera.text))
+
+        await self.descargar(cache, "error")
+        await self.descargar(cache, "error")
+        self.assertEqual(len(self.peticiones), 3)
+
+    async def test_modo_offline_y_ttl(self):
+        with self.assertRaises(NoEnCacheError):
+            await self.descargar(CacheHTTP(self.carpeta, modo="offline"), "list/bce")
+        self.assertEqual(self.peticiones, [])
+
+        await self.descargar(CacheHTTP(self.carpeta), "list/bce")
+        respuesta = await self.descargar(CacheHTTP(self.carpeta, ttl=0, modo="offline"), "list/bce")
+        self.assertEqual(respuesta.text, "respuesta /list/bce")
+        self.assertEqual(len(self.peticiones), 1)
+
+        await self.descargar(CacheHTTP(self.carpeta, ttl=0), "list/bce")
+        self.assertEqual(len(self.peticiones), 2)
+
+    async def test_cliente_uniprot_stream_y_contenido_compartido(self):
+        for _ in range(2):
+            for url in ("https://rest.uniprot.org/stream", "https://rest.uniprot.org/stream2"):
+                cliente = crear_cliente_uniprot(httpx.MockTransport(self.handler), CacheHTTP(self.carpeta))
+                with cliente.stream("GET", url) as response:
+                    self.assertEqual(b"".join(response.iter_bytes()), b'{"results":[]}')
+                cliente.close()
+
+        self.assertEqual(len(self.peticiones), 2)
+        objetos = [f for _, _, archivos in os.walk(os.path.join(self.carpeta, "objetos")) for f in archivos]
+        self.assertEqual(len(objetos), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -4,25 +4,42 @@
 Tests para el módulo de descarga de datos desde KEGG.
 
 Este archivo contiene pruebas unitarias para comprobar el correcto funcionamiento
-de las funciones del módulo 'descargas_datos_kegg.py'.
+de las funciones del módulo 'descargas_datos_kegg.py'. Las peticiones HTTP se
+simulan con `httpx.MockTransport` inyectado en el cliente compartido.
 
 Clases y tests incluidos:
 - TestKeggDownloader:
     - test_obtener_ids_kegg: Verifica que se obtienen correctamente los IDs de rutas
       KEGG desde una consulta de organismo.
     - test_descargar_entradas_kegg: Comprueba que se descargan correctamente las
-      entradas asociadas a los IDs y que se almacenan en archivos JSON.
+      entradas asociadas a los IDs y que se almacenan en archivos NDJSON+gzip.
+    - test_descargar_entradas_kegg_error_http: Comprueba que un lote fallido se
+      registra en `descarga.log` sin detener la descarga.
+    - test_descargar_entradas_kegg_error_red: Igual con un timeout que persiste
+      tras los reintentos: no se propaga y el bloque no se registra como completo.
+    - test_descargar_entradas_kegg_reanuda: Comprueba que una segunda ejecución solo
+      vuelve a pedir los bloques incompletos y que `verificar=True` repara bloques alterados.
 '''
 
 import unittest
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch
 import os
 import shutil
-import json
+import httpx
+from comun.cliente_http import ClienteHTTPAsync
+from comun.manifiesto import Manifiesto
+from comun.registros import leer_registros
+from Kegg import descargas_datos_kegg
 from Kegg.descargas_datos_kegg import obtener_ids_kegg, descargar_entradas_kegg  
-import sys
 
-sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+def cliente_simulado(handler):
+    return ClienteHTTPAsync(
+        base_url=descargas_datos_kegg.KEGG_API_BASE_URL,
+        transport=httpx.MockTransport(handler),
+        tasa=1000, reintentos=2, espera_base=0
+    )
+
 
 class TestKeggDownloader(unittest.TestCase):
 
@@ -30,45 +47,110 @@ class TestKeggDownloader(unittest.TestCase):
         self.test_output_dir = "test_kegg_output"
         if os.path.exists(self.test_output_dir):
             shutil.rmtree(self.test_output_dir)
+        self.urls_pedidas = []
 
     def tearDown(self):
         if os.path.exists(self.test_output_dir):
             shutil.rmtree(self.test_output_dir)
 
-    @patch("requests.get")
-    def test_obtener_ids_kegg(self, mock_get):
-        # Simula la respuesta de KEGG
-        mock_response = MagicMock()
-        mock_response.status_code = 200
-        mock_response.text = "bce00010\tGlycolysis / Gluconeogenesis - Bacillus cereus\nbce00020\tCitrate cycle - Bacillus cereus"
-        mock_get.return_value = mock_response
+    def test_obtener_ids_kegg(self):
+        def handler(request):
+            self.urls_pedidas.append(str(request.url))
+            return httpx.Response(200, text="bce00010\tGlycolysis / Gluconeogenesis - Bacillus cereus\nbce00020\tCitrate cycle - Bacillus cereus")
+
+        with patch.object(descargas_datos_kegg, "crear_cliente_kegg", lambda *a: cliente_simulado(handler)):
+            ids = obtener_ids_kegg("bce")
 
-        ids = obtener_ids_kegg("bce")
         self.assertEqual(ids, ["bce00010", "bce00020"])
-        mock_get.assert_called_once_with("http://rest.kegg.jp/list/bce")
-
-    @patch("requests.get")
-    def test_descargar_entradas_kegg(self, mock_get):
-        mock_response = MagicMock()
-        mock_response.status_code = 200
-        mock_response.text = (
-            "ENTRY       bce00010  Pathway\nNAME        Glycolysis\n///\n"
-            "ENTRY       bce00020  Pathway\nNAME        Citrate Cycle\n///\n"
-        )
-        mock_get.return_value = mock_response
+        self.assertEqual(self.urls_pedidas, ["http://rest.kegg.jp/list/bce"])
+
+    def test_descargar_entradas_kegg(self):
+        def handler(request):
+            self.urls_pedidas.append(str(request.url))
+            return httpx.Response(200, text=(
+                "ENTRY       bce00010  Pathway\nNAME        Glycolysis\n///\n"
+                "ENTRY       bce00020  Pathway\nNAME        Citrate Cycle\n///\n"
+            ))
 
         ids = ["bce00010", "bce00020"]
-        descargar_entradas_kegg(ids, self.test_output_dir, batch_size=2, bloque_size=2, delay=0)
+        with patch.object(descargas_datos_kegg, "crear_cliente_kegg", lambda *a: cliente_simulado(handler)):
+            descargar_entradas_kegg(ids, self.test_output_dir, batch_size=2, bloque_size=2)
+
+        self.assertEqual(self.urls_pedidas, ["http://rest.kegg.jp/get/bce00010+bce00020"])
 
         # Verifica que se creó el archivo JSON
         files = os.listdir(self.test_output_dir)
-        json_files = [f for f in files if f.endswith(".json")]
-        self.assertEqual(len(json_files), 1)
+        json_files = [f for f in files if f.endswith(".ndjson.gz")]
+        self.assertEqual(json_files, ["bloque_0001.ndjson.gz"])
+
+        data = list(leer_registros(os.path.join(self.test_output_dir, json_files[0])))
+        self.assertEqual(len(data), 2)
+        self.assertIn("raw_text", data[0])
+
+    def test_descargar_entradas_kegg_error_http(self):
+        def handler(request):
+            if "bce00030" in str(request.url):
+                return httpx.Response(400)
+            return httpx.Response(200, text="ENTRY       bce00010  Pathway\n///\n")
+
+        ids = ["bce00010", "bce00030"]
+        with patch.object(descargas_datos_kegg, "crear_cliente_kegg", lambda *a: cliente_simulado(handler)):
+            descargar_entradas_kegg(ids, self.test_output_dir, batch_size=1, bloque_size=10)
+
+        with open(os.path.join(self.test_output_dir, "descarga.log")) as f:
+            self.assertIn("400", f.read())
+        self.assertEqual(len(list(leer_registros(os.path.join(self.test_output_dir, "bloque_0001.ndjson.gz")))), 1)
+
+    def test_descargar_entradas_kegg_error_red(self):
+        def handler(request):
+            if "bce00030" in str(request.url):
+                raise httpx.ReadTimeout("timeout", request=request)
+            return httpx.Response(200, text="ENTRY       bce00010  Pathway\n///\n")
+
+        ids = ["bce00010", "bce00030"]
+        with patch.object(descargas_datos_kegg, "crear_cliente_kegg", lambda *a: cliente_simulado(handler)):
+            descargar_entradas_kegg(ids, self.test_output_dir, batch_size=1, bloque_size=10)
+
+        with open(os.path.join(self.test_output_dir, "descarga.log")) as f:
+            self.assertIn("ReadTimeout", f.read())
+        self.assertEqual(len(list(leer_registros(os.path.join(self.test_output_dir, "bloque_0001.ndjson.gz")))), 1)
+        manifiesto = Manifiesto.cargar(self.test_output_dir, {"batch_size": 1, "bloque_size": 10})
+        self.assertFalse(manifiesto.completado("bloque_0001"))
+
+    def test_descargar_entradas_kegg_reanuda(self):
+        fallar = {"bce00030"}
+
+        def handler(request):
+            self.urls_pedidas.append(str(request.url))
+            id_kegg = request.url.path.split("/")[-1]
+            if id_kegg in fallar:
+                return httpx.Response(400)
+            return httpx.Response(200, text=f"ENTRY       {id_kegg}  Pathway\n///\n")
+
+        ids = ["bce00010", "bce00020", "bce00030", "bce00040"]
+        with patch.object(descargas_datos_kegg, "crear_cliente_kegg", lambda *a: cliente_simulado(handler)):
+            descargar_entradas_kegg(ids, self.test_output_dir, batch_size=1, bloque_size=2)
+
+            # El bloque 2 quedó incompleto: solo se vuelve a pedir ese
+            fallar.clear()
+            self.urls_pedidas.clear()
+            descargar_entradas_kegg(ids, self.test_output_dir, batch_size=1, bloque_size=2)
+            self.assertEqual(sorted(self.urls_pedidas), [
+                "http://rest.kegg.jp/get/bce00030", "http://rest.kegg.jp/get/bce00040"
+            ])
+
+            # Sin cambios no se pide nada; con verificar=True se repara el bloque alterado
+            with open(os.path.join(self.test_output_dir, "bloque_0001.ndjson.gz"), "wb") as f:
+                f.write(b"")
+            self.urls_pedidas.clear()
+            descargar_entradas_kegg(ids, self.test_output_dir, batch_size=1, bloque_size=2)
+            self.assertEqual(self.urls_pedidas, [])
+            descargar_entradas_kegg(ids, self.test_output_dir, batch_size=1, bloque_size=2, verificar=True)
+            self.assertEqual(sorted(self.urls_pedidas), [
+                "http://rest.kegg.jp/get/bce00010", "http://rest.kegg.jp/get/bce00020"
+            ])
 
-        with open(os.path.join(self.test_output_dir, json_files[0]), "r") as f:
-            data = json.load(f)
-            self.assertEqual(len(data), 2)
-            self.assertIn("raw_text", data[0])
+        self.assertEqual(len(list(leer_registros(os.path.join(self.test_output_dir, "bloque_0001.ndjson.gz")))), 2)
 
 if __name__ == "__main__":
     unittest.main()
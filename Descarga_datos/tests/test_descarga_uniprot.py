@@ -8,9 +8,26 @@ Tests para el módulo de descarga de datos desde UniProt.
 
 - test_descargar_datos_uniprot: Comprueba que se descargan correctamente un número determinado
   de entradas (en este caso 500 entradas por bloque) desde la API de UniProt en formato JSON.
+
+- TestDescargaUniProtSimulada (sin red, con `httpx.MockTransport` y respuestas gzip):
+    - test_proceso_descarga_cursor: Recorre todas las páginas siguiendo la cabecera Link
+      y, al relanzarla, reanuda desde el manifiesto sin volver a pedirlas.
+    - test_descargar_stream_uniprot: Decodifica el stream por trozos y lo guarda en bloques.
+    - test_iterar_resultados_json_por_trozos: Entradas partidas en cualquier punto, incluidas
+      cadenas con llaves, comillas y barras escapadas.
+    - test_iterar_resultados_json_truncado: Una respuesta cortada lanza ValueError.
 '''
 
+import gzip
+import json
+import os
+import shutil
+import tempfile
 import unittest
+from unittest.mock import patch
+import httpx
+from comun.registros import leer_registros
+from Uniprot import descargas_datos_uniprot
 from Uniprot.descargas_datos_uniprot import descargar_datos_uniprot, obtener_numero_entradas
 
 
@@ -30,5 +47,89 @@ class TestDescargaUniProt(unittest.TestCase):
         self.assertIsInstance(datos['results'], list)
         self.assertLessEqual(len(datos['results']), 2)
 
+
+def respuesta_gzip(datos, **kwargs):
+    return httpx.Response(200, content=gzip.compress(json.dumps(datos).encode()),
+                          headers={"Content-Encoding": "gzip", **kwargs.pop("headers", {})}, **kwargs)
+
+
+class TestDescargaUniProtSimulada(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.patcher = patch.object(descargas_datos_uniprot, "carpeta_descargas", self.temp_dir)
+        self.patcher.start()
+        self.peticiones = []
+        self.entradas = [{"primaryAccession": f"Q{i:05d}"} for i in range(5)]
+
+    def tearDown(self):
+        self.patcher.stop()
+        shutil.rmtree(self.temp_dir)
+
+    def cliente(self, handler):
+        def registrar(request):
+            self.peticiones.append(request)
+            return handler(request)
+        return descargas_datos_uniprot.crear_cliente_uniprot(transport=httpx.MockTransport(registrar))
+
+    def test_proceso_descarga_cursor(self):
+        def handler(request):
+            cursor = int(request.url.params.get("cursor", 0))
+            pagina = self.entradas[cursor:cursor + 2]
+            cabeceras = {}
+            if cursor + 2 < len(self.entradas):
+                cabeceras["Link"] = f'<https://rest.uniprot.org/uniprotkb/search?query=x&size=2&cursor={cursor + 2}>; rel="next"'
+            return respuesta_gzip({"results": pagina}, headers=cabeceras)
+
+        with self.cliente(handler) as cliente:
+            bloques = list(descargas_datos_uniprot.proceso_descarga("x", limit=2, cliente=cliente))
+        self.assertEqual([len(b) for b in bloques], [2, 2, 1])
+        self.assertEqual(self.peticiones[0].headers["Accept-Encoding"], "gzip")
+        self.assertEqual(self.peticiones[0].url.params["size"], "2")
+
+        # Se pierde la última página: al relanzar solo se pide esa
+        os.remove(os.path.join(self.temp_dir, "datos_uniprot_4_6.ndjson.gz"))
+        self.peticiones.clear()
+        with self.cliente(handler) as cliente:
+            bloques = list(descargas_datos_uniprot.proceso_descarga("x", limit=2, cliente=cliente))
+        self.assertEqual(sum(bloques, []), self.entradas)
+        self.assertEqual([str(p.url.params["cursor"]) for p in self.peticiones], ["4"])
+
+    def test_descargar_stream_uniprot(self):
+        cuerpo = json.dumps({"results": self.entradas}, indent=1).encode()
+
+        def handler(request):
+            self.assertEqual(request.url.path, "/uniprotkb/stream")
+            # Trozos pequeños para forzar entradas partidas entre trozos
+            comprimido = gzip.compress(cuerpo)
+            trozos = [comprimido[i:i + 16] for i in range(0, len(comprimido), 16)]
+            return httpx.Response(200, headers={"Content-Encoding": "gzip"}, content=iter(trozos))
+
+        with self.cliente(handler) as cliente:
+            bloques = list(descargas_datos_uniprot.descargar_stream_uniprot("x", limit=2, cliente=cliente))
+        self.assertEqual([len(b) for b in bloques], [2, 2, 1])
+        self.assertEqual(list(leer_registros(os.path.join(self.temp_dir, "datos_uniprot_2_4.ndjson.gz"))),
+                         self.entradas[2:4])
+
+    def test_iterar_resultados_json_por_trozos(self):
+        texto = json.dumps({"results": self.entradas})
+        trozos = [texto[i:i + 7] for i in range(0, len(texto), 7)]
+        self.assertEqual(list(descargas_datos_uniprot.iterar_resultados_json(trozos)), self.entradas)
+
+        entradas = [{"texto": 'a "{[}]" \\', "lista": [{"x": [1, 2]}, "]"]}, {"vacia": {}}]
+        texto = json.dumps({"facets": [], "results": entradas, "fin": True})
+        for tamano in (1, 2, 3, 5):
+            trozos = [texto[i:i + tamano] for i in range(0, len(texto), tamano)]
+            self.assertEqual(list(descargas_datos_uniprot.iterar_resultados_json(trozos)), entradas)
+
+    def test_iterar_resultados_json_truncado(self):
+        texto = json.dumps({"results": self.entradas})
+        with self.assertRaises(ValueError):
+            list(descargas_datos_uniprot.iterar_resultados_json([texto[:-10]]))
+        with self.assertRaises(ValueError):
+            list(descargas_datos_uniprot.iterar_resultados_json(['{"error": "x"}']))
+        self.assertEqual(list(descargas_datos_uniprot.iterar_resultados_json(['{"results": []}'])), [])
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -5,9 +5,10 @@ Tests para el script de descarga y procesamiento de datos de rutas metabólicas
 
 Este archivo contiene pruebas unitarias diseñadas para verificar la funcionalidad
 del script 'Kegg/descargas_definiciones_rutas_kegg_kgml.py'. Las pruebas simulan
-interacciones con la API de KEGG y operaciones de sistema de archivos para asegurar
-que el script maneja correctamente diversos escenarios, incluyendo respuestas exitosas,
-errores de red, errores HTTP y el procesamiento y guardado de datos.
+la API de KEGG con `httpx.MockTransport` (inyectado en el cliente compartido
+`comun.cliente_http`) y usan un directorio temporal para los archivos de salida,
+asegurando que el script maneja correctamente respuestas exitosas, errores de red,
+errores HTTP y el procesamiento y guardado de datos.
 
 Clases y tests principales incluidos:
 - TestKeggDownloader:
@@ -24,111 +25,106 @@ Clases y tests principales incluidos:
     - Pruebas para `get_genes_for_pathway_from_kegg`:
         - test_get_genes_for_pathway_from_kegg_success: Comprueba la correcta extracción de IDs de genes de KEGG.
         - test_get_genes_for_pathway_from_kegg_fetch_fails: Verifica el comportamiento si la obtención de genes falla.
-    - Pruebas para la función `main` (flujo principal):
+    - Pruebas para la función `main_async` (flujo principal):
         - test_main_flow_success: Simula un flujo completo exitoso, incluyendo la creación de directorios,
-          descarga de datos KGML, obtención de genes y guardado de archivos JSON.
+          descarga de datos KGML, obtención de genes con una sola petición a `link/pathway`
+          y guardado de archivos JSON.
+        - test_main_genes_ruta_a_ruta_si_falla_link: Si `link/pathway` falla, los genes se
+          piden a `get/<ruta>/genes`.
         - test_main_no_pathways_found: Verifica el comportamiento del script cuando no se encuentran rutas para el organismo.
         - test_main_file_write_error: Comprueba el manejo de errores durante la escritura de archivos JSON.
+        - test_main_reanuda_y_verifica_con_manifiesto: Comprueba que una segunda ejecución solo
+          descarga las rutas pendientes y que `verificar=True` vuelve a descargar archivos alterados.
+        - test_main_estados_de_ruta: Una ruta sin KGML (404) se registra con `sin_kgml` y no se
+          vuelve a pedir; una con el KGML fallido se cuenta como fallida, no se guarda y se reintenta.
 '''
 
+import os
+import shutil
+import tempfile
 import unittest
-from unittest.mock import patch, MagicMock, mock_open, call
-from pathlib import Path
-import requests
+from unittest.mock import patch, AsyncMock
+import httpx
+from comun.cliente_http import ClienteHTTPAsync
+from comun.manifiesto import Manifiesto
+from comun.registros import leer_registros
 from Kegg import descargas_definiciones_rutas_kegg_kgml as kegg_downloader_module
 
 
-class TestKeggDownloader(unittest.TestCase):
+class TestKeggDownloader(unittest.IsolatedAsyncioTestCase):
 
     def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.output_dir = os.path.join(self.temp_dir, "test_output_json")
+        self.peticiones = []
        
-        self.patcher_sleep = patch('time.sleep', return_value=None)
-        self.mock_sleep = self.patcher_sleep.start()
-        
         self.patcher_organism_code = patch.object(kegg_downloader_module, 'ORGANISM_CODE', "testorg")
-        self.patcher_delay = patch.object(kegg_downloader_module, 'REQUEST_DELAY_SECONDS', 0.01)
-        self.patcher_output_dir = patch.object(kegg_downloader_module, 'OUTPUT_JSON_DIR', "test_output_json")
+        self.patcher_output_dir = patch.object(kegg_downloader_module, 'OUTPUT_JSON_DIR', self.output_dir)
         self.patcher_base_url = patch.object(kegg_downloader_module, 'KEGG_API_BASE_URL', "http://fake-kegg-api")
 
-        self.mock_organism_code = self.patcher_organism_code.start()
-        self.mock_delay = self.patcher_delay.start()
-        self.mock_output_dir = self.patcher_output_dir.start()
-        self.mock_base_url = self.patcher_base_url.start()
+        self.patcher_organism_code.start()
+        self.patcher_output_dir.start()
+        self.patcher_base_url.start()
 
     def tearDown(self):
-        self.patcher_sleep.stop()
         self.patcher_organism_code.stop()
-        self.patcher_delay.stop()
         self.patcher_output_dir.stop()
         self.patcher_base_url.stop()
-
-    @patch('requests.get')
-    def test_fetch_kegg_data_with_retry_success(self, mock_get):
-        mock_response = MagicMock()
-        mock_response.status_code = 200
-        mock_response.text = "some data"
-        mock_response.raise_for_status = MagicMock()
-        mock_get.return_value = mock_response
-        result = kegg_downloader_module.fetch_kegg_data_with_retry("test/endpoint")
+        shutil.rmtree(self.temp_dir)
+
+    def leer_ruta(self, path_id):
+        [datos] = leer_registros(os.path.join(self.output_dir, f"{path_id}.ndjson.gz"))
+        return datos
+
+    def cliente(self, respuestas):
+        """Cliente con transporte simulado: `respuestas` mapea endpoint -> Response o excepción."""
+        def handler(request):
+            self.peticiones.append(str(request.url))
+            respuesta = respuestas.get(request.url.path.lstrip("/"), httpx.Response(404))
+            if isinstance(respuesta, Exception):
+                raise respuesta
+            return respuesta
+        return ClienteHTTPAsync(base_url="http://fake-kegg-api", transport=httpx.MockTransport(handler),
+                                tasa=1000, reintentos=2, espera_base=0)
+
+    async def test_fetch_kegg_data_with_retry_success(self):
+        async with self.cliente({"test/endpoint": httpx.Response(200, text="some data")}) as cliente:
+            result = await kegg_downloader_module.fetch_kegg_data_with_retry(cliente, "test/endpoint")
         self.assertEqual(result, "some data")
-        mock_get.assert_called_once_with("http://fake-kegg-api/test/endpoint", timeout=30)
-
-    @patch('requests.get')
-    def test_fetch_kegg_data_with_retry_http_404(self, mock_get):
-        mock_response = MagicMock()
-        mock_response.status_code = 404
-        mock_response.text = "Not Found"
-        http_error = requests.exceptions.HTTPError("404 Client Error", response=mock_response)
-        mock_response.raise_for_status = MagicMock(side_effect=http_error)
-        mock_get.return_value = mock_response
-        result = kegg_downloader_module.fetch_kegg_data_with_retry("test/endpoint")
+        self.assertEqual(self.peticiones, ["http://fake-kegg-api/test/endpoint"])
+
+    async def test_fetch_kegg_data_with_retry_http_404(self):
+        async with self.cliente({"test/endpoint": httpx.Response(404, text="Not Found")}) as cliente:
+            result = await kegg_downloader_module.fetch_kegg_data_with_retry(cliente, "test/endpoint")
         self.assertIsNone(result)
-        mock_get.assert_called_once()
-
-    @patch('requests.get')
-    def test_fetch_kegg_data_with_retry_http_400_ignored_for_genes(self, mock_get):
-        mock_response = MagicMock()
-        mock_response.status_code = 400
-        mock_response.text = "Bad Request"
-        http_error = requests.exceptions.HTTPError("400 Client Error", response=mock_response)
-        mock_response.raise_for_status = MagicMock(side_effect=http_error)
-        mock_get.return_value = mock_response
-        result = kegg_downloader_module.fetch_kegg_data_with_retry("get/path/genes", ignore_400_for_genes=True)
+        self.assertEqual(len(self.peticiones), 1)
+
+    async def test_fetch_kegg_data_with_retry_http_400_ignored_for_genes(self):
+        async with self.cliente({"get/path/genes": httpx.Response(400, text="Bad Request")}) as cliente:
+            result = await kegg_downloader_module.fetch_kegg_data_with_retry(cliente, "get/path/genes", ignore_400_for_genes=True)
         self.assertIsNone(result)
-        mock_get.assert_called_once()
-
-    @patch('requests.get')
-    def test_fetch_kegg_data_with_retry_retries_on_other_http_error(self, mock_get):
-        mock_response = MagicMock()
-        mock_response.status_code = 500
-        http_error = requests.exceptions.HTTPError("500 Server Error", response=mock_response)
-        mock_response.raise_for_status = MagicMock(side_effect=http_error)
-        mock_get.return_value = mock_response
-        result = kegg_downloader_module.fetch_kegg_data_with_retry("test/endpoint", retries=2)
+        self.assertEqual(len(self.peticiones), 1)
+
+    async def test_fetch_kegg_data_with_retry_retries_on_other_http_error(self):
+        async with self.cliente({"test/endpoint": httpx.Response(500)}) as cliente:
+            result = await kegg_downloader_module.fetch_kegg_data_with_retry(cliente, "test/endpoint")
         self.assertIsNone(result)
-        self.assertEqual(mock_get.call_count, 2)
+        self.assertEqual(len(self.peticiones), 2)
 
-    @patch('requests.get')
-    def test_fetch_kegg_data_with_retry_network_error(self, mock_get):
-        mock_get.side_effect = requests.exceptions.RequestException("Network error")
-        result = kegg_downloader_module.fetch_kegg_data_with_retry("test/endpoint", retries=2)
+    async def test_fetch_kegg_data_with_retry_network_error(self):
+        async with self.cliente({"test/endpoint": httpx.ConnectError("Network error")}) as cliente:
+            result = await kegg_downloader_module.fetch_kegg_data_with_retry(cliente, "test/endpoint")
         self.assertIsNone(result)
-        self.assertEqual(mock_get.call_count, 2)
-
-    @patch('requests.get')
-    def test_fetch_kegg_data_empty_response(self, mock_get):
-        mock_response = MagicMock()
-        mock_response.status_code = 200
-        mock_response.text = "  \n  "
-        mock_response.raise_for_status = MagicMock()
-        mock_get.return_value = mock_response
-        result = kegg_downloader_module.fetch_kegg_data_with_retry("test/endpoint", retries=2)
+        self.assertEqual(len(self.peticiones), 2)
+
+    async def test_fetch_kegg_data_empty_response(self):
+        async with self.cliente({"test/endpoint": httpx.Response(200, text="  \n  ")}) as cliente:
+            result = await kegg_downloader_module.fetch_kegg_data_with_retry(cliente, "test/endpoint")
         self.assertIsNone(result)
-        self.assertEqual(mock_get.call_count, 2)
 
    
-    @patch.object(kegg_downloader_module, 'fetch_kegg_data_with_retry')
-    def test_get_organism_pathway_metadata_success(self, mock_fetch):
+    @patch.object(kegg_downloader_module, 'fetch_kegg_data_with_retry', new_callable=AsyncMock)
+    async def test_get_organism_pathway_metadata_success(self, mock_fetch):
         mock_fetch.return_value = (
             "path:testorg00001\tPathway 1\n"
             "path:testorg00002\tPathway 2 Name with spaces"
@@ -137,151 +133,156 @@ class TestKeggDownloader(unittest.TestCase):
             {"pathway_id": "testorg00001", "name": "Pathway 1", "organism_code": "testorg", "image_url": "http://www.kegg.jp/kegg/pathway/testorg/testorg00001.png"},
             {"pathway_id": "testorg00002", "name": "Pathway 2 Name with spaces", "organism_code": "testorg", "image_url": "http://www.kegg.jp/kegg/pathway/testorg/testorg00002.png"}
         ]
-        result = kegg_downloader_module.get_organism_pathway_metadata("testorg")
+        result = await kegg_downloader_module.get_organism_pathway_metadata("cliente", "testorg")
         self.assertEqual(result, expected_metadata)
-        mock_fetch.assert_called_once_with("list/pathway/testorg")
+        mock_fetch.assert_awaited_once_with("cliente", "list/pathway/testorg")
 
-    @patch.object(kegg_downloader_module, 'fetch_kegg_data_with_retry')
-    def test_get_organism_pathway_metadata_fetch_fails(self, mock_fetch):
+    @patch.object(kegg_downloader_module, 'fetch_kegg_data_with_retry', new_callable=AsyncMock)
+    async def test_get_organism_pathway_metadata_fetch_fails(self, mock_fetch):
         mock_fetch.return_value = None
-        result = kegg_downloader_module.get_organism_pathway_metadata("testorg")
+        result = await kegg_downloader_module.get_organism_pathway_metadata("cliente", "testorg")
         self.assertEqual(result, [])
 
-    @patch.object(kegg_downloader_module, 'fetch_kegg_data_with_retry')
-    def test_get_genes_for_pathway_from_kegg_success(self, mock_fetch):
+    @patch.object(kegg_downloader_module, 'fetch_kegg_data_with_retry', new_callable=AsyncMock)
+    async def test_get_genes_for_pathway_from_kegg_success(self, mock_fetch):
         mock_fetch.return_value = (
             "testorg:gene1\tDescription 1\n"
             "testorg:gene2\tDescription 2"
         )
         expected_genes = ["testorg:gene1", "testorg:gene2"]
-        result = kegg_downloader_module.get_genes_for_pathway_from_kegg("testorg00001")
+        result = await kegg_downloader_module.get_genes_for_pathway_from_kegg("cliente", "testorg00001")
         self.assertEqual(result, expected_genes)
-        mock_fetch.assert_called_once_with("get/testorg00001/genes", ignore_400_for_genes=True)
+        mock_fetch.assert_awaited_once_with("cliente", "get/testorg00001/genes", ignore_400_for_genes=True)
 
-    @patch.object(kegg_downloader_module, 'fetch_kegg_data_with_retry')
-    def test_get_genes_for_pathway_from_kegg_fetch_fails(self, mock_fetch):
+    @patch.object(kegg_downloader_module, 'fetch_kegg_data_with_retry', new_callable=AsyncMock)
+    async def test_get_genes_for_pathway_from_kegg_fetch_fails(self, mock_fetch):
         mock_fetch.return_value = None
-        result = kegg_downloader_module.get_genes_for_pathway_from_kegg("testorg00001")
+        result = await kegg_downloader_module.get_genes_for_pathway_from_kegg("cliente", "testorg00001")
         self.assertEqual(result, [])
 
-    @patch.object(kegg_downloader_module, 'Path') # Patch Path donde se usa en el módulo
-    @patch.object(kegg_downloader_module, 'get_organism_pathway_metadata')
-    @patch.object(kegg_downloader_module, 'fetch_kegg_data_with_retry') # Para las llamadas directas a KGML
-    @patch.object(kegg_downloader_module, 'get_genes_for_pathway_from_kegg')
-    @patch('builtins.open', new_callable=mock_open)
-    @patch('json.dump') # json es importado globalmente en tu script
-    def test_main_flow_success(self, mock_json_dump, mock_file_open, mock_get_genes,
-                               mock_fetch_kgml, # Renombrado para claridad
-                               mock_get_pathway_meta, mock_path_constructor):
-        mock_path_instance = MagicMock()
-        mock_path_constructor.return_value = mock_path_instance
-        mock_path_instance.mkdir = MagicMock()
-        def path_div_side_effect(other):
-           
-            return Path(kegg_downloader_module.OUTPUT_JSON_DIR) / other
-        mock_path_instance.__truediv__ = MagicMock(side_effect=path_div_side_effect)
-
-        mock_pathway_list = [
-            {"pathway_id": "testorg00001", "name": "Pathway 1", "organism_code": "testorg", "image_url": "url1"},
-            {"pathway_id": "testorg00002", "name": "Pathway 2", "organism_code": "testorg", "image_url": "url2"}
-        ]
-        mock_get_pathway_meta.return_value = mock_pathway_list
-        mock_fetch_kgml.side_effect = ["<kgml_data_1/>", "<kgml_data_2/>"]
-        mock_get_genes.side_effect = [["geneA", "geneB"], ["geneC"]]
-
-        kegg_downloader_module.main()
-
-        mock_path_instance.mkdir.assert_called_once_with(parents=True, exist_ok=True)
-        mock_get_pathway_meta.assert_called_once_with("testorg")
-
-        expected_kgml_calls = [
-            call("get/testorg00001/kgml"),
-            call("get/testorg00002/kgml")
-        ]
-        self.assertEqual(mock_fetch_kgml.call_count, 2)
-        mock_fetch_kgml.assert_has_calls(expected_kgml_calls, any_order=False)
-
-        expected_gene_calls = [
-            call("testorg00001"),
-            call("testorg00002")
-        ]
-        mock_get_genes.assert_has_calls(expected_gene_calls, any_order=False)
-        self.assertEqual(mock_get_genes.call_count, 2)
-
-        expected_open_calls = [
-            call(Path('test_output_json/testorg00001.json'), 'w', encoding='utf-8'),
-            call(Path('test_output_json/testorg00002.json'), 'w', encoding='utf-8')
-        ]
-
-        self.assertEqual(mock_file_open.call_args_list, expected_open_calls)
-        
-        expected_json_data = [
-            call({
+    async def test_main_flow_success(self):
+        respuestas = {
+            "list/pathway/testorg": httpx.Response(200, text="path:testorg00001\tPathway 1\npath:testorg00002\tPathway 2"),
+            "get/testorg00001/kgml": httpx.Response(200, text="<kgml_data_1/>"),
+            "get/testorg00002/kgml": httpx.Response(200, text="<kgml_data_2/>"),
+            "link/pathway/testorg": httpx.Response(200, text="geneB\tpath:testorg00001\ngeneA\tpath:testorg00001"),
+        }
+        async with self.cliente(respuestas) as cliente:
+            await kegg_downloader_module.main_async(cliente)
+
+        self.assertFalse(any(url.endswith("/genes") for url in self.peticiones))
+        archivos = sorted(f for f in os.listdir(self.output_dir) if f.endswith(".ndjson.gz"))
+        self.assertEqual(archivos, ["testorg00001.ndjson.gz", "testorg00002.ndjson.gz"])
+        self.assertEqual(self.leer_ruta("testorg00001"), {
                 "_id": "testorg00001", "name": "Pathway 1", "organism_code": "testorg",
-                "image_url": "url1", "kgml_data": "<kgml_data_1/>",
+                "image_url": "http://www.kegg.jp/kegg/pathway/testorg/testorg00001.png",
+                "kgml_data": "<kgml_data_1/>",
                 "kegg_genes_in_pathway": ["geneA", "geneB"]
-            }, mock_file_open.return_value, indent=2, ensure_ascii=False),
-            call({
-                "_id": "testorg00002", "name": "Pathway 2", "organism_code": "testorg",
-                "image_url": "url2", "kgml_data": "<kgml_data_2/>",
-                "kegg_genes_in_pathway": ["geneC"]
-            }, mock_file_open.return_value, indent=2, ensure_ascii=False)
-        ]
-        mock_json_dump.assert_has_calls(expected_json_data, any_order=False)
-        self.assertEqual(mock_json_dump.call_count, 2)
+            })
+        datos = self.leer_ruta("testorg00002")
+        self.assertEqual(datos["kgml_data"], "<kgml_data_2/>")
+        self.assertEqual(datos["kegg_genes_in_pathway"], [])
 
+    @patch('builtins.print')
+    async def test_main_genes_ruta_a_ruta_si_falla_link(self, mock_print):
+        respuestas = {
+            "list/pathway/testorg": httpx.Response(200, text="path:testorg00001\tPathway 1\npath:testorg00002\tPathway 2"),
+            "get/testorg00001/kgml": httpx.Response(200, text="<kgml_data_1/>"),
+            "get/testorg00002/kgml": httpx.Response(200, text="<kgml_data_2/>"),
+            "get/testorg00001/genes": httpx.Response(200, text="geneA\tA\ngeneB\tB"),
+            "get/testorg00002/genes": httpx.Response(400),
+        }
+        async with self.cliente(respuestas) as cliente:
+            await kegg_downloader_module.main_async(cliente)
+
+        self.assertEqual(self.leer_ruta("testorg00001")["kegg_genes_in_pathway"], ["geneA", "geneB"])
+        self.assertEqual(self.leer_ruta("testorg00002")["kegg_genes_in_pathway"], [])
 
-    @patch.object(kegg_downloader_module, 'Path')
-    @patch.object(kegg_downloader_module, 'get_organism_pathway_metadata')
     @patch('builtins.print')
-    def test_main_no_pathways_found(self, mock_print, mock_get_pathway_meta, mock_path_constructor):
-        mock_path_instance = MagicMock()
-        mock_path_constructor.return_value = mock_path_instance
-        mock_path_instance.mkdir = MagicMock()
-        mock_get_pathway_meta.return_value = []
-        kegg_downloader_module.main()
-        mock_path_instance.mkdir.assert_called_once_with(parents=True, exist_ok=True)
-        mock_get_pathway_meta.assert_called_once_with("testorg")
-
-    @patch.object(kegg_downloader_module, 'Path')
-    @patch.object(kegg_downloader_module, 'get_organism_pathway_metadata')
-    @patch.object(kegg_downloader_module, 'fetch_kegg_data_with_retry')
-    @patch.object(kegg_downloader_module, 'get_genes_for_pathway_from_kegg')
-    @patch('builtins.open', new_callable=mock_open)
-    @patch('json.dump', side_effect=IOError("Disk full"))
+    async def test_main_no_pathways_found(self, mock_print):
+        async with self.cliente({"list/pathway/testorg": httpx.Response(200, text="")}) as cliente:
+            await kegg_downloader_module.main_async(cliente)
+        self.assertTrue(os.path.isdir(self.output_dir))
+        self.assertEqual(os.listdir(self.output_dir), [])
+
+    @patch.object(kegg_downloader_module, 'escribir_registros', side_effect=IOError("Disk full"))
     @patch('builtins.print')
-    def test_main_file_write_error(self, mock_print, mock_json_dump, mock_file_open, mock_get_genes,
-                                   mock_fetch_kgml, mock_get_pathway_meta, mock_path_constructor):
-        mock_path_instance = MagicMock()
-        mock_path_constructor.return_value = mock_path_instance
-        mock_path_instance.mkdir = MagicMock()
-        def path_div_side_effect(other):
-            return Path(kegg_downloader_module.OUTPUT_JSON_DIR) / other
-        mock_path_instance.__truediv__ = MagicMock(side_effect=path_div_side_effect)
-
-        mock_get_pathway_meta.return_value = [{"pathway_id": "testorg00001", "name": "Pathway 1", "organism_code": "testorg", "image_url": "url1"}]
-        mock_fetch_kgml.return_value = "<kgml_data_1/>"
-        mock_get_genes.return_value = ["geneA"]
-
-        kegg_downloader_module.main()
-
-        mock_path_instance.mkdir.assert_called_once()
-        expected_file_path_to_open = Path('test_output_json/testorg00001.json')
-        mock_file_open.assert_called_once_with(expected_file_path_to_open, 'w', encoding='utf-8')
-        mock_json_dump.assert_called_once()
+    async def test_main_file_write_error(self, mock_print, mock_json_dump):
+        respuestas = {
+            "list/pathway/testorg": httpx.Response(200, text="path:testorg00001\tPathway 1"),
+            "get/testorg00001/kgml": httpx.Response(200, text="<kgml_data_1/>"),
+            "get/testorg00001/genes": httpx.Response(200, text="geneA\tA"),
+        }
+        async with self.cliente(respuestas) as cliente:
+            await kegg_downloader_module.main_async(cliente)
 
-        found_error_message = False
-        
-        expected_file_path_str = str(Path('test_output_json') / 'testorg00001.json')
+        mock_json_dump.assert_called_once()
+        expected_file_path_str = os.path.join(self.output_dir, 'testorg00001.ndjson.gz')
         expected_msg_part_1 = f"Error al guardar el archivo {expected_file_path_str}"
         expected_msg_part_2 = "Disk full"
 
-        for call_arg_tuple in mock_print.call_args_list:
-            printed_message = call_arg_tuple[0][0]
-            if isinstance(printed_message, str) and expected_msg_part_1 in printed_message and expected_msg_part_2 in printed_message:
-                found_error_message = True
-                break
+        found_error_message = any(
+            isinstance(c[0][0], str) and expected_msg_part_1 in c[0][0] and expected_msg_part_2 in c[0][0]
+            for c in mock_print.call_args_list if c[0]
+        )
         self.assertTrue(found_error_message, f"No se imprimió el mensaje de error esperado '{expected_msg_part_1}: {expected_msg_part_2}'")
 
+    @patch('builtins.print')
+    async def test_main_reanuda_y_verifica_con_manifiesto(self, mock_print):
+        respuestas = {
+            "list/pathway/testorg": httpx.Response(200, text="path:testorg00001\tPathway 1\npath:testorg00002\tPathway 2"),
+            "get/testorg00001/kgml": httpx.Response(200, text="<kgml_data_1/>"),
+            "get/testorg00002/kgml": httpx.Response(500),
+            "get/testorg00001/genes": httpx.Response(200, text="geneA\tA"),
+        }
+        async with self.cliente(respuestas) as cliente:
+            await kegg_downloader_module.main_async(cliente)
+
+        # Segunda ejecución: solo se reintenta la ruta cuyo KGML falló
+        self.peticiones.clear()
+        respuestas["get/testorg00002/kgml"] = httpx.Response(200, text="<kgml_data_2/>")
+        async with self.cliente(respuestas) as cliente:
+            await kegg_downloader_module.main_async(cliente)
+        self.assertFalse(any("testorg00001" in url for url in self.peticiones))
+        self.assertIn("http://fake-kegg-api/get/testorg00002/kgml", self.peticiones)
+
+        # Con verificar=True se detecta el archivo modificado y se vuelve a descargar
+        with open(os.path.join(self.output_dir, "testorg00001.ndjson.gz"), "wb") as f:
+            f.write(b"")
+        self.peticiones.clear()
+        async with self.cliente(respuestas) as cliente:
+            await kegg_downloader_module.main_async(cliente, verificar=True)
+        self.assertIn("http://fake-kegg-api/get/testorg00001/kgml", self.peticiones)
+        self.assertFalse(any("testorg00002" in url for url in self.peticiones))
+        self.assertEqual(self.leer_ruta("testorg00001")["kgml_data"], "<kgml_data_1/>")
+
+    @patch('builtins.print')
+    async def test_main_estados_de_ruta(self, mock_print):
+        respuestas = {
+            "list/pathway/testorg": httpx.Response(
+                200, text="path:testorg00001\tPathway 1\npath:testorg01100\tGlobal\npath:testorg00003\tPathway 3"),
+            "get/testorg00001/kgml": httpx.Response(200, text="<kgml_data_1/>"),
+            "get/testorg00003/kgml": httpx.Response(500),
+            "link/pathway/testorg": httpx.Response(200, text="geneA\tpath:testorg00001"),
+        }  # testorg01100/kgml: 404
+        async with self.cliente(respuestas) as cliente:
+            resumen = await kegg_downloader_module.main_async(cliente)
+
+        self.assertEqual(resumen, {"guardada": 1, "sin_kgml": 1, "fallida": 1})
+        sin_kgml = self.leer_ruta("testorg01100")
+        self.assertIsNone(sin_kgml["kgml_data"])
+        self.assertNotIn("sin_kgml", sin_kgml)
+        self.assertFalse(os.path.exists(os.path.join(self.output_dir, "testorg00003.ndjson.gz")))
+        manifiesto = Manifiesto.cargar(self.output_dir, {"organismo": "testorg"})
+        self.assertTrue(manifiesto.completados["testorg01100"]["sin_kgml"])
+        self.assertNotIn("testorg00003", manifiesto.completados)
+
+        # Al reanudar solo se vuelve a pedir la ruta fallida
+        self.peticiones.clear()
+        async with self.cliente(respuestas) as cliente:
+            resumen = await kegg_downloader_module.main_async(cliente)
+        self.assertEqual(resumen, {"guardada": 0, "sin_kgml": 0, "fallida": 1})
+        self.assertFalse(any("testorg01100" in url or "testorg00001" in url for url in self.peticiones))
+
 if __name__ == '__main__':
-    unittest.main()
\ No newline at end of file
+    unittest.main()
@@ -0,0 +1,85 @@
+# tests/test_descargas_por_accesion_uniprot.py
+
+'''
+Tests para la descarga de UniProt por lotes de accesiones
+(`Uniprot/descargas_por_accesion_uniprot.py`).
+
+- test_agrupar_accesiones_respeta_longitud_url: Ningún grupo supera la longitud máxima
+  de URL ni el máximo de accesiones, y no se pierden ni repiten accesiones.
+- test_descargar_por_accesiones: Contra el servidor simulado, 300 accesiones se piden en
+  unas pocas peticiones, todas las entradas se escriben en NDJSON y se informa de las
+  accesiones que no existen.
+- test_grupo_truncado_se_informa_como_fallido: Un grupo cuya respuesta llega truncada no
+  escribe entradas y sus accesiones se devuelven en `fallidas`, no en `faltan`.
+'''
+
+import json
+import shutil
+import tempfile
+import unittest
+import httpx
+from comun.cliente_http import ClienteHTTPAsync
+from comun.registros import EscritorRegistros, leer_registros_carpeta
+from comun.servidor_simulado import ServidorSimulado, generar_datos, accesion_de
+from Uniprot.descargas_por_accesion_uniprot import agrupar_accesiones, consulta_accesiones, descargar_por_accesiones
+
+URL_BASE = "https://rest.uniprot.org/uniprotkb"
+
+
+class TestDescargasPorAccesionUniProt(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.carpeta = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.carpeta)
+
+    def test_agrupar_accesiones_respeta_longitud_url(self):
+        accesiones = [accesion_de(i) for i in range(1, 1001)] + ["P00001"]
+        grupos = list(agrupar_accesiones(accesiones, longitud_maxima=2000, url_base=URL_BASE))
+
+        self.assertEqual([a for grupo in grupos for a in grupo], accesiones[:1000])
+        for grupo in grupos:
+            url = httpx.URL(f"{URL_BASE}/stream", params={"format": "json", "query": consulta_accesiones(grupo)})
+            self.assertLessEqual(len(str(url)), 2000)
+        self.assertGreater(len(grupos), 1)
+        self.assertEqual(max(len(g) for g in agrupar_accesiones(accesiones, 10 ** 6, 300)), 300)
+
+    async def test_descargar_por_accesiones(self):
+        accesiones = [accesion_de(i) for i in range(1, 301)] + ["Q99999"]
+        with ServidorSimulado(generar_datos(genes=400, rutas=2)) as servidor:
+            async with ClienteHTTPAsync(base_url=servidor.url_uniprot, tasa=1000, espera_base=0) as cliente:
+                with EscritorRegistros(self.carpeta, "uniprot") as escritor:
+                    resumen = await descargar_por_accesiones(cliente, accesiones, escritor)
+
+        self.assertEqual(resumen["peticiones"], servidor.estadisticas["peticiones"])
+        self.assertLessEqual(resumen["peticiones"], 2)
+        self.assertEqual((resumen["entradas"], resumen["faltan"], resumen["errores"]), (300, ["Q99999"], 0))
+        escritas = {entrada["primaryAccession"] for entrada in leer_registros_carpeta(self.carpeta)}
+        self.assertEqual(escritas, set(accesiones[:300]))
+
+    async def test_grupo_truncado_se_informa_como_fallido(self):
+        def handler(request):
+            pedidas = request.url.params["query"][len("accession:("):-1].split(" OR ")
+            resultados = json.dumps({"results": [{"primaryAccession": a} for a in pedidas if a != "Q99999"]})
+            if "P00001" in pedidas:
+                resultados = resultados[:len(resultados) // 2]  # Conexión cortada a mitad
+            return httpx.Response(200, text=resultados)
+
+        accesiones = [accesion_de(i) for i in range(1, 31)] + ["Q99999"]
+        async with ClienteHTTPAsync(base_url=URL_BASE, transport=httpx.MockTransport(handler),
+                                    tasa=1000, espera_base=0) as cliente:
+            with EscritorRegistros(self.carpeta, "uniprot") as escritor:
+                resumen = await descargar_por_accesiones(cliente, accesiones, escritor, longitud_maxima=250)
+
+        grupos = list(agrupar_accesiones(accesiones, 250, url_base=URL_BASE))
+        self.assertGreater(len(grupos), 1)
+        self.assertEqual(resumen["errores"], 1)
+        self.assertEqual(resumen["fallidas"], sorted(grupos[0]))
+        self.assertEqual(resumen["faltan"], ["Q99999"])
+        escritas = {entrada["primaryAccession"] for entrada in leer_registros_carpeta(self.carpeta)}
+        self.assertEqual(escritas, set(accesiones[len(grupos[0]):30]))
+
+
+if __name__ == "__main__":
+    unittest.main()
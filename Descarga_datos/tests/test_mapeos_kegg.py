@@ -0,0 +1,89 @@
+# tests/test_mapeos_kegg.py
+
+'''
+Tests para los mapeos gen-ruta y KEGG-UniProt (`Kegg/mapeos_kegg.py`).
+
+Se simula la API de KEGG con `httpx.MockTransport` y se usa `mongomock` como base de datos.
+
+- test_descargar_mapeos_con_dos_peticiones: Con `link/pathway` y `conv/uniprot` se
+  generan los documentos por gen, se guardan y se suben con sus índices.
+- test_obtener_genes_por_ruta: Agrupa los genes por ruta, sin el prefijo `path:`.
+- test_subir_mapeo_con_errores_no_promueve: Con errores de escritura en el staging, el
+  mapeo no se promueve y la colección activa no cambia.
+'''
+
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+import httpx
+import mongomock
+from comun.cliente_http import ClienteHTTPAsync
+from comun.registros import leer_registros
+from comun.carga_mongo import cargar_registros
+from Kegg.mapeos_kegg import descargar_mapeos, obtener_genes_por_ruta, subir_mapeo, documentos_mapeo
+
+RESPUESTAS = {
+    "link/pathway/bce": "bce:BC_0001\tpath:bce00010\nbce:BC_0001\tpath:bce00020\nbce:BC_0002\tpath:bce00010\n",
+    "conv/uniprot/bce": "bce:BC_0001\tup:Q81JF6\nbce:BC_0002\tup:Q81JF7\n",
+}
+
+
+class TestMapeosKegg(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.peticiones = []
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def cliente(self):
+        def handler(request):
+            ruta = request.url.path.lstrip("/")
+            self.peticiones.append(ruta)
+            return httpx.Response(200, text=RESPUESTAS[ruta]) if ruta in RESPUESTAS else httpx.Response(404)
+        return ClienteHTTPAsync(base_url="http://rest.kegg.jp", transport=httpx.MockTransport(handler),
+                                tasa=1000, espera_base=0)
+
+    async def test_descargar_mapeos_con_dos_peticiones(self):
+        db = mongomock.MongoClient()["test"]
+        async with self.cliente() as cliente:
+            resumen = await descargar_mapeos(cliente, "bce", self.temp_dir, db=db)
+
+        self.assertEqual(sorted(self.peticiones), ["conv/uniprot/bce", "link/pathway/bce"])
+        self.assertEqual(resumen, {"kegg_genes_rutas": 2, "kegg_uniprot": 2})
+        self.assertEqual(next(leer_registros(os.path.join(self.temp_dir, "kegg_genes_rutas.ndjson.gz"))),
+                         {"_id": "bce:BC_0001", "entry": "BC_0001", "pathways": ["bce00010", "bce00020"]})
+        self.assertEqual(sorted(d["entry"] for d in db.kegg_genes_rutas.find({"pathways": "bce00010"})),
+                         ["BC_0001", "BC_0002"])
+        self.assertEqual(db.kegg_uniprot.find_one({"uniprot": "Q81JF7"})["_id"], "bce:BC_0002")
+        self.assertIn("uniprot_1", db.kegg_uniprot.index_information())
+        self.assertIn("pathways_1", db.kegg_genes_rutas.index_information())
+
+    def test_subir_mapeo_con_errores_no_promueve(self):
+        db = mongomock.MongoClient()["test"]
+        db.kegg_uniprot.insert_one({"_id": "bce:BC_0001", "entry": "BC_0001", "uniprot": ["Q81JF6"]})
+
+        def carga_con_error(coleccion, documentos):
+            resumen = cargar_registros(coleccion, documentos)
+            resumen.errores += 1  # Un `writeErrors` del servidor
+            return resumen
+
+        with mock.patch("Kegg.mapeos_kegg.cargar_registros", carga_con_error):
+            subido = subir_mapeo(db, "kegg_uniprot", documentos_mapeo(
+                {"bce:BC_0001": ["Q81JF6"], "bce:BC_0002": ["Q81JF7"]}, "uniprot"))
+
+        self.assertFalse(subido)
+        self.assertEqual(db.kegg_uniprot.count_documents({}), 1)
+        self.assertIsNone(db.dataset_versiones.find_one({"_id": "actual"}))
+
+    async def test_obtener_genes_por_ruta(self):
+        async with self.cliente() as cliente:
+            genes_por_ruta = await obtener_genes_por_ruta(cliente, "bce")
+        self.assertEqual(genes_por_ruta, {"bce00010": ["bce:BC_0001", "bce:BC_0002"], "bce00020": ["bce:BC_0001"]})
+
+
+if __name__ == "__main__":
+    unittest.main()
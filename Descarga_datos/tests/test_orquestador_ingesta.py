@@ -0,0 +1,145 @@
+# tests/test_orquestador_ingesta.py
+
+'''
+Tests para la tubería en streaming (`comun/tuberia.py`) y el orquestador de la ingesta
+(`orquestador_ingesta.py`).
+
+- test_tuberia_contrapresion_y_lotes: Con colas pequeñas y una etapa final lenta, las
+  etapas agrupan en lotes, filtran, cuentan los errores y registran la espera.
+- test_ingesta_completa_en_mongo: Con la API de KEGG simulada (`httpx.MockTransport`) y
+  `mongomock`, una ejecución carga genes, rutas (con el KGML comprimido) y mapeos y
+  promueve los staging.
+- test_ingesta_incompleta_no_se_promueve: Si falla un lote de genes o el KGML de una
+  ruta, esas colecciones no se promueven y se devuelven sus problemas; una ruta sin
+  KGML en KEGG (404) se omite sin impedir la promoción. Un mapeo que no se promueve
+  también se devuelve como problema.
+'''
+
+import os
+import asyncio
+import tempfile
+import unittest
+from unittest import mock
+from argparse import Namespace
+import httpx
+import mongomock
+from comun.cliente_http import ClienteHTTPAsync
+from comun.tuberia import Etapa, ejecutar_tuberia
+import orquestador_ingesta
+from orquestador_ingesta import ingesta
+from Kegg.kgml_comprimido import kgml_de_documento
+
+DIRECTORIO_INICIAL = os.getcwd()
+
+
+def entrada(gen, ruta):
+    pathway = f"PATHWAY     {ruta}  Ruta {ruta}\n" if ruta else ""
+    return f"ENTRY       {gen}           CDS       T00117\nNAME        proteina {gen}\n{pathway}///\n"
+
+
+GENES = {"bce:BC_0001": "bce00010", "bce:BC_0002": "bce00010", "bce:BC_0003": None}
+
+
+def handler(request):
+    ruta = request.url.path.lstrip("/")
+    if ruta == "list/bce":
+        return httpx.Response(200, text="\n".join(f"{g}\tCDS" for g in GENES))
+    if ruta == "list/pathway/bce":
+        return httpx.Response(200, text="path:bce00010\tGlycolysis")
+    if ruta == "link/pathway/bce":
+        return httpx.Response(200, text="\n".join(f"{g}\tpath:{p}" for g, p in GENES.items() if p))
+    if ruta == "conv/uniprot/bce":
+        return httpx.Response(200, text="bce:BC_0001\tup:Q81JF6")
+    if ruta == "get/bce00010/kgml":
+        return httpx.Response(200, text="<pathway name='bce00010'/>")
+    if ruta.startswith("get/"):
+        return httpx.Response(200, text="".join(entrada(i.split(":")[1], GENES[i]) for i in ruta[4:].split("+")))
+    return httpx.Response(404)
+
+
+class TestOrquestadorIngesta(unittest.IsolatedAsyncioTestCase):
+
+    async def test_tuberia_contrapresion_y_lotes(self):
+        recibidos = []
+
+        async def duplicar(x):
+            if x == 3:
+                raise ValueError("elemento erróneo")
+            return [x, x] if x % 2 == 0 else None
+
+        async def guardar(lote):
+            await asyncio.sleep(0.01)
+            recibidos.append(lote)
+
+        etapas = [Etapa("duplicar", duplicar, concurrencia=2, tamano_cola=2),
+                  Etapa("guardar", guardar, concurrencia=1, tamano_cola=1, lote=4)]
+        duplicar_stats, guardar_stats = await ejecutar_tuberia(range(10), etapas)
+
+        self.assertEqual(sorted(x for lote in recibidos for x in lote), [0, 0, 2, 2, 4, 4, 6, 6, 8, 8])
+        self.assertTrue(all(len(lote) <= 4 for lote in recibidos))
+        self.assertEqual((duplicar_stats.entradas, duplicar_stats.salidas, duplicar_stats.errores), (10, 10, 1))
+        self.assertEqual((guardar_stats.entradas, guardar_stats.llamadas), (10, len(recibidos)))
+        self.assertGreater(duplicar_stats.espera_salida, 0)
+
+    async def test_ingesta_completa_en_mongo(self):
+        db = mongomock.MongoClient()["test"]
+        opciones = Namespace(descargas=2, procesos=1, hilos=2, lote=2, cola=4)
+        cliente = ClienteHTTPAsync(base_url="http://rest.kegg.jp", transport=httpx.MockTransport(handler),
+                                   tasa=1000, espera_base=0)
+        async with cliente:
+            estadisticas, problemas = await ingesta(cliente, "bce", db=db, opciones=opciones)
+
+        self.assertEqual(problemas, {})
+        self.assertEqual([e.nombre for e in estadisticas],
+                         ["descarga", "parseo", "transformacion", "carga", "descarga_kgml", "carga_kgml"])
+        # BC_0003 no tiene rutas: se parsea pero no se carga
+        self.assertEqual(sorted(d["entry"] for d in db.kegg_rutas.find()), ["BC_0001", "BC_0002"])
+        self.assertEqual(db.kegg_rutas.find_one({"entry": "BC_0001"})["uniprot"], ["Q81JF6"])
+        ruta = db.kegg_rutas_graficas.find_one({"_id": "bce00010"})
+        self.assertEqual(ruta["kegg_genes_in_pathway"], ["bce:BC_0001", "bce:BC_0002"])
+        # El KGML se guarda comprimido en MongoDB
+        self.assertEqual(ruta["kgml_codec"], "zlib")
+        self.assertEqual(kgml_de_documento(ruta), "<pathway name='bce00010'/>")
+        self.assertEqual(db.kegg_uniprot.count_documents({}), 1)
+        self.assertFalse([c for c in db.list_collection_names() if c.endswith("__staging")])
+        self.assertEqual(db.dataset_versiones.find_one({"_id": "actual"})["version"], 4)
+
+    async def test_ingesta_incompleta_no_se_promueve(self):
+        def handler_con_fallos(request):
+            ruta = request.url.path.lstrip("/")
+            if ruta == "list/pathway/bce":
+                return httpx.Response(200, text="path:bce00010\tGlycolysis\npath:bce00020\tTCA cycle\n"
+                                                "path:bce01100\tMetabolic pathways")
+            if ruta == "get/bce00020/kgml" or ruta.startswith("get/bce:"):
+                return httpx.Response(500)
+            return handler(request)  # bce01100 no tiene KGML: 404
+
+        db = mongomock.MongoClient()["test"]
+        opciones = Namespace(descargas=2, procesos=1, hilos=2, lote=2, cola=4)
+        cliente = ClienteHTTPAsync(base_url="http://rest.kegg.jp", transport=httpx.MockTransport(handler_con_fallos),
+                                   tasa=1000, espera_base=0)
+        subir_mapeo_real = orquestador_ingesta.subir_mapeo
+
+        def subir_mapeo(db, coleccion, documentos):
+            return coleccion != "kegg_uniprot" and subir_mapeo_real(db, coleccion, documentos)
+
+        with tempfile.TemporaryDirectory() as carpeta, mock.patch("orquestador_ingesta.subir_mapeo", subir_mapeo):
+            os.chdir(carpeta)  # `descarga.log` se escribe en el directorio actual
+            try:
+                async with cliente:
+                    _, problemas = await ingesta(cliente, "bce", db=db, opciones=opciones)
+            finally:
+                os.chdir(DIRECTORIO_INICIAL)
+
+        self.assertEqual(sorted(problemas), ["kegg_rutas", "kegg_rutas_graficas", "kegg_uniprot"])
+        self.assertIn("lote 1", " ".join(problemas["kegg_rutas"]))
+        self.assertIn("ruta bce00020", " ".join(problemas["kegg_rutas_graficas"]))
+        self.assertNotIn("bce01100", " ".join(problemas["kegg_rutas_graficas"]))
+        # Las colecciones activas no se crean y el staging queda para revisarlo
+        self.assertNotIn("kegg_rutas", db.list_collection_names())
+        self.assertNotIn("kegg_rutas_graficas", db.list_collection_names())
+        self.assertEqual([d["_id"] for d in db.kegg_rutas_graficas__staging.find()], ["bce00010"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,104 @@
+# tests/test_parser_kegg.py
+
+'''
+Tests para el parser de entradas de KEGG (`Kegg/parser_kegg.py`) y su uso en paralelo
+desde `Kegg/descargas_kegg_paths.py`.
+
+- test_parsear_entrada_completa: Se extraen todas las secciones estructuradas, con sus
+  líneas de continuación.
+- test_parsear_posicion: Posiciones simples, complementarias, con cromosoma y con `join`.
+- test_procesar_archivos_en_paralelo: Con varios procesos se escriben las entradas con
+  rutas en el orden de los archivos de entrada.
+'''
+
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+from comun.registros import escribir_registros, leer_registros_carpeta
+from Kegg import descargas_kegg_paths
+from Kegg.parser_kegg import parsear_entrada_kegg, parsear_posicion
+
+ENTRADA = """ENTRY       BC_0001           CDS       T00117
+SYMBOL      dnaA, BC0001
+NAME        (RefSeq) chromosomal replication initiator protein
+            DnaA
+ORTHOLOGY   K02313  chromosomal replication initiator protein
+            K00845  glucokinase [EC:2.7.1.2 2.7.1.1]
+ORGANISM    bce  Bacillus cereus ATCC 14579
+PATHWAY     bce02020  Two-component system
+            bce04112  Cell cycle - Caulobacter
+MODULE      bce_M00001  Glycolysis (Embden-Meyerhof pathway)
+BRITE       KEGG Orthology (KO) [BR:bce00001]
+             09180 Brite Hierarchies
+POSITION    complement(1..1344)
+MOTIF       Pfam: Bac_DnaA Bac_DnaA_C
+            PROSITE: DNAA
+DBLINKS     NCBI-ProteinID: NP_830000
+            UniProt: Q81JF6
+AASEQ       10
+            MLNIDQ
+            HIKE
+NTSEQ       12
+            atgctgaata
+            tt
+///
+"""
+
+
+def entrada(gen, rutas):
+    lineas = [f"ENTRY       {gen}           CDS       T00117"]
+    lineas += [f"{'PATHWAY' if i == 0 else '':12}{ruta}  Ruta {ruta}" for i, ruta in enumerate(rutas)]
+    return "\n".join(lineas) + "\n///\n"
+
+
+class TestParserKegg(unittest.TestCase):
+
+    def test_parsear_entrada_completa(self):
+        doc = parsear_entrada_kegg(ENTRADA)
+
+        self.assertEqual((doc["entry"], doc["type"], doc["genome"]), ("BC_0001", "CDS", "T00117"))
+        self.assertEqual(doc["symbol"], ["dnaA", "BC0001"])
+        self.assertEqual(doc["name"], "(RefSeq) chromosomal replication initiator protein DnaA")
+        self.assertEqual(doc["orthology"][1], {"ko_id": "K00845", "name": "glucokinase", "ec": ["2.7.1.2", "2.7.1.1"]})
+        self.assertEqual(doc["organism"], {"code": "bce", "name": "Bacillus cereus ATCC 14579"})
+        self.assertEqual(doc["pathways"], [
+            {"pathway_id": "bce02020", "pathway_name": "Two-component system"},
+            {"pathway_id": "bce04112", "pathway_name": "Cell cycle - Caulobacter"},
+        ])
+        self.assertEqual(doc["modules"][0]["module_id"], "bce_M00001")
+        self.assertEqual(doc["motif"], {"Pfam": ["Bac_DnaA", "Bac_DnaA_C"], "PROSITE": ["DNAA"]})
+        self.assertEqual(doc["dblinks"]["UniProt"], ["Q81JF6"])
+        self.assertEqual(doc["aaseq"], {"length": 10, "sequence": "MLNIDQHIKE"})
+        self.assertEqual(doc["ntseq"]["sequence"], "atgctgaatatt")
+        self.assertEqual(len(doc["otras_secciones"]["BRITE"]), 2)
+
+    def test_parsear_posicion(self):
+        self.assertEqual(parsear_posicion("1..1344"),
+                         {"raw": "1..1344", "chromosome": None, "start": 1, "end": 1344, "strand": "+"})
+        self.assertEqual(parsear_posicion("complement(2290..3435)")["strand"], "-")
+        posicion = parsear_posicion("2:join(30..40,10..20)")
+        self.assertEqual((posicion["chromosome"], posicion["start"], posicion["end"]), ("2", 10, 40))
+        self.assertIsNone(parsear_posicion("Unknown")["start"])
+
+    def test_procesar_archivos_en_paralelo(self):
+        temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, temp_dir)
+        entrada_dir = os.path.join(temp_dir, "entrada")
+        salida_dir = os.path.join(temp_dir, "salida")
+        for numero in range(4):
+            escribir_registros(os.path.join(entrada_dir, f"bloque_{numero:04d}.ndjson.gz"), [
+                {"raw_text": entrada(f"BC_{numero}01", ["bce00010"])},
+                {"raw_text": entrada(f"BC_{numero}02", [])},
+            ])
+
+        with patch.object(descargas_kegg_paths, "carpeta_salida", salida_dir):
+            descargas_kegg_paths.procesar_archivos_kegg(entrada_dir, procesos=2)
+
+        docs = list(leer_registros_carpeta(salida_dir))
+        self.assertEqual([d["entry"] for d in docs], ["BC_001", "BC_101", "BC_201", "BC_301"])
+
+
+if __name__ == "__main__":
+    unittest.main()
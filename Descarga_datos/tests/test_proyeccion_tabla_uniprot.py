@@ -0,0 +1,58 @@
+# tests/test_proyeccion_tabla_uniprot.py
+
+'''
+Tests para la proyección `tabla` de las entradas de UniProt (`Uniprot/proyeccion_tabla_uniprot.py`).
+
+- test_documento_tabla: Descripción (submissionNames antes que recommendedName), genes,
+  locus y estadísticas de la secuencia salen planos y sin la secuencia completa.
+- test_rellenar_tabla: Con `mongomock`, solo se rellenan los documentos sin `tabla`
+  (salvo con `todas`).
+'''
+
+import unittest
+import mongomock
+from Uniprot.proyeccion_tabla_uniprot import documento_tabla, con_tabla, rellenar_tabla
+
+ENTRADA = {
+    "primaryAccession": "Q81JF6",
+    "proteinDescription": {"recommendedName": {"fullName": {"value": "Chromosomal replication initiator protein DnaA"}}},
+    "genes": [
+        {"geneName": {"value": "dnaA"}, "orderedLocusNames": [{"value": "BC_0001"}, {"value": "BC0001"}]},
+        {"orfNames": [{"value": "X"}]},
+    ],
+    "sequence": {"value": "MENI", "length": 4, "molWeight": 512, "crc64": "ABC", "md5": "def"},
+}
+
+
+class TestProyeccionTablaUniProt(unittest.TestCase):
+
+    def test_documento_tabla(self):
+        tabla = documento_tabla(ENTRADA)
+        self.assertEqual(tabla, {
+            "primaryAccession": "Q81JF6",
+            "proteinDescription": "Chromosomal replication initiator protein DnaA",
+            "genes": [{"geneName": "dnaA", "orderedLocusNames": "BC_0001"},
+                      {"geneName": None, "orderedLocusNames": ""}],
+            "locusNames": ["BC_0001", "BC0001"],
+            "geneNames": ["dnaA"],
+            "sequence": {"length": 4, "molWeight": 512, "crc64": "ABC", "md5": "def"},
+        })
+        enviada = dict(ENTRADA, proteinDescription={"submissionNames": [{"fullName": {"value": "Enviada"}}],
+                                                    "recommendedName": {"fullName": {"value": "Recomendada"}}})
+        self.assertEqual(documento_tabla(enviada)["proteinDescription"], "Enviada")
+        self.assertEqual(con_tabla({"entry": "BC_0001"}), {"entry": "BC_0001"})
+
+    def test_rellenar_tabla(self):
+        coleccion = mongomock.MongoClient().db.UniProt
+        coleccion.insert_many([dict(ENTRADA), con_tabla(dict(ENTRADA, primaryAccession="Q81JF7")), {"entry": "BC_0001"}])
+        coleccion.update_one({"primaryAccession": "Q81JF7"}, {"$set": {"tabla.geneNames": []}})
+
+        self.assertEqual(rellenar_tabla(coleccion, tamano_lote=1), 1)
+        self.assertEqual(coleccion.find_one({"primaryAccession": "Q81JF6"})["tabla"], documento_tabla(ENTRADA))
+        self.assertEqual(coleccion.find_one({"primaryAccession": "Q81JF7"})["tabla"]["geneNames"], [])
+        self.assertEqual(rellenar_tabla(coleccion, todas=True), 2)
+        self.assertEqual(coleccion.find_one({"primaryAccession": "Q81JF7"})["tabla"]["geneNames"], ["dnaA"])
+
+
+if __name__ == "__main__":
+    unittest.main()
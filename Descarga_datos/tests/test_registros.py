@@ -0,0 +1,83 @@
+# tests/test_registros.py
+
+'''
+Tests para el módulo de E/S de registros NDJSON+gzip (`comun/registros.py`).
+
+- test_escribir_y_leer_registros: Ida y vuelta de registros con caracteres no ASCII.
+- test_escritor_rota_por_tamano: El escritor cambia de archivo al superar el tamaño máximo.
+- test_escritor_descarta_archivo_si_falla: Un error dentro del bloque `with` no deja
+  archivos a medias en la carpeta.
+- test_leer_carpeta_con_json_antiguo: La lectura de carpeta acepta los `.json` antiguos
+  e ignora archivos que no son de registros.
+- test_listar_prefiere_ndjson_gz: Si un archivo existe como `.json` y `.ndjson.gz`, solo
+  se lee el `.ndjson.gz`.
+'''
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from comun.registros import (
+    EscritorRegistros, escribir_registros, leer_registros, leer_registros_carpeta, listar_archivos_registros
+)
+
+
+class TestRegistros(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_escribir_y_leer_registros(self):
+        registros = [{"_id": "bce00010", "name": "Glucólisis"}, {"_id": "bce00020", "genes": [1, 2]}]
+        ruta = os.path.join(self.temp_dir, "rutas.ndjson.gz")
+
+        self.assertEqual(escribir_registros(ruta, iter(registros)), 2)
+        self.assertEqual(list(leer_registros(ruta)), registros)
+
+    def test_escritor_rota_por_tamano(self):
+        with EscritorRegistros(self.temp_dir, "bloque", tamano_maximo=50) as escritor:
+            for i in range(5):
+                escritor.escribir({"id": i, "texto": "x" * 30})
+
+        self.assertEqual(escritor.total, 5)
+        self.assertEqual([os.path.basename(a) for a in escritor.archivos],
+                         [f"bloque_000{i}.ndjson.gz" for i in range(1, 6)])
+        self.assertEqual([r["id"] for r in leer_registros_carpeta(self.temp_dir)], list(range(5)))
+
+    def test_escritor_descarta_archivo_si_falla(self):
+        with self.assertRaises(RuntimeError):
+            with EscritorRegistros(self.temp_dir, "bloque") as escritor:
+                escritor.escribir({"id": 1})
+                raise RuntimeError("fallo")
+
+        self.assertEqual(os.listdir(self.temp_dir), [])
+
+    def test_leer_carpeta_con_json_antiguo(self):
+        with open(os.path.join(self.temp_dir, "a.json"), "w") as f:
+            json.dump([{"id": 1}, {"id": 2}], f)
+        with open(os.path.join(self.temp_dir, "b.json"), "w") as f:
+            json.dump({"id": 3}, f)
+        with open(os.path.join(self.temp_dir, "descarga.log"), "w") as f:
+            f.write("Error")
+        escribir_registros(os.path.join(self.temp_dir, "c.ndjson.gz"), [{"id": 4}])
+
+        self.assertEqual([r["id"] for r in leer_registros_carpeta(self.temp_dir)], [1, 2, 3, 4])
+
+    def test_listar_prefiere_ndjson_gz(self):
+        with open(os.path.join(self.temp_dir, "bloque_0001.json"), "w") as f:
+            json.dump([{"id": 1}], f)
+        escribir_registros(os.path.join(self.temp_dir, "bloque_0001.ndjson.gz"), [{"id": 1}])
+        with open(os.path.join(self.temp_dir, "bloque_0002.json"), "w") as f:
+            json.dump([{"id": 2}], f)
+
+        self.assertEqual([os.path.basename(r) for r in listar_archivos_registros(self.temp_dir)],
+                         ["bloque_0001.ndjson.gz", "bloque_0002.json"])
+        self.assertEqual([r["id"] for r in leer_registros_carpeta(self.temp_dir)], [1, 2])
+
+
+if __name__ == "__main__":
+    unittest.main()
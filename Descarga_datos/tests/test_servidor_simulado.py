@@ -0,0 +1,68 @@
+# tests/test_servidor_simulado.py
+
+'''
+Tests para el servidor simulado de KEGG/UniProt (`comun/servidor_simulado.py`) y el banco
+de pruebas de las descargas (`banco_pruebas_descargas.py`).
+
+- test_endpoints_kegg_y_uniprot: Las respuestas tienen el formato que esperan los
+  parsers (entradas de genes, `link/pathway`, paginación de UniProt y filtro por
+  accesiones).
+- test_banco_con_errores: Con errores 503 programados, el cliente de KEGG reintenta el
+  lote que falla una vez y pierde el que agota los reintentos; el banco cuenta las
+  entradas guardadas y las peticiones reintentadas.
+'''
+
+import unittest
+import httpx
+from banco_pruebas_descargas import crear_parser, ejecutar_banco
+from comun.servidor_simulado import ServidorSimulado, generar_datos
+from Kegg.parser_kegg import parsear_entrada_kegg
+
+
+class TestServidorSimulado(unittest.TestCase):
+
+    def test_endpoints_kegg_y_uniprot(self):
+        datos = generar_datos(genes=30, rutas=4)
+        with ServidorSimulado(datos) as servidor, httpx.Client() as cliente:
+            ids = [linea.split()[0] for linea in cliente.get(f"{servidor.url_kegg}/list/bce").text.splitlines()]
+            self.assertEqual(len(ids), 30)
+
+            texto = cliente.get(f"{servidor.url_kegg}/get/{ids[0]}").text
+            documento = parsear_entrada_kegg(texto)
+            self.assertEqual(documento["entry"], "BC_0001")
+            self.assertEqual([p["pathway_id"] for p in documento["pathways"]], datos["genes"]["BC_0001"]["rutas"])
+            self.assertEqual(documento["dblinks"], {"UniProt": ["P00001"]})
+
+            enlaces = cliente.get(f"{servidor.url_kegg}/link/pathway/bce").text.splitlines()
+            self.assertEqual(len(enlaces), sum(len(g["rutas"]) for g in datos["genes"].values()))
+            self.assertEqual(cliente.get(f"{servidor.url_kegg}/get/bce00010/genes").status_code, 400)
+
+            respuesta = cliente.get(f"{servidor.url_uniprot}/search", params={"query": "organism_id:226900", "size": 25},
+                                    headers={"Accept-Encoding": "gzip"})
+            self.assertEqual(respuesta.headers["x-total-results"], "30")
+            self.assertEqual(len(respuesta.json()["results"]), 25)
+            self.assertEqual(len(cliente.get(respuesta.links["next"]["url"]).json()["results"]), 5)
+
+            respuesta = cliente.get(f"{servidor.url_uniprot}/stream", params={"query": "accession:(P00002 OR P00007)"})
+            accesiones = [p["primaryAccession"] for p in respuesta.json()["results"]]
+            self.assertEqual(accesiones, ["P00002", "P00007"])
+
+    def test_banco_con_errores(self):
+        opciones = crear_parser().parse_args([
+            "--genes", "60", "--rutas", "3", "--latencia", "0", "--espera-base", "0.01",
+            # El lote 2 se recupera al reintentar; el lote 3 agota los 3 intentos del cliente
+            "--fallo", "get/bce:BC_0011+=1", "--fallo", "get/bce:BC_0021+=3",
+            "--escenarios", "kegg_entradas,kegg_rutas",
+        ])
+        resultados = {r.nombre: r for r in ejecutar_banco(opciones)}
+
+        self.assertEqual(resultados["kegg_entradas"].elementos, 50)
+        # 1 petición `list/` + 6 lotes de `get/`, con 1 reintento del lote 2 y 2 del lote 3
+        kegg = resultados["kegg_entradas"].peticiones
+        self.assertEqual(kegg["errores"], 4)
+        self.assertEqual(kegg["peticiones"], 10)
+        self.assertEqual(resultados["kegg_rutas"].elementos, 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
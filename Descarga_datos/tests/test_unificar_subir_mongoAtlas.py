@@ -7,6 +7,16 @@ variables de entorno almacenadas en un archivo .env (MONGO_URI y DB_NAME).
 Uso:
     python subir_a_mongodb.py <ruta_a_la_carpeta_json> <nombre_coleccion>
 
+- test_save_to_mongoDB_atlas: Sube documentos de archivos `.json` antiguos.
+- test_recarga_idempotente_por_clave_natural: Volver a cargar reemplaza por clave natural
+  (`primaryAccession`) en lugar de duplicar (carga directa, sin staging).
+- test_carga_azul_verde_promueve_staging: La carga por defecto pasa por el staging, se
+  promueve y conserva la generación anterior.
+- test_archivo_fallido_no_se_promueve: Si un archivo no se puede cargar, el staging no se
+  promueve aunque pase la validación y la colección activa no cambia.
+- test_indice_unico_elimina_duplicados: Si la colección tiene duplicados de cargas
+  antiguas, se borran antes de crear el índice único sobre la clave natural.
+
 '''
 
 import os
@@ -15,6 +25,8 @@ import tempfile
 import shutil
 import mongomock
 from unittest import mock, TestCase
+from comun.registros import escribir_registros
+from comun.carga_mongo import cargar_registros
 from unificar_ficheros_json_subir_mongoAtlas import save_to_mongoDB_atlas  # Asegúrate de que el nombre del archivo sea correcto
 
 class TestSaveToMongoDBAtlas(TestCase):
@@ -54,4 +66,80 @@ class TestSaveToMongoDBAtlas(TestCase):
         names = sorted(doc["name"] for doc in documents)
         self.assertEqual(names, ["A", "B", "C"])
 
+    @mock.patch("unificar_ficheros_json_subir_mongoAtlas.MongoClient")
+    @mock.patch.dict(os.environ, {"MONGO_URI": "mongodb://fakeuri", "DB_NAME": "testdb"})
+    def test_recarga_idempotente_por_clave_natural(self, mock_mongo_client):
+        mock_client = mongomock.MongoClient()
+        mock_mongo_client.return_value = mock_client
+        escribir_registros(os.path.join(self.temp_dir, "uniprot.ndjson.gz"), [
+            {"primaryAccession": "Q81IH1", "uniProtkbId": "A_BACCR"},
+            {"primaryAccession": "Q81IH2", "uniProtkbId": "B_BACCR"},
+        ])
+
+        save_to_mongoDB_atlas(self.temp_dir, "test_collection", tamano_lote=2, hilos=2, blue_green=False)
+
+        # Segunda carga con un documento modificado: se reemplaza, no se duplica
+        escribir_registros(os.path.join(self.temp_dir, "uniprot.ndjson.gz"), [
+            {"primaryAccession": "Q81IH1", "uniProtkbId": "A2_BACCR"},
+            {"primaryAccession": "Q81IH2", "uniProtkbId": "B_BACCR"},
+        ])
+        resumen = save_to_mongoDB_atlas(self.temp_dir, "test_collection", tamano_lote=2, hilos=2, blue_green=False)
+
+        collection = mock_client["testdb"]["test_collection"]
+        self.assertEqual(collection.count_documents({}), 5)  # 3 documentos sin clave + 2 de UniProt
+        self.assertEqual(collection.find_one({"primaryAccession": "Q81IH1"})["uniProtkbId"], "A2_BACCR")
+        self.assertEqual(collection.find_one({"primaryAccession": "Q81IH1"})["tabla"]["primaryAccession"], "Q81IH1")
+        self.assertEqual((resumen.insertados, resumen.reemplazados, resumen.sin_cambios), (0, 1, 4))
+        self.assertEqual(resumen.errores, 0)
+
+    @mock.patch("unificar_ficheros_json_subir_mongoAtlas.MongoClient")
+    @mock.patch.dict(os.environ, {"MONGO_URI": "mongodb://fakeuri", "DB_NAME": "testdb"})
+    def test_carga_azul_verde_promueve_staging(self, mock_mongo_client):
+        mock_client = mongomock.MongoClient()
+        mock_mongo_client.return_value = mock_client
+        db = mock_client["testdb"]
+
+        save_to_mongoDB_atlas(self.temp_dir, "test_collection")
+        escribir_registros(os.path.join(self.temp_dir, "data3.ndjson.gz"), [{"name": "D"}])
+        save_to_mongoDB_atlas(self.temp_dir, "test_collection")
+
+        self.assertEqual(db["test_collection"].count_documents({}), 4)
+        self.assertEqual(db["test_collection__anterior"].count_documents({}), 3)
+        self.assertNotIn("test_collection__staging", db.list_collection_names())
+        self.assertEqual(db["dataset_versiones"].find_one({"_id": "actual"})["version"], 2)
+
+    @mock.patch("unificar_ficheros_json_subir_mongoAtlas.MongoClient")
+    @mock.patch.dict(os.environ, {"MONGO_URI": "mongodb://fakeuri", "DB_NAME": "testdb"})
+    def test_archivo_fallido_no_se_promueve(self, mock_mongo_client):
+        mock_client = mongomock.MongoClient()
+        mock_mongo_client.return_value = mock_client
+        db = mock_client["testdb"]
+        self.assertTrue(save_to_mongoDB_atlas(self.temp_dir, "test_collection").publicada)
+
+        escribir_registros(os.path.join(self.temp_dir, "data3.ndjson.gz"), [{"name": "D"}])
+        with open(os.path.join(self.temp_dir, "data4.json"), "w") as f:
+            f.write('[{"name": "E"}, {"name":')  # Archivo truncado
+        resumen = save_to_mongoDB_atlas(self.temp_dir, "test_collection")
+
+        self.assertFalse(resumen.publicada)
+        self.assertEqual(resumen.fallos, ["data4.json"])
+        self.assertEqual(sorted(d["name"] for d in db["test_collection"].find()), ["A", "B", "C"])
+        self.assertEqual(db["test_collection__staging"].count_documents({}), 4)
+        self.assertEqual(db["dataset_versiones"].find_one({"_id": "actual"})["version"], 1)
+
+    def test_indice_unico_elimina_duplicados(self):
+        collection = mongomock.MongoClient()["testdb"]["test_collection"]
+        collection.insert_many([
+            {"primaryAccession": "Q81IH1", "uniProtkbId": "A_BACCR"},
+            {"primaryAccession": "Q81IH1", "uniProtkbId": "A_BACCR"},
+            {"primaryAccession": "Q81IH2", "uniProtkbId": "B_BACCR"},
+        ])
+
+        resumen = cargar_registros(collection, [{"primaryAccession": "Q81IH1", "uniProtkbId": "A2_BACCR"}])
+
+        self.assertEqual(resumen.errores, 0)
+        self.assertEqual(collection.count_documents({"primaryAccession": "Q81IH1"}), 1)
+        self.assertEqual(collection.find_one({"primaryAccession": "Q81IH1"})["uniProtkbId"], "A2_BACCR")
+        self.assertEqual(collection.count_documents({}), 2)
+        self.assertTrue(any(indice.get("unique") for indice in collection.index_information().values()))
 
@@ -0,0 +1,70 @@
+# tests/test_versiones_dataset.py
+
+'''
+Tests para la recarga azul/verde de colecciones (`comun/versiones_dataset.py`), con `mongomock`.
+
+- test_promover_incrementa_version: Promover publica el staging, conserva la colección
+  anterior y sus índices, e incrementa la versión del dataset.
+- test_validacion_detecta_perdida_de_documentos: Un staging con muchos menos documentos
+  o sin los campos de la colección activa no se puede promover.
+- test_revertir_intercambia_generaciones: Revertir vuelve a activar la generación anterior.
+'''
+
+import unittest
+import mongomock
+from comun.versiones_dataset import preparar_staging, validar_staging, promover, revertir, version_actual
+
+
+class TestVersionesDataset(unittest.TestCase):
+
+    def setUp(self):
+        self.db = mongomock.MongoClient()["test"]
+        self.db["UniProt"].create_index("primaryAccession", unique=True)
+        self.db["UniProt"].insert_many([{"primaryAccession": f"Q{i}", "sequence": "MK"} for i in range(10)])
+
+    def cargar_staging(self, documentos):
+        staging = preparar_staging(self.db, "UniProt")
+        if documentos:
+            staging.insert_many(documentos)
+        return staging
+
+    def test_promover_incrementa_version(self):
+        staging = self.cargar_staging([{"primaryAccession": f"Q{i}", "sequence": "MKV"} for i in range(11)])
+
+        self.assertIn("primaryAccession_1", staging.index_information())
+        self.assertEqual(validar_staging(self.db, "UniProt"), [])
+        self.assertEqual(promover(self.db, "UniProt"), 1)
+
+        self.assertEqual(self.db["UniProt"].count_documents({}), 11)
+        self.assertEqual(self.db["UniProt__anterior"].count_documents({}), 10)
+        self.assertIn("primaryAccession_1", self.db["UniProt__anterior"].index_information())
+        self.assertNotIn("UniProt__staging", self.db.list_collection_names())
+        self.assertEqual(version_actual(self.db)["colecciones"]["UniProt"]["documentos"], 11)
+
+    def test_validacion_detecta_perdida_de_documentos(self):
+        self.cargar_staging([{"primaryAccession": f"Q{i}", "sequence": "MK"} for i in range(5)])
+        self.assertEqual(len(validar_staging(self.db, "UniProt")), 1)
+
+        self.cargar_staging([{"primaryAccession": f"Q{i}"} for i in range(10)])
+        self.assertIn("sequence", validar_staging(self.db, "UniProt")[0])
+
+        self.cargar_staging([])
+        self.assertEqual(len(validar_staging(self.db, "UniProt")), 1)
+
+    def test_revertir_intercambia_generaciones(self):
+        with self.assertRaises(ValueError):
+            revertir(self.db, "UniProt")
+
+        self.cargar_staging([{"primaryAccession": f"Q{i}", "sequence": "MKV"} for i in range(12)])
+        promover(self.db, "UniProt")
+        self.assertEqual(revertir(self.db, "UniProt"), 2)
+
+        self.assertEqual(self.db["UniProt"].count_documents({}), 10)
+        self.assertEqual(self.db["UniProt__anterior"].count_documents({}), 12)
+        self.assertIn("primaryAccession_1", self.db["UniProt"].index_information())
+        self.assertNotIn("UniProt__revirtiendo", self.db.list_collection_names())
+        self.assertEqual(version_actual(self.db)["colecciones"]["UniProt"]["origen"], "revertir")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,27 +1,61 @@
 '''
-Este script unifica y sube datos desde múltiples archivos JSON ubicados en una carpeta especificada
+Este script unifica y sube datos desde múltiples archivos de registros (NDJSON+gzip de
+`comun.registros`, o `.json` antiguos) ubicados en una carpeta especificada
 a una colección de MongoDB Atlas. El nombre de la colección y la ruta a la carpeta de archivos se
 proporcionan como argumentos al ejecutar el script. La conexión a MongoDB Atlas se gestiona mediante
 variables de entorno almacenadas en un archivo `.env` (MONGO_URI y DB_NAME).
 
+La carga es idempotente (`comun.carga_mongo`): cada documento se sube con un upsert por su
+clave natural (`_id`, `primaryAccession` o `entry`), en lotes `bulk_write(ordered=False)`
+enviados en paralelo por varios hilos. Volver a ejecutar el script reemplaza los documentos
+en lugar de duplicarlos, y un documento erróneo no detiene el resto. Al final se muestra el
+rendimiento de la carga en la colección.
+
+Por defecto la carga es "azul/verde" (`comun.versiones_dataset`): los documentos se suben a
+`<nombre_coleccion>__staging`, se valida el resultado (no vacío, sin pérdida significativa de
+documentos ni de campos) y solo entonces se promueve como colección activa, conservando la
+anterior en `<nombre_coleccion>__anterior` e incrementando la versión del dataset. Si la
+validación falla, la colección activa no se toca y el staging queda para revisarlo.
+Tampoco se promueve si algún archivo no se pudo cargar o hubo errores de escritura
+(`ResumenCarga.problemas`): una recarga que ha perdido datos no sustituye a la activa.
+En ese caso el script termina con código 1.
+Con `--directo` se escribe directamente en la colección activa (cargas parciales).
+
+Los documentos con KGML (`kegg_rutas_graficas`) se suben con `kgml_data` comprimido
+(`Kegg.kgml_comprimido`) y las entradas de UniProt, con la proyección `tabla` que sirve
+la API (`Uniprot.proyeccion_tabla_uniprot`).
+
+Para volver a la generación anterior:
+    python -m comun.versiones_dataset revertir <nombre_coleccion>
+
 Uso:
-    unificar_ficheros_json_subir_mongoAtlas.py <ruta_a_la_carpeta_json> <nombre_coleccion>
+    unificar_ficheros_json_subir_mongoAtlas.py <ruta_a_la_carpeta_json> <nombre_coleccion> [--hilos N] [--lote N] [--directo]
 
 '''
 
-import json
 import os
 import sys
+import argparse
 from pymongo import MongoClient
 from dotenv import load_dotenv
+from comun.registros import leer_registros, listar_archivos_registros
+from comun.carga_mongo import cargar_registros, ResumenCarga, TAMANO_LOTE, HILOS
+from comun.versiones_dataset import preparar_staging, validar_staging, promover, registrar_version
+from Kegg.kgml_comprimido import comprimir_documento_ruta
+from Uniprot.proyeccion_tabla_uniprot import con_tabla
+
+
+def preparar_documento(documento):
+    """Formato de almacenamiento: KGML comprimido y proyección `tabla` en las entradas de UniProt."""
+    return con_tabla(comprimir_documento_ruta(documento))
 
-def save_to_mongoDB_atlas(json_directory, collection_name):
+
+def save_to_mongoDB_atlas(json_directory, collection_name, tamano_lote=TAMANO_LOTE, hilos=HILOS, blue_green=True):
     # Cargar variables de entorno desde el archivo .env
     load_dotenv()
 
     mongo_uri = os.getenv("MONGO_URI")
     db_name = os.getenv("DB_NAME")
-    #collection_name = db[collection_name]
     
     # Verifica si las variables están disponibles
     if not mongo_uri or not db_name or not collection_name:
@@ -32,7 +66,6 @@ def save_to_mongoDB_atlas(json_directory, collection_name):
         # Conexión a MongoDB Atlas
         client = MongoClient(mongo_uri)
         db = client[db_name]
-        collection = db[collection_name]
         print(f"Conectado a la base de datos '{db_name}', colección '{collection_name}'")
     except Exception as e:
         print(f"Error al conectar a MongoDB Atlas: {e}")
@@ -43,44 +76,61 @@ def save_to_mongoDB_atlas(json_directory, collection_name):
         print(f"El directorio {json_directory} no existe.")
         return
     
-    archivos = [f for f in os.listdir(json_directory) if f.endswith(".json")]
+    archivos = listar_archivos_registros(json_directory)
     if not archivos:
-        print(f"No se encontraron archivos .json en '{json_directory}'")
+        print(f"No se encontraron archivos de registros en '{json_directory}'")
         return
 
-    # Procesar cada archivo .json en el directorio
-    for filename in archivos:
-        file_path = os.path.join(json_directory, filename)
+    collection = preparar_staging(db, collection_name) if blue_green else db[collection_name]
+
+    # Procesar cada archivo del directorio, acumulando el resumen de la colección
+    resumen = ResumenCarga(collection_name)
+    for file_path in archivos:
+        filename = os.path.basename(file_path)
         print(f"Procesando archivo: {file_path}")
+        documentos_previos = resumen.documentos
         
         try:
-                # Leer datos del archivo JSON
-            with open(file_path, "r", encoding="utf-8") as json_file:
-                    data = json.load(json_file)
-
-                # Asegurarse de que los datos son una lista, si no lo son, convertirlos a una lista
-            if not isinstance(data, list):
-                print(f"El archivo {filename} no tiene una lista de datos. Convertido a lista.")
-                data = [data]
-                
-                # Insertar datos en MongoDB
-            if data:
-                result = collection.insert_many(data)
-                print(f"Insertados {len(result.inserted_ids)} documentos desde {filename}")
+            documentos = map(preparar_documento, leer_registros(file_path))
+            cargar_registros(collection, documentos, tamano_lote, hilos, resumen)
+            cargados = resumen.documentos - documentos_previos
+            if cargados:
+                print(f"Cargados {cargados} documentos desde {filename}")
             else:
                 print(f"El archivo {filename} está vacío.")
             
         except Exception as e:
             print(f"Error al procesar el archivo {filename}: {e}")
+            resumen.fallos.append(filename)
             
-    print("Proceso completo.")
+    print(resumen.informe())
 
+    problemas = resumen.problemas()
+    if blue_green and not problemas:
+        problemas = validar_staging(db, collection_name)
+    for problema in problemas:
+        print(f"Carga incompleta: {problema}")
 
-if __name__ == "__main__":
-    if len(sys.argv) != 3:
-        print("Uso: python subir_a_mongodb.py <ruta_a_la_carpeta_json> <nombre_coleccion>")
-    else:
-        json_directory = sys.argv[1]
-        collection_name = sys.argv[2]
-        save_to_mongoDB_atlas(json_directory, collection_name)
+    if blue_green:
+        if problemas:
+            print(f"No se promueve '{collection.name}'; la colección '{collection_name}' no se ha modificado.")
+            return resumen
+        promover(db, collection_name)
+    elif resumen.documentos:
+        # Lo escrito ya está en la colección activa, aunque la carga esté incompleta
+        registrar_version(db, collection_name, documentos=resumen.documentos, origen="carga directa")
+    resumen.publicada = not problemas
+    print("Proceso completo." if resumen.publicada else "Proceso terminado con errores.")
+    return resumen
 
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sube los registros de una carpeta a una colección de MongoDB.")
+    parser.add_argument("json_directory", help="Carpeta con los archivos de registros.")
+    parser.add_argument("collection_name", help="Colección de destino.")
+    parser.add_argument("--hilos", type=int, default=HILOS, help="Lotes enviados en paralelo.")
+    parser.add_argument("--lote", type=int, default=TAMANO_LOTE, help="Documentos por bulk_write.")
+    parser.add_argument("--directo", action="store_true", help="Escribe en la colección activa sin staging.")
+    args = parser.parse_args()
+    resumen = save_to_mongoDB_atlas(args.json_directory, args.collection_name, args.lote, args.hilos, not args.directo)
+    sys.exit(0 if resumen is not None and resumen.publicada else 1)
@@ -26,10 +26,19 @@ Variables de entorno esperadas (con valores por defecto si aplica):
    - COLLECTION_KEGG: Nombre de la colección Kegg (def: "Kegg").
    - COLLECTION_KEGG_RUTAS: Nombre de la colección Kegg Rutas (def: "Kegg_rutas").
    - COLLECTION_KEGG_RUTAS_GRAFICAS: Nombre de la colección de kegg rutas hgml (def:"kegg_rutas_graficas").
+   - COLLECTION_KEGG_GENES_NODOS: Índice gen -> nodos KGML (def: "kegg_genes_nodos").
+   - COLLECTION_KEGG_METRICAS_RUTAS: Métricas topológicas por ruta (def: "kegg_metricas_rutas").
+   - COLLECTION_KEGG_METRICAS_GENES: Métricas de centralidad por gen (def: "kegg_metricas_genes").
+   - COLLECTION_KEGG_UNIPROT: Relación gen de KEGG -> accesiones de UniProt de la
+     ingesta, usada para resaltar proteínas en las rutas (def: "kegg_uniprot").
+
+8. Proveer `get_database_sincrona` (pymongo) para los trabajos offline de
+    `app.jobs`, que se ejecutan fuera del bucle de eventos de FastAPI.
 '''
 
 import os
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import MongoClient
 from dotenv import load_dotenv
 from fastapi import HTTPException
 
@@ -46,6 +55,11 @@ collection_uniprot = os.getenv("COLLECTION_UNIPROT", "UniProt")  # Valor por def
 collection_kegg = os.getenv("COLLECTION_KEGG", "Kegg")  # Valor por defecto: "Kegg"
 collection_kegg_rutas = os.getenv("COLLECTION_KEGG_RUTAS", "Kegg_rutas")  # Valor por defecto: "Kegg"
 collection_kegg_rutas_hgml = os.getenv("COLLECTION_KEGG_RUTAS_GRAFICAS", "kegg_rutas_graficas")
+collection_kegg_genes_nodos = os.getenv("COLLECTION_KEGG_GENES_NODOS", "kegg_genes_nodos")
+collection_kegg_metricas_rutas = os.getenv("COLLECTION_KEGG_METRICAS_RUTAS", "kegg_metricas_rutas")
+collection_kegg_metricas_genes = os.getenv("COLLECTION_KEGG_METRICAS_GENES", "kegg_metricas_genes")
+collection_dataset_versiones = os.getenv("COLLECTION_DATASET_VERSIONES", "dataset_versiones")
+collection_kegg_uniprot = os.getenv("COLLECTION_KEGG_UNIPROT", "kegg_uniprot")
 
 # Crear cliente de MongoDB
 client = AsyncIOMotorClient(mongo_uri)
@@ -58,6 +72,7 @@ uniprot_collection = db[collection_uniprot]
 kegg_collection = db[collection_kegg]
 kegg_rutas_collection = db[collection_kegg_rutas]
 kegg_rutas_graficas_collection = db[collection_kegg_rutas_hgml]
+kegg_genes_nodos_collection = db[collection_kegg_genes_nodos]
 
 # Verificar si la conexión es exitosa
 async def check_connection():
@@ -77,6 +92,10 @@ def get_collection(collection_name: str):
 def get_database():
     return db
 
+# Base de datos síncrona (pymongo) para los trabajos offline
+def get_database_sincrona():
+    return MongoClient(mongo_uri)[db_name]
+
 # Dependencia de FastAPI para inyectar una colección específica
 def get_collection_dependency(collection_name: str = collection_uniprot):
     return get_collection(collection_name)
@@ -1,12 +1,28 @@
 # backend/app/config/redis_config.py
 
+import os
 import redis
+import redis.asyncio as redis_async
+
+REDIS_HOST = os.getenv("REDIS_HOST", "redis")  # nombre del servicio de redis en docker-compose
+REDIS_PORT = int(os.getenv("REDIS_PORT", 6379))
 
 def get_redis_connection():
     r = redis.Redis(
-        host='redis',   # nombre del servicio de redis en docker-compose
-        port=6379, 
+        host=REDIS_HOST,
+        port=REDIS_PORT, 
         db=0,
         decode_responses=True  # para que no te devuelva bytes, sino strings
     )
     return r
+
+def get_redis_async_connection():
+    # Conexión asíncrona en modo binario: la caché guarda bytes (JSON serializado o comprimido)
+    r = redis_async.Redis(
+        host=REDIS_HOST,
+        port=REDIS_PORT,
+        db=0,
+        socket_connect_timeout=0.5,
+        socket_timeout=1.0,
+    )
+    return r
@@ -10,16 +10,24 @@ Su función principal, `obtener_resultados_tabla`, está diseñada para:
     mayúsculas/minúsculas) en los campos:
     - `primaryAccession`
     - `_id` (si el `query` parece un ObjectId válido)
-    - `genes.orderedLocusNames.value`
+    - `tabla.locusNames` (todos los locus de la entrada)
     - `sequence.value`
-4.  Ejecutar la consulta contra la colección 'UniProt', limitando la recuperación
-    inicial de documentos desde la base de datos a un máximo (actualmente 10 documentos
-    debido a `to_list(length=10)`).
-5.  Proyectar y seleccionar campos específicos de los documentos para optimizar
-    la transferencia de datos.
-6.  Mapear los documentos recuperados de MongoDB a una lista de objetos
-    Pydantic `QueryResponse`. Este proceso incluye la extracción y estructuración
-    de datos anidados como `proteinDescription`, `genes` y `sequence`.
+4.  Ejecutar la consulta contra la colección 'UniProt' como una agregación limitada
+    a `MAXIMO_DOCUMENTOS` (10) documentos. Solo se buscan documentos con `tabla`,
+    así que los cargados antes de la proyección no ocupan esos 10 huecos (ni se
+    encuentran): antes de desplegar esta versión sobre una base de datos existente
+    hay que rellenar `tabla` con `python -m Uniprot.proyeccion_tabla_uniprot`
+    (desde `Descarga_datos`).
+5.  Proyectar en MongoDB (`PROYECCION_TABLA`) el subdocumento `tabla` que añade la
+    carga (`Descarga_datos/Uniprot/proyeccion_tabla_uniprot.py`), con la descripción
+    ya resuelta y los genes y la secuencia aplanados, más `sequence.value`. Los
+    documentos llegan con la forma de `QueryResponse`, sin recorrer en Python las
+    estructuras anidadas de UniProt.
+6.  Devolver los documentos proyectados tal cual, sin construir objetos Pydantic:
+    el router los envía con `respuesta_json` (`app.services.respuesta_service`).
+    Un documento con `tabla` pero sin `genes` (proyección incompleta) se
+    registra como error y se descarta. En modo validación
+    (`VALIDAR_RESPUESTAS`) cada documento se valida además con `QueryResponse`.
 7.  Manejar errores, incluyendo:
     - `ValueError` (convertido a `HTTPException` 400) si el `query` es inválido.
     - `HTTPException` 404 si no se encuentran documentos o si, tras el
@@ -27,23 +35,39 @@ Su función principal, `obtener_resultados_tabla`, está diseñada para:
     - `HTTPException` 500 para errores internos inesperados.
 8.  Registrar información detallada y errores durante el proceso mediante `logging`.
 
-La función devuelve una `List[QueryResponse]` o lanza una `HTTPException`.
+La función devuelve una lista de diccionarios con la forma de `QueryResponse` o lanza una `HTTPException`.
 """
 
 from bson import ObjectId
 from app.config.db import db 
-from app.models.models_data_mongo import QueryResponse, Gene, Sequence 
-from typing import List, Optional
+from app.models.models_data_mongo import QueryResponse
+from app.services.respuesta_service import validar_respuestas
+from typing import List
 from fastapi import HTTPException
 import logging
 
 logger = logging.getLogger(__name__)
 
-async def obtener_resultados_tabla(query: str) -> List[QueryResponse]:
+MAXIMO_DOCUMENTOS = 10
+PROYECCION_TABLA = {
+    "_id": 0,
+    "primaryAccession": "$tabla.primaryAccession",
+    "proteinDescription": "$tabla.proteinDescription",
+    "genes": "$tabla.genes",
+    "sequence": {
+        "value": "$sequence.value",
+        "length": "$tabla.sequence.length",
+        "molWeight": "$tabla.sequence.molWeight",
+        "crc64": "$tabla.sequence.crc64",
+        "md5": "$tabla.sequence.md5",
+    },
+}
+
+async def obtener_resultados_tabla(query: str) -> List[dict]:
     """
     Realiza una búsqueda en la colección UniProt para la tabla de resultados.
-    Busca en primaryAccession, _id, genes (orderedLocusNames.value y geneName), y sequence.value.
-    Devuelve una lista de objetos QueryResponse o lanza HTTPException.
+    Busca en primaryAccession, _id, los locus de sus genes (tabla.locusNames) y sequence.value.
+    Devuelve los documentos con la forma de QueryResponse o lanza HTTPException.
     """
     logger.info(f"ConsultaTabla: Iniciando obtener_resultados_tabla con query='{query}'")
 
@@ -68,7 +92,7 @@ async def obtener_resultados_tabla(query: str) -> List[QueryResponse]:
         # Construcción de la Query MongoDB
         mongo_query_conditions = [
             {"primaryAccession": {"$regex": query, "$options": "i"}},
-            {"genes.orderedLocusNames.value": {"$regex": query, "$options": "i"}}, 
+            {"tabla.locusNames": {"$regex": query, "$options": "i"}},
             {"sequence.value": {"$regex": query, "$options": "i"}}
         ]
         
@@ -76,33 +100,23 @@ async def obtener_resultados_tabla(query: str) -> List[QueryResponse]:
         if query_object_id:
             mongo_query_conditions.append({"_id": query_object_id})
 
-        query_dict = {"$or": mongo_query_conditions}
+        # Sin `tabla` (documento sin rellenar) no se puede mostrar: se filtra antes del $limit
+        query_dict = {"$or": mongo_query_conditions, "tabla": {"$exists": True}}
         logger.info(f"ConsultaTabla: Query MongoDB a ejecutar: {query_dict}")
 
-        # Proyección (campos a devolver)
-        projection = {
-            "_id": 0, 
-            "primaryAccession": 1,
-            "proteinDescription.submissionNames.fullName.value": 1,
-            "proteinDescription.recommendedName.fullName.value": 1,
-            "genes.orderedLocusNames": 1, 
-            # "genes.geneName": 1, 
-            "sequence.value": 1,
-            "sequence.length": 1,
-            "sequence.molWeight": 1,
-            "sequence.crc64": 1,
-            "sequence.md5": 1
-        }
-
-        logger.debug(f"ConsultaTabla: Proyección MongoDB: {projection}")
+        # Proyección: los campos de la tabla ya vienen aplanados en el subdocumento
+        # `tabla` (lo añade la carga, `Descarga_datos/Uniprot/proyeccion_tabla_uniprot.py`); MongoDB
+        # solo les da la forma de `QueryResponse` y añade la secuencia completa.
+        pipeline = [
+            {"$match": query_dict},
+            {"$limit": MAXIMO_DOCUMENTOS},
+            {"$project": PROYECCION_TABLA},
+        ]
+        logger.debug(f"ConsultaTabla: Pipeline MongoDB: {pipeline}")
 
-    
-        resultados_cursor = collection.find(query_dict, projection)
-        
         # Ejecutar la consulta
-        
-        documentos = await resultados_cursor.to_list(length=10)  
-        logger.info(f"ConsultaTabla: MongoDB devolvió {len(documentos)} documentos crudos para query='{query}'.")
+        documentos = await collection.aggregate(pipeline).to_list(length=MAXIMO_DOCUMENTOS)
+        logger.info(f"ConsultaTabla: MongoDB devolvió {len(documentos)} documentos para query='{query}'.")
 
         # Manejar caso de no documentos encontrados por MongoDB
         
@@ -111,72 +125,22 @@ async def obtener_resultados_tabla(query: str) -> List[QueryResponse]:
             raise HTTPException(status_code=404, detail="No se encontraron datos que coincidan con la consulta.")
         
        
-        # Procesar documentos y convertir a objetos QueryResponse
-        resultados: List[QueryResponse] = []
-        for doc_idx, doc in enumerate(documentos):
-            logger.debug(f"ConsultaTabla: Procesando documento {doc_idx + 1}/{len(documentos)}: {doc.get('primaryAccession', 'N/A')}")
-            
-            # Procesamiento de Genes
-            genes_list: List[Gene] = []
-            raw_genes_data = doc.get("genes", [])
-            if isinstance(raw_genes_data, list):
-                for gene_data in raw_genes_data:
-                    if isinstance(gene_data, dict):
-                        gene_name_val = gene_data.get("geneName", "") 
-                        
-                        ordered_locus_name_str = ""
-                        raw_locus_names_list = gene_data.get("orderedLocusNames")
-                        if isinstance(raw_locus_names_list, list) and raw_locus_names_list:
-                            first_locus_item = raw_locus_names_list[0] 
-                            if isinstance(first_locus_item, dict):
-                                ordered_locus_name_str = first_locus_item.get("value", "")
-                        elif isinstance(raw_locus_names_list, str): 
-                            ordered_locus_name_str = raw_locus_names_list
-                        
-                        genes_list.append(Gene(
-                            geneName=gene_name_val,
-                            orderedLocusNames=ordered_locus_name_str
-                        ))
-                        
-            # Procesamiento de ProteinDescription
-            proteinDescription_str: Optional[str] = None 
-            raw_protein_desc_data = doc.get("proteinDescription", {})
-            if isinstance(raw_protein_desc_data, dict):
-                submission_names_list = raw_protein_desc_data.get("submissionNames", [])
-                if submission_names_list and isinstance(submission_names_list[0], dict):
-                    full_name_data = submission_names_list[0].get("fullName", {})
-                    protein_desc_val_from_db = full_name_data.get("value")
-                    proteinDescription_str = protein_desc_val_from_db
-
-                if proteinDescription_str is None: 
-                    recommended_name_obj = raw_protein_desc_data.get("recommendedName", {})
-                    if isinstance(recommended_name_obj, dict):
-                        full_name_data_rec = recommended_name_obj.get("fullName", {})
-                        if isinstance(full_name_data_rec, dict):
-                            proteinDescription_str = full_name_data_rec.get("value")
-            
-            # Procesamiento de Sequence
-            raw_sequence_data = doc.get("sequence", {})
-            sequence_obj = Sequence(
-                value=raw_sequence_data.get("value", ""),
-                length=raw_sequence_data.get("length", 0),
-                molWeight=raw_sequence_data.get("molWeight"),
-                crc64=raw_sequence_data.get("crc64"),       
-                md5=raw_sequence_data.get("md5")          
-            )            
-    
-
-            # Crear el objeto QueryResponse
-            try:
-                resultado_obj = QueryResponse(
-                    primaryAccession=doc.get("primaryAccession"), 
-                    proteinDescription=proteinDescription_str,
-                    genes=genes_list,
-                    sequence=sequence_obj
-                )
-                resultados.append(resultado_obj)
-            except Exception as pydantic_exc: 
-                logger.error(f"ConsultaTabla: Error al crear QueryResponse para doc {doc.get('primaryAccession', 'N/A')}: {pydantic_exc}. Documento parcial: {str(doc)[:200]}", exc_info=True)
+        # Los documentos ya tienen la forma de QueryResponse y se devuelven sin convertir
+        validar = validar_respuestas()
+        resultados: List[dict] = []
+        for doc in documentos:
+            if "genes" not in doc:
+                # Proyección `tabla` incompleta (se rehace con
+                # `python -m Uniprot.proyeccion_tabla_uniprot --todas`)
+                logger.error(f"ConsultaTabla: Documento sin 'tabla.genes' (secuencia {str(doc.get('sequence', {}).get('value', 'N/A'))[:20]}...). Se descarta.")
+                continue
+            if validar:
+                try:
+                    QueryResponse.model_validate(doc)
+                except Exception as pydantic_exc:
+                    logger.error(f"ConsultaTabla: Error al validar QueryResponse para doc {doc.get('primaryAccession', 'N/A')}: {pydantic_exc}. Documento parcial: {str(doc)[:200]}")
+                    continue
+            resultados.append(doc)
                 
         # Manejar caso de no resultados después del procesamiento
         if not resultados:
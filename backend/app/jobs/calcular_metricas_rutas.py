@@ -0,0 +1,104 @@
+# backend/app/jobs/calcular_metricas_rutas.py
+
+'''
+# Trabajo offline que precalcula métricas topológicas de todas las rutas KEGG
+# (ver `app.services.kegg_metricas_service`) y las guarda en dos colecciones:
+#
+#   - `COLLECTION_KEGG_METRICAS_RUTAS`: un documento por ruta con el resumen
+#     (nodos, aristas, componentes, diámetro) y las métricas de sus genes.
+#   - `COLLECTION_KEGG_METRICAS_GENES`: un documento por gen con sus métricas
+#     en cada ruta en la que aparece.
+#
+# Ambas colecciones se sustituyen enteras al final (colección temporal +
+# renombrado, `app.jobs.reemplazo_colecciones`): la API nunca las ve vacías y
+# las rutas que ya no existen pierden sus métricas. Después se incrementa la
+# versión del dataset: las respuestas con `include_metrics` incluyen las
+# métricas, y sus ETag y claves de caché dependen de esa versión.
+#
+# Las rutas se procesan en paralelo con un `ProcessPoolExecutor`: el parseo de
+# KGML y la intermediación son CPU puro, así que el paralelismo entre procesos
+# escala con el número de núcleos. Los documentos (con el KGML) se leen del
+# cursor a medida que hay hueco en el pool (`app.jobs.ejecucion_acotada`), no
+# todos de golpe.
+#
+# Se ejecuta tras la ingesta de KGML, desde el directorio `backend`:
+#     python -m app.jobs.calcular_metricas_rutas [--procesos N]
+'''
+
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+from app.config.db import (
+    get_database_sincrona, collection_kegg_rutas_hgml,
+    collection_kegg_metricas_rutas, collection_kegg_metricas_genes
+)
+from app.services.kegg_service import parse_kgml_to_graph
+from app.services.kegg_kgml_comprimido_service import kgml_de_documento
+from app.services.kegg_metricas_service import calcular_metricas_ruta, metricas_por_gen, MetricasRuta
+from app.services.version_dataset_service import registrar_version
+from app.jobs.reemplazo_colecciones import reemplazar_coleccion
+from app.jobs.ejecucion_acotada import PENDIENTES_POR_PROCESO, mapear_acotado
+
+
+def _procesar_ruta(documento: dict) -> Tuple[str, Optional[MetricasRuta], Optional[str]]:
+    """Parsea una ruta y calcula sus métricas (se ejecuta en un proceso hijo)."""
+    pathway_id = documento["_id"]
+    # El KGML viaja comprimido al proceso hijo y se descomprime allí
+    grafo = parse_kgml_to_graph(kgml_de_documento(documento), pathway_id)
+    if grafo["error"]:
+        return pathway_id, None, grafo["error"]
+    return pathway_id, calcular_metricas_ruta(grafo, pathway_id), None
+
+
+def calcular_metricas(db, procesos: Optional[int] = None) -> List[MetricasRuta]:
+    """Calcula las métricas de todas las rutas con KGML en paralelo."""
+    coleccion = db[collection_kegg_rutas_hgml]
+    documentos = coleccion.find({}, {"kgml_data": 1, "kgml_codec": 1})
+    procesos = procesos or os.cpu_count() or 1
+    print(f"Calculando métricas de {coleccion.count_documents({})} rutas con {procesos} procesos...")
+
+    resultados: List[MetricasRuta] = []
+    with ProcessPoolExecutor(max_workers=procesos) as executor:
+        tareas = ((documento,) for documento in documentos)
+        for pathway_id, metricas, error in mapear_acotado(executor, _procesar_ruta, tareas,
+                                                          procesos * PENDIENTES_POR_PROCESO):
+            if error:
+                print(f"Ruta {pathway_id} omitida: {error}")
+                continue
+            resultados.append(metricas)
+    return resultados
+
+
+def guardar_metricas(db, metricas_rutas: List[MetricasRuta]) -> int:
+    """
+    Sustituye las métricas por ruta y por gen por las recién calculadas y
+    devuelve la nueva versión del dataset.
+    """
+
+    rutas_por_gen: Dict[str, List[dict]] = {}
+    for metricas in metricas_rutas:
+        for gen, entradas in metricas_por_gen(metricas).items():
+            rutas_por_gen.setdefault(gen, []).extend(entradas)
+
+    reemplazar_coleccion(db, collection_kegg_metricas_rutas, metricas_rutas)
+    reemplazar_coleccion(db, collection_kegg_metricas_genes,
+                         ({"_id": gen, "rutas": rutas} for gen, rutas in rutas_por_gen.items()))
+    version = registrar_version(db, collection_kegg_metricas_rutas, documentos=len(metricas_rutas),
+                                origen="calcular_metricas_rutas")
+    print(f"Métricas guardadas: {len(metricas_rutas)} rutas, {len(rutas_por_gen)} genes. "
+          f"Versión del dataset: {version}.")
+    return version
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precalcula métricas topológicas de las rutas KEGG.")
+    parser.add_argument("--procesos", type=int, default=None, help="Número de procesos (def: núcleos disponibles)")
+    args = parser.parse_args()
+
+    db = get_database_sincrona()
+    guardar_metricas(db, calcular_metricas(db, args.procesos))
+
+
+if __name__ == "__main__":
+    main()
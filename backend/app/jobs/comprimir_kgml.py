@@ -0,0 +1,93 @@
+# backend/app/jobs/comprimir_kgml.py
+
+'''
+# Migración que convierte el KGML de los documentos existentes de
+# 'kegg_rutas_graficas' al formato comprimido
+# (`app.services.kegg_kgml_comprimido_service`): `kgml_data` pasa de texto a
+# binario zlib y se añade el marcador `kgml_codec`.
+#
+# Solo se tocan los documentos cuyo `kgml_data` sigue siendo texto, así que la
+# migración se puede relanzar sin riesgo (p. ej. si se interrumpe). Los
+# documentos se actualizan en lotes `bulk_write(ordered=False)`.
+#
+# El contenido de las rutas no cambia, así que no hace falta incrementar la
+# versión del dataset ni invalidar la caché de grafos. Con `--descomprimir` se
+# deshace la conversión.
+#
+# Se ejecuta desde el directorio `backend`:
+#     python -m app.jobs.comprimir_kgml [--descomprimir] [--lote N]
+'''
+
+import argparse
+from typing import Dict
+from bson.binary import Binary
+from pymongo import UpdateOne
+from app.config.db import get_database_sincrona, collection_kegg_rutas_hgml
+from app.services.kegg_kgml_comprimido_service import comprimir_kgml, kgml_de_documento
+
+TAMANO_LOTE = 200
+
+
+def _enviar(coleccion, operaciones) -> None:
+    if operaciones:
+        coleccion.bulk_write(operaciones, ordered=False)
+        operaciones.clear()
+
+
+def comprimir_documentos(db, tamano_lote: int = TAMANO_LOTE) -> Dict[str, int]:
+    """Comprime el KGML de los documentos que aún lo guardan como texto."""
+    coleccion = db[collection_kegg_rutas_hgml]
+    resumen = {"documentos": 0, "bytes_antes": 0, "bytes_despues": 0}
+    operaciones = []
+    for documento in coleccion.find({"kgml_data": {"$type": "string"}}, {"kgml_data": 1}):
+        datos, codec = comprimir_kgml(documento["kgml_data"])
+        operaciones.append(UpdateOne(
+            {"_id": documento["_id"]},
+            {"$set": {"kgml_data": Binary(datos), "kgml_codec": codec}}
+        ))
+        resumen["documentos"] += 1
+        resumen["bytes_antes"] += len(documento["kgml_data"].encode("utf-8"))
+        resumen["bytes_despues"] += len(datos)
+        if len(operaciones) >= tamano_lote:
+            _enviar(coleccion, operaciones)
+    _enviar(coleccion, operaciones)
+    return resumen
+
+
+def descomprimir_documentos(db, tamano_lote: int = TAMANO_LOTE) -> Dict[str, int]:
+    """Vuelve a guardar como texto el KGML de los documentos comprimidos."""
+    coleccion = db[collection_kegg_rutas_hgml]
+    resumen = {"documentos": 0}
+    operaciones = []
+    for documento in coleccion.find({"kgml_data": {"$type": "binData"}}, {"kgml_data": 1, "kgml_codec": 1}):
+        operaciones.append(UpdateOne(
+            {"_id": documento["_id"]},
+            {"$set": {"kgml_data": kgml_de_documento(documento)}, "$unset": {"kgml_codec": ""}}
+        ))
+        resumen["documentos"] += 1
+        if len(operaciones) >= tamano_lote:
+            _enviar(coleccion, operaciones)
+    _enviar(coleccion, operaciones)
+    return resumen
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Comprime (o descomprime) el KGML guardado en MongoDB.")
+    parser.add_argument("--descomprimir", action="store_true", help="Deshace la migración.")
+    parser.add_argument("--lote", type=int, default=TAMANO_LOTE, help="Documentos por bulk_write.")
+    args = parser.parse_args()
+
+    db = get_database_sincrona()
+    if args.descomprimir:
+        print(f"KGML descomprimido en {descomprimir_documentos(db, args.lote)['documentos']} documentos.")
+        return
+    resumen = comprimir_documentos(db, args.lote)
+    if resumen["documentos"]:
+        print(f"KGML comprimido en {resumen['documentos']} documentos: "
+              f"{resumen['bytes_antes'] / 1024 / 1024:.1f} MiB -> {resumen['bytes_despues'] / 1024 / 1024:.1f} MiB.")
+    else:
+        print("No hay documentos con el KGML sin comprimir.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+# backend/app/jobs/construir_indice_genes_nodos.py
+
+'''
+# Trabajo offline que construye el índice gen -> (ruta, nodo, x, y) a partir
+# de los documentos KGML de la colección 'kegg_rutas_graficas'.
+#
+# En KGML un mismo `<entry>` puede agrupar varios genes (ej. "bce:BC5335 bce:BC5336")
+# y un gen aparece en muchas rutas, por lo que sin este índice el frontend
+# tendría que descargar y recorrer cada grafo para localizar sus genes.
+#
+# Funcionamiento:
+#   1. Recorre todas las rutas con KGML y las parsea con `parse_kgml_to_graph`,
+#      de modo que los `node_id` coinciden con los que devuelve el endpoint
+#      de grafos.
+#   2. Agrupa los nodos por gen con `extraer_nodos_por_gen`.
+#   3. Sustituye la colección del índice (`COLLECTION_KEGG_GENES_NODOS`) por una
+#      con un documento por gen: {"_id": "bce:BC5335", "nodos": [...]}. Se
+#      escribe en una colección temporal que se renombra al final
+#      (`app.jobs.reemplazo_colecciones`), así que la API nunca ve el índice
+#      vacío o a medias.
+#
+# Se ejecuta tras la ingesta de KGML, desde el directorio `backend`:
+#     python -m app.jobs.construir_indice_genes_nodos
+'''
+
+from typing import Dict, List
+from app.config.db import get_database_sincrona, collection_kegg_rutas_hgml, collection_kegg_genes_nodos
+from app.services.kegg_service import parse_kgml_to_graph, extraer_nodos_por_gen, NodoDeGen
+from app.services.kegg_kgml_comprimido_service import kgml_de_documento
+from app.jobs.reemplazo_colecciones import reemplazar_coleccion
+
+
+def construir_indice(db) -> Dict[str, List[NodoDeGen]]:
+    """Parsea todas las rutas y devuelve el índice gen -> nodos en memoria."""
+    indice: Dict[str, List[NodoDeGen]] = {}
+    rutas_procesadas = 0
+
+    for documento in db[collection_kegg_rutas_hgml].find({}, {"kgml_data": 1, "kgml_codec": 1}):
+        grafo = parse_kgml_to_graph(kgml_de_documento(documento), documento["_id"])
+        if grafo["error"]:
+            print(f"Ruta {documento['_id']} omitida: {grafo['error']}")
+            continue
+        for gen, nodos in extraer_nodos_por_gen(grafo, documento["_id"]).items():
+            indice.setdefault(gen, []).extend(nodos)
+        rutas_procesadas += 1
+
+    print(f"Rutas procesadas: {rutas_procesadas}. Genes indexados: {len(indice)}")
+    return indice
+
+
+def guardar_indice(db, indice: Dict[str, List[NodoDeGen]]) -> None:
+    """Sustituye (de forma atómica) el contenido de la colección del índice por el nuevo índice."""
+    total = reemplazar_coleccion(
+        db, collection_kegg_genes_nodos,
+        ({"_id": gen, "nodos": nodos} for gen, nodos in indice.items()),
+        indices=["nodos.pathway_id"]
+    )
+    print(f"Índice guardado en '{collection_kegg_genes_nodos}' ({total} documentos).")
+
+
+def main():
+    db = get_database_sincrona()
+    guardar_indice(db, construir_indice(db))
+
+
+if __name__ == "__main__":
+    main()
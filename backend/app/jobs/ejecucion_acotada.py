@@ -0,0 +1,35 @@
+# backend/app/jobs/ejecucion_acotada.py
+
+'''
+# Reparto acotado de tareas a un pool de procesos para los trabajos offline
+# que recorren todas las rutas KEGG (cálculo de métricas, exportación de
+# grafos).
+#
+# `mapear_acotado(executor, funcion, argumentos, maximo)` lee `argumentos`
+# (normalmente un generador sobre el cursor de MongoDB) a medida que hay hueco
+# en el pool, así que en memoria solo están los documentos de las tareas
+# pendientes y no la colección entera. El límite habitual es
+# `PENDIENTES_POR_PROCESO` tareas por proceso.
+'''
+
+from concurrent.futures import FIRST_COMPLETED, as_completed, wait
+from typing import Callable, Iterable, Iterator
+
+PENDIENTES_POR_PROCESO = 4
+
+
+def mapear_acotado(executor, funcion: Callable, argumentos: Iterable[tuple], maximo: int) -> Iterator:
+    """
+    Como `executor.map`, pero consumiendo `argumentos` a medida que terminan las
+    tareas: nunca hay más de `maximo` enviadas sin terminar. Los resultados se
+    devuelven en el orden en que terminan.
+    """
+    pendientes = set()
+    for args in argumentos:
+        if len(pendientes) >= maximo:
+            terminadas, pendientes = wait(pendientes, return_when=FIRST_COMPLETED)
+            for futuro in terminadas:
+                yield futuro.result()
+        pendientes.add(executor.submit(funcion, *args))
+    for futuro in as_completed(pendientes):
+        yield futuro.result()
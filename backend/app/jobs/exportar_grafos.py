@@ -0,0 +1,136 @@
+# backend/app/jobs/exportar_grafos.py
+
+'''
+# Trabajo offline que exporta los grafos de todas las rutas KEGG a archivos
+# estáticos comprimidos, versionados por la versión del dataset, con su
+# manifiesto (formato en `app.services.exportacion_grafos_service`).
+#
+# Cada ruta se parsea y se le aplica el layout una sola vez; después se
+# codifican su grafo completo y las proyecciones pedidas con `--proyeccion`
+# (mismos parámetros que el endpoint, ej:
+# `--proyeccion "node_types=gene&collapse_compounds=true"`). Con `--metricas`
+# los archivos incluyen las métricas precalculadas
+# (`app.jobs.calcular_metricas_rutas`), como `include_metrics=true`.
+#
+# Las rutas se procesan en paralelo con un `ProcessPoolExecutor`, como en el
+# cálculo de métricas. Los documentos (con el KGML completo) se leen del cursor
+# a medida que hay hueco en el pool (`app.jobs.ejecucion_acotada`), no todos
+# de golpe. Los archivos se escriben en `v<version>/` y el
+# manifiesto raíz se sustituye al final de forma atómica, así que los clientes
+# pasan de una versión a otra sin ver exportaciones a medias. Se conservan las
+# `--conservar` versiones más recientes (def: 2) para los clientes que aún usen
+# el manifiesto anterior.
+#
+# Se ejecuta tras la ingesta de KGML (y el cálculo de métricas), desde el
+# directorio `backend`:
+#     python -m app.jobs.exportar_grafos [--salida DIR] [--proyeccion P ...]
+#         [--metricas] [--procesos N] [--conservar N]
+'''
+
+import argparse
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+import orjson
+from app.config.db import get_database_sincrona, collection_kegg_rutas_hgml, collection_kegg_metricas_rutas
+from app.services.kegg_proyecciones_service import ProyeccionGrafo
+from app.services.version_dataset_service import leer_version_dataset
+from app.services.exportacion_grafos_service import (
+    DIRECTORIO_EXPORTACION, NOMBRE_MANIFIESTO, proyeccion_desde_texto, renderizar_ruta
+)
+from app.jobs.ejecucion_acotada import PENDIENTES_POR_PROCESO, mapear_acotado
+
+CONSERVAR_VERSIONES = 2
+
+
+def _escribir_atomico(ruta: str, datos: bytes) -> None:
+    temporal = f"{ruta}.tmp"
+    with open(temporal, "wb") as f:
+        f.write(datos)
+    os.replace(temporal, ruta)
+
+
+def exportar_grafos(db, salida: str, proyecciones: List[ProyeccionGrafo], incluir_metricas: bool = False,
+                    procesos: Optional[int] = None) -> dict:
+    """Exporta todas las rutas con KGML y devuelve el manifiesto escrito."""
+    version = leer_version_dataset(db)
+    carpeta_version = f"v{version}"
+    os.makedirs(os.path.join(salida, carpeta_version), exist_ok=True)
+
+    metricas: Dict[str, dict] = {}
+    if incluir_metricas:
+        metricas = {m.pop("_id"): m for m in db[collection_kegg_metricas_rutas].find({})}
+
+    documentos = db[collection_kegg_rutas_hgml].find({"kgml_data": {"$ne": None}})
+    tareas = ((documento, proyecciones, metricas.get(documento["_id"])) for documento in documentos)
+    procesos = procesos or os.cpu_count() or 1
+    print(f"Exportando grafos (versión {version}) con {procesos} procesos...")
+
+    rutas: Dict[str, dict] = {}
+    with ProcessPoolExecutor(max_workers=procesos) as executor:
+        resultados = mapear_acotado(executor, renderizar_ruta, tareas, procesos * PENDIENTES_POR_PROCESO)
+        for pathway_id, codificados, resumen, error in resultados:
+            if error:
+                print(f"Ruta {pathway_id} omitida: {error}")
+                continue
+            archivos = {}
+            for clave, (nombre, bytes_json, comprimido) in codificados.items():
+                ruta_archivo = os.path.join(salida, carpeta_version, nombre)
+                if not os.path.exists(ruta_archivo):  # El nombre incluye el hash del contenido
+                    _escribir_atomico(ruta_archivo, comprimido)
+                archivos[clave] = {"archivo": f"{carpeta_version}/{nombre}", "bytes": len(comprimido),
+                                   "bytes_json": bytes_json}
+            entrada = dict(resumen, **archivos.pop(""))
+            entrada["proyecciones"] = archivos
+            rutas[pathway_id] = entrada
+
+    manifiesto = {
+        "version": version,
+        "generado": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "metricas": incluir_metricas,
+        "proyecciones": [proyeccion.clave() for proyeccion in proyecciones],
+        "rutas": dict(sorted(rutas.items())),
+    }
+    datos = orjson.dumps(manifiesto)
+    _escribir_atomico(os.path.join(salida, carpeta_version, NOMBRE_MANIFIESTO), datos)
+    _escribir_atomico(os.path.join(salida, NOMBRE_MANIFIESTO), datos)
+    return manifiesto
+
+
+def limpiar_versiones(salida: str, conservar: int = CONSERVAR_VERSIONES) -> List[str]:
+    """Borra las carpetas `v<n>` más antiguas y conserva las `conservar` más recientes."""
+    versiones = sorted(
+        (int(nombre[1:]), nombre) for nombre in os.listdir(salida)
+        if nombre.startswith("v") and nombre[1:].isdigit() and os.path.isdir(os.path.join(salida, nombre))
+    )
+    borradas = [nombre for _, nombre in versiones[:-conservar]] if conservar > 0 else []
+    for nombre in borradas:
+        shutil.rmtree(os.path.join(salida, nombre))
+    return borradas
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Exporta los grafos de las rutas KEGG a archivos estáticos.")
+    parser.add_argument("--salida", default=DIRECTORIO_EXPORTACION or "exportacion_grafos",
+                        help="Directorio de la exportación (def: EXPORTACION_GRAFOS_DIR).")
+    parser.add_argument("--proyeccion", action="append", default=[], type=proyeccion_desde_texto,
+                        help="Proyección a exportar, ej: 'node_types=gene&collapse_compounds=true' (repetible).")
+    parser.add_argument("--metricas", action="store_true", help="Incluir las métricas precalculadas.")
+    parser.add_argument("--procesos", type=int, default=None, help="Número de procesos (def: núcleos disponibles)")
+    parser.add_argument("--conservar", type=int, default=CONSERVAR_VERSIONES, help="Versiones a conservar.")
+    args = parser.parse_args()
+
+    manifiesto = exportar_grafos(get_database_sincrona(), args.salida, args.proyeccion, args.metricas, args.procesos)
+    total = sum(ruta["bytes"] + sum(p["bytes"] for p in ruta["proyecciones"].values())
+                for ruta in manifiesto["rutas"].values())
+    print(f"Exportadas {len(manifiesto['rutas'])} rutas (versión {manifiesto['version']}, "
+          f"{total / 1024 / 1024:.1f} MiB comprimidos) en {args.salida}.")
+    borradas = limpiar_versiones(args.salida, args.conservar)
+    if borradas:
+        print(f"Versiones antiguas borradas: {', '.join(borradas)}")
+
+
+if __name__ == "__main__":
+    main()
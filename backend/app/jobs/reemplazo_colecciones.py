@@ -0,0 +1,45 @@
+# backend/app/jobs/reemplazo_colecciones.py
+
+'''
+# Sustitución atómica del contenido de una colección calculada por un trabajo
+# offline (índice gen -> nodos, métricas...).
+#
+# `reemplazar_coleccion(db, nombre, documentos, indices)` escribe los
+# documentos en una colección temporal (`<nombre>_nueva`), crea sus índices y
+# la renombra sobre la colección final con `dropTarget=True`. Los lectores ven
+# siempre la colección anterior completa o la nueva completa (nunca una
+# colección vacía o a medias), un fallo a mitad deja intacta la anterior y los
+# documentos que ya no existen (p. ej. rutas eliminadas) desaparecen.
+'''
+
+from typing import Iterable, Sequence
+
+SUFIJO_TEMPORAL = "_nueva"
+TAMANO_LOTE_INSERCION = 1000
+
+
+def reemplazar_coleccion(db, nombre: str, documentos: Iterable[dict], indices: Sequence[str] = (),
+                         tamano_lote: int = TAMANO_LOTE_INSERCION) -> int:
+    """Sustituye el contenido de `nombre` por `documentos`. Devuelve cuántos se escribieron."""
+    temporal = db[nombre + SUFIJO_TEMPORAL]
+    temporal.drop()  # Restos de una ejecución interrumpida
+
+    lote, total = [], 0
+    for documento in documentos:
+        lote.append(documento)
+        if len(lote) >= tamano_lote:
+            temporal.insert_many(lote, ordered=False)
+            total += len(lote)
+            lote = []
+    if lote:
+        temporal.insert_many(lote, ordered=False)
+        total += len(lote)
+
+    if total == 0:
+        # Sin documentos no se crea la temporal; la colección final queda vacía
+        db[nombre].delete_many({})
+        return 0
+    for campo in indices:
+        temporal.create_index(campo)
+    temporal.rename(nombre, dropTarget=True)
+    return total
@@ -1,6 +1,7 @@
 from fastapi import FastAPI, Depends
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import JSONResponse, ORJSONResponse
 from dotenv import load_dotenv
 from app.config.db import db, get_database
 #get_database, get_collection_dependency # Importamos la conexión a MongoDB
@@ -18,15 +19,20 @@ from app.utils.transformador import transformar_documento
 #from app.consultas.consulta4 import obtener_resultados # Esta funciona pero le faltan algunos campos
 from app.models.models_data_mongo import QueryResponse  
 from app.services.kegg_service import obtener_ruta_metabolica
+from app.services.exportacion_grafos_service import ExportacionGrafosStatic, DIRECTORIO_EXPORTACION
 
 load_dotenv()  # Cargar variables de entorno desde .env
 
-app = FastAPI()
+app = FastAPI(default_response_class=ORJSONResponse)  # Serialización con orjson
 
 app.include_router(uniprot_router, prefix="/api", tags=["Uniprot"])
 app.include_router(kegg_router, prefix="/api/kegg")
 app.include_router(kegg_graph_router, prefix="/api/kegg")
 
+# Exportación estática de los grafos (python -m app.jobs.exportar_grafos), si se ha generado
+if DIRECTORIO_EXPORTACION:
+    app.mount("/api/kegg/pathways_graph/export", ExportacionGrafosStatic(directory=DIRECTORIO_EXPORTACION, check_dir=False), name="exportacion_grafos")
+
 # Configurar CORS
 app.add_middleware(
     CORSMiddleware,
@@ -36,6 +42,10 @@ app.add_middleware(
     allow_headers=["*"],  # Permitir todos los headers
 )
 
+# Compresión gzip según Accept-Encoding (los grafos llegan ya comprimidos desde
+# la caché, ver app.services.compresion_service, y el middleware no los toca)
+app.add_middleware(GZipMiddleware, minimum_size=1000, compresslevel=6)
+
 # Obtener las variables de entorno
 mongo_uri = os.getenv("MONGO_URI")
 db_name = os.getenv("DB_BACILLUS_CEREUS")
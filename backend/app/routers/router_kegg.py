@@ -17,6 +17,8 @@
 #       - Llama a la función de servicio `obtener_ruta_metabolica` (de
 #         `app.services.kegg_service`) para realizar la lógica de obtención
 #         de datos.
+#       - Añade en `metricas` las métricas de centralidad precalculadas del gen
+#         en cada ruta (`app.services.kegg_metricas_service`).
 #       - Devuelve los datos directamente como `JSONResponse` si se encuentran.
 #       - Maneja errores y casos de "no encontrado" devolviendo un objeto
 #         JSON con una clave "error".
@@ -29,6 +31,7 @@ from fastapi import APIRouter, Depends
 from app.config.db import get_database
 from pydantic import BaseModel
 from app.services.kegg_service import obtener_ruta_metabolica
+from app.services.kegg_metricas_service import obtener_metricas_gen
 from fastapi.responses import JSONResponse
 from motor.motor_asyncio import AsyncIOMotorDatabase
 
@@ -45,6 +48,7 @@ async def get_kegg_route(entry: str, db: AsyncIOMotorDatabase = Depends(get_data
         ruta_metabolica =  await obtener_ruta_metabolica(entry, db)
         print(f"Resultado: {ruta_metabolica}")
         if ruta_metabolica:
+            ruta_metabolica["metricas"] = await obtener_metricas_gen(ruta_metabolica.get("entry") or entry, db)
             return JSONResponse(content=ruta_metabolica)
         return {"error": "Ruta metabólica no encontrada"}
     except Exception as e:
@@ -10,32 +10,79 @@
 #     1. Recupera un documento de ruta metabólica (que contiene datos KGML)
 #        desde una base de datos MongoDB utilizando un `pathway_map_id`
 #        (ej. "bce00010").
-#     2. Utiliza un servicio (`app.services.kegg_service.parse_kgml_to_graph`)
+#     2. Utiliza un servicio (`app.services.kegg_grafo_service.obtener_grafo_ruta`)
 #        para parsear la cadena KGML cruda en un formato de grafo estructurado
-#        (nodos y aristas).
+#        (nodos y aristas), completar en el servidor las coordenadas que falten
+#        y cachear el resultado por ruta.
 #     3. Devuelve estos datos del grafo parseado junto con metadatos relevantes
 #        de la ruta (nombre, código de organismo, URL de imagen).
+#     4. Admite proyecciones calculadas y cacheadas en el servidor: filtro por
+#        tipo de nodo (`node_types=gene,compound`), colapso de cadenas
+#        gen -> compuesto -> gen en aristas gen -> gen (`collapse_compounds`)
+#        y eliminación de mapas huérfanos (`drop_orphan_maps`).
+#     5. Con `include_metrics=true`, añade las métricas topológicas precalculadas
+#        por `app.jobs.calcular_metricas_rutas` (resumen de la ruta y grado,
+#        intermediación y puntos de articulación de los nodos de genes).
+#     6. Según la cabecera `Accept`, devuelve el grafo en JSON normal o en una
+#        codificación compacta (columnar JSON o binaria, ver
+#        `app.services.kegg_codificacion_service`) sin pasar por Pydantic.
+#     7. En JSON normal, el grafo (que ya tiene la forma de la respuesta) no
+#        pasa por Pydantic: se envía en streaming a partir de su codificación
+#        JSON en la caché (`obtener_grafo_ruta_json` y `a_json_por_bloques`),
+#        primero los metadatos y las métricas y después nodos y aristas por
+#        bloques, sin decodificarlo ni volver a codificarlo. Con
+#        `VALIDAR_RESPUESTAS` se valida con el modelo y se envía con
+#        `respuesta_json` (`app.services.respuesta_service`).
+#     8. Admite peticiones condicionales (`app.services.cache_http_service`):
+#        el ETag depende de la versión del dataset, la ruta, los parámetros y
+#        `Accept`, y si coincide con `If-None-Match` se responde 304 sin
+#        construir el grafo. Las respuestas se pueden cachear un día
+#        (`Cache-Control`).
+#     9. Si el cliente admite gzip, el JSON normal se envía comprimido desde la
+#        caché de respuestas comprimidas (`app.services.compresion_service`):
+#        cada grafo se comprime una sola vez por versión del dataset.
+#   - Define un endpoint (`POST /pathways_graph/highlight`) que, dada una lista
+#     de genes, devuelve por cada ruta los nodos (y coordenadas) en los que
+#     aparecen, usando el índice gen -> nodos construido en la ingesta
+#     (`app.jobs.construir_indice_genes_nodos`). También admite accesiones de
+#     UniProt, que se traducen a genes de KEGG con la relación KEGG <-> UniProt.
 #
 # Modelos Pydantic:
 #   - `GraphNode`, `GraphEdge`: Definen la estructura de los nodos y aristas
 #     del grafo para la respuesta.
 #   - `ParsedPathwayGraphResponse`: Define el esquema completo de la respuesta JSON,
 #     incluyendo metadatos de la ruta y los componentes del grafo.
+#   - `PathwayMetrics`: Métricas topológicas opcionales de la ruta.
+#   - `HighlightRequest`, `HighlightResponse`: Petición y respuesta del
+#     endpoint de resaltado de genes.
 #
 # Dependencias:
 #   - Conexión a la base de datos MongoDB (a través de `app.config.db.get_database`).
-#   - Servicio de parseo de KGML (`app.services.kegg_service`).
+#   - Servicios de parseo, layout y caché de KGML (`app.services.kegg_grafo_service`).
 #
 # El router utiliza el prefijo "/pathways_graph" y está etiquetado como
 # "KEGG Pathway Graphs" para la documentación OpenAPI.
 '''
 
-from fastapi import APIRouter, HTTPException, Depends, Path as FastApiPath
+from fastapi import APIRouter, HTTPException, Depends, Path as FastApiPath, Query, Request
+from fastapi.responses import Response, StreamingResponse
+import orjson
 from motor.motor_asyncio import AsyncIOMotorDatabase # Para MongoDB asincrono
 from app.config.db import get_database # Para obtener la conexion a la DB
 from pydantic import BaseModel, Field
-from typing import List, Optional, Any
-from app.services.kegg_service import parse_kgml_to_graph, KgmlNode, KgmlEdge
+from typing import Dict, List, Optional, Any
+from app.services.kegg_service import obtener_resaltados_por_ruta
+from app.services.kegg_grafo_service import obtener_grafo_ruta, obtener_grafo_ruta_json
+from app.services.kegg_proyecciones_service import crear_proyeccion
+from app.services.kegg_codificacion_service import (
+    elegir_codificacion, a_columnar, a_binario, a_json_por_bloques, MEDIA_TYPE_COLUMNAR
+)
+from app.services.kegg_metricas_service import obtener_metricas_ruta
+from app.services.respuesta_service import respuesta_json, validar_respuestas
+from app.services.cache_http_service import cache_http
+from app.services.compresion_service import acepta_gzip, respuesta_gzip_cacheada
+
+MAX_GENES_RESALTADO = 5000
 
 
 kegg_graph_router = APIRouter(
@@ -59,6 +106,22 @@ class GraphEdge(BaseModel): # Equivalente a KgmlEdge pero para la respuesta Pyda
     label: Optional[str] = None
     
 
+class PathwayMetricsSummary(BaseModel):
+    num_nodos: int
+    num_aristas: int
+    num_componentes: int
+    diametro: int
+
+class NodeMetrics(BaseModel):
+    node_id: str
+    grado: int
+    intermediacion: float
+    punto_articulacion: bool
+
+class PathwayMetrics(BaseModel):
+    resumen: PathwayMetricsSummary
+    nodos: List[NodeMetrics]
+
     
 class ParsedPathwayGraphResponse(BaseModel):
     # El _id del documento original de MongoDB, que es el pathway_map_id
@@ -74,67 +137,104 @@ class ParsedPathwayGraphResponse(BaseModel):
     
     nodes: List[GraphNode]
     edges: List[GraphEdge]
+    metrics: Optional[PathwayMetrics] = None # Solo con include_metrics=true
 
     class Config:
         populate_by_name = True # Permite usar alias en Field
 
 
-# --- Lógica de obtención de datos de la BD (dentro del router o en servicio) ---
-async def get_pathway_document_from_db(pathway_id: str, db: AsyncIOMotorDatabase) -> Optional[dict]:
-    """
-    Obtiene el documento completo de una ruta desde la colección 'kegg_rutas_graficas'.
-    Este documento debe contener el campo 'kgml_data'.
-    """
-    # Asegúrate de que 'kegg_rutas_graficas' es el nombre correcto de tu colección
-    # donde guardas el KGML y otros metadatos de la ruta.
-    collection_name = "kegg_rutas_graficas" 
-    pathway_document = await db[collection_name].find_one({"_id": pathway_id})
-    return pathway_document
+class HighlightRequest(BaseModel):
+    genes: List[str] # IDs de genes, ej: "BC_5335", "BC5335" o "bce:BC5335", o accesiones de UniProt ("Q81JF6")
+
+class HighlightNode(BaseModel):
+    gene: str # El gen tal y como se pidió
+    node_id: str # ID del nodo en el grafo (puede agrupar varios genes)
+    x: Optional[int] = None
+    y: Optional[int] = None
+
+class PathwayHighlight(BaseModel):
+    pathwayId: str
+    nodes: List[HighlightNode]
+
+class HighlightResponse(BaseModel):
+    pathways: List[PathwayHighlight]
+    genes_no_encontrados: List[str]
+
 
-   
 @kegg_graph_router.get("/pathways_graph/{pathway_map_id}", response_model=ParsedPathwayGraphResponse)
 async def get_pathway_graph_with_parsed_kgml_endpoint(
+    request: Request,
     pathway_map_id: str = FastApiPath(..., description="ID del mapa de ruta KEGG, ej: bce00010"), 
-    db: AsyncIOMotorDatabase = Depends(get_database)
+    include_metrics: bool = Query(False, description="Incluir métricas topológicas precalculadas"),
+    node_types: Optional[str] = Query(None, description="Tipos de nodo a conservar separados por comas, ej: gene,compound"),
+    collapse_compounds: bool = Query(False, description="Sustituir gen -> compuesto -> gen por aristas gen -> gen"),
+    drop_orphan_maps: bool = Query(False, description="Eliminar nodos 'map' sin aristas"),
+    db: AsyncIOMotorDatabase = Depends(get_database),
+    cabeceras_cache: Dict[str, str] = Depends(cache_http("grafo"))
 ):
     """
     Obtiene los detalles de una ruta metabólica y parsea su KGML
     para devolver nodos y aristas listos para graficar.
     """
-    pathway_document = await get_pathway_document_from_db(pathway_map_id, db)
-
-    if not pathway_document:
-        raise HTTPException(
-            status_code=404, 
-            detail=f"Documento del pathway con ID '{pathway_map_id}' no encontrado."
-        )
+    try:
+        proyeccion = crear_proyeccion(node_types, collapse_compounds, drop_orphan_maps)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    codificacion = elegir_codificacion(request.headers.get("accept"))
+
+    if not codificacion and not validar_respuestas():
+        async def cuerpo_json():
+            # El grafo ya codificado (el de la caché), con metadatos y métricas al principio
+            grafo_json = await obtener_grafo_ruta_json(pathway_map_id, db, proyeccion)
+            metricas = await obtener_metricas_ruta(pathway_map_id, db) if include_metrics else None
+            return a_json_por_bloques(grafo_json, {"metrics": metricas})
+
+        if acepta_gzip(request.headers.get("accept-encoding")):
+            # Cuerpo comprimido una sola vez y cacheado con el ETag de la respuesta
+            async def generar():
+                return b"".join([bloque async for bloque in await cuerpo_json()])
+            return await respuesta_gzip_cacheada(cabeceras_cache["ETag"], generar, "application/json", cabeceras_cache)
+
+        # Sin gzip: el JSON se envía por bloques
+        return StreamingResponse(await cuerpo_json(), media_type="application/json", headers=cabeceras_cache)
+
+    # Grafo parseado con coordenadas completas (desde la caché si ya se calculó)
+    response_data = await obtener_grafo_ruta(pathway_map_id, db, proyeccion)
+
+    response_data["metrics"] = await obtener_metricas_ruta(pathway_map_id, db) if include_metrics else None
+
+    # Codificaciones compactas: se serializan directamente desde los diccionarios
+    if codificacion == MEDIA_TYPE_COLUMNAR:
+        return Response(orjson.dumps(a_columnar(response_data)), media_type=codificacion, headers=cabeceras_cache)
+    if codificacion:
+        return Response(a_binario(response_data), media_type=codificacion, headers=cabeceras_cache)
     
-    kgml_string = pathway_document.get("kgml_data")
-    if not kgml_string:
+    return respuesta_json(response_data, ParsedPathwayGraphResponse, headers=cabeceras_cache)
+
+
+@kegg_graph_router.post("/highlight", response_model=HighlightResponse)
+async def get_pathway_highlights_for_genes_endpoint(
+    request: HighlightRequest,
+    db: AsyncIOMotorDatabase = Depends(get_database)
+):
+    """
+    Devuelve, para una lista de genes, los nodos a resaltar en cada ruta
+    en la que aparecen, sin necesidad de descargar los grafos.
+    """
+    if not request.genes:
+        raise HTTPException(status_code=400, detail="La lista de genes no puede estar vacía.")
+    if len(request.genes) > MAX_GENES_RESALTADO:
         raise HTTPException(
-            status_code=404, # O 500 si consideras que el documento está incompleto
-            detail=f"Datos KGML no encontrados en el documento del pathway '{pathway_map_id}'."
+            status_code=400,
+            detail=f"Se admiten como máximo {MAX_GENES_RESALTADO} genes por petición."
         )
 
-    # Llamar a la función de parseo (que es síncrona)
-    # FastAPI maneja la ejecución de funciones síncronas en un thread pool si el endpoint es async
-    parsed_graph_components = parse_kgml_to_graph(kgml_string, pathway_map_id)
-
-    if parsed_graph_components["error"]:
-        # Si hubo un error durante el parseo del KGML
-        raise HTTPException(status_code=500, detail=f"Error parseando KGML para '{pathway_map_id}': {parsed_graph_components['error']}")
-
-    # Construir la respuesta usando el modelo Pydantic
-    # Pydantic se encargará de la validación y serialización.
-    # El alias "_id" en ParsedPathwayGraphResponse se mapeará a pathway_document["_id"]
-    response_data = {
-        "_id": pathway_document["_id"], # Pydantic lo mapeará a 'pathwayId'
-        "name": pathway_document.get("name", "Nombre de Ruta Desconocido"),
-        "pathwayName": pathway_document.get("pathway_name", pathway_document.get("name")), # Usar 'name' como fallback
-        "organism_code": pathway_document.get("organism_code", "N/A"),
-        "image_url": pathway_document.get("image_url"),
-        "nodes": parsed_graph_components["nodes"],
-        "edges": parsed_graph_components["edges"]
-    }
-    
-    return response_data
\ No newline at end of file
+    resaltados = await obtener_resaltados_por_ruta(request.genes, db)
+
+    return respuesta_json({
+        "pathways": [
+            {"pathwayId": pathway_id, "nodes": nodos}
+            for pathway_id, nodos in sorted(resaltados["pathways"].items())
+        ],
+        "genes_no_encontrados": resaltados["genes_no_encontrados"]
+    }, HighlightResponse)
@@ -13,7 +13,12 @@ relacionadas con datos de UniProt. Proporciona endpoints para:
     - Lógica principal: Llama a `obtener_resultados_tabla` (de
       `app.consultas.consulta_uniprot_tabla`) para obtener la lista completa
       de coincidencias y luego aplica paginación internamente.
-    - Modelo de respuesta: `Page[QueryResponse]`. Devuelve un objeto que incluye
+    - Modelo de respuesta: `Page[QueryResponse]`. La página se envía con
+      `respuesta_json` (`app.services.respuesta_service`): los documentos de la
+      proyección `tabla` se serializan con orjson sin volver a validarse (salvo
+      con `VALIDAR_RESPUESTAS`). Lleva `ETag` (según la versión del dataset y los
+      parámetros, con 304 si coincide `If-None-Match`) y un `Cache-Control` corto
+      (`app.services.cache_http_service`). Devuelve un objeto que incluye
       la lista de resultados para la página (`result`), el total de ítems
       encontrados (`total`), el número de página actual (`page`) y el tamaño
       de página (`size`).
@@ -21,12 +26,14 @@ relacionadas con datos de UniProt. Proporciona endpoints para:
       
 """
 
-from fastapi import APIRouter, HTTPException 
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException 
+from pydantic import ValidationError
+from typing import Dict, List
 from app.models.models_data_mongo import QueryResponse 
 from app.models.models_page_consultas import Page
 from app.consultas.consulta_uniprot_tabla import obtener_resultados_tabla 
-from app.models.models_page_consultas import Page
+from app.services.respuesta_service import respuesta_json
+from app.services.cache_http_service import cache_http
 import logging
 
 logger = logging.getLogger(__name__)
@@ -37,7 +44,8 @@ router = APIRouter(
 )
 
 @router.get("/buscar", response_model=Page[QueryResponse])
-async def search_uniprot_data(query: str, page_num: int = 1, page_size: int = 10):
+async def search_uniprot_data(query: str, page_num: int = 1, page_size: int = 10,
+                              cabeceras_cache: Dict[str, str] = Depends(cache_http("busqueda"))):
     """
     Busca proteínas en la base de datos UniProt utilizando un término de consulta.
     Esta ruta utiliza la función `obtener_resultados_tabla`.
@@ -46,29 +54,34 @@ async def search_uniprot_data(query: str, page_num: int = 1, page_size: int = 10
     
     try:
 
-        todos_los_resultados: List[QueryResponse] = await obtener_resultados_tabla(query)
+        todos_los_resultados: List[dict] = await obtener_resultados_tabla(query)
         
         total_items: int = len(todos_los_resultados)
         
         # Lógica de paginación 
         start_index = (page_num - 1) * page_size
         end_index = start_index + page_size
-        resultados_paginados: List[QueryResponse] = todos_los_resultados[start_index:end_index]
+        resultados_paginados: List[dict] = todos_los_resultados[start_index:end_index]
         
         logger.info(f"Router: Devolviendo {len(resultados_paginados)} de {total_items} resultados para query='{query}' (página {page_num}, tamaño {page_size}).")
         
        
-        return {
+        return respuesta_json({
             "result": resultados_paginados,  # La lista de ítems para la página actual
             "total": total_items,            # El número total de ítems
             "page": page_num,                # El número de página actual
             "size": page_size                # El tamaño de la página
-        }
+        }, Page[QueryResponse], headers=cabeceras_cache)
         
     except HTTPException as http_exc:
         logger.info(f"Router: Propagando HTTPException desde /uniprot/buscar: Status={http_exc.status_code}, Detail='{http_exc.detail}' para query='{query}'")
         raise http_exc
 
+    except ValidationError as vale:
+        # Solo en modo validación: la proyección no tiene la forma de la respuesta
+        logger.error(f"Router: Respuesta inválida en /uniprot/buscar con query='{query}': {vale}", exc_info=True)
+        raise HTTPException(status_code=500, detail="Error interno del servidor al procesar la búsqueda.")
+
     except ValueError as ve: 
         logger.error(f"Router: Error de validación (ValueError) en /uniprot/buscar con query='{query}': {str(ve)}", exc_info=True)
         raise HTTPException(status_code=400, detail=str(ve))
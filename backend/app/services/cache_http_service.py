@@ -0,0 +1,70 @@
+# backend/app/services/cache_http_service.py
+
+'''
+# Caché HTTP (peticiones condicionales) de los endpoints de lectura.
+#
+# Las respuestas solo dependen de la versión del dataset
+# (`app.services.version_dataset_service`), de la ruta y sus parámetros y de la
+# representación pedida (`Accept` y, si admite gzip, `Accept-Encoding`; ver
+# `app.services.compresion_service`), así que el ETag se calcula a partir de esos
+# datos sin generar el cuerpo:
+#     ETag: "v<version>-<sha256(formato, version, ruta, parámetros, accept, gzip)>"
+# `VERSION_FORMATO` entra en el hash para invalidar los ETag de los clientes
+# cuando cambia la forma de las respuestas sin cambiar el dataset.
+#
+# `cache_http(clase)` devuelve una dependencia de FastAPI que:
+#   - Responde `304 Not Modified` (sin consultar MongoDB ni la caché de
+#     grafos) si `If-None-Match` coincide con el ETag actual.
+#   - Si no, devuelve las cabeceras `ETag`, `Cache-Control` (según la clase de
+#     ruta, ver `CACHE_CONTROL`) y `Vary` que el endpoint añade a su respuesta.
+# Las respuestas de error no llevan estas cabeceras.
+'''
+
+import hashlib
+import os
+from typing import Callable, Dict, Iterable, Optional, Tuple
+from urllib.parse import urlencode
+from fastapi import Depends, HTTPException, Request
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from app.config.db import get_database
+from app.services.version_dataset_service import obtener_version_dataset
+from app.services.compresion_service import acepta_gzip
+
+VERSION_FORMATO = 2
+
+CACHE_CONTROL = {
+    # Los grafos solo cambian con una nueva carga; el ETag permite revalidarlos después
+    "grafo": os.getenv("CACHE_CONTROL_GRAFOS", "public, max-age=86400"),
+    "busqueda": os.getenv("CACHE_CONTROL_BUSQUEDAS", "public, max-age=60"),
+}
+
+
+def calcular_etag(version: int, ruta: str, parametros: Iterable[Tuple[str, str]], variante: str = "") -> str:
+    """ETag fuerte de una respuesta a partir de la versión del dataset, la ruta, los parámetros y la variante."""
+    clave = "\n".join((str(VERSION_FORMATO), str(version), ruta, urlencode(sorted(parametros)), variante))
+    return f'"v{version}-{hashlib.sha256(clave.encode("utf-8")).hexdigest()[:32]}"'
+
+
+def etag_coincide(if_none_match: Optional[str], etag: str) -> bool:
+    """Comprueba `If-None-Match` contra el ETag (comparación débil, como indica la RFC 9110)."""
+    if not if_none_match:
+        return False
+    etiquetas = [etiqueta.strip() for etiqueta in if_none_match.split(",")]
+    return "*" in etiquetas or any(etiqueta.removeprefix("W/") == etag for etiqueta in etiquetas)
+
+
+def cache_http(clase: str) -> Callable:
+    """Dependencia que responde 304 si el cliente ya tiene la respuesta o devuelve sus cabeceras de caché."""
+    cache_control = CACHE_CONTROL[clase]
+
+    async def dependencia(request: Request, db: AsyncIOMotorDatabase = Depends(get_database)) -> Dict[str, str]:
+        version = await obtener_version_dataset(db)
+        codificacion = "gzip" if acepta_gzip(request.headers.get("accept-encoding")) else "identity"
+        etag = calcular_etag(version, request.url.path, request.query_params.multi_items(),
+                             f"{request.headers.get('accept', '')}|{codificacion}")
+        cabeceras = {"ETag": etag, "Cache-Control": cache_control, "Vary": "Accept, Accept-Encoding"}
+        if etag_coincide(request.headers.get("if-none-match"), etag):
+            raise HTTPException(status_code=304, headers=cabeceras)
+        return cabeceras
+
+    return dependencia
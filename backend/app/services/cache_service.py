@@ -0,0 +1,70 @@
+# backend/app/services/cache_service.py
+
+'''
+# Este módulo ofrece una caché de bytes sobre Redis para los resultados costosos
+# de la API (grafos KGML parseados, proyecciones, etc.).
+#
+# - `cache_get(clave)` / `cache_set(clave, valor, ttl)`: lectura y escritura
+#   asíncronas de valores binarios.
+#
+# La caché es opcional: si Redis no está disponible, las operaciones devuelven
+# `None` sin lanzar excepciones y se deja de intentar la conexión durante
+# `REDIS_REINTENTO_SEGUNDOS`, para no penalizar cada petición con un timeout.
+# Así la API funciona igual (solo que más lenta) sin Redis, por ejemplo en tests.
+#
+# Variables de entorno:
+#   - CACHE_TTL_SEGUNDOS: TTL por defecto de las entradas (def: 86400).
+'''
+
+import logging
+import os
+import time
+from typing import Optional
+from redis.exceptions import RedisError
+from app.config.redis_config import get_redis_async_connection
+
+logger = logging.getLogger(__name__)
+
+CACHE_TTL_SEGUNDOS = int(os.getenv("CACHE_TTL_SEGUNDOS", 86400))
+REDIS_REINTENTO_SEGUNDOS = 30
+
+_redis = None
+_redis_no_disponible_hasta = 0.0
+
+
+def _conexion():
+    global _redis
+    if time.monotonic() < _redis_no_disponible_hasta:
+        return None
+    if _redis is None:
+        _redis = get_redis_async_connection()
+    return _redis
+
+
+def _marcar_no_disponible(error: Exception) -> None:
+    global _redis_no_disponible_hasta
+    _redis_no_disponible_hasta = time.monotonic() + REDIS_REINTENTO_SEGUNDOS
+    logger.warning(f"Cache: Redis no disponible ({type(error).__name__}: {error}). Se reintentará en {REDIS_REINTENTO_SEGUNDOS}s.")
+
+
+async def cache_get(clave: str) -> Optional[bytes]:
+    """Devuelve el valor guardado para `clave`, o None si no existe o Redis no responde."""
+    conexion = _conexion()
+    if conexion is None:
+        return None
+    try:
+        return await conexion.get(clave)
+    except (RedisError, OSError) as e:
+        _marcar_no_disponible(e)
+        return None
+
+
+async def cache_set(clave: str, valor: bytes, ttl: Optional[int] = None) -> None:
+    """Guarda `valor` bajo `clave`. Los errores de Redis se registran y se ignoran."""
+    conexion = _conexion()
+    if conexion is None:
+        return
+    try:
+        await conexion.set(clave, valor, ex=ttl or CACHE_TTL_SEGUNDOS)
+    except (RedisError, OSError) as e:
+        _marcar_no_disponible(e)
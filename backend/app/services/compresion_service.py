@@ -0,0 +1,69 @@
+# backend/app/services/compresion_service.py
+
+'''
+# Compresión gzip de las respuestas según `Accept-Encoding`.
+#
+# - Las respuestas en general se comprimen al vuelo con el `GZipMiddleware` de
+#   Starlette (`app/main.py`), que no toca las que ya llevan `Content-Encoding`.
+# - Las respuestas cacheables y grandes (el JSON de los grafos de rutas) se
+#   comprimen una sola vez: `respuesta_gzip_cacheada(clave, generar, ...)` guarda
+#   en la caché (`app.services.cache_service`) el cuerpo ya comprimido y las
+#   siguientes peticiones lo envían tal cual, sin generar ni comprimir nada.
+#   Como clave se usa el ETag de la respuesta (`app.services.cache_http_service`),
+#   que ya identifica la versión del dataset, la ruta, los parámetros y la
+#   representación.
+#
+# `acepta_gzip(accept_encoding)` interpreta la cabecera con sus valores `q`
+# (`gzip;q=0` rechaza gzip).
+'''
+
+import gzip
+import logging
+from typing import Awaitable, Callable, Dict, Optional
+from fastapi.responses import Response
+from starlette.concurrency import run_in_threadpool
+from app.services.cache_service import cache_get, cache_set
+
+logger = logging.getLogger(__name__)
+
+NIVEL_GZIP = 6  # Las respuestas cacheadas se comprimen una sola vez
+PREFIJO_CLAVE = "gzip:"
+
+
+def acepta_gzip(accept_encoding: Optional[str]) -> bool:
+    """Indica si `Accept-Encoding` admite gzip (directamente o con `*`)."""
+    if not accept_encoding:
+        return False
+    calidades: Dict[str, float] = {}
+    for parte in accept_encoding.split(","):
+        codificacion, _, parametros = parte.strip().partition(";")
+        calidad = 1.0
+        parametro = parametros.strip()
+        if parametro.startswith("q="):
+            try:
+                calidad = float(parametro[2:])
+            except ValueError:
+                calidad = 0.0
+        calidades[codificacion.strip().lower()] = calidad
+    return calidades.get("gzip", calidades.get("*", 0.0)) > 0
+
+
+def comprimir_gzip(datos: bytes) -> bytes:
+    return gzip.compress(datos, compresslevel=NIVEL_GZIP, mtime=0)
+
+
+async def respuesta_gzip_cacheada(clave: str, generar: Callable[[], Awaitable[bytes]],
+                                  media_type: str, headers: Optional[Dict[str, str]] = None) -> Response:
+    """
+    Respuesta gzip con el cuerpo comprimido guardado en la caché bajo `clave`. Si no
+    está, se genera con `generar()`, se comprime (en el threadpool) y se guarda.
+    """
+    clave_cache = PREFIJO_CLAVE + clave
+    comprimido = await cache_get(clave_cache)
+    if comprimido is None:
+        comprimido = await run_in_threadpool(comprimir_gzip, await generar())
+        await cache_set(clave_cache, comprimido)
+        logger.debug(f"Compresión: cuerpo comprimido y cacheado ({len(comprimido)} bytes) para {clave}")
+    cabeceras = dict(headers or {})
+    cabeceras["Content-Encoding"] = "gzip"
+    return Response(comprimido, media_type=media_type, headers=cabeceras)
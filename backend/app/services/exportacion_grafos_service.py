@@ -0,0 +1,139 @@
+# backend/app/services/exportacion_grafos_service.py
+
+'''
+# Exportación estática de los grafos de las rutas (generada por
+# `app.jobs.exportar_grafos`) y su servicio desde la API.
+#
+# Los grafos solo cambian al volver a cargar el KGML, así que se pueden
+# renderizar una vez por versión del dataset a archivos estáticos:
+#     <directorio>/manifest.json                  # Manifiesto actual (mutable)
+#     <directorio>/v<version>/manifest.json       # Copia del manifiesto de la versión
+#     <directorio>/v<version>/<ruta>.<hash>.json.gz
+# Cada archivo es el JSON de la respuesta de `GET /pathways_graph/pathways_graph/{id}`
+# (o de una de sus proyecciones) comprimido con gzip. El nombre lleva el hash
+# del contenido, así que un archivo nunca cambia y se puede cachear como
+# `immutable`. El manifiesto indica, por ruta, el archivo de su grafo y de cada
+# proyección, su tamaño, el número de nodos y aristas y las rutas vecinas (las
+# que aparecen como nodos "map"), para que el frontend pueda precargarlas.
+#
+# `ExportacionGrafosStatic` sirve el directorio (montado en `app/main.py` si se
+# define `EXPORTACION_GRAFOS_DIR`) sin trabajo en Python por petición:
+#   - Los `.json.gz` se envían tal cual con `Content-Encoding: gzip` y
+#     `Cache-Control` inmutable; a los clientes sin gzip se les descomprimen.
+#   - Los manifiestos se revalidan siempre (`no-cache`, con ETag).
+# También se pueden servir con un servidor estático (p. ej. nginx con
+# `gzip_static`) con las mismas cabeceras.
+'''
+
+import gzip
+import hashlib
+import os
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs
+import orjson
+from starlette.datastructures import Headers
+from starlette.responses import Response
+from starlette.staticfiles import StaticFiles
+from starlette.types import Scope
+from app.services.kegg_grafo_service import componer_grafo, parsear_documento_con_layout
+from app.services.kegg_proyecciones_service import ProyeccionGrafo, crear_proyeccion, proyectar_grafo
+from app.services.compresion_service import acepta_gzip, comprimir_gzip
+
+DIRECTORIO_EXPORTACION = os.getenv("EXPORTACION_GRAFOS_DIR")
+NOMBRE_MANIFIESTO = "manifest.json"
+EXTENSION = ".json.gz"
+CACHE_CONTROL_INMUTABLE = "public, max-age=31536000, immutable"
+CACHE_CONTROL_MANIFIESTO = "no-cache"
+PREFIJO_RUTA_MAPA = "path:"
+
+
+def proyeccion_desde_texto(texto: str) -> ProyeccionGrafo:
+    """
+    Proyección a partir de los mismos parámetros que el endpoint de grafos,
+    ej: "node_types=gene&collapse_compounds=true&drop_orphan_maps=true".
+    """
+    parametros = parse_qs(texto, strict_parsing=True)
+    desconocidos = set(parametros) - {"node_types", "collapse_compounds", "drop_orphan_maps"}
+    if desconocidos:
+        raise ValueError(f"Parámetros de proyección desconocidos: {', '.join(sorted(desconocidos))}")
+
+    def activado(nombre: str) -> bool:
+        return parametros.get(nombre, ["false"])[-1].lower() in ("1", "true", "si", "sí")
+
+    return crear_proyeccion(",".join(parametros.get("node_types", [])) or None,
+                            activado("collapse_compounds"), activado("drop_orphan_maps"))
+
+
+def rutas_vecinas(grafo: dict) -> List[str]:
+    """Rutas enlazadas desde el grafo (nodos "map" con ID "path:<ruta>"), sin la propia."""
+    vecinas = {
+        node["id"][len(PREFIJO_RUTA_MAPA):] for node in grafo["nodes"]
+        if node["type"] == "map" and node["id"].startswith(PREFIJO_RUTA_MAPA)
+    }
+    vecinas.discard(grafo["_id"])
+    return sorted(vecinas)
+
+
+def nombre_archivo(pathway_id: str, datos_json: bytes) -> str:
+    return f"{pathway_id}.{hashlib.sha256(datos_json).hexdigest()[:16]}{EXTENSION}"
+
+
+def renderizar_ruta(documento: dict, proyecciones: List[ProyeccionGrafo],
+                    metricas: Optional[dict] = None) -> Tuple[str, Optional[Dict[str, Tuple[str, int, bytes]]], Optional[dict], Optional[str]]:
+    """
+    Parsea una ruta y codifica su grafo y sus proyecciones (se ejecuta en un
+    proceso hijo). Devuelve (ruta, {clave de proyección ("" para el grafo
+    completo): (nombre de archivo, bytes del JSON, JSON gzip)}, resumen para el
+    manifiesto, error).
+    """
+    pathway_id = documento["_id"]
+    parseado = parsear_documento_con_layout(documento, pathway_id)
+    if parseado["error"]:
+        return pathway_id, None, None, parseado["error"]
+
+    grafo = componer_grafo(documento, parseado)
+    resumen = {
+        "name": grafo["name"],
+        "nodos": len(grafo["nodes"]),
+        "aristas": len(grafo["edges"]),
+        "vecinas": rutas_vecinas(grafo),
+    }
+    codificados = {}
+    for proyeccion in [ProyeccionGrafo()] + proyecciones:
+        vista = dict(grafo)
+        if not proyeccion.es_identidad():
+            proyectado = proyectar_grafo(grafo, proyeccion)
+            vista["nodes"], vista["edges"] = proyectado["nodes"], proyectado["edges"]
+        vista["metrics"] = metricas
+        datos_json = orjson.dumps(vista)
+        clave = "" if proyeccion.es_identidad() else proyeccion.clave()
+        codificados[clave] = (nombre_archivo(pathway_id, datos_json), len(datos_json), comprimir_gzip(datos_json))
+    return pathway_id, codificados, resumen, None
+
+
+class ExportacionGrafosStatic(StaticFiles):
+    """Archivos de la exportación con sus cabeceras de caché y codificación."""
+
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        respuesta = await super().get_response(path, scope)
+        if respuesta.status_code not in (200, 304):
+            return respuesta
+        if not path.endswith(EXTENSION):
+            respuesta.headers["Cache-Control"] = CACHE_CONTROL_MANIFIESTO
+            return respuesta
+
+        respuesta.headers["Cache-Control"] = CACHE_CONTROL_INMUTABLE
+        respuesta.headers["Vary"] = "Accept-Encoding"
+        if acepta_gzip(Headers(scope=scope).get("accept-encoding")):
+            respuesta.headers["Content-Encoding"] = "gzip"
+            return respuesta
+        if respuesta.status_code == 304:
+            return respuesta
+
+        # Cliente sin gzip (poco habitual): se descomprime el archivo
+        ruta_completa, _ = self.lookup_path(path)
+        with open(ruta_completa, "rb") as f:
+            datos = gzip.decompress(f.read())
+        return Response(datos, media_type="application/json", headers={
+            "Cache-Control": CACHE_CONTROL_INMUTABLE, "Vary": "Accept-Encoding"
+        })
@@ -0,0 +1,212 @@
+# backend/app/services/kegg_codificacion_service.py
+
+'''
+# Este módulo define codificaciones compactas del grafo de una ruta, como
+# alternativa al JSON "objeto por nodo" de `ParsedPathwayGraphResponse`.
+# El endpoint de grafos elige la codificación según la cabecera `Accept`
+# (`elegir_codificacion`, con sus valores `q`): una codificación compacta solo
+# se usa si el cliente la nombra expresamente (los comodines como `*/*` no
+# cuentan) con una calidad mayor que 0 y no menor que la de `application/json`.
+#
+# 1.  Columnar JSON (`MEDIA_TYPE_COLUMNAR`), generado por `a_columnar(grafo)`:
+#     - Todas las cadenas (IDs, etiquetas, tipos) se guardan una sola vez en
+#       `strings` y los nodos/aristas las referencian por índice.
+#     - Los atributos de los nodos van en arrays paralelos (`id`, `label`,
+#       `type`, `x`, `y`).
+#     - Las aristas son pares de índices en el array de nodos. Se conservan
+#       todos los nodos, también los que comparten ID (una misma entrada
+#       dibujada varias veces en KGML), con sus coordenadas, igual que en el
+#       JSON. Como las aristas del parser solo llevan el ID, cada extremo
+#       apunta a la primera aparición de ese ID.
+#
+# 2.  Binario (`MEDIA_TYPE_BINARIO`), generado por `a_binario(grafo)`, con la
+#     misma estructura en formato little-endian con prefijos de longitud:
+#         b"CWG1"
+#         u32 len + JSON de metadatos (pathwayId, name, ...)
+#         u32 num_strings, y por cada una: u32 len + UTF-8
+#         u32 num_nodos, u32[n] id, u32[n] label, u32[n] type, i32[n] x, i32[n] y
+#         u32 num_aristas, u32[m] source, u32[m] target, u32[m] label
+#     Las coordenadas ausentes se codifican como `COORDENADA_NULA`.
+#     `desde_binario(datos)` devuelve el mismo diccionario que `a_columnar`.
+#
+# Ambas codificaciones trabajan sobre los diccionarios del grafo (caché) y no
+# pasan por la validación de Pydantic objeto a objeto.
+#
+# 3.  JSON normal por bloques, generado por `a_json_por_bloques(grafo_json, cabecera)`
+#     a partir del grafo ya codificado en la caché
+#     (`app.services.kegg_grafo_service.obtener_grafo_ruta_json`): primero un
+#     bloque con los campos de `cabecera` (p. ej. `metrics`) y los metadatos de
+#     la ruta, y después los nodos y aristas en bloques de `TAMANO_BLOQUE_JSON`
+#     bytes, sin decodificar ni volver a codificar el grafo. El endpoint los
+#     envía en una respuesta en streaming.
+'''
+
+import struct
+from typing import AsyncIterator, Dict, List, Optional
+import orjson
+
+MEDIA_TYPE_COLUMNAR = "application/vnd.cerewiki.graph.columnar+json"
+MEDIA_TYPE_BINARIO = "application/vnd.cerewiki.graph.columnar+binary"
+MAGIC_BINARIO = b"CWG1"
+COORDENADA_NULA = -(2 ** 31)
+CAMPOS_METADATOS = ("pathwayName", "name", "organism_code", "image_url", "metrics")
+TAMANO_BLOQUE_JSON = 64 * 1024
+
+
+def _calidades_accept(accept: str) -> Dict[str, float]:
+    """Media type (o rango) -> valor `q` de cada elemento de `Accept`."""
+    calidades: Dict[str, float] = {}
+    for parte in accept.split(","):
+        media_type, *parametros = [trozo.strip() for trozo in parte.split(";")]
+        calidad = 1.0
+        for parametro in parametros:
+            nombre, _, valor = parametro.partition("=")
+            if nombre.strip().lower() == "q":
+                try:
+                    calidad = float(valor)
+                except ValueError:
+                    calidad = 0.0
+        if media_type:
+            calidades[media_type.lower()] = calidad
+    return calidades
+
+
+def elegir_codificacion(accept: Optional[str]) -> Optional[str]:
+    """Devuelve el media type compacto pedido en `Accept`, o None para el JSON normal."""
+    if not accept:
+        return None
+    calidades = _calidades_accept(accept)
+    calidad_json = calidades.get("application/json", calidades.get("application/*", calidades.get("*/*", 0.0)))
+
+    # A igual calidad se prefiere la codificación binaria
+    media_type = max((MEDIA_TYPE_BINARIO, MEDIA_TYPE_COLUMNAR), key=lambda m: calidades.get(m, 0.0))
+    calidad = calidades.get(media_type, 0.0)
+    if calidad > 0 and calidad >= calidad_json:
+        return media_type
+    return None
+
+
+class _TablaCadenas:
+    def __init__(self):
+        self.cadenas: List[str] = []
+        self._indices: Dict[str, int] = {}
+
+    def indice(self, cadena: Optional[str]) -> int:
+        cadena = cadena or ""
+        indice = self._indices.get(cadena)
+        if indice is None:
+            indice = self._indices[cadena] = len(self.cadenas)
+            self.cadenas.append(cadena)
+        return indice
+
+
+def a_columnar(grafo: dict) -> dict:
+    """Convierte el grafo (metadatos + nodes + edges) a la representación columnar."""
+    tabla = _TablaCadenas()
+    nodes, edges = grafo["nodes"], grafo["edges"]
+
+    # Se conservan todos los nodos; las aristas apuntan a la primera aparición de cada ID
+    indice_nodo: Dict[str, int] = {}
+    for posicion, node in enumerate(nodes):
+        indice_nodo.setdefault(node["id"], posicion)
+
+    aristas = [edge for edge in edges if edge["source"] in indice_nodo and edge["target"] in indice_nodo]
+    columnar = {"pathwayId": grafo.get("_id", grafo.get("pathwayId"))}
+    columnar.update({campo: grafo[campo] for campo in CAMPOS_METADATOS if grafo.get(campo) is not None})
+    columnar["nodes"] = {
+        "id": [tabla.indice(node["id"]) for node in nodes],
+        "label": [tabla.indice(node["label"]) for node in nodes],
+        "type": [tabla.indice(node["type"]) for node in nodes],
+        "x": [node["x"] for node in nodes],
+        "y": [node["y"] for node in nodes],
+    }
+    columnar["edges"] = {
+        "source": [indice_nodo[edge["source"]] for edge in aristas],
+        "target": [indice_nodo[edge["target"]] for edge in aristas],
+        "label": [tabla.indice(edge.get("label")) for edge in aristas],
+    }
+    columnar["strings"] = tabla.cadenas
+    return columnar
+
+
+def _coordenadas(valores: List[Optional[int]]) -> List[int]:
+    return [COORDENADA_NULA if v is None else v for v in valores]
+
+
+def a_binario(grafo: dict) -> bytes:
+    """Codifica el grafo en el formato binario con prefijos de longitud."""
+    columnar = a_columnar(grafo)
+    nodos, aristas, cadenas = columnar.pop("nodes"), columnar.pop("edges"), columnar.pop("strings")
+    n, m = len(nodos["id"]), len(aristas["source"])
+
+    partes = [MAGIC_BINARIO]
+    metadatos = orjson.dumps(columnar)
+    partes.append(struct.pack("<I", len(metadatos)) + metadatos)
+
+    partes.append(struct.pack("<I", len(cadenas)))
+    for cadena in cadenas:
+        codificada = cadena.encode("utf-8")
+        partes.append(struct.pack("<I", len(codificada)) + codificada)
+
+    partes.append(struct.pack(f"<I{n}I{n}I{n}I", n, *nodos["id"], *nodos["label"], *nodos["type"]))
+    partes.append(struct.pack(f"<{n}i{n}i", *_coordenadas(nodos["x"]), *_coordenadas(nodos["y"])))
+    partes.append(struct.pack(f"<I{m}I{m}I{m}I", m, *aristas["source"], *aristas["target"], *aristas["label"]))
+    return b"".join(partes)
+
+
+def desde_binario(datos: bytes) -> dict:
+    """Decodifica el formato binario al mismo diccionario que devuelve `a_columnar`."""
+    if datos[:4] != MAGIC_BINARIO:
+        raise ValueError("Formato binario de grafo no reconocido.")
+    posicion = 4
+
+    def leer(formato: str):
+        nonlocal posicion
+        valores = struct.unpack_from(formato, datos, posicion)
+        posicion += struct.calcsize(formato)
+        return valores
+
+    (longitud,) = leer("<I")
+    columnar = orjson.loads(datos[posicion:posicion + longitud])
+    posicion += longitud
+
+    (num_cadenas,) = leer("<I")
+    cadenas = []
+    for _ in range(num_cadenas):
+        (longitud,) = leer("<I")
+        cadenas.append(datos[posicion:posicion + longitud].decode("utf-8"))
+        posicion += longitud
+
+    (n,) = leer("<I")
+    ids, etiquetas, tipos = list(leer(f"<{n}I")), list(leer(f"<{n}I")), list(leer(f"<{n}I"))
+    xs, ys = leer(f"<{n}i"), leer(f"<{n}i")
+    (m,) = leer("<I")
+    origen, destino, etiquetas_aristas = list(leer(f"<{m}I")), list(leer(f"<{m}I")), list(leer(f"<{m}I"))
+
+    columnar["nodes"] = {
+        "id": ids, "label": etiquetas, "type": tipos,
+        "x": [None if v == COORDENADA_NULA else v for v in xs],
+        "y": [None if v == COORDENADA_NULA else v for v in ys],
+    }
+    columnar["edges"] = {"source": origen, "target": destino, "label": etiquetas_aristas}
+    columnar["strings"] = cadenas
+    return columnar
+
+
+async def a_json_por_bloques(grafo_json: bytes, cabecera: Optional[dict] = None,
+                             tamano_bloque: int = TAMANO_BLOQUE_JSON) -> AsyncIterator[bytes]:
+    """
+    Genera el JSON del grafo con los campos de `cabecera` añadidos al principio:
+    un primer bloque con la cabecera y los metadatos, y después los nodos y las
+    aristas en bloques de como mucho `tamano_bloque` bytes del grafo ya codificado.
+    """
+    vista = memoryview(grafo_json)[1:]  # Sin la "{" inicial
+    campos = orjson.dumps(cabecera)[1:-1] if cabecera else b""
+    if campos and bytes(vista[:1]) != b"}":
+        campos += b","
+
+    # El primer bloque lleva la cabecera y los metadatos de la ruta (lo anterior a "nodes")
+    corte = max(grafo_json.find(b'"nodes":') - 1, 0)
+    yield b"{" + campos + bytes(vista[:corte])
+    for posicion in range(corte, len(vista), tamano_bloque):
+        yield bytes(vista[posicion:posicion + tamano_bloque])
@@ -0,0 +1,145 @@
+# backend/app/services/kegg_grafo_service.py
+
+'''
+# Este módulo prepara los datos de grafo de una ruta KEGG que sirve el endpoint
+# `GET /api/kegg/pathways_graph/pathways_graph/{pathway_map_id}`.
+#
+# `obtener_grafo_ruta(pathway_map_id, db_motor)`:
+#   1. Busca el grafo ya procesado en la caché (`app.services.cache_service`).
+#      Si está, se devuelve sin tocar la colección ni volver a parsear el KGML.
+#      La clave incluye la versión del dataset
+#      (`app.services.version_dataset_service`), así que al promover una nueva
+#      carga los grafos cacheados de la anterior dejan de usarse.
+#   2. Si no, recupera el documento de 'kegg_rutas_graficas', descomprime el
+#      KGML si está guardado comprimido (`app.services.kegg_kgml_comprimido_service`),
+#      lo parsea con `parse_kgml_to_graph` y completa las coordenadas que falten
+#      con el layout del servidor (`completar_coordenadas`), de modo que todos
+#      los nodos llegan al frontend con posición.
+#   3. Guarda el resultado (metadatos + nodos + aristas) en la caché.
+#   4. Si se pide una proyección (`app.services.kegg_proyecciones_service`), la
+#      calcula a partir del grafo completo y la cachea con su propia clave.
+#
+# `obtener_grafo_ruta_json` devuelve el mismo grafo ya codificado en JSON (los
+# bytes que se guardan en la caché). Con la caché llena no se decodifica: el
+# endpoint lo envía por bloques tal cual (`app.services.kegg_codificacion_service`).
+#
+# El parseo y el layout son CPU puro, así que se ejecutan en el threadpool
+# para no bloquear el bucle de eventos.
+#
+# Errores: lanza `HTTPException` 404 si no existe la ruta o no tiene KGML,
+# y 500 si el KGML no se puede parsear.
+'''
+
+import orjson
+from typing import Optional, Tuple
+from fastapi import HTTPException
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from starlette.concurrency import run_in_threadpool
+from app.config.db import collection_kegg_rutas_hgml
+from app.services.cache_service import cache_get, cache_set
+from app.services.version_dataset_service import obtener_version_dataset
+from app.services.kegg_service import parse_kgml_to_graph, ParsedKgmlGraph
+from app.services.kegg_kgml_comprimido_service import kgml_de_documento
+from app.services.kegg_layout_service import completar_coordenadas
+from app.services.kegg_proyecciones_service import ProyeccionGrafo, proyectar_grafo
+
+
+def clave_cache_grafo(pathway_map_id: str, proyeccion: ProyeccionGrafo = ProyeccionGrafo(), version: int = 0) -> str:
+    if proyeccion.es_identidad():
+        return f"grafo:v{version}:{pathway_map_id}"
+    return f"grafo:v{version}:{pathway_map_id}:{proyeccion.clave()}"
+
+
+def parsear_documento_con_layout(pathway_document: dict, pathway_map_id: str) -> ParsedKgmlGraph:
+    """Descomprime (si hace falta) el KGML del documento y lo parsea con layout."""
+    return parsear_con_layout(kgml_de_documento(pathway_document), pathway_map_id)
+
+
+def parsear_con_layout(kgml_string: str, pathway_map_id: str) -> ParsedKgmlGraph:
+    """Parsea el KGML y completa las coordenadas de los nodos que no las tienen."""
+    grafo = parse_kgml_to_graph(kgml_string, pathway_map_id)
+    if not grafo["error"]:
+        grafo["nodes"] = completar_coordenadas(grafo["nodes"], grafo["edges"])
+    return grafo
+
+
+def componer_grafo(pathway_document: dict, parsed_graph: ParsedKgmlGraph) -> dict:
+    """Metadatos de la ruta + nodos y aristas parseados (lo que se cachea y se sirve)."""
+    return {
+        "_id": pathway_document["_id"],
+        "name": pathway_document.get("name", "Nombre de Ruta Desconocido"),
+        "pathwayName": pathway_document.get("pathway_name", pathway_document.get("name")), # Usar 'name' como fallback
+        "organism_code": pathway_document.get("organism_code", "N/A"),
+        "image_url": pathway_document.get("image_url"),
+        "nodes": parsed_graph["nodes"],
+        "edges": parsed_graph["edges"]
+    }
+
+
+async def get_pathway_document_from_db(pathway_id: str, db: AsyncIOMotorDatabase) -> dict | None:
+    """
+    Obtiene el documento completo de una ruta desde la colección 'kegg_rutas_graficas'.
+    Este documento debe contener el campo 'kgml_data'.
+    """
+    return await db[collection_kegg_rutas_hgml].find_one({"_id": pathway_id})
+
+
+async def obtener_grafo_ruta(pathway_map_id: str, db_motor: AsyncIOMotorDatabase,
+                             proyeccion: ProyeccionGrafo = ProyeccionGrafo()) -> dict:
+    """
+    Devuelve los metadatos de la ruta y su grafo (nodos con coordenadas y aristas),
+    opcionalmente proyectado, desde la caché si es posible.
+    """
+    grafo, grafo_json = await _obtener_grafo_y_json(pathway_map_id, db_motor, proyeccion)
+    return grafo if grafo is not None else orjson.loads(grafo_json)
+
+
+async def obtener_grafo_ruta_json(pathway_map_id: str, db_motor: AsyncIOMotorDatabase,
+                                  proyeccion: ProyeccionGrafo = ProyeccionGrafo()) -> bytes:
+    """Como `obtener_grafo_ruta`, pero codificado en JSON y sin decodificar la caché."""
+    return (await _obtener_grafo_y_json(pathway_map_id, db_motor, proyeccion))[1]
+
+
+async def _obtener_grafo_y_json(pathway_map_id: str, db_motor: AsyncIOMotorDatabase,
+                                proyeccion: ProyeccionGrafo) -> Tuple[Optional[dict], bytes]:
+    """(grafo o None si viene de la caché, grafo en JSON), calculándolo y cacheándolo si falta."""
+    version = await obtener_version_dataset(db_motor)
+    clave = clave_cache_grafo(pathway_map_id, proyeccion, version)
+    cacheado = await cache_get(clave)
+    if cacheado is not None:
+        return None, cacheado
+
+    grafo = await _calcular_grafo(pathway_map_id, db_motor, proyeccion)
+    grafo_json = orjson.dumps(grafo)
+    await cache_set(clave, grafo_json)
+    return grafo, grafo_json
+
+
+async def _calcular_grafo(pathway_map_id: str, db_motor: AsyncIOMotorDatabase,
+                          proyeccion: ProyeccionGrafo) -> dict:
+    if not proyeccion.es_identidad():
+        grafo = await obtener_grafo_ruta(pathway_map_id, db_motor)
+        proyectado = proyectar_grafo(grafo, proyeccion)
+        grafo["nodes"], grafo["edges"] = proyectado["nodes"], proyectado["edges"]
+        return grafo
+
+    pathway_document = await get_pathway_document_from_db(pathway_map_id, db_motor)
+    if not pathway_document:
+        raise HTTPException(
+            status_code=404, 
+            detail=f"Documento del pathway con ID '{pathway_map_id}' no encontrado."
+        )
+
+    if not pathway_document.get("kgml_data"):
+        raise HTTPException(
+            status_code=404, # O 500 si consideras que el documento está incompleto
+            detail=f"Datos KGML no encontrados en el documento del pathway '{pathway_map_id}'."
+        )
+
+    parsed_graph_components = await run_in_threadpool(parsear_documento_con_layout, pathway_document, pathway_map_id)
+
+    if parsed_graph_components["error"]:
+        # Si hubo un error durante el parseo del KGML
+        raise HTTPException(status_code=500, detail=f"Error parseando KGML para '{pathway_map_id}': {parsed_graph_components['error']}")
+
+    return componer_grafo(pathway_document, parsed_graph_components)
@@ -0,0 +1,44 @@
+# backend/app/services/kegg_kgml_comprimido_service.py
+
+'''
+# Almacenamiento comprimido del KGML de las rutas en 'kegg_rutas_graficas'.
+#
+# El campo `kgml_data` puede ser:
+#   - Texto: el XML tal cual (documentos cargados antes de la compresión).
+#   - Binario: el XML en UTF-8 comprimido con el códec indicado en el campo
+#     `kgml_codec` (hoy solo `CODEC_ZLIB`). El marcador permite añadir otros
+#     códecs (p. ej. zstd) sin ambigüedad con los documentos existentes.
+#
+# `kgml_de_documento(documento)` devuelve siempre el texto, así que el resto
+# del backend (servicio de grafos y trabajos offline) no distingue entre
+# ambos formatos. El KGML se comprime unas 10 veces, lo que reduce el
+# almacenamiento en Atlas y lo que viaja por la red en cada petición de grafo.
+#
+# La carga de `Descarga_datos` escribe ya el formato comprimido; los
+# documentos existentes se convierten con `app.jobs.comprimir_kgml`.
+'''
+
+import zlib
+from typing import Optional, Tuple
+
+CODEC_ZLIB = "zlib"
+NIVEL_COMPRESION = 9  # Se comprime una vez al cargar y se lee muchas veces
+
+
+def comprimir_kgml(kgml_string: str) -> Tuple[bytes, str]:
+    """Devuelve (KGML comprimido, códec)."""
+    return zlib.compress(kgml_string.encode("utf-8"), NIVEL_COMPRESION), CODEC_ZLIB
+
+
+def descomprimir_kgml(datos: bytes, codec: Optional[str]) -> str:
+    if codec in (None, CODEC_ZLIB):
+        return zlib.decompress(datos).decode("utf-8")
+    raise ValueError(f"Códec de KGML desconocido: {codec!r}")
+
+
+def kgml_de_documento(documento: dict) -> Optional[str]:
+    """KGML en texto de un documento de ruta, esté o no comprimido."""
+    kgml = documento.get("kgml_data")
+    if isinstance(kgml, (bytes, bytearray)):
+        return descomprimir_kgml(bytes(kgml), documento.get("kgml_codec"))
+    return kgml
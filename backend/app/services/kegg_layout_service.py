@@ -0,0 +1,125 @@
+# backend/app/services/kegg_layout_service.py
+
+'''
+# Este módulo calcula en el servidor las coordenadas de los nodos KGML que no
+# las traen (`parse_kgml_to_graph` deja `x`/`y` a None cuando falta `<graphics>`
+# o los valores no son enteros), para que el navegador no tenga que ejecutar
+# ningún layout de Cytoscape.
+#
+# `completar_coordenadas(nodes, edges)` aplica un layout dirigido por fuerzas
+# (Fruchterman-Reingold) vectorizado con NumPy:
+#   - Los nodos con coordenadas KGML quedan fijos y sirven de "semilla".
+#   - Los nodos sin coordenadas parten del centro de sus vecinos conocidos
+#     (o de un punto aleatorio, con semilla fija, dentro del mapa) y se mueven
+#     por repulsión entre nodos y atracción a lo largo de las relaciones.
+#   - Solo se calculan las fuerzas de los nodos móviles (matriz m x n), que en
+#     los mapas KEGG son una minoría.
+#
+# El resultado es determinista para un mismo KGML, por lo que puede cachearse
+# junto al grafo parseado.
+'''
+
+from typing import Dict, List
+import numpy as np
+from app.services.kegg_service import KgmlNode, KgmlEdge
+
+ITERACIONES_LAYOUT = 150
+ENFRIAMIENTO = 0.95
+TAMANO_MAPA_POR_DEFECTO = 1000.0
+DISTANCIA_MINIMA = 1e-2  # También se usa como distancia al cuadrado mínima
+
+
+def completar_coordenadas(nodes: List[KgmlNode], edges: List[KgmlEdge],
+                          iteraciones: int = ITERACIONES_LAYOUT, semilla: int = 0) -> List[KgmlNode]:
+    """
+    Devuelve una copia de `nodes` en la que todos los nodos tienen coordenadas
+    enteras. Los nodos que ya las tenían no se modifican.
+    """
+    n = len(nodes)
+    moviles = np.array([node["x"] is None or node["y"] is None for node in nodes], dtype=bool)
+    if n == 0 or not moviles.any():
+        return [KgmlNode(**node) for node in nodes]
+
+    rng = np.random.default_rng(semilla)
+    posiciones = np.zeros((n, 2), dtype=np.float64)
+    conocidos = ~moviles
+    for i, node in enumerate(nodes):
+        if conocidos[i]:
+            posiciones[i] = (node["x"], node["y"])
+
+    if conocidos.any():
+        minimo = posiciones[conocidos].min(axis=0)
+        maximo = posiciones[conocidos].max(axis=0)
+        extension = np.maximum(maximo - minimo, TAMANO_MAPA_POR_DEFECTO / 10)
+    else:
+        minimo = np.zeros(2)
+        extension = np.full(2, TAMANO_MAPA_POR_DEFECTO)
+
+    # Aristas como pares de índices (un mismo ID KGML puede repetirse en varios nodos)
+    indices_por_id: Dict[str, List[int]] = {}
+    for i, node in enumerate(nodes):
+        indices_por_id.setdefault(node["id"], []).append(i)
+    pares = [
+        (a, b)
+        for edge in edges
+        for a in indices_por_id.get(edge["source"], [])
+        for b in indices_por_id.get(edge["target"], [])
+        if a != b
+    ]
+    origen = np.array([a for a, _ in pares], dtype=np.int64)
+    destino = np.array([b for _, b in pares], dtype=np.int64)
+
+    # Posición inicial: centro de los vecinos con coordenadas, o aleatoria dentro del mapa
+    suma_vecinos = np.zeros((n, 2))
+    num_vecinos = np.zeros(n)
+    if len(pares):
+        for a, b in ((origen, destino), (destino, origen)):
+            validos = conocidos[b]
+            np.add.at(suma_vecinos, a[validos], posiciones[b[validos]])
+            np.add.at(num_vecinos, a[validos], 1)
+    indices_moviles = np.flatnonzero(moviles)
+    aleatorias = minimo + rng.random((len(indices_moviles), 2)) * extension
+    con_vecinos = num_vecinos[indices_moviles] > 0
+    posiciones[indices_moviles] = np.where(
+        con_vecinos[:, None],
+        suma_vecinos[indices_moviles] / np.maximum(num_vecinos[indices_moviles], 1)[:, None]
+        + rng.normal(scale=extension.min() / 50, size=(len(indices_moviles), 2)),
+        aleatorias,
+    )
+
+    k = np.sqrt(extension.prod() / n)  # Distancia ideal entre nodos
+    temperatura = extension.max() / 10
+
+    x, y = posiciones[:, 0], posiciones[:, 1]
+    k2 = k * k
+    for _ in range(iteraciones):
+        # Repulsión: solo filas de nodos móviles frente a todos los nodos
+        dx = x[indices_moviles, None] - x[None, :]
+        dy = y[indices_moviles, None] - y[None, :]
+        factor = k2 / np.maximum(dx * dx + dy * dy, DISTANCIA_MINIMA)
+        desplazamiento_x = (factor * dx).sum(axis=1)
+        desplazamiento_y = (factor * dy).sum(axis=1)
+
+        # Atracción a lo largo de las relaciones (acumulada con bincount sobre todos los nodos)
+        if len(pares):
+            ax = x[origen] - x[destino]
+            ay = y[origen] - y[destino]
+            distancia_aristas = np.sqrt(ax * ax + ay * ay) / k
+            fx, fy = distancia_aristas * ax, distancia_aristas * ay
+            atraccion_x = np.bincount(destino, fx, n) - np.bincount(origen, fx, n)
+            atraccion_y = np.bincount(destino, fy, n) - np.bincount(origen, fy, n)
+            desplazamiento_x += atraccion_x[indices_moviles]
+            desplazamiento_y += atraccion_y[indices_moviles]
+
+        longitud = np.maximum(np.sqrt(desplazamiento_x ** 2 + desplazamiento_y ** 2), DISTANCIA_MINIMA)
+        paso = np.minimum(longitud, temperatura) / longitud
+        x[indices_moviles] += desplazamiento_x * paso
+        y[indices_moviles] += desplazamiento_y * paso
+        temperatura *= ENFRIAMIENTO
+
+    redondeadas = np.rint(posiciones).astype(int)
+    return [
+        KgmlNode(**node) if conocidos[i]
+        else KgmlNode(**{**node, "x": int(redondeadas[i, 0]), "y": int(redondeadas[i, 1])})
+        for i, node in enumerate(nodes)
+    ]
@@ -0,0 +1,113 @@
+# backend/app/services/kegg_metricas_service.py
+
+'''
+# Este módulo calcula métricas topológicas de las rutas KEGG a partir del grafo
+# ya parseado por `parse_kgml_to_graph`, usando `networkx`.
+#
+# 1.  `calcular_metricas_ruta(parsed_graph, pathway_map_id)`:
+#     - Construye un grafo no dirigido con todos los nodos y relaciones de la ruta.
+#     - Resumen de la ruta: número de nodos y aristas, componentes conexas y
+#       diámetro (el mayor de entre las componentes, que pueden estar desconectadas).
+#     - Para cada nodo de tipo "gene": grado, intermediación (betweenness
+#       normalizada) y si es punto de articulación.
+#
+# 2.  `metricas_por_gen(metricas_ruta)`:
+#     - Reorganiza las métricas de nodos por gen individual, separando los
+#       nombres KGML compuestos ("bce:BC5335 bce:BC5336").
+#
+# 3.  `obtener_metricas_ruta` / `obtener_metricas_gen`:
+#     - Lecturas asíncronas de las colecciones que rellena el trabajo offline
+#       `app.jobs.calcular_metricas_rutas`.
+#
+# El cálculo es costoso (intermediación O(V·E)), por eso se hace una sola vez
+# tras la ingesta y la API se limita a leer el resultado.
+'''
+
+from typing import Dict, List, Optional, TypedDict
+import networkx as nx
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from app.config.db import collection_kegg_metricas_rutas, collection_kegg_metricas_genes
+from app.services.kegg_service import ParsedKgmlGraph, normalizar_id_gen_kegg
+
+
+class ResumenRuta(TypedDict):
+    num_nodos: int
+    num_aristas: int
+    num_componentes: int
+    diametro: int
+
+class MetricasNodo(TypedDict):
+    node_id: str
+    grado: int
+    intermediacion: float
+    punto_articulacion: bool
+
+class MetricasRuta(TypedDict):
+    _id: str
+    resumen: ResumenRuta
+    nodos: List[MetricasNodo]
+
+
+def calcular_metricas_ruta(parsed_graph: ParsedKgmlGraph, pathway_map_id: str) -> MetricasRuta:
+    """Calcula el resumen de la ruta y las métricas de centralidad de sus nodos de genes."""
+    grafo = nx.Graph()
+    tipos_por_nodo: Dict[str, str] = {}
+    for node in parsed_graph["nodes"]:
+        grafo.add_node(node["id"])
+        tipos_por_nodo[node["id"]] = node["type"]
+    for edge in parsed_graph["edges"]:
+        if edge["source"] != edge["target"]:
+            grafo.add_edge(edge["source"], edge["target"])
+
+    componentes = list(nx.connected_components(grafo))
+    diametro = max(
+        (nx.diameter(grafo.subgraph(componente)) for componente in componentes if len(componente) > 1),
+        default=0
+    )
+    intermediacion = nx.betweenness_centrality(grafo, normalized=True)
+    puntos_articulacion = set(nx.articulation_points(grafo))
+
+    nodos: List[MetricasNodo] = [
+        MetricasNodo(
+            node_id=node_id,
+            grado=grafo.degree(node_id),
+            intermediacion=round(intermediacion[node_id], 6),
+            punto_articulacion=node_id in puntos_articulacion,
+        )
+        for node_id, tipo in tipos_por_nodo.items() if tipo == "gene"
+    ]
+
+    return MetricasRuta(
+        _id=pathway_map_id,
+        resumen=ResumenRuta(
+            num_nodos=grafo.number_of_nodes(),
+            num_aristas=grafo.number_of_edges(),
+            num_componentes=len(componentes),
+            diametro=diametro,
+        ),
+        nodos=nodos,
+    )
+
+
+def metricas_por_gen(metricas_ruta: MetricasRuta) -> Dict[str, List[Dict[str, object]]]:
+    """Agrupa las métricas de los nodos de una ruta por gen individual."""
+    por_gen: Dict[str, List[Dict[str, object]]] = {}
+    for nodo in metricas_ruta["nodos"]:
+        for gen_kegg in nodo["node_id"].split():
+            por_gen.setdefault(normalizar_id_gen_kegg(gen_kegg), []).append(
+                {"pathway_id": metricas_ruta["_id"], **nodo}
+            )
+    return por_gen
+
+
+async def obtener_metricas_ruta(pathway_map_id: str, db_motor: AsyncIOMotorDatabase) -> Optional[dict]:
+    """Devuelve las métricas precalculadas de una ruta, o None si no existen."""
+    return await db_motor[collection_kegg_metricas_rutas].find_one({"_id": pathway_map_id}, {"_id": 0})
+
+
+async def obtener_metricas_gen(gen_id: str, db_motor: AsyncIOMotorDatabase) -> List[dict]:
+    """Devuelve las métricas precalculadas de un gen en cada ruta en la que aparece."""
+    documento = await db_motor[collection_kegg_metricas_genes].find_one(
+        {"_id": normalizar_id_gen_kegg(gen_id)}
+    )
+    return documento.get("rutas", []) if documento else []
@@ -0,0 +1,105 @@
+# backend/app/services/kegg_proyecciones_service.py
+
+'''
+# Este módulo calcula proyecciones (vistas reducidas) de un grafo KGML ya
+# parseado, para que el frontend no tenga que descargar todos los nodos de
+# compuestos y mapas y filtrarlos en el navegador.
+#
+# Una proyección (`ProyeccionGrafo`) combina, en este orden:
+#   1. `colapsar_compuestos`: cada cadena gen -> compuesto -> gen se sustituye
+#      por una arista directa gen -> gen etiquetada "via <compuesto>"; después
+#      se eliminan los compuestos. Las cadenas salen sobre todo de las
+#      reacciones de KGML (sustrato -> enzima -> producto, ver
+#      `parse_kgml_to_graph`): el producto de la reacción de un gen es el
+#      sustrato de la del siguiente.
+#   2. `tipos`: solo se conservan los nodos de esos tipos (`TIPOS_NODO`: "gene",
+#      "compound", "map", "ortholog"...) y las aristas entre nodos conservados.
+#   3. `quitar_mapas_huerfanos`: se eliminan los nodos "map" sin aristas.
+#
+# `ProyeccionGrafo.clave()` identifica la proyección de forma canónica y se usa
+# en la clave de caché, de modo que cada vista se calcula una sola vez por ruta;
+# por eso `crear_proyeccion` rechaza los tipos de nodo desconocidos.
+'''
+
+from typing import Dict, FrozenSet, List, NamedTuple, Optional, Set, Tuple
+from app.services.kegg_service import KgmlNode, KgmlEdge, ParsedKgmlGraph
+
+# Tipos de `<entry>` definidos por KGML
+TIPOS_NODO = frozenset({"ortholog", "enzyme", "reaction", "gene", "group", "compound", "map", "brite", "other"})
+
+
+class ProyeccionGrafo(NamedTuple):
+    tipos: Optional[FrozenSet[str]] = None
+    colapsar_compuestos: bool = False
+    quitar_mapas_huerfanos: bool = False
+
+    def es_identidad(self) -> bool:
+        return not self.tipos and not self.colapsar_compuestos and not self.quitar_mapas_huerfanos
+
+    def clave(self) -> str:
+        tipos = ",".join(sorted(self.tipos)) if self.tipos else "*"
+        return f"t={tipos};c={int(self.colapsar_compuestos)};m={int(self.quitar_mapas_huerfanos)}"
+
+
+def crear_proyeccion(node_types: Optional[str], colapsar_compuestos: bool, quitar_mapas_huerfanos: bool) -> ProyeccionGrafo:
+    """
+    Construye la proyección a partir de los parámetros de la petición ("gene,compound").
+    Lanza ValueError si algún tipo de nodo no es de KGML.
+    """
+    tipos = frozenset(t.strip() for t in node_types.split(",") if t.strip()) if node_types else None
+    desconocidos = (tipos or frozenset()) - TIPOS_NODO
+    if desconocidos:
+        raise ValueError(f"Tipos de nodo desconocidos: {', '.join(sorted(desconocidos))}. "
+                         f"Válidos: {', '.join(sorted(TIPOS_NODO))}")
+    return ProyeccionGrafo(tipos or None, colapsar_compuestos, quitar_mapas_huerfanos)
+
+
+def _colapsar_compuestos(nodes: List[KgmlNode], edges: List[KgmlEdge]) -> Tuple[List[KgmlNode], List[KgmlEdge]]:
+    tipo_por_id = {node["id"]: node["type"] for node in nodes}
+    etiqueta_por_id = {node["id"]: node["label"] for node in nodes}
+    compuestos = {node_id for node_id, tipo in tipo_por_id.items() if tipo == "compound"}
+
+    entrantes: Dict[str, Set[str]] = {}
+    salientes: Dict[str, Set[str]] = {}
+    aristas_resultado: List[KgmlEdge] = []
+    for edge in edges:
+        if edge["target"] in compuestos and tipo_por_id.get(edge["source"]) == "gene":
+            entrantes.setdefault(edge["target"], set()).add(edge["source"])
+        if edge["source"] in compuestos and tipo_por_id.get(edge["target"]) == "gene":
+            salientes.setdefault(edge["source"], set()).add(edge["target"])
+        if edge["source"] not in compuestos and edge["target"] not in compuestos:
+            aristas_resultado.append(edge)
+
+    # Un mismo par de genes puede estar unido a través de varios compuestos
+    via: Dict[Tuple[str, str], List[str]] = {}
+    for compuesto in sorted(compuestos):
+        for origen in sorted(entrantes.get(compuesto, ())):
+            for destino in sorted(salientes.get(compuesto, ())):
+                if origen != destino:
+                    via.setdefault((origen, destino), []).append(etiqueta_por_id[compuesto])
+
+    aristas_resultado.extend(
+        KgmlEdge(source=origen, target=destino, label="via " + ", ".join(etiquetas))
+        for (origen, destino), etiquetas in via.items()
+    )
+    return [node for node in nodes if node["id"] not in compuestos], aristas_resultado
+
+
+def proyectar_grafo(grafo: ParsedKgmlGraph, proyeccion: ProyeccionGrafo) -> ParsedKgmlGraph:
+    """Aplica la proyección a un grafo parseado y devuelve un grafo nuevo."""
+    nodes, edges = list(grafo["nodes"]), list(grafo["edges"])
+
+    if proyeccion.colapsar_compuestos:
+        nodes, edges = _colapsar_compuestos(nodes, edges)
+
+    if proyeccion.tipos:
+        nodes = [node for node in nodes if node["type"] in proyeccion.tipos]
+
+    ids_conservados = {node["id"] for node in nodes}
+    edges = [edge for edge in edges if edge["source"] in ids_conservados and edge["target"] in ids_conservados]
+
+    if proyeccion.quitar_mapas_huerfanos:
+        conectados = {edge["source"] for edge in edges} | {edge["target"] for edge in edges}
+        nodes = [node for node in nodes if node["type"] != "map" or node["id"] in conectados]
+
+    return ParsedKgmlGraph(nodes=nodes, edges=edges, error=grafo.get("error"))
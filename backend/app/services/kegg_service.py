@@ -17,12 +17,30 @@
 #     - Parsea cadenas XML crudas en formato KGML (KEGG Markup Language).
 #     - Transforma los datos KGML en una representación de grafo estructurada,
 #       consistente en nodos (derivados de los elementos `<entry>` de KGML) y
-#       aristas (derivadas de los elementos `<relation>` de KGML).
+#       aristas (derivadas de los elementos `<relation>` de KGML y de los
+#       sustratos y productos de cada `<reaction>`: sustrato -> enzima ->
+#       producto, en ambos sentidos si la reacción es reversible, con el
+#       nombre de la reacción como etiqueta).
 #     - Extrae atributos como ID del nodo, etiqueta, tipo, coordenadas, y
 #       origen, destino y etiqueta de las aristas.
 #     - Devuelve un diccionario que contiene listas de nodos, aristas y cualquier
 #       error de parseo.
 #
+# 3.  `extraer_nodos_por_gen(parsed_graph, pathway_map_id)`:
+#     - Recorre los nodos de tipo "gene" de un grafo ya parseado y separa los
+#       nombres compuestos de KGML (ej. "bce:BC5335 bce:BC5336") en genes
+#       individuales, asociando cada gen a su nodo y coordenadas.
+#     - Lo utiliza el trabajo offline `app.jobs.construir_indice_genes_nodos`
+#       para construir el índice gen -> (ruta, nodo, x, y).
+#
+# 4.  `obtener_resaltados_por_ruta(genes, db_motor)`:
+#     - Consulta el índice anterior para una lista de genes y agrupa los
+#       nodos encontrados por ruta, listos para colorear en el frontend.
+#     - Los IDs que no son genes del índice se buscan como accesiones de
+#       UniProt en la relación KEGG <-> UniProt de la ingesta
+#       (`COLLECTION_KEGG_UNIPROT`, `Descarga_datos/Kegg/mapeos_kegg.py`), así
+#       que se pueden resaltar directamente las proteínas de la tabla de UniProt.
+#
 # El módulo también define estructuras `TypedDict` personalizadas (`KgmlNode`,
 # `KgmlEdge`, `ParsedKgmlGraph`) para representar los componentes del grafo
 # KGML parseado.
@@ -31,12 +49,14 @@
 # procesada de rutas KEGG para su uso en otras partes de la aplicación, como componentes de visualización de datos.
 '''
 
-from app.config.db import db 
+from app.config.db import db, collection_kegg_genes_nodos, collection_kegg_uniprot
 from motor.motor_asyncio import AsyncIOMotorDatabase
 import re
 import xml.etree.ElementTree as ET
 from typing import Dict, List, TypedDict 
 
+ORGANISMO_KEGG_POR_DEFECTO = "bce"
+
 # Tipos para el parser KGML
 class KgmlNode(TypedDict):
     id: str
@@ -55,6 +75,13 @@ class ParsedKgmlGraph(TypedDict):
     edges: List[KgmlEdge]
     error: str | None
 
+# Tipos para el índice gen -> nodos
+class NodoDeGen(TypedDict):
+    pathway_id: str
+    node_id: str
+    x: int | None
+    y: int | None
+
 
 # Función para convertir el ObjectId a cadena
 def serialize_document(doc):
@@ -169,5 +196,112 @@ def parse_kgml_to_graph(kgml_string: str, pathway_map_id: str) -> ParsedKgmlGrap
             relation_label = ", ".join(relation_label_parts)
             
             edges.append(KgmlEdge(source=source_node_id, target=target_node_id, label=relation_label))
-            
+
+    # Tercera pasada: aristas de las reacciones (el atributo 'id' es la entrada de la enzima)
+    for reaction in root.findall(".//reaction"):
+        enzyme_node_id = kgml_id_to_node_id_map.get(reaction.get("id") or "")
+        if not enzyme_node_id:
+            continue
+        reaction_label = reaction.get("name", "")
+        reversible = reaction.get("type") == "reversible"
+        enlaces = [(substrate.get("id"), True) for substrate in reaction.findall("substrate")]
+        enlaces += [(product.get("id"), False) for product in reaction.findall("product")]
+        for compound_kgml_id, hacia_enzima in enlaces:
+            compound_node_id = kgml_id_to_node_id_map.get(compound_kgml_id or "")
+            if not compound_node_id:
+                continue
+            source, target = (compound_node_id, enzyme_node_id) if hacia_enzima else (enzyme_node_id, compound_node_id)
+            edges.append(KgmlEdge(source=source, target=target, label=reaction_label))
+            if reversible:
+                edges.append(KgmlEdge(source=target, target=source, label=reaction_label))
+
     return ParsedKgmlGraph(nodes=nodes, edges=edges, error=None)
+
+
+# --- ÍNDICE GEN -> NODOS ---
+def normalizar_id_gen_kegg(gen_id: str, organismo: str = ORGANISMO_KEGG_POR_DEFECTO) -> str:
+    """
+    Normaliza un identificador de gen a la clave del índice: prefijo de organismo
+    en minúsculas y sin guiones bajos en el locus ("BC_5335" -> "bce:BC5335").
+    """
+    gen_id = gen_id.strip()
+    if ":" in gen_id:
+        prefijo, locus = gen_id.split(":", 1)
+    else:
+        prefijo, locus = organismo, gen_id
+    return f"{prefijo.lower()}:{locus.replace('_', '')}"
+
+
+def extraer_nodos_por_gen(parsed_graph: ParsedKgmlGraph, pathway_map_id: str) -> Dict[str, List[NodoDeGen]]:
+    """
+    Devuelve, para cada gen que aparece en el grafo, la lista de nodos de la ruta
+    en los que participa. Un mismo nodo KGML puede agrupar varios genes y un mismo
+    gen puede aparecer en varios nodos de la misma ruta.
+    """
+    nodos_por_gen: Dict[str, List[NodoDeGen]] = {}
+    for node in parsed_graph["nodes"]:
+        if node["type"] != "gene":
+            continue
+        for gen_kegg in node["id"].split():
+            clave = normalizar_id_gen_kegg(gen_kegg)
+            nodos_por_gen.setdefault(clave, []).append(NodoDeGen(
+                pathway_id=pathway_map_id,
+                node_id=node["id"],
+                x=node["x"],
+                y=node["y"],
+            ))
+    return nodos_por_gen
+
+
+async def obtener_resaltados_por_ruta(genes: List[str], db_motor: AsyncIOMotorDatabase) -> Dict[str, object]:
+    """
+    Consulta el índice gen -> nodos para una lista de genes (IDs de KEGG o
+    accesiones de UniProt) y agrupa el resultado por ruta:
+    {"pathways": {pathway_id: [nodos]}, "genes_no_encontrados": [...]}.
+    """
+    claves = {normalizar_id_gen_kegg(gen): gen for gen in genes if gen and gen.strip()}
+    resaltados: Dict[str, List[Dict[str, object]]] = {}
+
+    # Genes de KEGG: {clave del índice: [IDs pedidos]}
+    pedidos: Dict[str, List[str]] = {clave: [gen] for clave, gen in claves.items()}
+    encontrados = await _anadir_resaltados(db_motor, pedidos, resaltados)
+
+    # El resto pueden ser accesiones de UniProt: se traducen a genes de KEGG
+    restantes = {gen.strip(): gen for clave, gen in claves.items() if clave not in encontrados}
+    if restantes:
+        por_accesion: Dict[str, List[str]] = {}
+        cursor = db_motor[collection_kegg_uniprot].find({"uniprot": {"$in": list(restantes)}}, {"uniprot": 1})
+        async for doc in cursor:
+            for accesion in doc.get("uniprot", []):
+                if accesion in restantes:
+                    por_accesion.setdefault(normalizar_id_gen_kegg(doc["_id"]), []).append(restantes[accesion])
+        encontrados |= await _anadir_resaltados(db_motor, por_accesion, resaltados)
+
+    return {
+        "pathways": resaltados,
+        "genes_no_encontrados": [gen for gen in claves.values() if gen not in encontrados],
+    }
+
+
+async def _anadir_resaltados(db_motor: AsyncIOMotorDatabase, pedidos: Dict[str, List[str]],
+                             resaltados: Dict[str, List[Dict[str, object]]]) -> set:
+    """
+    Añade a `resaltados` los nodos de los genes de `pedidos` ({clave del índice:
+    [IDs pedidos]}) y devuelve las claves e IDs pedidos encontrados.
+    """
+    encontrados = set()
+    if not pedidos:
+        return encontrados
+    cursor = db_motor[collection_kegg_genes_nodos].find({"_id": {"$in": list(pedidos)}})
+    async for doc in cursor:
+        encontrados.add(doc["_id"])
+        for gen_original in pedidos[doc["_id"]]:
+            encontrados.add(gen_original)
+            for nodo in doc.get("nodos", []):
+                resaltados.setdefault(nodo["pathway_id"], []).append({
+                    "gene": gen_original,
+                    "node_id": nodo["node_id"],
+                    "x": nodo.get("x"),
+                    "y": nodo.get("y"),
+                })
+    return encontrados
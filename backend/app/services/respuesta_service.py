@@ -0,0 +1,39 @@
+# backend/app/services/respuesta_service.py
+
+'''
+# Respuestas JSON de los endpoints "calientes" (búsqueda de UniProt, grafos de
+# rutas y resaltado de genes), cuyos datos salen de nuestras propias
+# proyecciones de servicio (subdocumento `tabla`, grafos parseados y cacheados,
+# índice gen -> nodos), que ya tienen la forma del modelo de respuesta.
+#
+# `respuesta_json(datos, modelo)` devuelve un `ORJSONResponse` con los
+# diccionarios tal cual: FastAPI no vuelve a validarlos con `response_model`
+# ni los recorre con Pydantic para serializarlos, y orjson los codifica
+# directamente. El `response_model` de cada endpoint se mantiene para la
+# documentación OpenAPI.
+#
+# Con `VALIDAR_RESPUESTAS=1` (modo depuración; las pruebas lo activan en
+# `app/tests/conftest.py`) los datos se validan con el modelo antes de
+# enviarlos, como hacía `response_model`: un error de forma en una proyección
+# lanza `ValidationError` en lugar de llegar al frontend.
+'''
+
+import os
+from typing import Any, Optional, Type
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel
+
+
+def validar_respuestas() -> bool:
+    """Indica si las respuestas se validan con su modelo (modo depuración/pruebas)."""
+    return os.getenv("VALIDAR_RESPUESTAS", "").lower() in ("1", "true", "si", "sí")
+
+
+def respuesta_json(datos: Any, modelo: Optional[Type[BaseModel]] = None, **kwargs) -> ORJSONResponse:
+    """
+    `ORJSONResponse` con `datos` sin revalidar. En modo validación, los datos
+    pasan antes por `modelo` (con sus valores por defecto y alias).
+    """
+    if modelo is not None and validar_respuestas():
+        datos = modelo.model_validate(datos).model_dump(mode="json", by_alias=True)
+    return ORJSONResponse(datos, **kwargs)
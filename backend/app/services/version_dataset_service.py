@@ -0,0 +1,80 @@
+# backend/app/services/version_dataset_service.py
+
+'''
+# Este módulo expone la versión del dataset publicada por la carga de datos
+# (`Descarga_datos/comun/versiones_dataset.py`).
+#
+# Cada vez que se promueve (o se revierte) una colección, la carga incrementa el
+# campo `version` del documento `{"_id": "actual"}` de `dataset_versiones`. Los
+# servicios incluyen esa versión en sus claves de caché, de modo que los
+# resultados cacheados de un dataset anterior dejan de usarse sin tener que
+# borrarlos (caducan por su TTL).
+#
+# - `obtener_version_dataset(db_motor)`: versión actual (0 si nunca se ha
+#   registrado ninguna).
+# - `leer_version_dataset(db)`: lo mismo con pymongo, sin memoria, para los
+#   trabajos offline (`app.jobs`).
+# - `registrar_version(db, coleccion, **datos)`: incrementa la versión tras
+#   cambiar una colección desde un trabajo offline (p. ej. las métricas, que
+#   la API incluye en sus respuestas), igual que
+#   `Descarga_datos/comun/versiones_dataset.registrar_version`.
+#
+# Para no añadir una consulta a MongoDB en cada petición, la versión se guarda en
+# memoria durante `DATASET_VERSION_TTL_SEGUNDOS` (def: 5). Si MongoDB falla se
+# mantiene la última versión conocida.
+'''
+
+import logging
+import os
+import time
+from datetime import datetime, timezone
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ReturnDocument
+from pymongo.errors import PyMongoError
+from app.config.db import collection_dataset_versiones
+
+logger = logging.getLogger(__name__)
+
+DATASET_VERSION_TTL_SEGUNDOS = float(os.getenv("DATASET_VERSION_TTL_SEGUNDOS", 5))
+ID_VERSION_ACTUAL = "actual"
+
+_version = 0
+_leida_en = None
+
+
+async def obtener_version_dataset(db_motor: AsyncIOMotorDatabase) -> int:
+    global _version, _leida_en
+    ahora = time.monotonic()
+    if _leida_en is not None and ahora - _leida_en < DATASET_VERSION_TTL_SEGUNDOS:
+        return _version
+    try:
+        documento = await db_motor[collection_dataset_versiones].find_one(
+            {"_id": ID_VERSION_ACTUAL}, {"version": 1}
+        )
+        _version = int(documento["version"]) if documento else 0
+    except PyMongoError as e:
+        logger.warning("No se pudo leer la versión del dataset (%s); se usa la %s", e, _version)
+    _leida_en = ahora
+    return _version
+
+
+def leer_version_dataset(db) -> int:
+    """Versión actual del dataset leída con una conexión síncrona (pymongo)."""
+    documento = db[collection_dataset_versiones].find_one({"_id": ID_VERSION_ACTUAL}, {"version": 1})
+    return int(documento["version"]) if documento else 0
+
+
+def registrar_version(db, coleccion: str, **datos) -> int:
+    """Incrementa la versión del dataset tras cambiar `coleccion` y devuelve la nueva versión."""
+    ahora = datetime.now(timezone.utc)
+    documento = db[collection_dataset_versiones].find_one_and_update(
+        {"_id": ID_VERSION_ACTUAL},
+        {"$inc": {"version": 1}, "$set": {"actualizado": ahora}},
+        upsert=True, return_document=ReturnDocument.AFTER,
+    )
+    version = documento["version"]
+    db[collection_dataset_versiones].update_one(
+        {"_id": ID_VERSION_ACTUAL},
+        {"$set": {f"colecciones.{coleccion}": {"version": version, "fecha": ahora, **datos}}},
+    )
+    return version
@@ -0,0 +1,10 @@
+# backend/app/tests/conftest.py
+
+'''
+# Configuración común de las pruebas del backend: las respuestas de los
+# endpoints se validan con su modelo (`app.services.respuesta_service`).
+'''
+
+import os
+
+os.environ.setdefault("VALIDAR_RESPUESTAS", "1")
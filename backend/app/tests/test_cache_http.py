@@ -0,0 +1,65 @@
+# backend/app/tests/test_cache_http.py
+
+'''
+# Pruebas de la caché HTTP (`app.services.cache_http_service`):
+#   - `calcular_etag`: cambia con la versión del dataset, los parámetros y la
+#     variante, y no depende del orden de los parámetros.
+#   - Endpoint de grafos: devuelve ETag y Cache-Control, y con un
+#     `If-None-Match` que coincide responde 304 sin construir el grafo.
+'''
+
+import orjson
+import pytest
+from unittest.mock import AsyncMock, patch
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.routers.router_kegg_graph import kegg_graph_router
+from app.services.cache_http_service import calcular_etag, etag_coincide, CACHE_CONTROL
+from app.tests.test_respuesta_service import GRAFO, URL
+
+
+def test_calcular_etag():
+    etag = calcular_etag(3, "/grafo", [("a", "1"), ("b", "2")], "application/json")
+    assert etag.startswith('"v3-') and etag.endswith('"')
+    assert etag == calcular_etag(3, "/grafo", [("b", "2"), ("a", "1")], "application/json")
+    assert etag != calcular_etag(4, "/grafo", [("a", "1"), ("b", "2")], "application/json")
+    assert etag != calcular_etag(3, "/grafo", [("a", "1")], "application/json")
+    assert etag != calcular_etag(3, "/grafo", [("a", "1"), ("b", "2")], "application/octet-stream")
+
+    assert etag_coincide(f'"otro", W/{etag}', etag)
+    assert etag_coincide("*", etag)
+    assert not etag_coincide(None, etag) and not etag_coincide('"otro"', etag)
+
+
+@pytest.fixture
+def cliente(monkeypatch):
+    monkeypatch.setenv("VALIDAR_RESPUESTAS", "0")
+    app = FastAPI()
+    app.include_router(kegg_graph_router)
+    return TestClient(app)
+
+
+def test_grafo_etag_y_304(cliente):
+    grafo_json = AsyncMock(return_value=orjson.dumps(GRAFO))
+    with patch("app.services.cache_http_service.obtener_version_dataset", AsyncMock(return_value=7)), \
+            patch("app.routers.router_kegg_graph.obtener_grafo_ruta_json", grafo_json):
+        respuesta = cliente.get(URL)
+        assert respuesta.status_code == 200
+        etag = respuesta.headers["etag"]
+        assert etag.startswith('"v7-')
+        assert respuesta.headers["cache-control"] == CACHE_CONTROL["grafo"]
+
+        no_modificado = cliente.get(URL, headers={"If-None-Match": etag})
+        assert no_modificado.status_code == 304
+        assert no_modificado.content == b""
+        assert no_modificado.headers["etag"] == etag
+        assert grafo_json.await_count == 1
+
+        # Otros parámetros, otro ETag
+        assert cliente.get(URL, params={"include_metrics": "false"},
+                           headers={"If-None-Match": etag}).status_code == 200
+
+    with patch("app.services.cache_http_service.obtener_version_dataset", AsyncMock(return_value=8)), \
+            patch("app.routers.router_kegg_graph.obtener_grafo_ruta_json", grafo_json):
+        # Nueva versión del dataset: el ETag anterior ya no vale
+        assert cliente.get(URL, headers={"If-None-Match": etag}).status_code == 200
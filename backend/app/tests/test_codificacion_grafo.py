@@ -0,0 +1,91 @@
+# backend/app/tests/test_codificacion_grafo.py
+
+'''
+# Pruebas de las codificaciones compactas del grafo y del JSON por bloques
+# (`app.services.kegg_codificacion_service`).
+'''
+
+import orjson
+import pytest
+from app.services.kegg_codificacion_service import (
+    elegir_codificacion, a_columnar, a_binario, desde_binario, a_json_por_bloques,
+    MEDIA_TYPE_COLUMNAR, MEDIA_TYPE_BINARIO
+)
+
+GRAFO_PRUEBA = {
+    "_id": "bce00010",
+    "name": "Glycolysis",
+    "pathwayName": "Glycolysis",
+    "organism_code": "bce",
+    "image_url": None,
+    "nodes": [
+        {"id": "bce:BC1", "label": "pgi", "type": "gene", "x": 10, "y": 20},
+        {"id": "cpd:C1", "label": "C1", "type": "compound", "x": None, "y": -5},
+        {"id": "bce:BC2", "label": "pgi", "type": "gene", "x": 30, "y": 40},
+    ],
+    "edges": [
+        {"source": "bce:BC1", "target": "cpd:C1", "label": "compound"},
+        {"source": "cpd:C1", "target": "bce:BC2", "label": "compound"},
+    ],
+}
+
+
+def test_elegir_codificacion():
+    assert elegir_codificacion(None) is None
+    assert elegir_codificacion("application/json") is None
+    assert elegir_codificacion(f"{MEDIA_TYPE_COLUMNAR}, */*") == MEDIA_TYPE_COLUMNAR
+    assert elegir_codificacion(MEDIA_TYPE_BINARIO) == MEDIA_TYPE_BINARIO
+    assert elegir_codificacion("*/*") is None
+    assert elegir_codificacion(f"{MEDIA_TYPE_BINARIO};q=0, {MEDIA_TYPE_COLUMNAR}") == MEDIA_TYPE_COLUMNAR
+    assert elegir_codificacion(f"{MEDIA_TYPE_COLUMNAR};q=0") is None
+    assert elegir_codificacion(f"application/json, {MEDIA_TYPE_COLUMNAR};q=0.5") is None
+    assert elegir_codificacion(f"application/json;q=0.5, {MEDIA_TYPE_COLUMNAR}") == MEDIA_TYPE_COLUMNAR
+    assert elegir_codificacion(f"{MEDIA_TYPE_COLUMNAR};q=0.5, {MEDIA_TYPE_BINARIO};q=0.9") == MEDIA_TYPE_BINARIO
+    assert elegir_codificacion(f"{MEDIA_TYPE_COLUMNAR}-v2") is None  # No vale por subcadena
+
+
+def test_a_columnar_interna_cadenas_y_usa_indices():
+    columnar = a_columnar(GRAFO_PRUEBA)
+    cadenas = columnar["strings"]
+
+    assert columnar["pathwayId"] == "bce00010"
+    assert "image_url" not in columnar
+    assert cadenas.count("pgi") == 1 and cadenas.count("compound") == 1
+    assert [cadenas[i] for i in columnar["nodes"]["id"]] == ["bce:BC1", "cpd:C1", "bce:BC2"]
+    assert columnar["nodes"]["x"] == [10, None, 30]
+    assert columnar["edges"]["source"] == [0, 1]
+    assert columnar["edges"]["target"] == [1, 2]
+
+
+def test_a_columnar_ids_repetidos():
+    grafo = dict(GRAFO_PRUEBA, nodes=GRAFO_PRUEBA["nodes"] + [
+        {"id": "cpd:C1", "label": "C1", "type": "compound", "x": 99, "y": 99},
+    ])
+    columnar = a_columnar(grafo)
+    assert [columnar["strings"][i] for i in columnar["nodes"]["id"]] == ["bce:BC1", "cpd:C1", "bce:BC2", "cpd:C1"]
+    assert columnar["nodes"]["x"] == [10, None, 30, 99]
+    assert columnar["nodes"]["y"] == [20, -5, 40, 99]
+    assert columnar["edges"]["source"] == [0, 1]
+    assert columnar["edges"]["target"] == [1, 2]
+    assert desde_binario(a_binario(grafo)) == columnar
+
+
+def test_binario_ida_y_vuelta():
+    datos = a_binario(GRAFO_PRUEBA)
+    assert datos[:4] == b"CWG1"
+    assert desde_binario(datos) == a_columnar(GRAFO_PRUEBA)
+
+
+@pytest.mark.asyncio
+async def test_json_por_bloques_cabecera_primero():
+    grafo_json = orjson.dumps(GRAFO_PRUEBA)
+    bloques = [bloque async for bloque in a_json_por_bloques(grafo_json, {"metrics": None}, tamano_bloque=32)]
+
+    assert len(bloques) > 2
+    assert all(len(bloque) <= 32 for bloque in bloques[1:])
+    assert b'"metrics":null' in bloques[0] and b'"organism_code"' in bloques[0]
+    assert b'"nodes"' not in bloques[0]
+    assert orjson.loads(b"".join(bloques)) == dict(GRAFO_PRUEBA, metrics=None)
+
+    assert b"".join([b async for b in a_json_por_bloques(b"{}", {"metrics": None})]) == b'{"metrics":null}'
+    assert b"".join([b async for b in a_json_por_bloques(grafo_json)]) == grafo_json
@@ -0,0 +1,113 @@
+# backend/app/tests/test_compresion.py
+
+'''
+# Pruebas de la compresión gzip (`app.services.compresion_service`):
+#   - `acepta_gzip`: interpreta `Accept-Encoding` con sus valores `q`.
+#   - Endpoint de grafos: con gzip, el cuerpo se comprime una vez y se guarda en
+#     la caché (con el ETag como clave); las siguientes peticiones lo sirven
+#     desde la caché sin construir el grafo. Sin gzip se envía sin comprimir.
+#   - Recalcular las métricas (`guardar_metricas`) incrementa la versión del
+#     dataset: con `include_metrics` cambian el ETag, la clave de la caché gzip
+#     y la respuesta.
+'''
+
+import gzip
+import mongomock
+import orjson
+import pytest
+from unittest.mock import AsyncMock, patch
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.config.db import collection_dataset_versiones, collection_kegg_metricas_rutas
+from app.jobs.calcular_metricas_rutas import guardar_metricas
+from app.routers.router_kegg_graph import kegg_graph_router
+from app.services.kegg_metricas_service import calcular_metricas_ruta
+from app.services.version_dataset_service import leer_version_dataset
+from app.services.compresion_service import acepta_gzip, PREFIJO_CLAVE
+from app.tests.test_respuesta_service import GRAFO, URL
+from app.tests.test_metricas_rutas import _grafo_prueba
+
+
+def test_acepta_gzip():
+    assert acepta_gzip("gzip, deflate, br")
+    assert acepta_gzip("br;q=1.0, gzip;q=0.5")
+    assert acepta_gzip("*")
+    assert not acepta_gzip(None)
+    assert not acepta_gzip("br, deflate")
+    assert not acepta_gzip("gzip;q=0")
+    assert not acepta_gzip("*, gzip;q=0")
+
+
+@pytest.fixture
+def cliente(monkeypatch):
+    monkeypatch.setenv("VALIDAR_RESPUESTAS", "0")
+    app = FastAPI()
+    app.include_router(kegg_graph_router)
+    return TestClient(app)
+
+
+def test_grafo_gzip_comprimido_una_vez(cliente):
+    cache = {}
+
+    async def cache_get(clave):
+        return cache.get(clave)
+
+    async def cache_set(clave, valor, ttl=None):
+        cache[clave] = valor
+
+    grafo_json = AsyncMock(return_value=orjson.dumps(GRAFO))
+    with patch("app.services.cache_http_service.obtener_version_dataset", AsyncMock(return_value=1)), \
+            patch("app.routers.router_kegg_graph.obtener_grafo_ruta_json", grafo_json), \
+            patch("app.services.compresion_service.cache_get", cache_get), \
+            patch("app.services.compresion_service.cache_set", cache_set):
+        primera = cliente.get(URL, headers={"Accept-Encoding": "gzip"})
+        segunda = cliente.get(URL, headers={"Accept-Encoding": "gzip"})
+        sin_gzip = cliente.get(URL, headers={"Accept-Encoding": "identity"})
+
+    for respuesta in (primera, segunda):
+        assert respuesta.status_code == 200
+        assert respuesta.headers["content-encoding"] == "gzip"
+        assert respuesta.json() == dict(GRAFO, metrics=None)  # httpx descomprime
+    assert list(cache) == [PREFIJO_CLAVE + primera.headers["etag"]]
+    assert orjson.loads(gzip.decompress(cache[PREFIJO_CLAVE + primera.headers["etag"]])) == dict(GRAFO, metrics=None)
+
+    assert "content-encoding" not in sin_gzip.headers
+    assert sin_gzip.json() == dict(GRAFO, metrics=None)
+    assert sin_gzip.headers["etag"] != primera.headers["etag"]
+    assert grafo_json.await_count == 2  # La segunda petición con gzip no construye el grafo
+
+
+def test_recalcular_metricas_cambia_etag_y_respuesta(cliente):
+    db = mongomock.MongoClient().db
+    db[collection_dataset_versiones].insert_one({"_id": "actual", "version": 1})
+    db[collection_kegg_metricas_rutas].insert_one({"_id": "bce00010", "resumen": {"nodos": 0}, "nodos": []})
+    cache = {}
+
+    async def cache_get(clave):
+        return cache.get(clave)
+
+    async def cache_set(clave, valor, ttl=None):
+        cache[clave] = valor
+
+    async def version(_db):
+        return leer_version_dataset(db)
+
+    async def metricas(pathway_map_id, _db):
+        return db[collection_kegg_metricas_rutas].find_one({"_id": pathway_map_id}, {"_id": 0})
+
+    url = f"{URL}?include_metrics=true"
+    with patch("app.services.cache_http_service.obtener_version_dataset", version), \
+            patch("app.routers.router_kegg_graph.obtener_grafo_ruta_json", AsyncMock(return_value=orjson.dumps(GRAFO))), \
+            patch("app.routers.router_kegg_graph.obtener_metricas_ruta", metricas), \
+            patch("app.services.compresion_service.cache_get", cache_get), \
+            patch("app.services.compresion_service.cache_set", cache_set):
+        antes = cliente.get(url, headers={"Accept-Encoding": "gzip"})
+        guardar_metricas(db, [calcular_metricas_ruta(_grafo_prueba(), "bce00010")])
+        despues = cliente.get(url, headers={"Accept-Encoding": "gzip", "If-None-Match": antes.headers["etag"]})
+
+    assert antes.json()["metrics"]["resumen"] == {"nodos": 0}
+    assert despues.status_code == 200  # El ETag anterior ya no es válido
+    assert despues.headers["etag"] != antes.headers["etag"]
+    assert despues.json()["metrics"] == db[collection_kegg_metricas_rutas].find_one({"_id": "bce00010"}, {"_id": 0})
+    assert despues.json()["metrics"]["resumen"] != {"nodos": 0}
+    assert sorted(cache) == sorted(PREFIJO_CLAVE + r.headers["etag"] for r in (antes, despues))
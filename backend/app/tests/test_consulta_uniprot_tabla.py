@@ -0,0 +1,91 @@
+# backend/app/tests/test_consulta_uniprot_tabla.py
+
+'''
+# Pruebas de `obtener_resultados_tabla` con la colección simulada con
+# `mongomock` (envuelta para exponer la API asíncrona de motor):
+#   - La proyección `tabla` se devuelve con la forma de `QueryResponse`,
+#     añadiendo la secuencia completa.
+#   - Un documento sin `tabla` (cargado antes de la proyección) no se devuelve
+#     ni ocupa los huecos del límite de resultados.
+#   - Sin coincidencias se responde 404.
+'''
+
+import mongomock
+import pytest
+from unittest.mock import patch
+from fastapi import HTTPException
+from app.consultas.consulta_uniprot_tabla import obtener_resultados_tabla
+
+TABLA = {
+    "primaryAccession": "Q81JF6",
+    "proteinDescription": "Chromosomal replication initiator protein DnaA",
+    "genes": [{"geneName": "dnaA", "orderedLocusNames": "BC_0001"}],
+    "locusNames": ["BC_0001"],
+    "geneNames": ["dnaA"],
+    "sequence": {"length": 4, "molWeight": 512, "crc64": "ABC", "md5": "def"},
+}
+
+
+class _CursorMotor:
+    def __init__(self, documentos):
+        self._documentos = documentos
+
+    async def to_list(self, length=None):
+        return list(self._documentos)[:length]
+
+
+class _ColeccionMotor:
+    def __init__(self, coleccion):
+        self._coleccion = coleccion
+
+    def aggregate(self, pipeline):
+        return _CursorMotor(self._coleccion.aggregate(pipeline))
+
+
+@pytest.fixture
+def db_simulada():
+    coleccion = mongomock.MongoClient().db.UniProt
+    coleccion.insert_many([
+        {"primaryAccession": "Q81JF6", "genes": [{"orderedLocusNames": [{"value": "BC_0001"}]}],
+         "sequence": {"value": "MENI", "length": 4}, "tabla": TABLA},
+        {"primaryAccession": "Q81JF7", "sequence": {"value": "MKKL", "length": 4}},
+    ])
+    with patch("app.consultas.consulta_uniprot_tabla.db", {"UniProt": _ColeccionMotor(coleccion)}):
+        yield coleccion
+
+
+@pytest.mark.asyncio
+async def test_obtener_resultados_tabla_proyecta_tabla(db_simulada):
+    resultados = await obtener_resultados_tabla("bc_0001")
+
+    assert resultados == [{
+        "primaryAccession": "Q81JF6",
+        "proteinDescription": "Chromosomal replication initiator protein DnaA",
+        "genes": [{"geneName": "dnaA", "orderedLocusNames": "BC_0001"}],
+        "sequence": {"value": "MENI", "length": 4, "molWeight": 512, "crc64": "ABC", "md5": "def"},
+    }]
+
+
+@pytest.mark.asyncio
+async def test_documentos_sin_tabla_no_ocupan_el_limite(db_simulada):
+    # Más documentos sin `tabla` que el límite, insertados antes del que sí la tiene
+    db_simulada.insert_many([
+        {"primaryAccession": f"Q81K{i:02d}", "sequence": {"value": "MKKL", "length": 4}} for i in range(12)
+    ])
+    db_simulada.insert_one({"primaryAccession": "Q81K99", "sequence": {"value": "MENI", "length": 4},
+                            "tabla": dict(TABLA, primaryAccession="Q81K99")})
+
+    resultados = await obtener_resultados_tabla("Q81K")
+
+    assert [r["primaryAccession"] for r in resultados] == ["Q81K99"]
+
+
+@pytest.mark.asyncio
+async def test_obtener_resultados_tabla_sin_tabla_o_sin_coincidencias(db_simulada):
+    with pytest.raises(HTTPException) as sin_tabla:
+        await obtener_resultados_tabla("Q81JF7")
+    assert sin_tabla.value.status_code == 404
+
+    with pytest.raises(HTTPException) as sin_coincidencias:
+        await obtener_resultados_tabla("XXXX")
+    assert sin_coincidencias.value.status_code == 404
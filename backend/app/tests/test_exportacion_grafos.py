@@ -0,0 +1,127 @@
+# backend/app/tests/test_exportacion_grafos.py
+
+'''
+# Pruebas de la exportación estática de grafos (`app.jobs.exportar_grafos` y
+# `app.services.exportacion_grafos_service`) con una colección `mongomock`:
+#   - Se escriben el grafo y sus proyecciones comprimidos en `v<version>/`,
+#     con el hash del contenido en el nombre, y el manifiesto con las rutas
+#     vecinas. El JSON es el mismo que devuelve el endpoint.
+#   - `ExportacionGrafosStatic` sirve los archivos con gzip y caché inmutable
+#     (y descomprimidos si el cliente no admite gzip) y el manifiesto con
+#     `no-cache`.
+#   - `limpiar_versiones` conserva las versiones más recientes.
+#   - `mapear_acotado` (`app.jobs.ejecucion_acotada`) no lee más documentos de los que caben pendientes.
+'''
+
+import gzip
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import mongomock
+import orjson
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.config.db import collection_kegg_rutas_hgml, collection_dataset_versiones
+from app.jobs.exportar_grafos import exportar_grafos, limpiar_versiones
+from app.jobs.ejecucion_acotada import mapear_acotado
+from app.services.exportacion_grafos_service import (
+    ExportacionGrafosStatic, proyeccion_desde_texto, CACHE_CONTROL_INMUTABLE
+)
+from app.tests.test_indice_genes_nodos import KGML_PRUEBA
+
+KGML_CON_MAPA = KGML_PRUEBA.replace("</pathway>", """    <entry id="4" name="path:bce00020" type="map">
+        <graphics name="TCA cycle" x="500" y="600"/>
+    </entry>
+</pathway>""")
+
+
+@pytest.fixture
+def db():
+    db = mongomock.MongoClient().db
+    db[collection_dataset_versiones].insert_one({"_id": "actual", "version": 3})
+    db[collection_kegg_rutas_hgml].insert_many([
+        {"_id": "bce00010", "name": "Glycolysis", "organism_code": "bce", "kgml_data": KGML_CON_MAPA},
+        {"_id": "bce00020", "name": "TCA cycle", "organism_code": "bce", "kgml_data": "<no es xml"},
+    ])
+    return db
+
+
+def test_proyeccion_desde_texto():
+    proyeccion = proyeccion_desde_texto("node_types=gene,compound&collapse_compounds=true")
+    assert proyeccion.tipos == frozenset({"gene", "compound"})
+    assert proyeccion.colapsar_compuestos and not proyeccion.quitar_mapas_huerfanos
+    with pytest.raises(ValueError):
+        proyeccion_desde_texto("otro=1")
+
+
+def test_exportar_y_servir(db, tmp_path):
+    proyeccion = proyeccion_desde_texto("node_types=gene")
+    manifiesto = exportar_grafos(db, str(tmp_path), [proyeccion], procesos=1)
+
+    assert manifiesto["version"] == 3
+    assert list(manifiesto["rutas"]) == ["bce00010"]  # bce00020 no se puede parsear
+    ruta = manifiesto["rutas"]["bce00010"]
+    assert ruta["archivo"].startswith("v3/bce00010.") and ruta["archivo"].endswith(".json.gz")
+    assert ruta["vecinas"] == ["bce00020"]
+    assert (ruta["nodos"], ruta["aristas"]) == (4, 0)
+    assert orjson.loads((tmp_path / "manifest.json").read_bytes()) == manifiesto
+    assert (tmp_path / "v3" / "manifest.json").exists()
+
+    grafo = orjson.loads(gzip.decompress((tmp_path / ruta["archivo"]).read_bytes()))
+    assert grafo["_id"] == "bce00010" and grafo["metrics"] is None
+    assert len(grafo["nodes"]) == 4 and all(n["x"] is not None for n in grafo["nodes"])
+    solo_genes = orjson.loads(gzip.decompress((tmp_path / ruta["proyecciones"][proyeccion.clave()]["archivo"]).read_bytes()))
+    assert {n["type"] for n in solo_genes["nodes"]} == {"gene"}
+
+    app = FastAPI()
+    app.mount("/export", ExportacionGrafosStatic(directory=str(tmp_path)))
+    cliente = TestClient(app)
+
+    con_gzip = cliente.get(f"/export/{ruta['archivo']}", headers={"Accept-Encoding": "gzip"})
+    assert con_gzip.status_code == 200
+    assert con_gzip.headers["content-encoding"] == "gzip"
+    assert con_gzip.headers["content-type"] == "application/json"
+    assert con_gzip.headers["cache-control"] == CACHE_CONTROL_INMUTABLE
+    assert con_gzip.json() == grafo
+
+    sin_gzip = cliente.get(f"/export/{ruta['archivo']}", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in sin_gzip.headers
+    assert sin_gzip.json() == grafo
+
+    manifiesto_http = cliente.get("/export/manifest.json")
+    assert manifiesto_http.headers["cache-control"] == "no-cache"
+    assert cliente.get("/export/manifest.json",
+                       headers={"If-None-Match": manifiesto_http.headers["etag"]}).status_code == 304
+
+
+def test_limpiar_versiones(tmp_path):
+    for version in (1, 2, 10):
+        os.makedirs(tmp_path / f"v{version}")
+    assert limpiar_versiones(str(tmp_path), conservar=2) == ["v1"]
+    assert sorted(os.listdir(tmp_path)) == ["v10", "v2"]
+
+
+def test_mapear_acotado_consume_el_iterable_poco_a_poco():
+    leidos = []
+    liberar = threading.Event()
+
+    def argumentos():
+        for i in range(20):
+            leidos.append(i)
+            yield (i,)
+
+    def tarea(i):
+        liberar.wait(5)
+        return i * 2
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        resultados = mapear_acotado(executor, tarea, argumentos(), maximo=3)
+        hilo = threading.Thread(target=lambda: leidos.append(sorted(resultados)))
+        hilo.start()
+        hilo.join(0.2)
+        assert len(leidos) == 4  # 3 pendientes y el cuarto espera hueco
+        liberar.set()
+        hilo.join(5)
+
+    assert leidos[-1] == [i * 2 for i in range(20)]
@@ -0,0 +1,113 @@
+# backend/app/tests/test_indice_genes_nodos.py
+
+'''
+# Pruebas del índice gen -> (ruta, nodo, x, y):
+#   - `normalizar_id_gen_kegg`: distintas formas de escribir un mismo gen
+#     producen la misma clave.
+#   - `extraer_nodos_por_gen`: los nodos KGML con varios genes se separan y
+#     solo se indexan los nodos de tipo "gene".
+#   - `obtener_resaltados_por_ruta`: agrupa por ruta y devuelve los genes
+#     que no están en el índice (con la colección simulada mediante mocks);
+#     las accesiones de UniProt se traducen con la relación KEGG <-> UniProt.
+'''
+
+import pytest
+from unittest.mock import MagicMock
+from app.config.db import collection_kegg_genes_nodos, collection_kegg_uniprot
+from app.services.kegg_service import (
+    parse_kgml_to_graph, normalizar_id_gen_kegg, extraer_nodos_por_gen, obtener_resaltados_por_ruta
+)
+
+KGML_PRUEBA = """<?xml version="1.0"?>
+<pathway name="path:bce00010" org="bce" number="00010">
+    <entry id="1" name="bce:BC5335 bce:BC5336" type="gene">
+        <graphics name="pgi, BC5335..." x="100" y="200"/>
+    </entry>
+    <entry id="2" name="cpd:C00031" type="compound">
+        <graphics name="C00031" x="50" y="60"/>
+    </entry>
+    <entry id="3" name="bce:BC5335" type="gene">
+        <graphics name="pgi" x="300" y="400"/>
+    </entry>
+</pathway>"""
+
+
+class _CursorAsync:
+    def __init__(self, docs):
+        self._docs = iter(docs)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self._docs)
+        except StopIteration:
+            raise StopAsyncIteration
+
+
+def test_normalizar_id_gen_kegg():
+    assert normalizar_id_gen_kegg("BC_5335") == "bce:BC5335"
+    assert normalizar_id_gen_kegg("bce:BC5335") == "bce:BC5335"
+    assert normalizar_id_gen_kegg(" BCE:BC_5335 ") == "bce:BC5335"
+
+
+def test_extraer_nodos_por_gen():
+    grafo = parse_kgml_to_graph(KGML_PRUEBA, "bce00010")
+    indice = extraer_nodos_por_gen(grafo, "bce00010")
+
+    assert set(indice) == {"bce:BC5335", "bce:BC5336"}
+    assert indice["bce:BC5335"] == [
+        {"pathway_id": "bce00010", "node_id": "bce:BC5335 bce:BC5336", "x": 100, "y": 200},
+        {"pathway_id": "bce00010", "node_id": "bce:BC5335", "x": 300, "y": 400},
+    ]
+    assert indice["bce:BC5336"][0]["node_id"] == "bce:BC5335 bce:BC5336"
+
+
+@pytest.mark.asyncio
+async def test_obtener_resaltados_por_ruta():
+    mock_db = MagicMock()
+    mock_db.__getitem__.return_value.find.return_value = _CursorAsync([
+        {"_id": "bce:BC5335", "nodos": [
+            {"pathway_id": "bce00010", "node_id": "bce:BC5335", "x": 1, "y": 2},
+            {"pathway_id": "bce00020", "node_id": "bce:BC5335", "x": 3, "y": 4},
+        ]},
+    ])
+
+    resultado = await obtener_resaltados_por_ruta(["BC_5335", "BC_9999"], mock_db)
+
+    assert set(resultado["pathways"]) == {"bce00010", "bce00020"}
+    assert resultado["pathways"]["bce00010"][0]["gene"] == "BC_5335"
+    assert resultado["genes_no_encontrados"] == ["BC_9999"]
+
+
+class _ColeccionSimulada:
+    """Colección con `find({campo: {"$in": valores}})` sobre una lista de documentos."""
+
+    def __init__(self, docs):
+        self.docs = docs
+
+    def find(self, filtro, proyeccion=None):
+        (campo, condicion), = filtro.items()
+        valores = set(condicion["$in"])
+        return _CursorAsync([
+            doc for doc in self.docs
+            if valores & set(doc[campo] if isinstance(doc[campo], list) else [doc[campo]])
+        ])
+
+
+@pytest.mark.asyncio
+async def test_obtener_resaltados_por_accesion_uniprot():
+    colecciones = {
+        collection_kegg_genes_nodos: _ColeccionSimulada([
+            {"_id": "bce:BC5335", "nodos": [{"pathway_id": "bce00010", "node_id": "bce:BC5335", "x": 1, "y": 2}]},
+        ]),
+        collection_kegg_uniprot: _ColeccionSimulada([
+            {"_id": "bce:BC_5335", "entry": "BC_5335", "uniprot": ["Q81IH1"]},
+        ]),
+    }
+
+    resultado = await obtener_resaltados_por_ruta(["Q81IH1", "BC_5335", "Q99999"], colecciones)
+
+    assert [nodo["gene"] for nodo in resultado["pathways"]["bce00010"]] == ["BC_5335", "Q81IH1"]
+    assert resultado["genes_no_encontrados"] == ["Q99999"]
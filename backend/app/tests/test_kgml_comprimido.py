@@ -0,0 +1,70 @@
+# backend/app/tests/test_kgml_comprimido.py
+
+'''
+# Pruebas del KGML comprimido (`app.services.kegg_kgml_comprimido_service`):
+#   - Ida y vuelta, documentos antiguos en texto y códecs desconocidos.
+#   - La migración `app.jobs.comprimir_kgml` (con `mongomock`) solo convierte los
+#     documentos en texto y se puede deshacer.
+#   - `obtener_grafo_ruta` parsea igual un documento comprimido.
+'''
+
+import mongomock
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+from app.config.db import collection_kegg_rutas_hgml
+from app.jobs.comprimir_kgml import comprimir_documentos, descomprimir_documentos
+from app.services.kegg_grafo_service import obtener_grafo_ruta
+from app.services.kegg_kgml_comprimido_service import comprimir_kgml, kgml_de_documento, CODEC_ZLIB
+
+KGML_PRUEBA = """<?xml version="1.0"?>
+<pathway name="path:bce00010" org="bce" number="00010">
+    <entry id="1" name="bce:BC5335" type="gene"><graphics name="pgi" x="100" y="200"/></entry>
+    <entry id="2" name="cpd:C00031" type="compound"><graphics name="C00031" x="50" y="60"/></entry>
+    <relation entry1="1" entry2="2" type="PPrel"/>
+</pathway>"""
+
+
+def test_comprimir_y_leer_documentos():
+    datos, codec = comprimir_kgml(KGML_PRUEBA)
+    assert codec == CODEC_ZLIB and len(datos) < len(KGML_PRUEBA)
+    assert kgml_de_documento({"kgml_data": datos, "kgml_codec": codec}) == KGML_PRUEBA
+    assert kgml_de_documento({"kgml_data": KGML_PRUEBA}) == KGML_PRUEBA
+    assert kgml_de_documento({}) is None
+    with pytest.raises(ValueError):
+        kgml_de_documento({"kgml_data": datos, "kgml_codec": "desconocido"})
+
+
+def test_migracion_comprimir_y_descomprimir():
+    db = mongomock.MongoClient().db
+    coleccion = db[collection_kegg_rutas_hgml]
+    datos, codec = comprimir_kgml("<pathway/>")
+    coleccion.insert_many([
+        {"_id": "bce00010", "kgml_data": KGML_PRUEBA},
+        {"_id": "bce00020", "kgml_data": datos, "kgml_codec": codec},
+    ])
+
+    resumen = comprimir_documentos(db, tamano_lote=1)
+    assert resumen["documentos"] == 1 and resumen["bytes_despues"] < resumen["bytes_antes"]
+    migrado = coleccion.find_one({"_id": "bce00010"})
+    assert migrado["kgml_codec"] == CODEC_ZLIB and kgml_de_documento(migrado) == KGML_PRUEBA
+    assert comprimir_documentos(db)["documentos"] == 0
+
+    assert descomprimir_documentos(db)["documentos"] == 2
+    assert coleccion.find_one({"_id": "bce00020"}) == {"_id": "bce00020", "kgml_data": "<pathway/>"}
+
+
+@pytest.mark.asyncio
+@patch("app.services.kegg_grafo_service.obtener_version_dataset", new_callable=AsyncMock, return_value=1)
+@patch("app.services.kegg_grafo_service.cache_set", new_callable=AsyncMock)
+@patch("app.services.kegg_grafo_service.cache_get", new_callable=AsyncMock, return_value=None)
+async def test_obtener_grafo_ruta_con_kgml_comprimido(mock_cache_get, mock_cache_set, mock_version):
+    datos, codec = comprimir_kgml(KGML_PRUEBA)
+    mock_db = MagicMock()
+    mock_db.__getitem__.return_value.find_one = AsyncMock(return_value={
+        "_id": "bce00010", "name": "Glycolysis", "kgml_data": datos, "kgml_codec": codec
+    })
+
+    grafo = await obtener_grafo_ruta("bce00010", mock_db)
+
+    assert [nodo["id"] for nodo in grafo["nodes"]] == ["bce:BC5335", "cpd:C00031"]
+    assert len(grafo["edges"]) == 1
@@ -0,0 +1,77 @@
+# backend/app/tests/test_layout_grafo.py
+
+'''
+# Pruebas del layout en servidor y de la caché de grafos:
+#   - `completar_coordenadas`: respeta las coordenadas KGML, completa las que
+#     faltan de forma determinista y no apila los nodos nuevos.
+#   - `obtener_grafo_ruta`: con la caché vacía parsea y guarda (con la versión
+#     del dataset en la clave); con la caché llena no consulta MongoDB.
+'''
+
+import orjson
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+from app.services.kegg_service import KgmlNode, KgmlEdge
+from app.services.kegg_layout_service import completar_coordenadas
+from app.services.kegg_grafo_service import obtener_grafo_ruta
+from app.tests.test_indice_genes_nodos import KGML_PRUEBA
+
+
+def _nodos_prueba():
+    return [
+        KgmlNode(id="a", label="a", type="gene", x=0, y=0),
+        KgmlNode(id="b", label="b", type="gene", x=400, y=0),
+        KgmlNode(id="c", label="c", type="gene", x=None, y=None),
+        KgmlNode(id="d", label="d", type="compound", x=None, y=None),
+        KgmlNode(id="e", label="e", type="map", x=None, y=None),
+    ]
+
+
+def test_completar_coordenadas():
+    aristas = [KgmlEdge(source="a", target="c", label=""), KgmlEdge(source="c", target="b", label="")]
+    nodos = completar_coordenadas(_nodos_prueba(), aristas)
+
+    assert (nodos[0]["x"], nodos[0]["y"]) == (0, 0)
+    assert (nodos[1]["x"], nodos[1]["y"]) == (400, 0)
+    assert all(isinstance(node["x"], int) and isinstance(node["y"], int) for node in nodos)
+    posiciones = {(node["x"], node["y"]) for node in nodos}
+    assert len(posiciones) == len(nodos)
+    # Determinista: el mismo grafo produce las mismas coordenadas
+    assert completar_coordenadas(_nodos_prueba(), aristas) == nodos
+
+
+def test_completar_coordenadas_sin_nodos_moviles():
+    nodos = _nodos_prueba()[:2]
+    assert completar_coordenadas(nodos, []) == nodos
+
+
+@pytest.mark.asyncio
+@patch("app.services.kegg_grafo_service.obtener_version_dataset", new_callable=AsyncMock, return_value=3)
+@patch("app.services.kegg_grafo_service.cache_set", new_callable=AsyncMock)
+@patch("app.services.kegg_grafo_service.cache_get", new_callable=AsyncMock, return_value=None)
+async def test_obtener_grafo_ruta_guarda_en_cache(mock_cache_get, mock_cache_set, mock_version):
+    mock_db = MagicMock()
+    mock_db.__getitem__.return_value.find_one = AsyncMock(return_value={
+        "_id": "bce00010", "name": "Glycolysis", "organism_code": "bce", "kgml_data": KGML_PRUEBA
+    })
+
+    grafo = await obtener_grafo_ruta("bce00010", mock_db)
+
+    assert grafo["_id"] == "bce00010"
+    assert len(grafo["nodes"]) == 3
+    mock_cache_set.assert_awaited_once()
+    assert mock_cache_set.await_args.args[0] == "grafo:v3:bce00010"
+    assert orjson.loads(mock_cache_set.await_args.args[1]) == grafo
+
+
+@pytest.mark.asyncio
+@patch("app.services.kegg_grafo_service.obtener_version_dataset", new_callable=AsyncMock, return_value=3)
+@patch("app.services.kegg_grafo_service.cache_get", new_callable=AsyncMock)
+async def test_obtener_grafo_ruta_desde_cache(mock_cache_get, mock_version):
+    mock_cache_get.return_value = orjson.dumps({"_id": "bce00010", "nodes": [], "edges": []})
+    mock_db = MagicMock()
+
+    grafo = await obtener_grafo_ruta("bce00010", mock_db)
+
+    assert grafo["_id"] == "bce00010"
+    mock_db.__getitem__.assert_not_called()
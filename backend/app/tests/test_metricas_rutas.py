@@ -0,0 +1,85 @@
+# backend/app/tests/test_metricas_rutas.py
+
+'''
+# Pruebas de `app.services.kegg_metricas_service` sobre un grafo pequeño:
+#   A - B - C  y  D - E   (dos componentes; B es punto de articulación)
+# de su cálculo sobre la colección de KGML (`calcular_metricas`, que omite las
+# rutas con KGML inválido) y de su guardado
+# (`app.jobs.calcular_metricas_rutas.guardar_metricas`), que sustituye las
+# colecciones e incrementa la versión del dataset.
+'''
+
+import mongomock
+from app.config.db import (
+    collection_kegg_metricas_rutas, collection_kegg_metricas_genes, collection_dataset_versiones,
+    collection_kegg_rutas_hgml
+)
+from app.jobs.calcular_metricas_rutas import calcular_metricas, guardar_metricas
+from app.services.kegg_service import KgmlNode, KgmlEdge, ParsedKgmlGraph
+from app.services.kegg_metricas_service import calcular_metricas_ruta, metricas_por_gen
+from app.tests.test_indice_genes_nodos import KGML_PRUEBA
+
+
+def _grafo_prueba() -> ParsedKgmlGraph:
+    nodos = [
+        KgmlNode(id="bce:A", label="A", type="gene", x=0, y=0),
+        KgmlNode(id="bce:B bce:B2", label="B", type="gene", x=1, y=0),
+        KgmlNode(id="cpd:C", label="C", type="compound", x=2, y=0),
+        KgmlNode(id="bce:D", label="D", type="gene", x=0, y=1),
+        KgmlNode(id="bce:E", label="E", type="gene", x=1, y=1),
+    ]
+    aristas = [
+        KgmlEdge(source="bce:A", target="bce:B bce:B2", label=""),
+        KgmlEdge(source="bce:B bce:B2", target="cpd:C", label=""),
+        KgmlEdge(source="bce:D", target="bce:E", label=""),
+    ]
+    return ParsedKgmlGraph(nodes=nodos, edges=aristas, error=None)
+
+
+def test_calcular_metricas_ruta():
+    metricas = calcular_metricas_ruta(_grafo_prueba(), "bce00010")
+
+    assert metricas["_id"] == "bce00010"
+    assert metricas["resumen"] == {"num_nodos": 5, "num_aristas": 3, "num_componentes": 2, "diametro": 2}
+
+    por_nodo = {nodo["node_id"]: nodo for nodo in metricas["nodos"]}
+    assert "cpd:C" not in por_nodo  # Solo se devuelven nodos de genes
+    assert por_nodo["bce:B bce:B2"]["grado"] == 2
+    assert por_nodo["bce:B bce:B2"]["punto_articulacion"] is True
+    assert por_nodo["bce:A"]["punto_articulacion"] is False
+    assert por_nodo["bce:B bce:B2"]["intermediacion"] > por_nodo["bce:A"]["intermediacion"]
+
+
+def test_metricas_por_gen_separa_nodos_compuestos():
+    por_gen = metricas_por_gen(calcular_metricas_ruta(_grafo_prueba(), "bce00010"))
+
+    assert por_gen["bce:B"][0]["pathway_id"] == "bce00010"
+    assert por_gen["bce:B"][0]["grado"] == por_gen["bce:B2"][0]["grado"] == 2
+
+
+def test_guardar_metricas_elimina_rutas_obsoletas():
+    db = mongomock.MongoClient().db
+    db[collection_kegg_metricas_rutas].insert_one({"_id": "bce99999", "resumen": {}, "nodos": []})
+    db[collection_kegg_metricas_genes].insert_one({"_id": "bce:OBSOLETO", "rutas": []})
+    db[collection_dataset_versiones].insert_one({"_id": "actual", "version": 7})
+
+    assert guardar_metricas(db, [calcular_metricas_ruta(_grafo_prueba(), "bce00010")]) == 8
+
+    assert [d["_id"] for d in db[collection_kegg_metricas_rutas].find({})] == ["bce00010"]
+    assert sorted(d["_id"] for d in db[collection_kegg_metricas_genes].find({})) == [
+        "bce:A", "bce:B", "bce:B2", "bce:D", "bce:E"
+    ]
+    version = db[collection_dataset_versiones].find_one({"_id": "actual"})
+    assert version["version"] == 8
+    assert version["colecciones"][collection_kegg_metricas_rutas]["documentos"] == 1
+
+
+def test_calcular_metricas_desde_la_coleccion():
+    db = mongomock.MongoClient().db
+    db[collection_kegg_rutas_hgml].insert_many([
+        {"_id": "bce00010", "kgml_data": KGML_PRUEBA},
+        {"_id": "bce00020", "kgml_data": "<no es xml"},
+    ])
+
+    metricas = calcular_metricas(db, procesos=1)
+    assert [m["_id"] for m in metricas] == ["bce00010"]
@@ -0,0 +1,103 @@
+# backend/app/tests/test_proyecciones_grafo.py
+
+'''
+# Pruebas de `app.services.kegg_proyecciones_service`:
+#   g1 -> c1 -> g2,  g1 -> c2 -> g2,  g2 -> c3 (sin gen de salida),
+#   g2 -> m1 (mapa conectado) y m2 (mapa huérfano).
+# y del colapso sobre un fragmento KGML real de glucólisis (bce00010), donde
+# las cadenas gen -> compuesto -> gen solo existen a través de `<reaction>`.
+'''
+
+import pytest
+from app.services.kegg_service import KgmlNode, KgmlEdge, ParsedKgmlGraph, parse_kgml_to_graph
+from app.services.kegg_proyecciones_service import ProyeccionGrafo, crear_proyeccion, proyectar_grafo
+
+# pgi (R02740, reversible): C00668 <-> C05345;  pfkA (R04779): C05345 -> C05378
+KGML_REACCIONES = """<?xml version="1.0"?>
+<pathway name="path:bce00010" org="bce" number="00010">
+    <entry id="13" name="bce:BC5335" type="gene" reaction="rn:R02740">
+        <graphics name="pgi" x="483" y="407"/>
+    </entry>
+    <entry id="40" name="bce:BC4818" type="gene" reaction="rn:R04779">
+        <graphics name="pfkA" x="483" y="521"/>
+    </entry>
+    <entry id="63" name="cpd:C00668" type="compound">
+        <graphics name="C00668" x="483" y="372"/>
+    </entry>
+    <entry id="64" name="cpd:C05345" type="compound">
+        <graphics name="C05345" x="483" y="466"/>
+    </entry>
+    <entry id="65" name="cpd:C05378" type="compound">
+        <graphics name="C05378" x="483" y="578"/>
+    </entry>
+    <reaction id="13" name="rn:R02740" type="reversible">
+        <substrate id="63" name="cpd:C00668"/>
+        <product id="64" name="cpd:C05345"/>
+    </reaction>
+    <reaction id="40" name="rn:R04779" type="irreversible">
+        <substrate id="64" name="cpd:C05345"/>
+        <product id="65" name="cpd:C05378"/>
+    </reaction>
+</pathway>"""
+
+
+def _grafo_prueba() -> ParsedKgmlGraph:
+    nodos = [
+        KgmlNode(id="g1", label="G1", type="gene", x=0, y=0),
+        KgmlNode(id="g2", label="G2", type="gene", x=0, y=0),
+        KgmlNode(id="c1", label="C1", type="compound", x=0, y=0),
+        KgmlNode(id="c2", label="C2", type="compound", x=0, y=0),
+        KgmlNode(id="c3", label="C3", type="compound", x=0, y=0),
+        KgmlNode(id="m1", label="M1", type="map", x=0, y=0),
+        KgmlNode(id="m2", label="M2", type="map", x=0, y=0),
+    ]
+    aristas = [
+        KgmlEdge(source="g1", target="c1", label=""),
+        KgmlEdge(source="c1", target="g2", label=""),
+        KgmlEdge(source="g1", target="c2", label=""),
+        KgmlEdge(source="c2", target="g2", label=""),
+        KgmlEdge(source="g2", target="c3", label=""),
+        KgmlEdge(source="g2", target="m1", label="maplink"),
+    ]
+    return ParsedKgmlGraph(nodes=nodos, edges=aristas, error=None)
+
+
+def test_crear_proyeccion_y_clave_canonica():
+    a = crear_proyeccion("gene, compound", True, False)
+    b = crear_proyeccion("compound,gene", True, False)
+    assert a == b and a.clave() == b.clave()
+    assert crear_proyeccion("", False, False).es_identidad()
+    with pytest.raises(ValueError):
+        crear_proyeccion("gene,genes", False, False)
+
+
+def test_colapsar_compuestos():
+    grafo = proyectar_grafo(_grafo_prueba(), ProyeccionGrafo(colapsar_compuestos=True))
+
+    assert {node["id"] for node in grafo["nodes"]} == {"g1", "g2", "m1", "m2"}
+    assert {(e["source"], e["target"], e["label"]) for e in grafo["edges"]} == {
+        ("g1", "g2", "via C1, C2"),
+        ("g2", "m1", "maplink"),
+    }
+
+
+def test_filtro_por_tipo_y_mapas_huerfanos():
+    solo_genes = proyectar_grafo(_grafo_prueba(), ProyeccionGrafo(tipos=frozenset({"gene"}), colapsar_compuestos=True))
+    assert [e["label"] for e in solo_genes["edges"]] == ["via C1, C2"]
+
+    sin_huerfanos = proyectar_grafo(_grafo_prueba(), ProyeccionGrafo(quitar_mapas_huerfanos=True))
+    ids = {node["id"] for node in sin_huerfanos["nodes"]}
+    assert "m1" in ids and "m2" not in ids
+    assert len(sin_huerfanos["edges"]) == 6
+
+
+def test_colapsar_compuestos_de_reacciones_kgml():
+    grafo = parse_kgml_to_graph(KGML_REACCIONES, "bce00010")
+    assert ("cpd:C05345", "bce:BC4818", "rn:R04779") in {(e["source"], e["target"], e["label"]) for e in grafo["edges"]}
+
+    colapsado = proyectar_grafo(grafo, ProyeccionGrafo(tipos=frozenset({"gene"}), colapsar_compuestos=True))
+    assert [node["id"] for node in colapsado["nodes"]] == ["bce:BC5335", "bce:BC4818"]
+    # pfkA es irreversible: no hay arista de vuelta pfkA -> pgi
+    assert [(e["source"], e["target"], e["label"]) for e in colapsado["edges"]] == [
+        ("bce:BC5335", "bce:BC4818", "via C05345")
+    ]
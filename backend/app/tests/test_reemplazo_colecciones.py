@@ -0,0 +1,47 @@
+# backend/app/tests/test_reemplazo_colecciones.py
+
+'''
+# Pruebas de `app.jobs.reemplazo_colecciones.reemplazar_coleccion` con
+# `mongomock`: el contenido anterior se sustituye entero (los documentos que ya
+# no existen desaparecen), la colección temporal no queda tras el renombrado y
+# un fallo a mitad deja intacta la colección anterior.
+'''
+
+import mongomock
+import pytest
+from app.config.db import collection_kegg_genes_nodos
+from app.jobs.construir_indice_genes_nodos import guardar_indice
+from app.jobs.reemplazo_colecciones import reemplazar_coleccion, SUFIJO_TEMPORAL
+
+
+@pytest.fixture
+def db():
+    db = mongomock.MongoClient().db
+    db["datos"].insert_many([{"_id": "viejo", "valor": 0}, {"_id": "a", "valor": 0}])
+    return db
+
+
+def test_reemplazar_coleccion(db):
+    total = reemplazar_coleccion(db, "datos", ({"_id": c, "valor": 1} for c in "abc"),
+                                 indices=["valor"], tamano_lote=2)
+    assert total == 3
+    assert sorted(d["_id"] for d in db["datos"].find({"valor": 1})) == ["a", "b", "c"]
+    assert db["datos"].count_documents({}) == 3
+    assert "datos" + SUFIJO_TEMPORAL not in db.list_collection_names()
+
+
+def test_reemplazar_coleccion_fallo_conserva_la_anterior(db):
+    def documentos():
+        yield {"_id": "nuevo"}
+        raise RuntimeError("fallo a mitad")
+
+    with pytest.raises(RuntimeError):
+        reemplazar_coleccion(db, "datos", documentos(), tamano_lote=1)
+    assert sorted(d["_id"] for d in db["datos"].find({})) == ["a", "viejo"]
+
+
+def test_guardar_indice_elimina_genes_obsoletos(db):
+    db[collection_kegg_genes_nodos].insert_one({"_id": "bce:OBSOLETO", "nodos": []})
+    nodo = {"pathway_id": "bce00010", "node_id": "1", "x": 1.0, "y": 2.0}
+    guardar_indice(db, {"bce:BC5335": [nodo]})
+    assert list(db[collection_kegg_genes_nodos].find({})) == [{"_id": "bce:BC5335", "nodos": [nodo]}]
@@ -0,0 +1,64 @@
+# backend/app/tests/test_respuesta_service.py
+
+'''
+# Pruebas de las respuestas sin revalidación (`app.services.respuesta_service`)
+# en el endpoint de grafos:
+#   - Sin `VALIDAR_RESPUESTAS`, el grafo se envía tal cual (en streaming desde
+#     su JSON cacheado), aunque no cumpla el modelo.
+#   - Con `VALIDAR_RESPUESTAS`, la respuesta es la misma para un grafo válido y
+#     un grafo inválido provoca un error de validación.
+'''
+
+import orjson
+import pytest
+from unittest.mock import AsyncMock, patch
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from pydantic import ValidationError
+from app.routers.router_kegg_graph import kegg_graph_router
+
+GRAFO = {
+    "_id": "bce00010",
+    "name": "Glycolysis",
+    "pathwayName": "Glycolysis",
+    "organism_code": "bce",
+    "image_url": None,
+    "nodes": [{"id": "1", "label": "BC_0001", "type": "gene", "x": 10, "y": 20}],
+    "edges": [{"source": "1", "target": "1", "label": "ECrel"}],
+}
+URL = "/pathways_graph/pathways_graph/bce00010"
+
+
+@pytest.fixture
+def cliente():
+    app = FastAPI()
+    app.include_router(kegg_graph_router)
+    return TestClient(app)
+
+
+def _pedir(cliente, grafo, validar, monkeypatch):
+    monkeypatch.setenv("VALIDAR_RESPUESTAS", "1" if validar else "0")
+    with patch("app.services.cache_http_service.obtener_version_dataset", AsyncMock(return_value=1)), \
+            patch("app.routers.router_kegg_graph.obtener_grafo_ruta", AsyncMock(return_value=dict(grafo))), \
+            patch("app.routers.router_kegg_graph.obtener_grafo_ruta_json", AsyncMock(return_value=orjson.dumps(grafo))):
+        return cliente.get(URL)
+
+
+def test_grafo_sin_validar_se_envia_tal_cual(cliente, monkeypatch):
+    respuesta = _pedir(cliente, GRAFO, False, monkeypatch)
+    assert respuesta.status_code == 200
+    assert respuesta.headers["content-type"] == "application/json"
+    assert respuesta.json() == dict(GRAFO, metrics=None)
+
+    # Sin validación no se comprueba la forma: los datos vienen de nuestras proyecciones
+    incompleto = {k: v for k, v in GRAFO.items() if k != "organism_code"}
+    assert _pedir(cliente, incompleto, False, monkeypatch).json() == dict(incompleto, metrics=None)
+
+
+def test_grafo_validado_igual_y_errores_detectados(cliente, monkeypatch):
+    sin_validar = _pedir(cliente, GRAFO, False, monkeypatch).json()
+    assert _pedir(cliente, GRAFO, True, monkeypatch).json() == sin_validar
+
+    incompleto = {k: v for k, v in GRAFO.items() if k != "organism_code"}
+    with pytest.raises(ValidationError):
+        _pedir(cliente, incompleto, True, monkeypatch)
@@ -0,0 +1,51 @@
+# backend/app/tests/test_version_dataset.py
+
+'''
+# Pruebas de la versión del dataset usada en las claves de caché:
+#   - `obtener_version_dataset`: lee el documento `actual`, lo mantiene en
+#     memoria durante el TTL y conserva la última versión si MongoDB falla.
+#   - `clave_cache_grafo`: cambia con la versión.
+'''
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+from pymongo.errors import ServerSelectionTimeoutError
+from app.services import version_dataset_service
+from app.services.version_dataset_service import obtener_version_dataset
+from app.services.kegg_grafo_service import clave_cache_grafo
+
+
+@pytest.fixture(autouse=True)
+def reiniciar_version():
+    version_dataset_service._version = 0
+    version_dataset_service._leida_en = None
+
+
+def _db(find_one):
+    db = MagicMock()
+    db.__getitem__.return_value.find_one = find_one
+    return db
+
+
+@pytest.mark.asyncio
+async def test_version_se_cachea_durante_el_ttl():
+    find_one = AsyncMock(return_value={"_id": "actual", "version": 4})
+    db = _db(find_one)
+
+    assert await obtener_version_dataset(db) == 4
+    assert await obtener_version_dataset(db) == 4
+    find_one.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+@patch.object(version_dataset_service, "DATASET_VERSION_TTL_SEGUNDOS", 0)
+async def test_version_sin_documento_y_con_error():
+    assert await obtener_version_dataset(_db(AsyncMock(return_value=None))) == 0
+
+    await obtener_version_dataset(_db(AsyncMock(return_value={"version": 2})))
+    fallo = AsyncMock(side_effect=ServerSelectionTimeoutError("sin conexión"))
+    assert await obtener_version_dataset(_db(fallo)) == 2
+
+
+def test_clave_cache_grafo_incluye_version():
+    assert clave_cache_grafo("bce00010", version=1) != clave_cache_grafo("bce00010", version=2)
@@ -17,6 +17,8 @@
  * 5. Analizar (parsear) la respuesta exitosa (que se espera sea `KeggPathwayGraphData`) desde FastAPI.
  * 6. Devolver los datos como una respuesta JSON al cliente.
  * 7. Manejar errores de red u otras excepciones durante el proceso.
+ * 8. Reenviar `If-None-Match` a FastAPI y devolver su `ETag` y `Cache-Control`; si FastAPI
+ *    responde `304 Not Modified`, se devuelve 304 al cliente sin cuerpo.
  *
  * @param {NextRequest} request - El objeto de solicitud entrante de Next.js (no se usa directamente su cuerpo en este handler GET, pero es estándar).
  * @param {{ params: { pathwayId: string } }} { params } - Objeto que contiene los parámetros dinámicos de la ruta.
@@ -31,6 +33,17 @@ import { NextRequest, NextResponse } from 'next/server';
 import { KeggPathwayGraphData } from '@/features/kegg/types/keggTypes';
 
 const FASTAPI_URL = process.env.FASTAPI_BASE_URL || 'http://localhost:8000';
+const CABECERAS_CACHE = ['etag', 'cache-control', 'vary'];
+
+// Cabeceras de caché HTTP de la respuesta de FastAPI que se reenvían al cliente
+function cabecerasCache(response: Response): Headers {
+  const headers = new Headers();
+  for (const nombre of CABECERAS_CACHE) {
+    const valor = response.headers.get(nombre);
+    if (valor) headers.set(nombre, valor);
+  }
+  return headers;
+}
 
 export async function GET(
   request: NextRequest,
@@ -63,16 +76,23 @@ export async function GET(
   console.log(`[Next API /pathway_graph] Attempting to fetch pathway graph for ID: ${pathwayId} from URL: ${targetUrl}`);
 
   try {
+    const ifNoneMatch = request.headers.get('if-none-match');
     const fastApiResponse = await fetch(targetUrl, {
       method: 'GET',
       headers: {
         'Accept': 'application/json',
+        ...(ifNoneMatch ? { 'If-None-Match': ifNoneMatch } : {}),
       },
-      // cache: 'no-store', // Considera si lo necesitas para evitar caché
+      cache: 'no-store', // La caché la gestionan el navegador y FastAPI (ETag)
     });
 
     console.log(`[Next API /pathway_graph] FastAPI response status for ${pathwayId}: ${fastApiResponse.status}`);
 
+    if (fastApiResponse.status === 304) {
+      // El cliente ya tiene la versión actual del grafo
+      return new NextResponse(null, { status: 304, headers: cabecerasCache(fastApiResponse) });
+    }
+
     const responseBodyText = await fastApiResponse.text(); // Leer el cuerpo UNA VEZ
 
     if (responseBodyText) {
@@ -125,7 +145,7 @@ export async function GET(
     }
 
     console.log(`[Next API /pathway_graph] Successfully fetched and parsed KeggPathwayGraphData for ${pathwayId}.`);
-    return NextResponse.json(data);
+    return NextResponse.json(data, { headers: cabecerasCache(fastApiResponse) });
 
   } catch (error: any) {
     console.error(`[Next API /pathway_graph] Network or other critical error fetching pathway graph ${pathwayId}:`, error);